@@ -16,32 +16,17 @@ __version__ = "0.1.42"
 __author__ = "Obsidian AI Agent"
 
 
-# Make key classes available at package level
-try:
-    import importlib.util
-
-    importlib.util.find_spec(f"{__name__}.backend")
-    importlib.util.find_spec(f"{__name__}.caching")
-    importlib.util.find_spec(f"{__name__}.embeddings")
-    importlib.util.find_spec(f"{__name__}.llm_router")
-    importlib.util.find_spec(f"{__name__}.modelmanager")
-    importlib.util.find_spec(f"{__name__}.security")
-except ImportError as e:
-    # Handle imports gracefully during testing or when dependencies are missing
-    import logging
-
-    logging.error(f"ImportError in backend.__init__: {e}")
-
-
-# Ensure submodule is accessible as attribute for patching like 'agent.agent.*'
-try:
-    import importlib as _importlib
-    import sys as _sys
-
-    _agent_mod = _importlib.import_module(".backend", __name__)
-    # Expose attribute on package
-    _sys.modules[__name__].backend = _agent_mod
-except Exception as e:
-    import logging
-
-    logging.error(f"Exception in backend.__init__ (submodule import): {e}")
+# Submodules are imported on first attribute access so that importing a
+# single module (``agent.settings``, ``agent.vector_store``, CLI scripts) does
+# not build the FastAPI app; ``agent.backend`` etc. still resolve for patching
+def __getattr__(name):
+    import importlib
+
+    if name.startswith("__"):
+        raise AttributeError(name)
+    try:
+        return importlib.import_module(f"{__name__}.{name}")
+    except ModuleNotFoundError as e:
+        if e.name != f"{__name__}.{name}":
+            raise
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from e
@@ -4,17 +4,35 @@ Handles API key generation, rotation, validation, and storage for secure access
 """
 
 import hashlib
+import logging
 import secrets
 import time
-from typing import Dict, Optional
+from typing import Callable, Dict, List, Optional
 
 from fastapi import HTTPException
 
 # In-memory store for demonstration (replace with persistent storage in production)
 _API_KEYS: Dict[str, Dict] = {}
 
+# Callbacks invoked with the hashed key whenever a key is rotated or deactivated
+_REVOCATION_LISTENERS: List[Callable[[str], None]] = []
+
+
+def _notify_revoked(hashed: str) -> None:
+    for listener in list(_REVOCATION_LISTENERS):
+        try:
+            listener(hashed)
+        except Exception as e:
+            logging.warning(f"API key revocation listener failed: {e}")
+
 
 class APIKeyManager:
+    @staticmethod
+    def add_revocation_listener(listener: Callable[[str], None]) -> None:
+        """Register a callback for key rotation/deactivation (e.g. cache flush)"""
+        if listener not in _REVOCATION_LISTENERS:
+            _REVOCATION_LISTENERS.append(listener)
+
     @staticmethod
     def generate_key() -> str:
         key = secrets.token_urlsafe(32)
@@ -29,6 +47,7 @@ class APIKeyManager:
             raise HTTPException(status_code=401, detail="Invalid or inactive API key")
         # Deactivate old key
         _API_KEYS[old_hashed]["active"] = False
+        _notify_revoked(old_hashed)
         # Generate new key
         return APIKeyManager.generate_key()
 
@@ -42,6 +61,7 @@ class APIKeyManager:
         hashed = hashlib.sha256(key.encode()).hexdigest()
         if hashed in _API_KEYS:
             _API_KEYS[hashed]["active"] = False
+            _notify_revoked(hashed)
 
     @staticmethod
     def get_key_info(key: str) -> Optional[Dict]:
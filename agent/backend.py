@@ -1,6 +1,8 @@
 # agent/backend.py
 
 import asyncio
+import inspect
+import json
 import os
 import os as _os
 import pathlib
@@ -9,13 +11,23 @@ import subprocess
 import sys as _sys
 import sys as _sysmod
 import time
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, contextmanager
 from datetime import datetime, timedelta, timezone
-from typing import List, Optional, Union
+from typing import Any, Dict, List, Optional, Union
 
 # JWT authentication imports
 import jwt
-from fastapi import BackgroundTasks, Depends, FastAPI, HTTPException, Response, status
+from fastapi import (
+    BackgroundTasks,
+    Depends,
+    FastAPI,
+    HTTPException,
+    Request,
+    Response,
+    WebSocket,
+    WebSocketDisconnect,
+    status,
+)
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from pydantic import BaseModel, Field
@@ -33,13 +45,18 @@ from .csrf_middleware import CSRFMiddleware
 from .deps import ensure_minimal_dependencies, optional_ml_hint
 from .embeddings import EmbeddingsManager
 from .enhanced_caching import get_unified_cache_manager
+from .enterprise_tenant import TenantIsolation, current_tenant_id
 from .exception_handlers import RequestTrackingMiddleware, setup_exception_handlers
 from .file_validation import (
+    UPLOAD_CHUNK_SIZE,
     FileValidationError,
+    StreamedUpload,
+    spool_upload,
     validate_base64_audio,
     validate_pdf_path,
 )
 from .indexing import IndexingService, VaultIndexer
+from .lazy_imports import module_available
 from .log_management import router as log_router
 from .logging_framework import (
     LogCategory,
@@ -58,6 +75,7 @@ from .performance import (
     get_connection_pool,
     get_task_queue,
 )
+from .request_profiler import RequestProfilerMiddleware, get_profile_store
 from .security_hardening import (
     SecurityHardeningMiddleware,
     SecurityLevel,
@@ -65,6 +83,10 @@ from .security_hardening import (
 )
 from .security_management import router as security_router
 from .settings import get_settings, reload_settings, update_settings
+from .single_flight import SingleFlight
+from .spans import current_span, get_span_tracer, traced
+from .tenant_resources import TenantResourcePool, open_tenant_resources
+from .token_cache import get_token_cache
 from .utils import is_test_mode, redact_data
 
 # JWT authentication imports
@@ -118,6 +140,27 @@ def create_access_token(
     return jwt.encode(payload, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
 
 
+def _decode_token(token: str) -> dict:
+    """Verify a JWT, reusing cached claims for tokens verified earlier.
+
+    Raises the same ``jwt`` exceptions as ``jwt.decode``; revoked tokens
+    raise ``jwt.InvalidTokenError``.
+    """
+    cache = get_token_cache()
+    if cache.is_revoked(token):
+        raise jwt.InvalidTokenError("Token has been revoked")
+    payload = cache.get_claims(token)
+    if payload is None:
+        payload = jwt.decode(
+            token,
+            JWT_SECRET_KEY,
+            algorithms=[JWT_ALGORITHM],
+            options={"verify_exp": True},  # Verify expiration
+        )
+        cache.put_claims(token, payload)
+    return payload
+
+
 def verify_token(token: str) -> dict:
     """
     Verify and decode a JWT token.
@@ -132,13 +175,7 @@ def verify_token(token: str) -> dict:
         HTTPException: If token is invalid or expired
     """
     try:
-        payload = jwt.decode(
-            token,
-            JWT_SECRET_KEY,
-            algorithms=[JWT_ALGORITHM],
-            options={"verify_exp": True},
-        )
-        return payload
+        return _decode_token(token)
     except jwt.ExpiredSignatureError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -191,13 +228,12 @@ def get_current_user(
         )
 
     try:
-        # Decode and validate JWT token
-        payload = jwt.decode(
-            token,
-            JWT_SECRET_KEY,
-            algorithms=[JWT_ALGORITHM],
-            options={"verify_exp": True},  # Verify expiration
-        )
+        # Decode and validate JWT token (cached after the first verification)
+        payload = _decode_token(token)
+        cache = get_token_cache()
+        cached_user = cache.get_context(token)
+        if cached_user is not None:
+            return dict(cached_user)
 
         # Extract user information from token
         username = payload.get("sub")  # Subject = username
@@ -211,12 +247,14 @@ def get_current_user(
                 headers={"WWW-Authenticate": "Bearer"},
             )
 
-        return {
+        user = {
             "username": username,
             "user_id": user_id,
             "roles": roles,
             "token_exp": payload.get("exp"),
         }
+        cache.put_context(token, user)
+        return dict(user)
 
     except jwt.ExpiredSignatureError:
         raise HTTPException(
@@ -371,8 +409,14 @@ async def lifespan(app: FastAPI):
 
         logging.error(f"Startup error: {e} (continuing to serve OpenAPI schema)")
     yield
-    # Shutdown (if needed)
-    pass
+    # Shutdown: release pooled web connections
+    if vault_indexer is not None and hasattr(vault_indexer, "close_web_fetcher"):
+        try:
+            await vault_indexer.close_web_fetcher()
+        except Exception as e:
+            import logging
+
+            logging.warning(f"Failed to close web fetcher: {e}")
 
 
 app = FastAPI(
@@ -393,6 +437,8 @@ try:
         "format": os.environ.get("LOG_FORMAT", "structured"),
         "include_pii": os.environ.get("LOG_INCLUDE_PII", "false").lower()
         in ("true", "1", "yes"),
+        "async_enabled": os.environ.get("LOG_ASYNC", "false").lower()
+        in ("true", "1", "yes"),
     }
     initialize_logging(log_config)
 
@@ -416,6 +462,21 @@ setup_exception_handlers(app)
 app.add_middleware(RequestTrackingMiddleware)
 
 
+def _can_profile(request: Request) -> bool:
+    """``X-Profile: 1`` is honoured for admins only"""
+    auth_header = request.headers.get("authorization", "")
+    token = auth_header[7:] if auth_header.lower().startswith("bearer ") else None
+    try:
+        user = get_current_user(
+            HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+            if token
+            else None
+        )
+    except HTTPException:
+        return False
+    return "admin" in user.get("roles", [])
+
+
 # Outermost fail-safe middleware to guarantee a response object is returned
 class _FailSafeResponseMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request, call_next):
@@ -542,11 +603,9 @@ except Exception as e:
     print(f"[Enterprise] Warning: Failed to initialize enterprise features: {e}")
     ENTERPRISE_AVAILABLE = False
 
-# Inform about optional ML deps once
-try:
-    import chromadb  # noqa: F401
-    import sentence_transformers  # noqa: F401
-except Exception:
+# Inform about optional ML deps once (located, not imported: that is deferred
+# until the embeddings model is first loaded)
+if not (module_available("chromadb") and module_available("sentence_transformers")):
     print("[deps] " + optional_ml_hint())
 
 # Add rate limiting middleware
@@ -698,6 +757,10 @@ app.add_middleware(_SecurityHeadersEnforcer)
 # Note: This must be added after all other middleware so it wraps the chain
 app.add_middleware(_FailSafeResponseMiddleware)
 
+# Outside the other middleware so their cost shows up in profiles; the
+# RequestTracer request ID is read from the scope once the request is done
+app.add_middleware(RequestProfilerMiddleware, authorize=_can_profile)
+
 # --- Services (lazy-init) ---
 model_manager = None  # will be set to ModelManager instance
 emb_manager = None  # will be set to EmbeddingsManager instance
@@ -705,6 +768,19 @@ vault_indexer = None  # will be set to VaultIndexer instance
 cache_manager = None  # will be set to CacheManager instance
 
 
+# Wall time of each init_services phase (start_server.py --profile-startup)
+init_phase_timings: dict = {}
+
+
+@contextmanager
+def _init_phase(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        init_phase_timings[name] = time.perf_counter() - start
+
+
 def init_services():
     """Initialize global service singletons with performance optimizations.
 
@@ -720,11 +796,13 @@ def init_services():
 
     try:
         # Initialize performance systems
-        _init_performance_systems()
+        with _init_phase("performance_systems"):
+            _init_performance_systems()
 
         # Load env here (not at module import) so tests can patch
         # 1) External env (venv.txt outside repo)
-        _load_external_env()
+        with _init_phase("external_env"):
+            _load_external_env()
 
         # 2) .env in current working directory (optional)
         def safe_init(cls, *args, **kwargs):
@@ -734,47 +812,52 @@ def init_services():
                 print(f"[init_services] Error initializing {cls.__name__}: {e}")
                 return None
 
-        try:
-            from dotenv import load_dotenv
+        with _init_phase("dotenv"):
+            try:
+                from dotenv import load_dotenv
 
-            load_dotenv()
-        except Exception as e:
-            print(f"[init_services] Error loading .env: {e}")
+                load_dotenv()
+            except Exception as e:
+                print(f"[init_services] Error loading .env: {e}")
         # Prefer settings-based initialization; fall back to defaults if it fails
-        try:
-            if hasattr(ModelManager, "from_settings"):
-                model_manager = safe_init(ModelManager.from_settings)
-            else:
+        with _init_phase("model_manager"):
+            try:
+                if hasattr(ModelManager, "from_settings"):
+                    model_manager = safe_init(ModelManager.from_settings)
+                else:
+                    hf_token = os.getenv("HUGGINGFACE_TOKEN")
+                    model_manager = safe_init(ModelManager, hf_token=hf_token)
+            except Exception:
                 hf_token = os.getenv("HUGGINGFACE_TOKEN")
                 model_manager = safe_init(ModelManager, hf_token=hf_token)
-        except Exception:
-            hf_token = os.getenv("HUGGINGFACE_TOKEN")
-            model_manager = safe_init(ModelManager, hf_token=hf_token)
 
-        try:
-            if hasattr(EmbeddingsManager, "from_settings"):
-                emb_manager = safe_init(EmbeddingsManager.from_settings)
-            else:
+        with _init_phase("embeddings"):
+            try:
+                if hasattr(EmbeddingsManager, "from_settings"):
+                    emb_manager = safe_init(EmbeddingsManager.from_settings)
+                else:
+                    db_path = os.getenv("EMBEDDINGS_DB_PATH", "./vector_db")
+                    emb_manager = safe_init(EmbeddingsManager, db_path=db_path)
+            except Exception:
                 db_path = os.getenv("EMBEDDINGS_DB_PATH", "./vector_db")
                 emb_manager = safe_init(EmbeddingsManager, db_path=db_path)
-        except Exception:
-            db_path = os.getenv("EMBEDDINGS_DB_PATH", "./vector_db")
-            emb_manager = safe_init(EmbeddingsManager, db_path=db_path)
 
         # Use IndexingService.from_settings if available, otherwise use VaultIndexer with settings-based cache
-        try:
-            if hasattr(IndexingService, "from_settings"):
-                indexing_service = safe_init(IndexingService.from_settings)
-                vault_indexer = (
-                    indexing_service.vault_indexer if indexing_service else None
-                )
-            else:
+        with _init_phase("vault_indexer"):
+            try:
+                if hasattr(IndexingService, "from_settings"):
+                    indexing_service = safe_init(IndexingService.from_settings)
+                    vault_indexer = (
+                        indexing_service.vault_indexer if indexing_service else None
+                    )
+                else:
+                    vault_indexer = safe_init(VaultIndexer, emb_mgr=emb_manager)
+            except Exception:
                 vault_indexer = safe_init(VaultIndexer, emb_mgr=emb_manager)
-        except Exception:
-            vault_indexer = safe_init(VaultIndexer, emb_mgr=emb_manager)
 
-        cache_dir = os.getenv("CACHE_DIR", "./agent/cache")
-        cache_manager = safe_init(CacheManager, cache_dir)
+        with _init_phase("cache_manager"):
+            cache_dir = os.getenv("CACHE_DIR", "./agent/cache")
+            cache_manager = safe_init(CacheManager, cache_dir)
     except Exception as e:
         import logging
 
@@ -851,6 +934,16 @@ async def _app_startup():
                 f"[startup] Non-fatal error in init_services: {e} (server will continue to serve OpenAPI schema)"
             )
 
+    # Resume indexing jobs interrupted by a previous shutdown or crash
+    try:
+        jobs_db = os.getenv("JOBS_DB_PATH") or str(
+            get_settings().abs_cache_dir / "jobs.db"
+        )
+        if os.path.exists(jobs_db):
+            await _get_job_manager()
+    except Exception as e:
+        print(f"[startup] Warning: failed to resume background jobs: {e}")
+
     # Fallback: If no models are loaded, warn but do NOT exit or shutdown
     global model_manager
     if (
@@ -936,6 +1029,11 @@ class WebRequest(BaseModel):
     question: Optional[str] = None
 
 
+class WebBatchRequest(BaseModel):
+    urls: List[str]
+    force: bool = False
+
+
 class TranscribeRequest(BaseModel):
     audio_data: str  # Base64 encoded audio
     format: str = "webm"  # Audio format
@@ -1293,6 +1391,45 @@ async def verify_current_token(current_user: dict = Depends(get_current_user)):
     }
 
 
+@app.post("/api/auth/logout")
+async def logout(
+    credentials: HTTPAuthorizationCredentials | None = _security_dependency,
+):
+    """
+    Revoke the presented JWT until it expires.
+
+    Cached verifications are dropped immediately, so the token is rejected
+    on the next request even though its signature is still valid.
+    """
+    if credentials is None or not credentials.credentials:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Missing authentication token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    token = credentials.credentials
+    try:
+        claims = jwt.decode(
+            token,
+            JWT_SECRET_KEY,
+            algorithms=[JWT_ALGORITHM],
+            options={"verify_exp": False},
+        )
+    except jwt.InvalidTokenError as err:
+        # Only tokens we issued are worth remembering as revoked
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication token",
+            headers={"WWW-Authenticate": "Bearer"},
+        ) from err
+    get_token_cache().revoke_token(token, claims)
+    return {
+        "message": "Successfully logged out",
+        "logged_out_at": datetime.now(timezone.utc).isoformat(),
+        "status": "success",
+    }
+
+
 # ============================================================================
 # CONFIGURATION ENDPOINTS
 # ============================================================================
@@ -1340,8 +1477,8 @@ class ConfigUpdateRequest(BaseModel):
     )
     vector_db: Optional[str] = Field(
         None,
-        pattern="^(chroma|faiss)$",
-        description="Vector database (chroma or faiss)",
+        pattern="^(chroma|faiss|numpy)$",
+        description="Vector database (chroma, faiss or numpy)",
     )
     gpu: Optional[bool] = Field(None, description="Enable GPU acceleration")
 
@@ -1481,7 +1618,39 @@ async def post_update_config(request: ConfigUpdateRequest):
         raise
 
 
-def _ask_impl(request: AskRequest):
+_tenant_pool: Optional[TenantResourcePool] = None
+
+
+def _get_tenant_pool() -> Optional[TenantResourcePool]:
+    """Per-tenant collections/caches, available when enterprise is enabled"""
+    global _tenant_pool
+    integration = globals().get("enterprise_integration")
+    if _tenant_pool is None and integration is not None:
+        isolation = TenantIsolation(integration.tenant_manager)
+        _tenant_pool = TenantResourcePool(
+            isolation.get_tenant_cache_path,
+            factory=lambda tenant_id, path: open_tenant_resources(
+                tenant_id, path, shared_model=getattr(emb_manager, "model", None)
+            ),
+            max_open=int(os.getenv("TENANT_POOL_SIZE", "8")),
+        )
+    return _tenant_pool
+
+
+@contextmanager
+def _tenant_scope():
+    """Yield the current tenant's resources, or None for the global services"""
+    tenant_id = current_tenant_id.get()
+    pool = _get_tenant_pool() if tenant_id else None
+    if pool is None:
+        yield None
+        return
+    with pool.lease(tenant_id) as resources:
+        yield resources
+
+
+@traced("ask")
+def _ask_impl(request: AskRequest, tenant=None):
     from .error_handling import (
         ConfigurationError,
         ModelError,
@@ -1492,6 +1661,14 @@ def _ask_impl(request: AskRequest):
     with error_context("ask_implementation", reraise=False):
         # Log the request start
         request_logger = get_logger("backend.api.ask", LogCategory.API)
+        span = current_span()
+        span.set_attributes(
+            {
+                "ask.question_chars": len(request.question or ""),
+                "ask.max_tokens": request.max_tokens,
+                "ask.tenant": tenant is not None,
+            }
+        )
         with performance_timer("ask_request_processing"):
             request_logger.info(
                 "Processing ask request",
@@ -1516,11 +1693,23 @@ def _ask_impl(request: AskRequest):
                     suggestion="Please check your model configuration and ensure models are properly installed",
                 )
 
-            # Use the enhanced unified cache manager
+            # Use the tenant's own answer cache, else the unified cache manager
             unified_cache = get_unified_cache_manager()
             cache_key = f"ask:{hash((request.question, request.model_name, request.max_tokens, request.prefer_fast))}"
-
-            cached_result = unified_cache.get(cache_key)
+            if tenant is not None:
+                cache_key = "\x00".join(
+                    str(part)
+                    for part in (
+                        request.question,
+                        request.model_name,
+                        request.max_tokens,
+                        request.prefer_fast,
+                    )
+                )
+                cached_result = tenant.answers.get_cached_answer(cache_key)
+            else:
+                cached_result = unified_cache.get(cache_key)
+            span.set_attribute("ask.cache_hit", cached_result is not None)
             if cached_result is not None:
                 request_logger.info(
                     "Returning cached result",
@@ -1532,7 +1721,7 @@ def _ask_impl(request: AskRequest):
                 return {
                     "answer": cached_result,
                     "cached": True,
-                    "cache_level": "unified",
+                    "cache_level": "tenant" if tenant is not None else "unified",
                     "model": request.model_name,
                 }
 
@@ -1552,11 +1741,15 @@ def _ask_impl(request: AskRequest):
                 # Get context from .embeddings if use_context is True
                 context_text = ""
                 use_context = getattr(request, "use_context", False)
-                if use_context and emb_manager and hasattr(request, "question"):
+                embeddings = tenant.embeddings if tenant is not None else emb_manager
+                if use_context and embeddings and hasattr(request, "question"):
                     with performance_timer("embedding_search"):
-                        search_results = emb_manager.search(
+                        search_results = embeddings.search(
                             request.question, top_k=get_settings().top_k
                         )
+                        span.set_attribute(
+                            "ask.context_chunks", len(search_results or [])
+                        )
                         if search_results:
                             context_text = "\n".join(
                                 [hit["text"] for hit in search_results]
@@ -1633,7 +1826,10 @@ def _ask_impl(request: AskRequest):
                 ) from err
 
             # Cache the result
-            unified_cache.set(cache_key, answer, ttl=3600)  # Cache for 1 hour
+            if tenant is not None:
+                tenant.answers.store_answer(cache_key, answer)
+            else:
+                unified_cache.set(cache_key, answer, ttl=3600)  # Cache for 1 hour
             request_logger.info("Answer cached successfully")
 
             # Log successful completion
@@ -1655,6 +1851,18 @@ def _ask_impl(request: AskRequest):
             }
 
 
+# Identical questions asked at the same time share one retrieval + generation
+_ask_flights = SingleFlight()
+
+
+async def _ask_coalesced(request: AskRequest, tenant=None):
+    """``_ask_impl`` off the event loop, run once for identical concurrent asks"""
+    key = (current_tenant_id.get(), request.model_dump_json())
+    return await _ask_flights.do_async(
+        key, asyncio.to_thread, _ask_impl, request, tenant
+    )
+
+
 @app.post("/api/ask", dependencies=[Depends(require_role("user"))])
 async def api_ask(request: AskRequest):
     api_logger = get_logger("backend.api.ask_endpoint", LogCategory.API)
@@ -1663,7 +1871,8 @@ async def api_ask(request: AskRequest):
             "API ask request received",
             extra={"endpoint": "/api/ask", "request_id": req_id},
         )
-        result = _ask_impl(request)
+        with _tenant_scope() as tenant:
+            result = await _ask_coalesced(request, tenant)
         api_logger.info(
             "API ask request completed",
             extra={"endpoint": "/api/ask", "request_id": req_id},
@@ -1678,7 +1887,8 @@ async def ask(request: AskRequest):
         api_logger.info(
             "Ask request received", extra={"endpoint": "/ask", "request_id": req_id}
         )
-        result = _ask_impl(request)
+        with _tenant_scope() as tenant:
+            result = await _ask_coalesced(request, tenant)
         api_logger.info(
             "Ask request completed", extra={"endpoint": "/ask", "request_id": req_id}
         )
@@ -1691,9 +1901,13 @@ class ScanVaultRequest(BaseModel):
 
 
 @app.post("/api/scan_vault", dependencies=[Depends(require_role("admin"))])
-async def scan_vault(request: Union[ScanVaultRequest, str]):
+async def scan_vault(request: Union[ScanVaultRequest, str], background: bool = False):
     from .error_handling import ConfigurationError, ValidationError, error_context
 
+    if background:
+        vault_path = request if isinstance(request, str) else request.vault_path
+        return await _submit_job("scan_vault", vault_path)
+
     with error_context("scan_vault", reraise=False):
         if vault_indexer is None:
             init_services()
@@ -1716,7 +1930,9 @@ async def scan_vault(request: Union[ScanVaultRequest, str]):
 
         try:
             # Let the indexer decide how to handle path issues; wrap and surface as 500 on failure
-            indexed = vault_indexer.index_vault(vault_path)
+            with _tenant_scope() as tenant:
+                indexer = tenant.indexer if tenant is not None else vault_indexer
+                indexed = indexer.index_vault(vault_path)
             return {"indexed_files": indexed}
         except HTTPException:
             # Bubble up explicit HTTP errors unchanged
@@ -1740,7 +1956,11 @@ async def api_web(request: WebRequest):
             status_code=503, detail="Indexing service is not available."
         )
 
-    content = vault_indexer.fetch_web_page(request.url)
+    fetch_async = getattr(vault_indexer, "fetch_web_page_async", None)
+    if inspect.iscoroutinefunction(fetch_async):
+        content = await fetch_async(request.url)
+    else:
+        content = vault_indexer.fetch_web_page(request.url)
     if not content:
         raise HTTPException(
             status_code=400,
@@ -1758,19 +1978,44 @@ async def web(request: WebRequest):
     return await api_web(request)
 
 
+@app.post("/api/web/batch", dependencies=[Depends(require_role("admin"))])
+async def api_web_batch(request: WebBatchRequest):
+    """Fetch and index several URLs concurrently over the pooled web fetcher."""
+    if vault_indexer is None:
+        init_services()
+    if not vault_indexer:
+        raise HTTPException(
+            status_code=503, detail="Indexing service is not available."
+        )
+    if len(request.urls) > 100:
+        raise HTTPException(status_code=400, detail="At most 100 URLs per batch")
+
+    with _tenant_scope() as tenant:
+        indexer = tenant.indexer if tenant else vault_indexer
+        results = await indexer.index_web_pages(request.urls, force=request.force)
+    return {
+        "results": results,
+        "indexed": sum(1 for chunks in results.values() if chunks),
+        "failed": [url for url, chunks in results.items() if not chunks],
+    }
+
+
 @app.post("/api/reindex", dependencies=[Depends(require_role("admin"))])
-async def api_reindex(request: ReindexRequest):
+async def api_reindex(request: ReindexRequest, background: bool = False):
+    if background:
+        return await _submit_job("reindex", request.vault_path)
     # Return what the indexer reports; tests stub this
     if vault_indexer is None:
         init_services()
-    return vault_indexer.reindex(request.vault_path)
+    # A tenant's reindex only clears that tenant's collection
+    with _tenant_scope() as tenant:
+        indexer = tenant.indexer if tenant is not None else vault_indexer
+        return indexer.reindex(request.vault_path)
 
 
 @app.post("/reindex", dependencies=[Depends(require_role("admin"))])
 async def reindex(request: ReindexRequest):
-    if vault_indexer is None:
-        init_services()
-    return vault_indexer.reindex(request.vault_path)
+    return await api_reindex(request)
 
 
 @app.post("/transcribe", dependencies=[Depends(require_role("user"))])
@@ -1792,10 +2037,6 @@ async def transcribe_audio(request: TranscribeRequest):
         if validation_result.get("warnings"):
             print(f"Audio validation warnings: {validation_result['warnings']}")
 
-        import base64
-
-        # Decode base64 audio data (already validated)
-        base64.b64decode(request.audio_data)
         # Load Vosk model for transcription
         # Always return placeholder for transcription regardless of Vosk availability
         transcription = "Server-side speech recognition not yet implemented"
@@ -1850,7 +2091,9 @@ async def api_voice_transcribe(request: TranscribeRequest):
     """
     try:
         # Validate audio data before processing
-        validation_result = validate_base64_audio(request.audio_data)
+        validation_result = validate_base64_audio(
+            request.audio_data, include_bytes=True
+        )
         if not validation_result["valid"]:
             raise HTTPException(
                 status_code=400,
@@ -1861,22 +2104,25 @@ async def api_voice_transcribe(request: TranscribeRequest):
         if validation_result.get("warnings"):
             print(f"Audio validation warnings: {validation_result['warnings']}")
 
-        import base64
-
-        # Decode base64 audio data (already validated)
-        audio_bytes = base64.b64decode(request.audio_data)
-
-        # Attempt to use Vosk for transcription if available
+        # Use the pooled Vosk service when a model is loaded (WAV input only)
+        started = time.perf_counter()
         transcription = "Server-side speech recognition not yet implemented"
         confidence = 0.0
         status = "placeholder"
+        model_name = "vosk-placeholder"
+
+        service = _get_transcription_service()
+        if service is not None and service.available:
+            import io
 
-        # TODO: Implement actual Vosk transcription when model is available
-        # from .voice import transcribe_audio as vosk_transcribe
-        # result = vosk_transcribe(audio_bytes, request.language)
-        # transcription = result["text"]
-        # confidence = result["confidence"]
-        # status = "success"
+            audio_bytes = validation_result["audio_bytes"]
+            if audio_bytes[:4] == b"RIFF" and audio_bytes[8:12] == b"WAVE":
+                result = await _transcribe_with_service(
+                    service, io.BytesIO(audio_bytes)
+                )
+                transcription = result["transcription"]
+                status = "success"
+                model_name = "vosk"
 
         return {
             "success": True,
@@ -1885,7 +2131,7 @@ async def api_voice_transcribe(request: TranscribeRequest):
             "status": status,
             "audio_info": {
                 "size_mb": round(validation_result["size_mb"], 2),
-                "size_bytes": len(audio_bytes),
+                "size_bytes": validation_result["size_bytes"],
                 "type": validation_result["file_type"],
                 "format": request.format,
                 "language": request.language,
@@ -1894,8 +2140,8 @@ async def api_voice_transcribe(request: TranscribeRequest):
             },
             "metadata": {
                 "endpoint_version": "v1",
-                "processing_time_ms": 0,  # TODO: Add actual timing
-                "model": "vosk-placeholder",
+                "processing_time_ms": round((time.perf_counter() - started) * 1000),
+                "model": model_name,
             },
         }
 
@@ -1911,6 +2157,454 @@ async def api_voice_transcribe(request: TranscribeRequest):
         ) from err
 
 
+# ----------------------
+# Background Jobs
+# ----------------------
+
+_job_manager = None
+
+
+@contextmanager
+def _job_indexer(tenant_id: Optional[str] = None):
+    """A job's indexer: its tenant's own (leased for the whole run) or the global one"""
+    if tenant_id:
+        pool = _get_tenant_pool()
+        if pool is None:
+            raise RuntimeError(f"Resources for tenant {tenant_id} are not available")
+        with pool.lease(tenant_id) as resources:
+            yield resources.indexer
+        return
+    if vault_indexer is None:
+        init_services()
+    yield vault_indexer
+
+
+def _job_tenant() -> Optional[str]:
+    """Tenant that jobs submitted or viewed by this request belong to"""
+    tenant_id = current_tenant_id.get()
+    return tenant_id if tenant_id and _get_tenant_pool() is not None else None
+
+
+async def _get_job_manager():
+    """Shared JobManager; interrupted jobs are resumed on first use"""
+    global _job_manager
+    if _job_manager is None:
+        from .jobs import JobManager, JobStore
+
+        db_path = os.getenv("JOBS_DB_PATH") or str(
+            get_settings().abs_cache_dir / "jobs.db"
+        )
+        _job_manager = JobManager(_job_indexer, JobStore(db_path))
+        await _job_manager.recover()
+    return _job_manager
+
+
+async def _submit_job(kind: str, target: str) -> dict:
+    if not target or not str(target).strip():
+        raise HTTPException(status_code=400, detail="Job target cannot be empty")
+    manager = await _get_job_manager()
+    job, created = await manager.submit(kind, target, tenant_id=_job_tenant())
+    return {"job": job, "deduplicated": not created}
+
+
+async def _get_own_job(job_id: str) -> dict:
+    """A job of the caller's tenant; other tenants' jobs are reported missing"""
+    manager = await _get_job_manager()
+    job = manager.get(job_id)
+    if job is None or job["tenant_id"] != _job_tenant():
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+class JobRequest(BaseModel):
+    kind: str = Field(..., description="One of: reindex, scan_vault, index_pdf")
+    target: str = Field(..., description="Vault directory or PDF path")
+
+
+@app.post(
+    "/api/jobs", status_code=202, dependencies=[Depends(require_role("admin"))]
+)
+async def create_job(request: JobRequest):
+    """Queue an indexing job; returns the existing job if one is active"""
+    from .jobs import JOB_KINDS
+
+    if request.kind not in JOB_KINDS:
+        raise HTTPException(
+            status_code=400, detail=f"kind must be one of {', '.join(JOB_KINDS)}"
+        )
+    return await _submit_job(request.kind, request.target)
+
+
+@app.get("/api/jobs", dependencies=[Depends(require_role("admin"))])
+async def list_jobs(status: Optional[str] = None, limit: int = 50):
+    manager = await _get_job_manager()
+    jobs = manager.list_jobs(
+        status=status, limit=min(max(limit, 1), 500), tenant_id=_job_tenant()
+    )
+    return {"jobs": jobs}
+
+
+@app.get("/api/jobs/{job_id}", dependencies=[Depends(require_role("admin"))])
+async def get_job(job_id: str):
+    return await _get_own_job(job_id)
+
+
+@app.post("/api/jobs/{job_id}/cancel", dependencies=[Depends(require_role("admin"))])
+async def cancel_job(job_id: str):
+    await _get_own_job(job_id)
+    job = await (await _get_job_manager()).cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.post("/api/jobs/{job_id}/resume", dependencies=[Depends(require_role("admin"))])
+async def resume_job(job_id: str):
+    await _get_own_job(job_id)
+    try:
+        job = await (await _get_job_manager()).resume(job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+# ----------------------
+# Pooled Voice Transcription
+# ----------------------
+
+
+def _get_transcription_service():
+    """Shared Vosk transcription service, or None if voice support is missing"""
+    try:
+        from .voice import get_transcription_service
+    except Exception:  # pragma: no cover - optional dependency
+        return None
+    return get_transcription_service()
+
+
+async def _transcribe_with_service(service, source) -> dict:
+    """Run pooled transcription, mapping failures to HTTP errors"""
+    from .voice import TranscriberBusyError
+
+    try:
+        result = await service.transcribe(source)
+    except TranscriberBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e)) from e
+    if "error" in result:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return result
+
+
+@app.websocket("/ws/voice_transcribe")
+async def ws_voice_transcribe(websocket: WebSocket):
+    """
+    Stream 16-bit mono PCM and receive partial results as JSON messages.
+
+    Authenticate with a bearer token in the ``Authorization`` header or the
+    ``token`` query parameter; pass ``sample_rate`` (8000 or 16000) as a
+    query parameter. Send binary frames of PCM, then the text frame
+    ``{"eof": true}`` to receive the final transcript.
+    """
+    token = websocket.query_params.get("token")
+    auth_header = websocket.headers.get("authorization", "")
+    if not token and auth_header.lower().startswith("bearer "):
+        token = auth_header[7:]
+    try:
+        get_current_user(
+            HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+            if token
+            else None
+        )
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    service = _get_transcription_service()
+    if service is None or not service.available:
+        await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
+        return
+
+    try:
+        sample_rate = int(websocket.query_params.get("sample_rate", "16000"))
+        stream = service.open_stream(sample_rate)
+    except ValueError:
+        await websocket.close(code=status.WS_1003_UNSUPPORTED_DATA)
+        return
+
+    await websocket.accept()
+    try:
+        async with stream:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    return
+                if message.get("bytes"):
+                    await websocket.send_json(await stream.accept(message["bytes"]))
+                elif message.get("text") is not None:
+                    try:
+                        eof = json.loads(message["text"]).get("eof")
+                    except (ValueError, AttributeError):
+                        eof = False
+                    if eof:
+                        await websocket.send_json(await stream.finish())
+                        await websocket.close()
+                        return
+    except WebSocketDisconnect:
+        return
+    except Exception as err:
+        from .voice import TranscriberBusyError
+
+        busy = isinstance(err, TranscriberBusyError)
+        if not busy:
+            service.metrics.increment("errors")
+        code = (
+            status.WS_1013_TRY_AGAIN_LATER if busy else status.WS_1011_INTERNAL_ERROR
+        )
+        await websocket.close(code=code)
+
+
+# ----------------------
+# Streaming Uploads
+# ----------------------
+
+
+class _MultipartFilePart:
+    """Parser callbacks collecting the ``file`` part of a multipart body"""
+
+    def __init__(self, parse_options_header):
+        self._parse_options_header = parse_options_header
+        self.chunks: List[bytes] = []
+        self.found = False
+        self.done = False
+        self._in_file = False
+        self._field = b""
+        self._value = b""
+
+    def callbacks(self) -> Dict[str, Any]:
+        return {
+            "on_part_begin": self._part_begin,
+            "on_header_field": self._header_field,
+            "on_header_value": self._header_value,
+            "on_header_end": self._header_end,
+            "on_part_data": self._part_data,
+            "on_part_end": self._part_end,
+        }
+
+    def take(self) -> List[bytes]:
+        chunks, self.chunks = self.chunks, []
+        return chunks
+
+    def _part_begin(self):
+        self._in_file = False
+
+    def _header_field(self, data: bytes, start: int, end: int):
+        self._field += data[start:end]
+
+    def _header_value(self, data: bytes, start: int, end: int):
+        self._value += data[start:end]
+
+    def _header_end(self):
+        if self._field.lower() == b"content-disposition" and not self.found:
+            _, options = self._parse_options_header(self._value)
+            self._in_file = self.found = options.get(b"name") == b"file"
+        self._field = self._value = b""
+
+    def _part_data(self, data: bytes, start: int, end: int):
+        if self._in_file:
+            self.chunks.append(data[start:end])
+
+    def _part_end(self):
+        if self._in_file:
+            self._in_file = False
+            self.done = True
+
+
+async def _multipart_file_chunks(request: Request, content_type: str):
+    """Yield the ``file`` field of a multipart body as it comes off the socket"""
+    try:
+        from python_multipart.multipart import (
+            MultipartParseError,
+            MultipartParser,
+            parse_options_header,
+        )
+    except ImportError:  # python-multipart < 0.0.13
+        from multipart.multipart import (
+            MultipartParseError,
+            MultipartParser,
+            parse_options_header,
+        )
+
+    boundary = parse_options_header(content_type)[1].get(b"boundary")
+    if not boundary:
+        raise HTTPException(status_code=400, detail="Missing multipart boundary")
+    part = _MultipartFilePart(parse_options_header)
+    parser = MultipartParser(boundary, part.callbacks())
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            for data in part.take():
+                yield data
+            if part.done:
+                return
+        parser.finalize()
+    except MultipartParseError as e:
+        raise HTTPException(status_code=400, detail="Malformed multipart body") from e
+    for data in part.take():
+        yield data
+    if not part.found:
+        raise HTTPException(status_code=400, detail="Missing 'file' form field")
+
+
+async def _upload_chunks(request: Request):
+    """Yield the uploaded file in chunks from a raw or multipart request body.
+
+    Raw bodies (``application/octet-stream``, ``audio/*``, ``application/pdf``)
+    are read straight off the socket; multipart uploads are parsed as they
+    arrive and only the ``file`` field is passed on, so the size cap and the
+    magic-byte check apply before the rest of the body is read.
+    """
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        async for chunk in _multipart_file_chunks(request, content_type):
+            yield chunk
+    else:
+        async for chunk in request.stream():
+            yield chunk
+
+
+def _upload_filename(request: Request, default: str) -> str:
+    return request.headers.get("x-filename") or request.query_params.get(
+        "filename", default
+    )
+
+
+async def _spool_request(
+    request: Request, file_type: str, filename: str, **kwargs
+) -> StreamedUpload:
+    """Spool a streamed upload, mapping validation failures to HTTP errors"""
+    declared = request.headers.get("content-length")
+    limit_mb = kwargs.get("max_size_mb")
+    if declared and declared.isdigit() and limit_mb:
+        if int(declared) > limit_mb * 1024 * 1024 + UPLOAD_CHUNK_SIZE:
+            raise HTTPException(status_code=413, detail="Upload too large")
+    try:
+        return await spool_upload(
+            _upload_chunks(request), file_type, filename, **kwargs
+        )
+    except FileValidationError as e:
+        code = 413 if str(e).startswith("File too large") else 400
+        raise HTTPException(
+            status_code=code, detail=f"File validation failed: {str(e)}"
+        ) from e
+
+
+@app.post(
+    "/api/voice_transcribe/stream", dependencies=[Depends(require_role("user"))]
+)
+async def api_voice_transcribe_stream(request: Request):
+    """
+    Streaming voice transcription endpoint.
+
+    Accepts the recording as a raw request body or a multipart ``file`` field,
+    validates magic bytes from the first chunk, hashes while reading and
+    spools to a temporary file, so peak memory stays constant regardless of
+    the recording length. WAV recordings are handed to the Vosk transcriber
+    as a file handle when a model is loaded.
+    """
+    started = time.perf_counter()
+    s = get_settings()
+    upload = await _spool_request(
+        request,
+        "audio",
+        _upload_filename(request, "audio.wav"),
+        max_size_mb=s.audio_max_size_mb,
+    )
+    try:
+        transcription = "Server-side speech recognition not yet implemented"
+        status_text = "placeholder"
+        model_name = "vosk-placeholder"
+
+        header = upload.file.read(12)
+        upload.file.seek(0)
+        is_wav = header[:4] == b"RIFF" and header[8:12] == b"WAVE"
+        service = _get_transcription_service()
+        if service is not None and service.available and is_wav:
+            result = await _transcribe_with_service(service, upload.file)
+            transcription = result["transcription"]
+            status_text = "success"
+            model_name = "vosk"
+
+        return {
+            "success": True,
+            "transcription": transcription,
+            "confidence": 0.0,
+            "status": status_text,
+            "audio_info": {
+                "size_mb": round(upload.size_mb, 2),
+                "size_bytes": upload.size_bytes,
+                "type": upload.file_type,
+                "filename": upload.filename,
+                "hash": upload.hash_sha256[:16] + "...",
+                "warnings": upload.warnings,
+            },
+            "metadata": {
+                "endpoint_version": "v1",
+                "processing_time_ms": round((time.perf_counter() - started) * 1000),
+                "model": model_name,
+                "streamed": True,
+            },
+        }
+    finally:
+        upload.close()
+
+
+@app.post("/api/upload/pdf", dependencies=[Depends(require_role("admin"))])
+async def api_upload_pdf(request: Request):
+    """
+    Stream a PDF upload to disk and index it.
+
+    The body is validated and hashed incrementally and written under
+    ``<cache_dir>/uploads/<sha256>.pdf`` (the tenant's own storage when the
+    request is tenant-scoped); re-uploading the same document reuses the
+    stored copy.
+    """
+    s = get_settings()
+    with _tenant_scope() as tenant:
+        if tenant is not None and tenant.base_path:
+            upload_dir = pathlib.Path(tenant.base_path) / "uploads"
+        else:
+            upload_dir = s.abs_cache_dir / "uploads"
+        upload = await _spool_request(
+            request,
+            "pdf",
+            _upload_filename(request, "document.pdf"),
+            max_size_mb=s.pdf_max_size_mb,
+            spool_dir=str(upload_dir),
+        )
+        target = upload_dir / f"{upload.hash_sha256}.pdf"
+        try:
+            upload.file.close()  # Windows cannot rename a file that is still open
+            os.replace(upload.path, target)
+        finally:
+            upload.close(delete=True)
+
+        if tenant is None and vault_indexer is None:
+            init_services()
+        indexer = tenant.indexer if tenant is not None else vault_indexer
+        if not indexer:
+            raise HTTPException(
+                status_code=503, detail="Indexing service is not available."
+            )
+        chunks = await asyncio.to_thread(indexer.index_pdf, str(target))
+    return {
+        "success": True,
+        "chunks_indexed": chunks,
+        "file_info": {**upload.to_dict(), "stored_path": str(target)},
+    }
+
+
 # ----------------------
 # Enterprise Authentication Endpoints
 # ----------------------
@@ -2019,6 +2713,18 @@ async def enterprise_sso_callback(
         ) from e
 
 
+async def _enterprise_token_claims(token: str) -> Optional[Dict[str, Any]]:
+    """Claims of an enterprise token whose signature verifies, else None"""
+    claims = get_token_cache().get_claims(token, verifier="enterprise")
+    if claims is None:
+        try:
+            claims = await enterprise_integration.sso_manager.verify_jwt_token(token)
+        except Exception as e:
+            app_logger.debug(f"Enterprise token verification failed: {e}")
+            return None
+    return claims or None
+
+
 @app.post("/api/enterprise/auth/logout")
 async def enterprise_logout(token: str = None):
     """
@@ -2026,12 +2732,14 @@ async def enterprise_logout(token: str = None):
     """
     if not ENTERPRISE_AVAILABLE:
         raise HTTPException(status_code=404, detail="Enterprise features not available")
+    claims = await _enterprise_token_claims(token) if token else None
+    if claims is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token"
+        )
     try:
-        # In a real implementation, you would:
-        # 1. Validate the JWT token
-        # 2. Add token to blacklist
-        # 3. Clear any session data
-        # 4. Optionally redirect to SSO provider logout
+        # Revoke the token so cached verifications stop accepting it
+        get_token_cache().revoke_token(token, claims)
         return {
             "message": "Successfully logged out",
             "logged_out_at": datetime.now(timezone.utc).isoformat(),
@@ -2090,7 +2798,11 @@ async def search(query: str, top_k: int = 5):
     if emb_manager is None:
         init_services()
     try:
-        hits = emb_manager.search(query, top_k=top_k)
+        # Only the caller's tenant collection is searched
+        with _tenant_scope() as tenant:
+            embeddings = tenant.embeddings if tenant is not None else emb_manager
+            # Off the event loop so concurrent searches can be batched
+            hits = await asyncio.to_thread(embeddings.search, query, top_k=top_k)
         return {"results": hits}
     except Exception as err:
         raise HTTPException(
@@ -2099,8 +2811,8 @@ async def search(query: str, top_k: int = 5):
 
 
 @app.post("/api/index_pdf", dependencies=[Depends(require_role("admin"))])
-async def index_pdf(pdf_path: str):
-    if vault_indexer is None:
+async def index_pdf(pdf_path: str, background: bool = False):
+    if vault_indexer is None and not background:
         init_services()
     try:
         # Validate PDF file before indexing
@@ -2116,7 +2828,11 @@ async def index_pdf(pdf_path: str):
             print(
                 f"PDF validation warnings for {pdf_path}: {validation_result['warnings']}"
             )
-        count = vault_indexer.index_pdf(pdf_path)
+        if background:
+            return await _submit_job("index_pdf", pdf_path)
+        with _tenant_scope() as tenant:
+            indexer = tenant.indexer if tenant is not None else vault_indexer
+            count = indexer.index_pdf(pdf_path)
         return {
             "chunks_indexed": count,
             "file_info": {
@@ -2413,6 +3129,75 @@ async def get_performance_trends(hours: int = 24):
         ) from err
 
 
+@app.get(
+    "/api/performance/profiles", dependencies=[Depends(require_role("admin"))]
+)
+async def list_request_profiles(limit: int = 50):
+    """Stored per-request profiles (send ``X-Profile: 1`` as an admin to record)"""
+    profiles = get_profile_store().list(limit=limit)
+    return {
+        "status": "success",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "count": len(profiles),
+        "profiles": profiles,
+    }
+
+
+@app.get(
+    "/api/performance/profiles/{profile_id}",
+    dependencies=[Depends(require_role("admin"))],
+)
+async def get_request_profile(profile_id: str, format: str = "speedscope"):
+    """One profile as speedscope JSON or collapsed stacks (``format=collapsed``)"""
+    if format not in ("speedscope", "collapsed"):
+        raise HTTPException(
+            status_code=400, detail="format must be speedscope or collapsed"
+        )
+    path = get_profile_store().path(profile_id, format)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    media_type = "text/plain" if format == "collapsed" else "application/json"
+    return Response(content=path.read_bytes(), media_type=media_type)
+
+
+@app.get("/api/performance/traces", dependencies=[Depends(require_role("admin"))])
+async def list_span_traces(limit: int = 20):
+    """Recent request traces with the time spent in each phase"""
+    tracer = get_span_tracer()
+    traces = tracer.recent(limit=limit)
+    return {
+        "status": "success",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "count": len(traces),
+        "stats": dict(tracer.stats),
+        "traces": traces,
+    }
+
+
+@app.get(
+    "/api/performance/traces/{trace_id}",
+    dependencies=[Depends(require_role("admin"))],
+)
+async def get_span_trace(trace_id: str):
+    """One trace as OTLP-JSON"""
+    tracer = get_span_tracer()
+    if not tracer.get_trace(trace_id):
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return tracer.to_otlp([trace_id])
+
+
+@app.post(
+    "/api/performance/traces/export",
+    dependencies=[Depends(require_role("admin"))],
+)
+async def export_span_traces():
+    """Write the buffered traces to ``<log_dir>/traces`` as an OTLP-JSON file"""
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    path = get_settings().abs_log_dir / "traces" / f"otlp-{stamp}.json"
+    spans = await asyncio.to_thread(get_span_tracer().export_otlp, str(path))
+    return {"status": "success", "path": str(path), "spans": spans}
+
+
 @app.get("/api/performance/tracing/summary")
 async def get_tracing_summary():
     """Get request tracing summary with slow requests and endpoint stats"""
@@ -0,0 +1,475 @@
+"""
+HTTP Load Benchmark
+Boots the FastAPI ``app`` in-process with stand-in models and drives a mix of
+``/api/ask``, ``/api/search``, ``/api/reindex`` and ``/health`` traffic at a
+fixed concurrency. No model files, GPU or network are needed, so middleware,
+cache and router changes can be measured on any machine.
+
+- Embeddings: the real ``EmbeddingsManager`` with a hashing embedder in place
+  of SentenceTransformers and the in-process NumPy store in place of Chroma
+- LLM: ``ModelManager`` with a router that returns deterministic tokens after
+  a fixed latency (``--llm-latency-ms``)
+- Reports p50/p95/p99 latency per endpoint, throughput, event-loop lag and
+  peak RSS, and compares them with a committed baseline; the exit status is 1
+  when a budget regresses beyond ``--tolerance`` or when any endpoint returns
+  more errors than the baseline recorded (errors get no tolerance, so an
+  endpoint cannot pass by failing fast)
+
+Runs with ``TEST_MODE=1`` so CSRF, role checks and rate limits do not reject
+the synthetic load; the enterprise auth middleware still runs, with a bench
+token seeded into the verified-token cache (no tenant, so requests use the
+global services).
+
+Usage:
+    python -m agent.bench
+    python -m agent.bench --concurrency 32 --requests 5000 --mix ask=2,search=6,health=2
+    python -m agent.bench --update-baseline
+"""
+
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import io
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+from unittest.mock import patch
+
+import numpy as np
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "bench_baseline.json"
+DEFAULT_MIX = "ask=4,search=4,health=2,reindex=0.1"
+ENDPOINTS = ("ask", "search", "health", "reindex")
+BENCH_TOKEN = "agent-bench-token"
+# Sub-millisecond noise should not fail a latency budget
+_LATENCY_SLACK_MS = 1.0
+
+_TOPICS = (
+    "graph databases",
+    "spaced repetition",
+    "rust lifetimes",
+    "sourdough",
+    "kubernetes probes",
+    "stoic philosophy",
+    "vector search",
+    "garden soil",
+)
+_WORD = re.compile(r"\w+")
+
+
+class HashingEmbedder:
+    """SentenceTransformer stand-in: feature-hashed bag of words, L2-normalized"""
+
+    tokenizer = None
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def _embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in _WORD.findall(text.lower()):
+            digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+            h = int.from_bytes(digest, "little")
+            vector[h % self.dim] += 1.0 if h >> 63 else -1.0
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+
+    def encode(self, texts, **kwargs):
+        if isinstance(texts, str):
+            return self._embed(texts)
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.stack([self._embed(t) for t in texts])
+
+
+class StubLLMRouter:
+    """HybridLLMRouter stand-in: deterministic tokens after a fixed latency"""
+
+    def __init__(self, latency_ms: float = 20.0, **kwargs):
+        self.latency = latency_ms / 1000.0
+
+    def generate(self, prompt: str, *, max_tokens: int = 512, **kwargs) -> str:
+        time.sleep(self.latency)  # Blocking, like a llama.cpp call
+        seed = int(hashlib.md5(prompt.encode("utf-8")).hexdigest()[:8], 16)
+        words = [_TOPICS[(seed + i) % len(_TOPICS)] for i in range(max_tokens // 2)]
+        return " ".join(words) or "ok"
+
+    def get_available_models(self) -> Dict[str, bool]:
+        return {"llama": True, "gpt4all": False}
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise ValueError(f"unknown endpoint {name!r} (choose from {ENDPOINTS})")
+        mix[name] = float(weight or 1)
+    if not any(mix.values()):
+        raise ValueError("mix has no traffic")
+    return mix
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100.0 * (len(ordered) - 1))))]
+
+
+def peak_rss_mb() -> float:
+    try:
+        import resource
+
+        # ru_maxrss is in KiB on Linux, bytes on macOS
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+    except ImportError:
+        import psutil
+
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+
+
+def write_vault(path: Path, notes: int, seed: int):
+    rng = random.Random(seed)
+    path.mkdir(parents=True, exist_ok=True)
+    for i in range(notes):
+        topic = _TOPICS[i % len(_TOPICS)]
+        body = "\n\n".join(
+            f"## {topic.title()} {j}\n"
+            + " ".join(rng.choice(_TOPICS) for _ in range(40))
+            for j in range(4)
+        )
+        (path / f"note_{i:04d}.md").write_text(f"# {topic} {i}\n\n{body}\n")
+
+
+@contextlib.contextmanager
+def stand_in_services(workdir: Path, llm_latency_ms: float, notes: int, seed: int):
+    """Point the backend's service globals at stand-in-backed instances for
+    the duration of the block; yields the synthetic vault path"""
+    from . import backend, modelmanager
+    from .caching import CacheManager
+    from .embeddings import EmbeddingsManager
+    from .indexing import VaultIndexer
+
+    vault = workdir / "vault"
+    write_vault(vault, notes, seed)
+    env = {"SKIP_MODEL_DOWNLOADS": "1", "HF_TOKEN": ""}
+    with patch.dict(os.environ, env), patch.object(
+        modelmanager,
+        "HybridLLMRouter",
+        lambda **kwargs: StubLLMRouter(llm_latency_ms, **kwargs),
+    ), contextlib.redirect_stdout(io.StringIO()):
+        model_manager = modelmanager.ModelManager(
+            models_dir=str(workdir / "models"),
+            env_file=str(workdir / ".env"),
+            models_file=str(workdir / "models.txt"),
+            minimal_models=[],
+        )
+    emb_manager = EmbeddingsManager(
+        db_path=str(workdir / "vectors"), model=HashingEmbedder(), vector_db="numpy"
+    )
+    services = {
+        "model_manager": model_manager,
+        "emb_manager": emb_manager,
+        "vault_indexer": VaultIndexer(
+            emb_mgr=emb_manager, cache_dir=str(workdir / "cache")
+        ),
+        "cache_manager": CacheManager(str(workdir / "cache")),
+    }
+    services["vault_indexer"].reindex(str(vault))
+
+    previous = {name: getattr(backend, name) for name in services}
+    for name, service in services.items():
+        setattr(backend, name, service)
+    try:
+        yield vault
+    finally:
+        for name, service in previous.items():
+            setattr(backend, name, service)
+        emb_manager.close()
+
+
+def authorize_bench_token():
+    """Cache verified claims and resolved context for ``BENCH_TOKEN``"""
+    from .token_cache import get_token_cache
+
+    cache = get_token_cache()
+    if cache.get_context(BENCH_TOKEN, "enterprise", verifier="enterprise") is not None:
+        return
+    user = {"user_id": "bench", "tenant_id": "", "email": "bench@localhost"}
+    cache.put_claims(
+        BENCH_TOKEN, {**user, "roles": ["user", "admin"]}, verifier="enterprise"
+    )
+    context = {**user, "roles": ["user", "admin"], "permissions": {"user", "admin"}}
+    cache.put_context(BENCH_TOKEN, context, "enterprise", verifier="enterprise")
+
+
+class LoopLagMonitor:
+    """Samples how late the event loop wakes a task that sleeps ``interval``"""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.lags: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(0.0, loop.time() - start - self.interval))
+
+    def start(self):
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+
+
+def _request(client, endpoint: str, rng: random.Random, vault: str):
+    question = f"What do my notes say about {rng.choice(_TOPICS)}?"
+    if endpoint == "ask":
+        # A small question pool, so repeated questions hit the answer cache
+        body = {"question": f"{question} #{rng.randrange(50)}", "max_tokens": 32}
+        return client.post("/api/ask", json=body)
+    if endpoint == "search":
+        return client.post("/api/search", params={"query": question, "top_k": 5})
+    if endpoint == "reindex":
+        return client.post("/api/reindex", json={"vault_path": vault})
+    return client.get("/health")
+
+
+async def drive(app, plan: List[str], concurrency: int, vault: str, seed: int):
+    import httpx
+
+    latencies: Dict[str, List[float]] = {name: [] for name in ENDPOINTS}
+    errors: Dict[str, int] = {name: 0 for name in ENDPOINTS}
+    queue = list(reversed(plan))
+    transport = httpx.ASGITransport(app=app)
+
+    async def worker(n: int):
+        rng = random.Random(seed + n)
+        headers = {"Authorization": f"Bearer {BENCH_TOKEN}"}
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", headers=headers
+        ) as c:
+            while queue:
+                endpoint = queue.pop()
+                authorize_bench_token()  # Cached context expires after a minute
+                start = time.perf_counter()
+                try:
+                    response = await _request(c, endpoint, rng, vault)
+                    failed = response.status_code >= 400
+                except Exception:
+                    failed = True
+                latencies[endpoint].append(time.perf_counter() - start)
+                errors[endpoint] += failed
+
+    await asyncio.gather(*(worker(n) for n in range(concurrency)))
+    return latencies, errors
+
+
+async def run_load(
+    app,
+    vault: str,
+    mix: Dict[str, float],
+    requests: int,
+    concurrency: int,
+    warmup: int = 0,
+    seed: int = 0,
+) -> Dict:
+    rng = random.Random(seed)
+    names = [name for name in ENDPOINTS if mix.get(name)]
+    weights = [mix[name] for name in names]
+    plan = rng.choices(names, weights=weights, k=requests)
+    warmup_plan = rng.choices(names, weights=weights, k=warmup)
+    await drive(app, warmup_plan, concurrency, vault, seed)
+
+    monitor = LoopLagMonitor()
+    monitor.start()
+    start = time.perf_counter()
+    latencies, errors = await drive(app, plan, concurrency, vault, seed)
+    elapsed = time.perf_counter() - start
+    await monitor.stop()
+
+    endpoints = {}
+    for name in names:
+        ms = [t * 1000 for t in latencies[name]]
+        endpoints[name] = {
+            "count": len(ms),
+            "errors": errors[name],
+            "p50_ms": percentile(ms, 50),
+            "p95_ms": percentile(ms, 95),
+            "p99_ms": percentile(ms, 99),
+        }
+    lags = [lag * 1000 for lag in monitor.lags]
+    return {
+        "requests": requests,
+        "errors": sum(errors.values()),
+        "duration_s": elapsed,
+        "throughput_rps": requests / elapsed if elapsed else 0.0,
+        "endpoints": endpoints,
+        "event_loop_lag_ms": {"p99": percentile(lags, 99), "max": max(lags or [0])},
+        "rss_mb": peak_rss_mb(),
+    }
+
+
+def budget_metrics(report: Dict) -> Dict[str, float]:
+    """Flat metric name -> value pairs compared against the baseline"""
+    metrics = {
+        "errors": report["errors"],
+        "throughput_rps": report["throughput_rps"],
+        "event_loop_lag_ms.p99": report["event_loop_lag_ms"]["p99"],
+        "rss_mb": report["rss_mb"],
+    }
+    for name, stats in report["endpoints"].items():
+        metrics[f"{name}.errors"] = stats["errors"]
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            metrics[f"{name}.{key}"] = stats[key]
+    return {name: round(value, 3) for name, value in metrics.items()}
+
+
+def _is_error_metric(name: str) -> bool:
+    return name == "errors" or name.endswith(".errors")
+
+
+def compare(current: Dict[str, float], baseline: Dict[str, float], tolerance: float):
+    """Budget regressions: latency/lag/RSS above, throughput below tolerance,
+    and any error count above the baseline's (0 when it has none recorded)"""
+    regressions = []
+    for name, value in current.items():
+        if _is_error_metric(name) and value > baseline.get(name, 0):
+            regressions.append(f"{name}: {value:.0f} > {baseline.get(name, 0):.0f}")
+    for name, base in baseline.items():
+        if name not in current or _is_error_metric(name):
+            continue
+        value = current[name]
+        if name == "throughput_rps":
+            limit = base * (1 - tolerance)
+            if value < limit:
+                regressions.append(f"{name}: {value:.1f} < {limit:.1f}")
+            continue
+        limit = base * (1 + tolerance)
+        if name.endswith("_ms") or "_ms." in name:
+            limit += _LATENCY_SLACK_MS
+        if value > limit:
+            regressions.append(f"{name}: {value:.2f} > {limit:.2f}")
+    return regressions
+
+
+def format_report(report: Dict, regressions: Optional[List[str]]) -> str:
+    lines = [
+        f"{report['requests']} requests in {report['duration_s']:.2f}s "
+        f"({report['throughput_rps']:.1f} req/s), {report['errors']} errors",
+        f"{'endpoint':<10}{'count':>7}{'errors':>8}{'p50 ms':>9}{'p95 ms':>9}"
+        f"{'p99 ms':>9}",
+    ]
+    for name, s in report["endpoints"].items():
+        lines.append(
+            f"{name:<10}{s['count']:>7}{s['errors']:>8}{s['p50_ms']:>9.2f}"
+            f"{s['p95_ms']:>9.2f}{s['p99_ms']:>9.2f}"
+        )
+    lag = report["event_loop_lag_ms"]
+    lines.append(f"event loop lag p99 {lag['p99']:.2f} ms, max {lag['max']:.2f} ms")
+    lines.append(f"peak RSS {report['rss_mb']:.0f} MB")
+    if regressions is not None:
+        lines.append("")
+        if regressions:
+            lines.append("Budget regressions:")
+            lines.extend(f"  {r}" for r in regressions)
+        else:
+            lines.append("Within baseline budgets")
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="In-process HTTP load benchmark")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="endpoint=weight,...")
+    parser.add_argument("--llm-latency-ms", type=float, default=20.0)
+    parser.add_argument("--notes", type=int, default=50, help="Synthetic vault size")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument("--tolerance", type=float, default=None)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--json", action="store_true", help="Emit JSON results")
+    parser.add_argument(
+        "--verbose", action="store_true", help="Keep backend/middleware output"
+    )
+    args = parser.parse_args(argv)
+    mix = parse_mix(args.mix)
+
+    os.environ.setdefault("TEST_MODE", "1")
+    # Middleware prints per request; keep the report readable
+    quiet = contextlib.redirect_stdout(io.StringIO())
+    if args.verbose:
+        quiet = contextlib.nullcontext()
+    with tempfile.TemporaryDirectory(prefix="agent-bench-") as tmp, quiet:
+        from .backend import app
+
+        services = stand_in_services(
+            Path(tmp), args.llm_latency_ms, args.notes, args.seed
+        )
+        with services as vault:
+            report = asyncio.run(
+                run_load(
+                    app,
+                    str(vault),
+                    mix,
+                    args.requests,
+                    args.concurrency,
+                    warmup=args.warmup,
+                    seed=args.seed,
+                )
+            )
+    report["config"] = {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "mix": mix,
+        "llm_latency_ms": args.llm_latency_ms,
+        "notes": args.notes,
+    }
+
+    metrics = budget_metrics(report)
+    baseline_path = Path(args.baseline)
+    regressions = None
+    if args.update_baseline:
+        tolerance = 0.5 if args.tolerance is None else args.tolerance
+        baseline = {
+            "config": report["config"],
+            "tolerance": tolerance,
+            "metrics": metrics,
+        }
+        baseline_path.write_text(json.dumps(baseline, indent=2) + "\n")
+    elif baseline_path.exists():
+        baseline = json.loads(baseline_path.read_text())
+        tolerance = baseline.get("tolerance", 0.5)
+        if args.tolerance is not None:
+            tolerance = args.tolerance
+        if baseline.get("config") != report["config"]:
+            print("Warning: baseline was recorded with a different configuration")
+        regressions = compare(metrics, baseline.get("metrics", {}), tolerance)
+    report["regressions"] = regressions
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(format_report(report, regressions))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
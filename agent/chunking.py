@@ -0,0 +1,229 @@
+"""
+Markdown Chunking
+Offset-based, Markdown-aware text chunking for embeddings.
+
+- Chunks are ``(start, end)`` character offsets into the original note, with
+  1-based line numbers and the enclosing heading path, so search results can
+  point at an exact location; text is only sliced out when a caller asks
+- Frontmatter is kept as its own chunk, a heading always starts a new chunk
+  and fenced code blocks are never split unless they exceed the chunk size
+  on their own (then they are split on line boundaries)
+- Chunk size is measured in tokens of the embedding model's tokenizer when
+  one is available and in whitespace-separated words otherwise; ``overlap``
+  applies when a single oversized block has to be split
+"""
+
+import re
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Callable, Iterator, List, Optional, Tuple
+
+_FRONTMATTER_OPEN = re.compile(r"---[ \t]*\r?\n")
+_FRONTMATTER_CLOSE = re.compile(r"^(?:---|\.\.\.)[ \t]*\r?$", re.MULTILINE)
+_FENCE = re.compile(r" {0,3}(`{3,}|~{3,})")
+_HEADING = re.compile(r" {0,3}(#{1,6})[ \t]+([^\r\n]*?)[ \t#]*\r?$", re.MULTILINE)
+_BLANK = re.compile(r"[ \t]*(?:\r?\n|$)")
+_WORD = re.compile(r"\S+")
+_LINE = re.compile(r"[^\n]*\n?")
+
+# (kind, start, end, heading level or 0)
+Block = Tuple[str, int, int, int]
+
+
+def count_words(text: str, start: int = 0, end: Optional[int] = None) -> int:
+    """Whitespace-separated words in ``text[start:end]`` without slicing"""
+    end = len(text) if end is None else end
+    return sum(1 for _ in _WORD.finditer(text, start, end))
+
+
+def tokenizer_counter(tokenizer) -> Optional[Callable[[str, int, int], int]]:
+    """Token counter backed by a Hugging Face tokenizer, or None if unusable"""
+    if tokenizer is None:
+        return None
+
+    def count(text: str, start: int = 0, end: Optional[int] = None) -> int:
+        ids = tokenizer(text[start:end], add_special_tokens=False)["input_ids"]
+        return len(ids)
+
+    try:
+        if isinstance(count("probe text"), int) and count("probe text") > 0:
+            return count
+    except Exception:
+        pass
+    return None
+
+
+@dataclass(frozen=True)
+class Chunk:
+    """A span of the source text"""
+
+    start: int
+    end: int
+    line_start: int
+    line_end: int
+    heading: str = ""
+    kind: str = "text"
+
+    def text(self, source: str) -> str:
+        return source[self.start : self.end]
+
+    def metadata(self) -> dict:
+        return {
+            "start": self.start,
+            "end": self.end,
+            "line_start": self.line_start,
+            "line_end": self.line_end,
+            "heading": self.heading,
+            "kind": self.kind,
+        }
+
+
+class MarkdownChunker:
+    """Split Markdown into token-bounded chunks that follow its structure"""
+
+    def __init__(
+        self,
+        max_tokens: int = 500,
+        overlap: int = 50,
+        token_counter: Optional[Callable[[str, int, int], int]] = None,
+    ):
+        self.max_tokens = max(1, max_tokens)
+        self.overlap = max(0, min(overlap, self.max_tokens - 1))
+        self.count = token_counter or count_words
+
+    # ----------------------
+    # Block scanning
+    # ----------------------
+
+    def _blocks(self, text: str) -> Iterator[Block]:
+        n = len(text)
+        pos = 0
+        match = _FRONTMATTER_OPEN.match(text)
+        if match:
+            close = _FRONTMATTER_CLOSE.search(text, match.end())
+            if close:
+                pos = close.end()
+                yield ("frontmatter", 0, pos, 0)
+
+        para_start = None
+        while pos < n:
+            line_end = text.find("\n", pos)
+            line_end = n if line_end < 0 else line_end + 1
+
+            blank = _BLANK.match(text, pos)
+            heading = _HEADING.match(text, pos, line_end)
+            fence = _FENCE.match(text, pos, line_end)
+            if (blank and blank.end() >= line_end) or heading or fence:
+                if para_start is not None:
+                    yield ("text", para_start, pos, 0)
+                    para_start = None
+
+            if heading:
+                yield ("heading", pos, line_end, len(heading.group(1)))
+            elif fence:
+                marker = fence.group(1)
+                close = re.compile(
+                    rf"^ {{0,3}}{re.escape(marker[0])}{{{len(marker)},}}[ \t]*$",
+                    re.MULTILINE,
+                ).search(text, line_end)
+                end = n if close is None else min(n, close.end() + 1)
+                yield ("code", pos, end, 0)
+                pos = end
+                continue
+            elif not (blank and blank.end() >= line_end) and para_start is None:
+                para_start = pos
+            pos = line_end
+
+        if para_start is not None:
+            yield ("text", para_start, n, 0)
+
+    # ----------------------
+    # Packing
+    # ----------------------
+
+    def iter_chunks(self, text: str) -> Iterator[Chunk]:
+        """Yield chunks in document order"""
+        if not text:
+            return
+        line_starts = [0] + [m.end() for m in re.finditer("\n", text)]
+        headings: List[Tuple[int, str]] = []
+        current: Optional[List] = None  # [start, end, tokens, heading, kind]
+
+        def emit(start: int, end: int, heading: str, kind: str):
+            while start < end and text[start].isspace():
+                start += 1
+            while end > start and text[end - 1].isspace():
+                end -= 1
+            if start < end:
+                return Chunk(
+                    start,
+                    end,
+                    bisect_right(line_starts, start),
+                    bisect_right(line_starts, end - 1),
+                    heading,
+                    kind,
+                )
+            return None
+
+        for kind, start, end, level in self._blocks(text):
+            if kind == "heading":
+                title = _HEADING.match(text, start, end).group(2)
+                while headings and headings[-1][0] >= level:
+                    headings.pop()
+                headings.append((level, title))
+            heading_path = " > ".join(title for _, title in headings)
+            tokens = self.count(text, start, end)
+
+            starts_section = kind in ("heading", "frontmatter")
+            if current is not None and (
+                starts_section or current[2] + tokens > self.max_tokens
+            ):
+                chunk = emit(*current[:2], current[3], current[4])
+                if chunk:
+                    yield chunk
+                current = None
+
+            if tokens > self.max_tokens:
+                for s, e in self._split(text, kind, start, end, tokens):
+                    chunk = emit(s, e, heading_path, kind)
+                    if chunk:
+                        yield chunk
+                continue
+
+            if current is None:
+                current = [start, end, tokens, heading_path, kind]
+            else:
+                current[1] = end
+                current[2] += tokens
+                if current[4] != kind:
+                    current[4] = "mixed"
+            if kind == "frontmatter":
+                chunk = emit(start, end, "", kind)
+                if chunk:
+                    yield chunk
+                current = None
+
+        if current is not None:
+            chunk = emit(*current[:2], current[3], current[4])
+            if chunk:
+                yield chunk
+
+    def _split(
+        self, text: str, kind: str, start: int, end: int, tokens: int
+    ) -> Iterator[Tuple[int, int]]:
+        """Split one oversized block on word (or, for code, line) boundaries"""
+        unit = _LINE if kind in ("code", "frontmatter") else _WORD
+        spans = [(m.start(), m.end()) for m in unit.finditer(text, start, end)]
+        spans = [s for s in spans if s[0] < s[1]]
+        # Size windows by the block's average tokens per unit
+        per_unit = tokens / max(1, len(spans))
+        size = max(1, int(self.max_tokens / per_unit))
+        step = max(1, size - int(self.overlap / per_unit))
+        for i in range(0, len(spans), step):
+            window = spans[i : i + size]
+            yield window[0][0], window[-1][1]
+            if i + size >= len(spans):
+                break
+
+    def chunk(self, text: str) -> List[Chunk]:
+        return list(self.iter_chunks(text))
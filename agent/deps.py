@@ -14,6 +14,7 @@ Notes:
 
 from __future__ import annotations
 
+import importlib.util
 import subprocess
 import sys
 from typing import List, Tuple
@@ -46,8 +47,9 @@ def _run(cmd: List[str]) -> Tuple[int, str]:
 
 def ensure_minimal_dependencies() -> bool:
     """
-    Ensure all required backend dependencies are available. If an import fails, attempt to
-    install via pip and retry imports. Returns True if all imports succeed at the end.
+    Ensure all required backend dependencies are available. If a package cannot be
+    found, attempt to install it via pip and check again. Returns True if all
+    packages are available at the end.
     """
     ok = True
 
@@ -56,8 +58,8 @@ def ensure_minimal_dependencies() -> bool:
         ("fastapi", "fastapi>=0.104.1"),
         ("uvicorn", "uvicorn>=0.24.0"),
         ("requests", "requests>=2.31.0"),
-        ("python_dotenv", "python-dotenv>=1.0.0"),
-        ("python_multipart", "python-multipart>=0.0.6"),
+        ("dotenv", "python-dotenv>=1.0.0"),
+        ("multipart", "python-multipart>=0.0.6"),
         ("readability", "readability-lxml>=0.8.1"),
         ("pypdf", "pypdf>=3.0.0"),
         ("bs4", "beautifulsoup4>=4.10.0"),
@@ -69,9 +71,9 @@ def ensure_minimal_dependencies() -> bool:
     ]
 
     def _try_import(name: str) -> bool:
+        # Locate without importing so the check does not load every package
         try:
-            __import__(name)
-            return True
+            return importlib.util.find_spec(name) is not None
         except Exception:
             return False
 
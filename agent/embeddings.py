@@ -6,20 +6,19 @@ import os
 from pathlib import Path
 from typing import Dict, List, Optional
 
-try:
-    from sentence_transformers import SentenceTransformer  # type: ignore
-except Exception:
-    SentenceTransformer = None  # type: ignore
-
-try:
-    from chromadb import PersistentClient  # type: ignore
-    from chromadb.utils import embedding_functions  # type: ignore
-except Exception:
-    PersistentClient = None  # type: ignore
-    embedding_functions = None  # type: ignore
+from .chunking import Chunk, MarkdownChunker, tokenizer_counter
+from .lazy_imports import LazyAttribute, LazyModule
+from .query_batching import MicroBatcher, QueryEmbeddingCache
 from .settings import get_settings
+from .single_flight import SingleFlight
+from .spans import current_span, start_span, traced
 from .utils import safe_call
 
+# Imported on first use: sentence_transformers pulls in torch
+SentenceTransformer = LazyAttribute("sentence_transformers", "SentenceTransformer")
+PersistentClient = LazyAttribute("chromadb", "PersistentClient")
+embedding_functions = LazyModule("chromadb.utils.embedding_functions")
+
 
 class EmbeddingsManager:
     """Manages embeddings for vault content using Chroma + SentenceTransformers."""
@@ -32,6 +31,13 @@ class EmbeddingsManager:
         db_path: str = "./agent/vector_db",
         collection_name: str = "obsidian_notes",
         model_name: str = "all-MiniLM-L6-v2",
+        model=None,
+        vector_db: str = "chroma",
+        ivf_lists: int = 0,
+        quantization: str = "none",
+        query_cache_size: int = 1024,
+        search_batch_window_ms: float = 2.0,
+        search_max_batch: int = 32,
     ):
         self.chunk_size = chunk_size
         self.overlap = overlap
@@ -39,9 +45,23 @@ class EmbeddingsManager:
         self.db_path = db_path
         self.collection_name = collection_name
         self.model_name = model_name
-
-        # Load embedding model if available; swallow errors
-        if SentenceTransformer is None:
+        self.vector_db = vector_db
+        # Repeated queries skip the model; concurrent searches share one
+        # encode call and one multi-query lookup
+        self.query_cache = QueryEmbeddingCache(query_cache_size)
+        self._search_batcher = MicroBatcher(
+            self._search_batch,
+            window=search_batch_window_ms / 1000.0,
+            max_batch=search_max_batch,
+        )
+        # Callers embedding the same text at the same time share one encode
+        self._embed_flights = SingleFlight()
+
+        # Reuse an already-loaded model (e.g. shared by per-tenant managers),
+        # otherwise load it if available; swallow errors
+        if model is not None:
+            self.model = model
+        elif not SentenceTransformer:
             logging.warning(
                 "[EmbeddingsManager] sentence_transformers not available; embeddings disabled"
             )
@@ -60,8 +80,24 @@ class EmbeddingsManager:
             self.collection = None
             return
 
+        if vector_db == "numpy":
+            from .vector_store import NumpyVectorStore
+
+            # In-process store: no Chroma client; vectors live under db_path
+            self.chroma_client = None
+            self.collection = safe_call(
+                NumpyVectorStore,
+                str(Path(self.db_path) / self.collection_name),
+                embed_fn=self._embed_documents,
+                ivf_lists=ivf_lists,
+                quantization=quantization,
+                error_msg="[EmbeddingsManager] Error opening NumPy vector store",
+                default=None,
+            )
+            return
+
         # Initialize persistent Chroma client; swallow errors
-        if PersistentClient is None:
+        if not PersistentClient:
             self.chroma_client = None
         else:
             self.chroma_client = safe_call(
@@ -72,7 +108,7 @@ class EmbeddingsManager:
             )
 
         # Create or get collection using the **model name**, not the model object
-        if self.chroma_client and embedding_functions is not None:
+        if self.chroma_client and embedding_functions:
             try:
                 self.collection = self.chroma_client.get_or_create_collection(
                     name=self.collection_name,
@@ -107,17 +143,34 @@ class EmbeddingsManager:
             db_path=vector_db_path,
             collection_name="obsidian_notes",
             model_name=s.embed_model,
+            vector_db=s.vector_db,
+            ivf_lists=s.vector_ivf_lists,
+            quantization=s.vector_quantization,
+            query_cache_size=s.query_cache_size,
+            search_batch_window_ms=s.search_batch_window_ms,
         )
 
     # ----------------------
     # Core embedding methods
     # ----------------------
 
+    def _embed_documents(self, documents: List[str]) -> List[List[float]]:
+        """Batch-encode documents for stores without an embedding function."""
+        return self.model.encode(documents)
+
+    def _persist(self):
+        if self.chroma_client is not None:
+            self.chroma_client.persist()
+        elif self.collection is not None and hasattr(self.collection, "persist"):
+            self.collection.persist()
+
     def compute_embedding(self, text: str, timeout: float = 5.0) -> List[float]:
         if self.model is None:
             logging.error("[EmbeddingsManager] No embedding model loaded.")
             return []
-        return safe_call(
+        return self._embed_flights.do(
+            (self.model_name, text),
+            safe_call,
             lambda t: self.model.encode(t).tolist(),
             text,
             error_msg="[EmbeddingsManager] Error computing embedding",
@@ -141,28 +194,100 @@ class EmbeddingsManager:
             error_msg="[EmbeddingsManager] Error upserting embedding",
         )
 
-    def search(self, query: str, top_k: Optional[int] = None) -> List[Dict]:
-        if top_k is None:
-            top_k = self.top_k
-        query_vec = self.compute_embedding(query)
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Query embeddings via the LRU cache; misses are encoded in one call"""
+        vectors: Dict[str, List[float]] = {}
+        missing = []
+        for query in queries:
+            if query in vectors or query in missing:
+                continue
+            cached = self.query_cache.get(self.model_name, query)
+            if cached is not None:
+                vectors[query] = cached
+            else:
+                missing.append(query)
+
+        current_span().set_attributes(
+            {"embed.queries": len(queries), "embed.cache_misses": len(missing)}
+        )
+        if len(missing) == 1:
+            encoded = [self.compute_embedding(missing[0])]
+        elif missing and self.model is not None:
+            encoded = safe_call(
+                lambda: [list(v) for v in self.model.encode(missing).tolist()],
+                error_msg="[EmbeddingsManager] Error computing embeddings",
+                default=[[] for _ in missing],
+            )
+        else:
+            encoded = [[] for _ in missing]
+        for query, vector in zip(missing, encoded, strict=True):
+            if len(vector):
+                self.query_cache.put(self.model_name, query, vector)
+            vectors[query] = vector
+        return [vectors[q] for q in queries]
+
+    def _search_batch(self, requests: List[tuple]) -> List[List[Dict]]:
+        """Answer ``(query, top_k)`` requests with one multi-query lookup"""
+        queries = list(dict.fromkeys(query for query, _ in requests))
+        # Spans nest under the search that leads the batch
+        with start_span("embeddings.embed_queries"):
+            vectors = dict(zip(queries, self.embed_queries(queries), strict=True))
         if self.collection is None:
             logging.error("[EmbeddingsManager] No collection available for search.")
-            return []
+            return [[] for _ in requests]
+        usable = [q for q in queries if len(vectors[q])]
+        if not usable:
+            return [[] for _ in requests]
+        n_results = max(top_k for _, top_k in requests)
 
         def do_search():
             results = self.collection.query(
-                query_embeddings=[query_vec], n_results=top_k
+                query_embeddings=[vectors[q] for q in usable], n_results=n_results
             )
-            hits = []
-            for doc, meta in zip(
-                results["documents"][0], results["metadatas"][0], strict=True
+            by_query = {}
+            for query, docs, metas in zip(
+                usable, results["documents"], results["metadatas"], strict=True
             ):
-                hits.append({"text": doc, "source": meta.get("note_path", "")})
-            return hits
+                hits = []
+                for doc, meta in zip(docs, metas, strict=True):
+                    hit = {"text": doc, "source": meta.get("note_path", "")}
+                    # Offsets recorded by index_file locate the passage in the note
+                    for key in ("start", "end", "line_start", "line_end", "heading"):
+                        if key in meta:
+                            hit[key] = meta[key]
+                    hits.append(hit)
+                by_query[query] = hits
+            return by_query
+
+        with start_span(
+            "vector.query",
+            {
+                "vector.db": self.vector_db,
+                "vector.queries": len(usable),
+                "vector.batch_size": len(requests),
+                "vector.n_results": n_results,
+            },
+        ):
+            by_query = safe_call(
+                do_search,
+                error_msg="[EmbeddingsManager] Error during search",
+                default={},
+            )
+        return [by_query.get(query, [])[:top_k] for query, top_k in requests]
 
-        return safe_call(
-            do_search, error_msg="[EmbeddingsManager] Error during search", default=[]
-        )
+    @traced("embeddings.search")
+    def search(self, query: str, top_k: Optional[int] = None) -> List[Dict]:
+        if top_k is None:
+            top_k = self.top_k
+        hits = self._search_batcher((query, top_k))
+        current_span().set_attributes({"search.top_k": top_k, "search.hits": len(hits)})
+        return hits
+
+    def get_search_stats(self) -> Dict[str, Dict]:
+        return {
+            "query_cache": self.query_cache.get_stats(),
+            "batching": self._search_batcher.get_stats(),
+        }
 
     def get_embedding_by_id(self, note_id: str) -> List[float]:
         """Retrieve an embedding vector by its ID (note_path)."""
@@ -187,6 +312,12 @@ class EmbeddingsManager:
         )
 
     def reset_db(self):
+        if self.vector_db == "numpy" and self.collection is not None:
+            safe_call(
+                self.collection.reset,
+                error_msg="[EmbeddingsManager] Error resetting DB",
+            )
+            return
         if self.chroma_client is None:
             logging.error(
                 "[EmbeddingsManager] No Chroma client available for reset_db."
@@ -237,10 +368,13 @@ class EmbeddingsManager:
         references may help Windows file lock issues in tests.
         """
         try:
-            # Best-effort cleanup
+            # Best-effort cleanup; flush buffered vectors of in-process stores
+            if self.vector_db == "numpy" and self.collection is not None:
+                self.collection.persist()
             self.collection = None
             self.chroma_client = None
             self.model = None
+            self.query_cache.clear()
         except Exception as e:
             import logging
 
@@ -272,33 +406,47 @@ class EmbeddingsManager:
     def _hash_text(self, text: str) -> str:
         return hashlib.md5(text.encode("utf-8"), usedforsecurity=False).hexdigest()
 
-    def chunk_text(self, text: str) -> List[str]:
+    @property
+    def chunker(self) -> MarkdownChunker:
+        """Markdown-aware chunker sized in model tokens (words without a model)"""
+        key = (self.chunk_size, self.overlap, id(self.model))
+        if getattr(self, "_chunker_key", None) != key:
+            counter = tokenizer_counter(getattr(self.model, "tokenizer", None))
+            self._chunker = MarkdownChunker(self.chunk_size, self.overlap, counter)
+            self._chunker_key = key
+        return self._chunker
+
+    def chunk_spans(self, text: str) -> List[Chunk]:
+        """Chunks as offsets into ``text`` with line numbers and heading path."""
         if not text:
             return []
-        words = text.split()
-        step = self.chunk_size - self.overlap
-        return [
-            " ".join(words[i : i + self.chunk_size]) for i in range(0, len(words), step)
-        ]
+        return self.chunker.chunk(text)
+
+    def chunk_text(self, text: str) -> List[str]:
+        return [chunk.text(text) for chunk in self.chunk_spans(text)]
 
     # ----------------------
     # Indexing helpers
     # ----------------------
 
+    @traced("embeddings.index_file")
     def index_file(self, file_path: str) -> int:
         if not os.path.exists(file_path):
             return 0
         with open(file_path, "r", encoding="utf-8") as f:
             text = f.read()
-        chunks = self.chunk_text(text)
-        ids = [f"{os.path.basename(file_path)}-{i}" for i in range(len(chunks))]
+        spans = self.chunk_spans(text)
+        current_span().set_attributes(
+            {"index.chars": len(text), "index.chunks": len(spans)}
+        )
+        ids = [f"{os.path.basename(file_path)}-{i}" for i in range(len(spans))]
         self.collection.add(
-            documents=chunks,
+            documents=[span.text(text) for span in spans],
             ids=ids,
-            metadatas=[{"note_path": file_path} for _ in chunks],
+            metadatas=[{"note_path": file_path, **span.metadata()} for span in spans],
         )
-        self.chroma_client.persist()
-        return len(chunks)
+        self._persist()
+        return len(spans)
 
     def index_vault(self, vault_path: str) -> Dict[str, int]:
         vault = Path(vault_path)
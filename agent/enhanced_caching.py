@@ -21,6 +21,8 @@ from enum import Enum
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Protocol
 
+from agent.spans import current_span, traced
+
 try:
     from agent.caching import CacheManager, EmbeddingCache, FileHashCache
     from agent.error_handling import ConfigurationError, SystemError, error_context
@@ -350,6 +352,7 @@ class UnifiedCacheManager:
             except Exception as e:
                 logger.warning(f"Some cache subsystems failed to initialize: {e}")
 
+    @traced("cache.get")
     def get(self, key: str, default: Any = None) -> Any:
         """
         Intelligent cache get with automatic provider selection
@@ -375,6 +378,12 @@ class UnifiedCacheManager:
                     self.metrics.hits += 1
                 else:
                     self.metrics.misses += 1
+                current_span().set_attributes(
+                    {
+                        "cache.key_prefix": key.split(":", 1)[0],
+                        "cache.hit": result is not default,
+                    }
+                )
 
                 self.metrics.avg_access_time = (
                     self.metrics.avg_access_time
@@ -389,6 +398,7 @@ class UnifiedCacheManager:
                 logger.warning(f"Cache get error for key {key}: {e}")
                 return default
 
+    @traced("cache.set")
     def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
         """
         Intelligent cache set with automatic provider selection and optimization
@@ -423,14 +433,17 @@ class UnifiedCacheManager:
         """Route get request to appropriate cache provider"""
         cache_type = analysis["cache_type"]
         size_category = analysis["size_category"]
+        span = current_span()
 
         # Route based on data characteristics
         if "embed" in key.lower() and self.embedding_cache:
             # Special handling for embeddings
+            span.set_attribute("cache.provider", "embedding")
             return self._get_from_embedding_cache(key, default)
 
         elif "file" in key.lower() or "hash" in key.lower():
             # File-related caching
+            span.set_attribute("cache.provider", "file")
             return self._get_from_file_cache(key, default)
 
         elif size_category in ["huge", "large"] or cache_type in [
@@ -438,6 +451,7 @@ class UnifiedCacheManager:
             CacheType.PERSISTENT,
         ]:
             # Large data or long-term storage - use multi-level cache
+            span.set_attribute("cache.provider", "multi_level")
             return self.multi_level_cache.get(key, default)
 
         elif self.legacy_cache and cache_type in [
@@ -445,10 +459,12 @@ class UnifiedCacheManager:
             CacheType.SESSION,
         ]:
             # Medium-term data - use legacy cache
+            span.set_attribute("cache.provider", "legacy")
             return self.legacy_cache.get_cached_answer(key) or default
 
         else:
             # Default to multi-level cache
+            span.set_attribute("cache.provider", "multi_level")
             return self.multi_level_cache.get(key, default)
 
     def _route_set(
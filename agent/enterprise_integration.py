@@ -3,7 +3,7 @@
 
 import logging
 from datetime import datetime
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 import jwt
 from fastapi import FastAPI, HTTPException, Request, status
@@ -15,7 +15,8 @@ from .enterprise_auth import SSOEndpoints, SSOManager
 from .enterprise_gdpr import GDPRComplianceManager, GDPREndpoints
 from .enterprise_rbac import RBACEndpoints, RBACManager
 from .enterprise_soc2 import SOC2ComplianceManager, SOC2Endpoints
-from .enterprise_tenant import TenantEndpoints, TenantManager
+from .enterprise_tenant import TenantEndpoints, TenantManager, current_tenant_id
+from .token_cache import VerifiedTokenCache, get_token_cache
 
 logger = logging.getLogger(__name__)
 
@@ -29,11 +30,13 @@ class EnterpriseAuthMiddleware(BaseHTTPMiddleware):
         sso_manager: SSOManager,
         rbac_manager: RBACManager,
         tenant_manager: TenantManager,
+        token_cache: Optional[VerifiedTokenCache] = None,
     ):
         super().__init__(app)
         self.sso_manager = sso_manager
         self.rbac_manager = rbac_manager
         self.tenant_manager = tenant_manager
+        self.token_cache = token_cache or get_token_cache()
 
         # Public endpoints that don't require authentication
         self.public_endpoints = {
@@ -63,30 +66,50 @@ class EnterpriseAuthMiddleware(BaseHTTPMiddleware):
         token = auth_header.split(" ")[1]
 
         try:
-            # Verify JWT token
-            user_info = await self.sso_manager.verify_jwt_token(token)
-            if not user_info:
-                return self._unauthorized_response("Invalid token")
-
-            # Check if user's tenant is active
-            tenant = self.tenant_manager.get_tenant(user_info["tenant_id"])
-            if not tenant or tenant.status != "active":
-                return self._unauthorized_response("Tenant not active")
-
-            # Get user permissions
-            permissions = self.rbac_manager.get_user_permissions(
-                user_info["user_id"], user_info["tenant_id"]
+            if self.token_cache.is_revoked(token):
+                return self._unauthorized_response("Token revoked")
+
+            # Reuse the verified claims and resolved tenant/RBAC context
+            user_context = self.token_cache.get_context(
+                token, "enterprise", verifier="enterprise"
             )
+            if user_context is not None:
+                user_info = user_context
+            else:
+                user_info = self.token_cache.get_claims(token, verifier="enterprise")
+                if user_info is None:
+                    # Verify JWT token
+                    user_info = await self.sso_manager.verify_jwt_token(token)
+                    if not user_info:
+                        return self._unauthorized_response("Invalid token")
+                    self.token_cache.put_claims(
+                        token, user_info, verifier="enterprise"
+                    )
+
+                # Check if user's tenant is active
+                tenant = self.tenant_manager.get_tenant(user_info["tenant_id"])
+                if not tenant or tenant.status != "active":
+                    return self._unauthorized_response("Tenant not active")
+
+                # Get user permissions
+                permissions = self.rbac_manager.get_user_permissions(
+                    user_info["user_id"], user_info["tenant_id"]
+                )
+                user_context = {
+                    "user_id": user_info["user_id"],
+                    "tenant_id": user_info["tenant_id"],
+                    "email": user_info["email"],
+                    "roles": user_info.get("roles", []),
+                    "permissions": permissions,
+                    "authenticated_at": datetime.utcnow().isoformat(),
+                }
+                self.token_cache.put_context(
+                    token, user_context, "enterprise", verifier="enterprise"
+                )
 
             # Add user context to request state
-            request.state.user = {
-                "user_id": user_info["user_id"],
-                "tenant_id": user_info["tenant_id"],
-                "email": user_info["email"],
-                "roles": user_info.get("roles", []),
-                "permissions": permissions,
-                "authenticated_at": datetime.utcnow().isoformat(),
-            }
+            request.state.user = dict(user_context)
+            permissions = user_context["permissions"]
 
             # Check endpoint permissions
             if not self._check_endpoint_permission(request, permissions):
@@ -103,7 +126,12 @@ class EnterpriseAuthMiddleware(BaseHTTPMiddleware):
             logger.error(f"Authentication error: {str(e)}")
             return self._unauthorized_response("Authentication failed")
 
-        return await call_next(request)
+        # Scope downstream services (collections, caches) to the user's tenant
+        tenant_token = current_tenant_id.set(user_context["tenant_id"])
+        try:
+            return await call_next(request)
+        finally:
+            current_tenant_id.reset(tenant_token)
 
     def _check_endpoint_permission(self, request: Request, permissions: set) -> bool:
         """Check if user has permission for the endpoint"""
@@ -181,6 +209,13 @@ class EnterpriseIntegration:
         self.sso_manager = SSOManager(default_sso_config)
         self.tenant_manager = TenantManager()
         self.rbac_manager = RBACManager()
+
+        # Cached enterprise context carries roles and tenant status
+        self.token_cache = token_cache = get_token_cache()
+        self.rbac_manager.add_change_listener(
+            lambda user_id, _tenant_id: token_cache.invalidate_subject(user_id)
+        )
+        self.tenant_manager.add_status_listener(token_cache.invalidate_tenant)
         self.gdpr_manager = GDPRComplianceManager()
         self.soc2_manager = SOC2ComplianceManager()
 
@@ -253,6 +288,7 @@ class EnterpriseIntegration:
                 sso_manager=self.sso_manager,
                 rbac_manager=self.rbac_manager,
                 tenant_manager=self.tenant_manager,
+                token_cache=self.token_cache,
             )
 
     def _register_endpoints(self):
@@ -2,11 +2,25 @@
 # Provides granular permission management for enterprise deployments
 
 import logging
+import time
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timezone
 from enum import Enum
 from functools import wraps
-from typing import Any, Dict, List, Optional, Set
+from typing import (
+    AbstractSet,
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from fastapi import Request
 
 logger = logging.getLogger(__name__)
 
@@ -45,6 +59,29 @@ class Permission(Enum):
     tenant_admin = "tenant_admin"
     billing_access = "billing_access"
 
+    def __init__(self, value):
+        # One bit per permission (definition order) so a user's effective
+        # permissions fit in a single int. Stored on the member because
+        # hashing an Enum member for a dict lookup is comparatively slow.
+        self.bit = 1 << len(type(self).__members__)
+
+
+PERMISSION_BITS: Dict[Permission, int] = {perm: perm.bit for perm in Permission}
+ALL_PERMISSIONS_MASK = (1 << len(PERMISSION_BITS)) - 1
+
+
+def permissions_to_mask(permissions: Iterable[Permission]) -> int:
+    """Compile permissions to a bitmask"""
+    mask = 0
+    for perm in permissions:
+        mask |= perm.bit
+    return mask
+
+
+def mask_to_permissions(mask: int) -> FrozenSet[Permission]:
+    """Expand a bitmask back to the permissions it contains"""
+    return frozenset(perm for perm, bit in PERMISSION_BITS.items() if mask & bit)
+
 
 class UserRole(Enum):
     # Standard user roles
@@ -76,19 +113,44 @@ class UserPermissions:
     user_id: str
     tenant_id: str
     roles: List[UserRole]
-    effective_permissions: Set[Permission]
+    effective_permissions: AbstractSet[Permission]
     granted_by: str
     granted_at: datetime
     expires_at: Optional[datetime] = None
+    permission_mask: int = 0
 
 
 class RBACManager:
-    """Role-Based Access Control manager"""
+    """Role-Based Access Control manager
+
+    Role permissions are compiled to bitmasks (with transitive inheritance)
+    whenever role definitions change. Each user/tenant grant stores its final
+    mask in a per-tenant index, so ``has_permission`` is a dict lookup and a
+    single AND.
+    """
 
     def __init__(self):
         self.roles = self._initialize_default_roles()
         self.user_permissions: Dict[str, UserPermissions] = {}
         self.custom_roles: Dict[str, Role] = {}
+        self.role_masks: Dict[Any, int] = {}
+        # tenant_id -> user_id -> (permission mask, expiry timestamp or None)
+        self._grants: Dict[str, Dict[str, Tuple[int, Optional[float]]]] = {}
+        # Users share a handful of role combinations; compile each one once
+        self._combination_masks: Dict[FrozenSet[Any], int] = {}
+        self._mask_permissions: Dict[int, FrozenSet[Permission]] = {}
+        # Called with (user_id, tenant_id) whenever a user's roles change
+        self._change_listeners: List[Callable[[str, str], None]] = []
+        self._compile_roles()
+
+    def add_change_listener(self, listener: Callable[[str, str], None]) -> None:
+        """Register a callback for role changes (e.g. cached context flush)"""
+        if listener not in self._change_listeners:
+            self._change_listeners.append(listener)
+
+    def _notify_change(self, user_id: str, tenant_id: str) -> None:
+        for listener in self._change_listeners:
+            listener(user_id, tenant_id)
 
     def _initialize_default_roles(self) -> Dict[UserRole, Role]:
         """Initialize default role definitions"""
@@ -225,9 +287,11 @@ class RBACManager:
 
         # Recalculate effective permissions
         self._calculate_effective_permissions(user_perms)
+        self._notify_change(user_id, tenant_id)
 
         logger.info(
-            f"Assigned role {role.value} to user {user_id} in tenant {tenant_id}"
+            f"Assigned role {getattr(role, 'value', role)} to user {user_id} "
+            f"in tenant {tenant_id}"
         )
         return True
 
@@ -242,29 +306,78 @@ class RBACManager:
         if role in user_perms.roles:
             user_perms.roles.remove(role)
             self._calculate_effective_permissions(user_perms)
+            self._notify_change(user_id, tenant_id)
             logger.info(
-                f"Removed role {role.value} from user {user_id} in tenant {tenant_id}"
+                f"Removed role {getattr(role, 'value', role)} from user {user_id} "
+                f"in tenant {tenant_id}"
             )
             return True
 
         return False
 
+    def _grant_mask(self, user_id: str, tenant_id: str) -> int:
+        """Return the user's live permission mask (0 if unknown or expired)"""
+        tenant_grants = self._grants.get(tenant_id)
+        grant = tenant_grants.get(user_id) if tenant_grants else None
+        if grant is None:
+            return 0
+        mask, expires = grant
+        if expires is not None and time.time() > expires:
+            logger.warning(f"Permissions expired for user {user_id}")
+            return 0
+        return mask
+
     def has_permission(
         self, user_id: str, tenant_id: str, permission: Permission
     ) -> bool:
         """Check if user has a specific permission"""
-        key = f"{user_id}:{tenant_id}"
-        user_perms = self.user_permissions.get(key)
+        return bool(self._grant_mask(user_id, tenant_id) & permission.bit)
 
-        if not user_perms:
-            return False
+    def has_permissions(
+        self,
+        user_id: str,
+        tenant_id: str,
+        permissions: Iterable[Permission],
+        require_all: bool = True,
+    ) -> bool:
+        """Check several permissions at once (all of them, or any of them)"""
+        required = permissions_to_mask(permissions)
+        granted = self._grant_mask(user_id, tenant_id) & required
+        return granted == required if require_all else bool(granted)
 
-        # Check if permissions have expired
-        if user_perms.expires_at and datetime.utcnow() > user_perms.expires_at:
-            logger.warning(f"Permissions expired for user {user_id}")
-            return False
+    def check_permissions_batch(
+        self,
+        tenant_id: str,
+        user_ids: Iterable[str],
+        permissions: Iterable[Permission],
+    ) -> Dict[str, Dict[str, bool]]:
+        """Evaluate permissions for many users of a tenant in one pass
 
-        return permission in user_perms.effective_permissions
+        Used by admin listing endpoints to annotate a page of users without
+        one lookup per (user, permission) pair.
+        """
+        bits = [(perm.value, perm.bit) for perm in permissions]
+        tenant_grants = self._grants.get(tenant_id, {})
+        now = time.time()
+        results = {}
+        for user_id in user_ids:
+            mask, expires = tenant_grants.get(user_id, (0, None))
+            if expires is not None and now > expires:
+                mask = 0
+            results[user_id] = {name: bool(mask & bit) for name, bit in bits}
+        return results
+
+    def list_users_with_permission(
+        self, tenant_id: str, permission: Permission
+    ) -> List[str]:
+        """List users of a tenant holding a permission"""
+        bit = permission.bit
+        now = time.time()
+        return [
+            user_id
+            for user_id, (mask, expires) in self._grants.get(tenant_id, {}).items()
+            if mask & bit and (expires is None or now <= expires)
+        ]
 
     def get_user_permissions(
         self, user_id: str, tenant_id: str
@@ -281,22 +394,65 @@ class RBACManager:
         except ValueError:
             return False
 
+    def _compile_roles(self):
+        """Compile every role, including all inherited roles, to a bitmask"""
+        definitions: Dict[Any, Role] = {**self.roles, **self.custom_roles}
+        compiled: Dict[Any, int] = {}
+
+        def resolve(name, chain: FrozenSet[Any]) -> int:
+            if name in compiled:
+                return compiled[name]
+            if name in chain:
+                raise ValueError(f"Role inheritance cycle at {name}")
+            role = definitions.get(name)
+            if role is None:
+                return 0
+            mask = permissions_to_mask(role.permissions)
+            if role.inherits_from is not None:
+                mask |= resolve(role.inherits_from, chain | {name})
+            compiled[name] = mask
+            return mask
+
+        for name in definitions:
+            resolve(name, frozenset())
+
+        self.role_masks = compiled
+        self._combination_masks.clear()
+
+    def _roles_mask(self, roles: Iterable[Any]) -> int:
+        key = frozenset(roles)
+        mask = self._combination_masks.get(key)
+        if mask is None:
+            mask = 0
+            for role in key:
+                mask |= self.role_masks.get(role, 0)
+            self._combination_masks[key] = mask
+        return mask
+
     def _calculate_effective_permissions(self, user_perms: UserPermissions):
         """Calculate effective permissions from all assigned roles"""
-        effective_perms = set()
-
-        for role in user_perms.roles:
-            if role in self.roles:
-                role_perms = self.roles[role].permissions
-                effective_perms.update(role_perms)
-
-                # Handle role inheritance
-                inherited_role = self.roles[role].inherits_from
-                if inherited_role and inherited_role in self.roles:
-                    inherited_perms = self.roles[inherited_role].permissions
-                    effective_perms.update(inherited_perms)
-
-        user_perms.effective_permissions = effective_perms
+        mask = self._roles_mask(user_perms.roles)
+        permissions = self._mask_permissions.get(mask)
+        if permissions is None:
+            permissions = self._mask_permissions[mask] = mask_to_permissions(mask)
+
+        user_perms.permission_mask = mask
+        user_perms.effective_permissions = permissions
+
+        expires = None
+        if user_perms.expires_at is not None:
+            expires_at = user_perms.expires_at
+            if expires_at.tzinfo is None:
+                expires_at = expires_at.replace(tzinfo=timezone.utc)
+            expires = expires_at.timestamp()
+        tenant_grants = self._grants.setdefault(user_perms.tenant_id, {})
+        tenant_grants[user_perms.user_id] = (mask, expires)
+
+    def _recalculate_all(self):
+        """Recompile roles and refresh every grant after a role definition change"""
+        self._compile_roles()
+        for user_perms in self.user_permissions.values():
+            self._calculate_effective_permissions(user_perms)
 
     def create_custom_role(
         self,
@@ -304,8 +460,9 @@ class RBACManager:
         display_name: str,
         description: str,
         permissions: List[Permission],
+        inherits_from: Optional[Any] = None,
     ) -> bool:
-        """Create a custom role"""
+        """Create a custom role, optionally inheriting a standard or custom role"""
         if role_name in self.custom_roles:
             return False
 
@@ -314,9 +471,16 @@ class RBACManager:
             display_name=display_name,
             description=description,
             permissions=set(permissions),
+            inherits_from=inherits_from,
         )
 
         self.custom_roles[role_name] = custom_role
+        try:
+            self._recalculate_all()
+        except ValueError:
+            del self.custom_roles[role_name]
+            self._compile_roles()
+            raise
         logger.info(f"Created custom role: {role_name}")
         return True
 
@@ -377,8 +541,9 @@ class RBACManager:
         pass invalid role names and expect no crash.
         """
         try:
-            if isinstance(role, UserRole):
-                return self.roles.get(role, Role(role, "", "", set())).permissions
+            if isinstance(role, UserRole) or role in self.custom_roles:
+                # Include permissions inherited through the whole role chain
+                return set(mask_to_permissions(self.role_masks.get(role, 0)))
             # Allow passing strings (tests may simulate invalid role)
             return set()
         except Exception:
@@ -532,6 +697,22 @@ class RBACEndpoints:
         self.audit_logger = audit_logger
         self._register_endpoints()
 
+    def _permission_error(
+        self, request: Request, permission: Permission
+    ) -> Optional[Dict[str, Any]]:
+        """Error response unless the authenticated caller holds ``permission``"""
+        user = getattr(request.state, "user", None)
+        if not user:
+            return {"error": "Authentication required", "status_code": 401}
+        if not self.rbac_manager.has_permission(
+            user.get("user_id"), user.get("tenant_id"), permission
+        ):
+            return {
+                "error": f"Permission {permission.value} required",
+                "status_code": 403,
+            }
+        return None
+
     def _register_endpoints(self):
         """Register RBAC endpoints with FastAPI"""
 
@@ -594,6 +775,56 @@ class RBACEndpoints:
             else:
                 return {"error": "User permissions not found", "status_code": 404}
 
+        @self.app.get("/admin/tenants/{tenant_id}/users")
+        async def list_tenant_users(
+            tenant_id: str, request: Request, permission: Optional[str] = None
+        ):
+            """List a tenant's users, optionally only those holding a permission"""
+            error = self._permission_error(request, Permission.view_users)
+            if error:
+                return error
+            if tenant_id != request.state.user.get("tenant_id"):
+                return {"error": "Cross-tenant access denied", "status_code": 403}
+            if permission:
+                try:
+                    required = Permission(permission)
+                except ValueError:
+                    return {
+                        "error": f"Invalid permission: {permission}",
+                        "status_code": 400,
+                    }
+                user_ids = self.rbac_manager.list_users_with_permission(
+                    tenant_id, required
+                )
+            else:
+                user_ids = [
+                    perms.user_id
+                    for perms in self.rbac_manager.user_permissions.values()
+                    if perms.tenant_id == tenant_id
+                ]
+            return {"tenant_id": tenant_id, "users": user_ids, "total": len(user_ids)}
+
+        @self.app.post("/admin/permissions/check")
+        async def check_permissions(request_data: Dict[str, Any], request: Request):
+            """Check several permissions for a batch of users in one call"""
+            error = self._permission_error(request, Permission.view_users)
+            if error:
+                return error
+            tenant_id = request.state.user.get("tenant_id")
+            if request_data.get("tenant_id", tenant_id) != tenant_id:
+                return {"error": "Cross-tenant access denied", "status_code": 403}
+            try:
+                permissions = [
+                    Permission(name) for name in request_data.get("permissions", [])
+                ]
+            except ValueError as err:
+                return {"error": str(err), "status_code": 400}
+
+            results = self.rbac_manager.check_permissions_batch(
+                tenant_id, request_data.get("user_ids", []), permissions
+            )
+            return {"tenant_id": tenant_id, "results": results}
+
         @self.app.get("/admin/audit-log")
         @require_permission(Permission.view_audit_logs)
         async def get_audit_log(
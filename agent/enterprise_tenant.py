@@ -3,17 +3,38 @@ Enterprise Multi-Tenant Architecture
 Provides tenant isolation, resource management, and billing capabilities
 """
 
+import asyncio
 import logging
+import math
+import time
 import uuid
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
 
 from fastapi.responses import JSONResponse
 
 logger = logging.getLogger(__name__)
 
+# Tenant of the request being handled; set by the tenant/auth middleware so
+# services can pick the tenant's own collections and caches
+current_tenant_id: ContextVar[Optional[str]] = ContextVar(
+    "current_tenant_id", default=None
+)
+
 
 # Minimal stub for TenantEndpoints to fix import errors
 class TenantEndpoints:
@@ -38,6 +59,10 @@ class TenantLimits:
     max_api_calls_per_hour: int
     max_concurrent_requests: int
     features_enabled: List[str] = field(default_factory=list)
+    # Requests allowed to wait for a concurrency slot before 429s are returned
+    max_queued_requests: int = 10
+    # Relative share of the expensive-endpoint pool when tenants compete
+    scheduling_weight: int = 1
 
 
 @dataclass
@@ -76,6 +101,17 @@ class TenantManager:
         self.tenants: Dict[str, TenantConfig] = {}
         self.usage_metrics: Dict[str, TenantUsage] = {}
         self.tier_limits = self._initialize_tier_limits()
+        # Called with the tenant ID whenever a tenant's status changes
+        self._status_listeners: List[Callable[[str], None]] = []
+
+    def add_status_listener(self, listener: Callable[[str], None]) -> None:
+        """Register a callback for tenant status changes and deletion"""
+        if listener not in self._status_listeners:
+            self._status_listeners.append(listener)
+
+    def _notify_status(self, tenant_id: str) -> None:
+        for listener in self._status_listeners:
+            listener(tenant_id)
 
     def _initialize_tier_limits(self) -> Dict[TenantTier, TenantLimits]:
         """Initialize default limits for each tier"""
@@ -86,6 +122,8 @@ class TenantManager:
                 max_storage_gb=5,
                 max_api_calls_per_hour=1000,
                 max_concurrent_requests=5,
+                max_queued_requests=5,
+                scheduling_weight=1,
                 features_enabled=["basic_ai", "document_search"],
             ),
             TenantTier.PROFESSIONAL: TenantLimits(
@@ -94,6 +132,8 @@ class TenantManager:
                 max_storage_gb=50,
                 max_api_calls_per_hour=5000,
                 max_concurrent_requests=20,
+                max_queued_requests=10,
+                scheduling_weight=2,
                 features_enabled=[
                     "basic_ai",
                     "document_search",
@@ -107,6 +147,8 @@ class TenantManager:
                 max_storage_gb=500,
                 max_api_calls_per_hour=25000,
                 max_concurrent_requests=100,
+                max_queued_requests=25,
+                scheduling_weight=4,
                 features_enabled=[
                     "basic_ai",
                     "document_search",
@@ -123,6 +165,8 @@ class TenantManager:
                 max_storage_gb=99999,
                 max_api_calls_per_hour=999999,
                 max_concurrent_requests=500,
+                max_queued_requests=50,
+                scheduling_weight=8,
                 features_enabled=["all"],
             ),
         }
@@ -197,6 +241,7 @@ class TenantManager:
         if new_status not in {"active", "suspended", "terminated"}:
             return False
         tenant.status = new_status
+        self._notify_status(tenant_id)
         return True
 
     def update_tenant_usage(
@@ -335,6 +380,7 @@ class TenantManager:
         tenant = self.get_tenant(tenant_id)
         if tenant:
             tenant.status = "suspended"
+            self._notify_status(tenant_id)
             logger.warning(f"Suspended tenant {tenant_id}: {reason}")
 
     def list_tenants(
@@ -356,6 +402,8 @@ class TenantManager:
         existed = tenant_id in self.tenants
         self.tenants.pop(tenant_id, None)
         self.usage_metrics.pop(tenant_id, None)
+        if existed:
+            self._notify_status(tenant_id)
         return existed
 
 
@@ -461,12 +509,279 @@ class BillingManager:
         }
 
 
+class AdmissionRejected(Exception):
+    """Request could not be admitted: tenant not active, wait queue full or wait
+    timed out"""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _AdmissionStats:
+    """Admission counters and recent queue-wait samples for one tenant"""
+
+    def __init__(self, window: int = 500):
+        self.admitted = 0
+        self.queued = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self.waits: Deque[float] = deque(maxlen=window)
+
+    def summary(self) -> Dict[str, Any]:
+        waits = {"p50_ms": None, "p95_ms": None, "max_ms": None}
+        if self.waits:
+            ordered = sorted(self.waits)
+            last = len(ordered) - 1
+            waits = {
+                "p50_ms": round(ordered[last // 2] * 1000, 3),
+                "p95_ms": round(ordered[int(last * 0.95)] * 1000, 3),
+                "max_ms": round(ordered[last] * 1000, 3),
+            }
+        return {
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+            "queue_wait": waits,
+        }
+
+
+class _TenantGate:
+    """Concurrency semaphore for one tenant, sized from its TenantLimits"""
+
+    def __init__(self, limit: int, max_queue: int, loop):
+        self.semaphore = asyncio.Semaphore(limit)
+        self.limit = limit
+        self.max_queue = max_queue
+        self.loop = loop
+        self.in_flight = 0
+        self.waiting = 0
+
+
+class WeightedFairScheduler:
+    """Share a fixed pool of slots across tenants by weighted fair queuing
+
+    Each tenant has a virtual time that advances by ``1 / weight`` for every
+    slot it is granted. When slots are contended the waiting tenant with the
+    lowest virtual time goes next, so a weight-4 tenant gets about four times
+    the slots of a weight-1 tenant and one busy tenant cannot starve the rest.
+    """
+
+    def __init__(self, slots: int):
+        self.slots = slots
+        self.available = slots
+        self._waiters: Dict[str, Deque[Tuple[asyncio.Future, int]]] = {}
+        self._vtime: Dict[str, float] = {}
+        self._clock = 0.0  # Virtual start time of the most recent grant
+        self.granted: Dict[str, int] = {}
+
+    def _start_time(self, tenant_id: str) -> float:
+        # Idle tenants rejoin at the current clock instead of banking credit
+        return max(self._vtime.get(tenant_id, 0.0), self._clock)
+
+    def _charge(self, tenant_id: str, weight: int):
+        start = self._start_time(tenant_id)
+        self._clock = start
+        self._vtime[tenant_id] = start + 1.0 / max(1, weight)
+        self.granted[tenant_id] = self.granted.get(tenant_id, 0) + 1
+
+    async def acquire(self, tenant_id: str, weight: int, timeout: float):
+        """Wait for a slot; raises asyncio.TimeoutError after ``timeout``"""
+        if self.available > 0 and not self._waiters:
+            self.available -= 1
+            self._charge(tenant_id, weight)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (future, weight)
+        self._waiters.setdefault(tenant_id, deque()).append(entry)
+        try:
+            await asyncio.wait_for(future, timeout)
+        except BaseException:
+            if future.done() and not future.cancelled():
+                self.release()  # Granted just as we gave up: pass it on
+            else:
+                queue = self._waiters.get(tenant_id)
+                if queue is not None and entry in queue:
+                    queue.remove(entry)
+                    if not queue:
+                        del self._waiters[tenant_id]
+            raise
+
+    def release(self):
+        """Return a slot, handing it to the most under-served waiting tenant"""
+        while self._waiters:
+            tenant_id = min(self._waiters, key=self._start_time)
+            queue = self._waiters[tenant_id]
+            future, weight = queue.popleft()
+            if not queue:
+                del self._waiters[tenant_id]
+            if future.done():
+                continue
+            self._charge(tenant_id, weight)
+            future.set_result(None)
+            return
+        self.available += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "slots": self.slots,
+            "available": self.available,
+            "waiting": {t: len(q) for t, q in self._waiters.items()},
+            "granted": dict(self.granted),
+        }
+
+
+class TenantAdmissionController:
+    """Per-tenant admission control for incoming requests
+
+    - Each tenant gets an ``asyncio.Semaphore`` of ``max_concurrent_requests``
+    - Up to ``max_queued_requests`` more wait at most ``queue_timeout`` seconds
+      for a slot; beyond that requests are rejected (429) straight away
+    - Suspended and terminated tenants are rejected (429) without queuing
+    - Expensive endpoints additionally share ``expensive_slots`` across all
+      tenants, granted by weighted fair queuing on ``scheduling_weight``
+    - Queue-wait percentiles and admission counters are kept per tenant
+
+    When a tenant's limits change (e.g. a tier upgrade) a new semaphore is
+    used for new requests; in-flight requests release the one they acquired.
+    """
+
+    DEFAULT_EXPENSIVE_PATHS = (
+        "/api/ask",
+        "/api/reindex",
+        "/api/scan_vault",
+        "/api/index_pdf",
+        "/api/jobs",
+    )
+
+    def __init__(
+        self,
+        tenant_manager: TenantManager,
+        queue_timeout: float = 2.0,
+        expensive_slots: int = 4,
+        expensive_paths: Optional[Tuple[str, ...]] = None,
+    ):
+        self.tenant_manager = tenant_manager
+        self.queue_timeout = queue_timeout
+        self.expensive_paths = tuple(expensive_paths or self.DEFAULT_EXPENSIVE_PATHS)
+        self.scheduler = WeightedFairScheduler(expensive_slots)
+        self._gates: Dict[str, _TenantGate] = {}
+        self._stats: Dict[str, _AdmissionStats] = {}
+
+    def is_expensive(self, path: Any) -> bool:
+        return isinstance(path, str) and path.startswith(self.expensive_paths)
+
+    def _gate(self, tenant_id: str, limits: TenantLimits) -> _TenantGate:
+        loop = asyncio.get_running_loop()
+        gate = self._gates.get(tenant_id)
+        if (
+            gate is None
+            or gate.loop is not loop
+            or gate.limit != limits.max_concurrent_requests
+            or gate.max_queue != limits.max_queued_requests
+        ):
+            gate = _TenantGate(
+                limits.max_concurrent_requests, limits.max_queued_requests, loop
+            )
+            self._gates[tenant_id] = gate
+        return gate
+
+    def _reject(self, reason: str) -> AdmissionRejected:
+        return AdmissionRejected(reason, retry_after=max(1.0, self.queue_timeout))
+
+    @asynccontextmanager
+    async def admit(self, tenant_id: str, expensive: bool = False) -> AsyncIterator:
+        """Hold a tenant slot (and a shared expensive slot) for one request"""
+        tenant = self.tenant_manager.get_tenant(tenant_id)
+        if tenant is None:
+            raise ValueError(f"Unknown tenant: {tenant_id}")
+        if tenant.status != "active":
+            raise self._reject("tenant_inactive")
+        gate = self._gate(tenant_id, tenant.limits)
+        stats = self._stats.setdefault(tenant_id, _AdmissionStats())
+        started = time.perf_counter()
+
+        if gate.semaphore.locked():
+            if gate.waiting >= gate.max_queue:
+                stats.rejected_queue_full += 1
+                raise self._reject("queue_full")
+            gate.waiting += 1
+            stats.queued += 1
+            try:
+                await asyncio.wait_for(gate.semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                stats.rejected_timeout += 1
+                raise self._reject("queue_timeout") from None
+            finally:
+                gate.waiting -= 1
+        else:
+            await gate.semaphore.acquire()
+
+        gate.in_flight += 1
+        try:
+            if expensive:
+                remaining = self.queue_timeout - (time.perf_counter() - started)
+                try:
+                    await self.scheduler.acquire(
+                        tenant_id, tenant.limits.scheduling_weight, max(0.0, remaining)
+                    )
+                except asyncio.TimeoutError:
+                    stats.rejected_timeout += 1
+                    raise self._reject("queue_timeout") from None
+
+            stats.admitted += 1
+            stats.waits.append(time.perf_counter() - started)
+            self.tenant_manager.increment_usage(tenant_id, "concurrent_requests")
+            try:
+                yield
+            finally:
+                self.tenant_manager.increment_usage(
+                    tenant_id, "concurrent_requests", -1
+                )
+                if expensive:
+                    self.scheduler.release()
+        finally:
+            gate.in_flight -= 1
+            gate.semaphore.release()
+
+    def get_metrics(self, tenant_id: Optional[str] = None) -> Dict[str, Any]:
+        """Admission metrics for one tenant, or all tenants plus the scheduler"""
+
+        def tenant_metrics(tid: str) -> Dict[str, Any]:
+            gate = self._gates.get(tid)
+            metrics = self._stats.get(tid, _AdmissionStats()).summary()
+            metrics.update(
+                {
+                    "limit": gate.limit if gate else None,
+                    "in_flight": gate.in_flight if gate else 0,
+                    "waiting": gate.waiting if gate else 0,
+                    "expensive_granted": self.scheduler.granted.get(tid, 0),
+                }
+            )
+            return metrics
+
+        if tenant_id is not None:
+            return tenant_metrics(tenant_id)
+        return {
+            "tenants": {tid: tenant_metrics(tid) for tid in self._stats},
+            "expensive_pool": self.scheduler.get_stats(),
+        }
+
+
 # FastAPI middleware for multi-tenant isolation
 class MultiTenantMiddleware:
     """Middleware to enforce tenant isolation"""
 
-    def __init__(self, tenant_manager: TenantManager):
+    def __init__(
+        self,
+        tenant_manager: TenantManager,
+        admission: Optional[TenantAdmissionController] = None,
+    ):
         self.tenant_manager = tenant_manager
+        self.admission = admission or TenantAdmissionController(tenant_manager)
 
     async def __call__(self, request, call_next):
         """Enforce tenant isolation and limits"""
@@ -478,23 +793,24 @@ class MultiTenantMiddleware:
             )
         # Strict isolation: ensure all resource access is scoped by tenant_id
         request.state.tenant_id = tenant_id
-        # Check tenant status and limits
-        if not self.tenant_manager.check_resource_limit(
-            tenant_id, "concurrent_requests"
-        ):
+        # Queue briefly for a tenant slot instead of rejecting bursts outright
+        expensive = self.admission.is_expensive(request.url.path)
+        tenant_token = current_tenant_id.set(tenant_id)
+        try:
+            async with self.admission.admit(tenant_id, expensive):
+                return await call_next(request)
+        except AdmissionRejected as rejected:
             return JSONResponse(
                 status_code=429,
                 content={
                     "error": "Concurrent request limit exceeded",
                     "type": "rate_limit_error",
+                    "reason": rejected.reason,
                 },
+                headers={"Retry-After": str(math.ceil(rejected.retry_after))},
             )
-        self.tenant_manager.increment_usage(tenant_id, "concurrent_requests")
-        try:
-            response = await call_next(request)
-            return response
         finally:
-            self.tenant_manager.increment_usage(tenant_id, "concurrent_requests", -1)
+            current_tenant_id.reset(tenant_token)
 
     def _extract_tenant_id(self, request) -> Optional[str]:
         """Extract tenant ID from request"""
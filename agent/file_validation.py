@@ -8,6 +8,7 @@ Provides comprehensive validation for:
 - Path traversal prevention
 - Malicious content detection
 - Filename sanitization
+- Streaming uploads spooled to disk with incremental hashing
 """
 
 import base64
@@ -15,8 +16,10 @@ import hashlib
 import mimetypes
 import os
 import re
+import tempfile
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import AsyncIterator, BinaryIO, Dict, List, Optional, Tuple
 
 # Optional import for python-magic
 try:
@@ -523,13 +526,17 @@ class FileValidator:
 # Helper functions for common validation scenarios
 
 
-def validate_base64_audio(audio_data: str, max_size_mb: float = 25) -> Dict[str, any]:
+def validate_base64_audio(
+    audio_data: str, max_size_mb: float = 25, include_bytes: bool = False
+) -> Dict[str, any]:
     """
     Validate base64-encoded audio data
 
     Args:
         audio_data: Base64-encoded audio
         max_size_mb: Maximum size in MB
+        include_bytes: Add the decoded audio as ``audio_bytes`` so callers
+            do not decode it a second time
 
     Returns:
         Validation result dict
@@ -547,7 +554,10 @@ def validate_base64_audio(audio_data: str, max_size_mb: float = 25) -> Dict[str,
     if max_size_mb != 25:
         validator.ALLOWED_TYPES["audio"]["max_size_mb"] = max_size_mb
 
-    return validator.validate_file(audio_bytes, "audio.webm")
+    result = validator.validate_file(audio_bytes, "audio.webm")
+    if include_bytes:
+        result["audio_bytes"] = audio_bytes
+    return result
 
 
 def validate_pdf_path(pdf_path: str) -> Dict[str, any]:
@@ -573,6 +583,224 @@ def validate_pdf_path(pdf_path: str) -> Dict[str, any]:
     return validator.validate_file(content, filename, pdf_path)
 
 
+# ----------------------------------------------------------------------
+# Streaming uploads
+# ----------------------------------------------------------------------
+
+# Endpoints whose request bodies are streamed; middleware must not buffer them
+STREAMING_UPLOAD_PATHS = frozenset(
+    {
+        "/api/voice_transcribe/stream",
+        "/api/upload/pdf",
+    }
+)
+
+UPLOAD_CHUNK_SIZE = 64 * 1024  # Bytes read per chunk from multipart uploads
+SPOOL_MAX_MEMORY = 1024 * 1024  # Spooled uploads roll over to disk past 1MB
+
+
+def is_streaming_upload(path: str) -> bool:
+    """Return True if the request body for ``path`` must not be buffered"""
+    return path in STREAMING_UPLOAD_PATHS
+
+
+@dataclass
+class StreamedUpload:
+    """A validated upload spooled to a temporary file"""
+
+    file: BinaryIO
+    filename: str
+    file_type: str
+    mime_type: str
+    size_bytes: int
+    hash_sha256: str
+    warnings: List[str] = field(default_factory=list)
+    path: Optional[str] = None  # Set when spooled to a named file on disk
+
+    @property
+    def size_mb(self) -> float:
+        return self.size_bytes / (1024 * 1024)
+
+    def to_dict(self) -> Dict[str, any]:
+        """Validation-result shaped summary (matches ``validate_file`` keys)"""
+        return {
+            "valid": True,
+            "sanitized_filename": self.filename,
+            "file_type": self.file_type,
+            "mime_type": self.mime_type,
+            "size_bytes": self.size_bytes,
+            "size_mb": self.size_mb,
+            "hash_sha256": self.hash_sha256,
+            "warnings": list(self.warnings),
+        }
+
+    def close(self, delete: bool = True) -> None:
+        """Close the spool file; named spool files are removed unless kept"""
+        try:
+            self.file.close()
+        finally:
+            if delete and self.path and os.path.exists(self.path):
+                os.remove(self.path)
+
+
+class StreamingUploadValidator(FileValidator):
+    """Validate an upload chunk by chunk without holding it in memory
+
+    - Magic bytes are checked as soon as the first bytes arrive
+    - SHA-256 is computed incrementally
+    - Data is spooled to a temp file (in memory up to ``SPOOL_MAX_MEMORY``,
+      or a named file in ``spool_dir`` when a path is needed, e.g. for PDFs)
+    - The size cap aborts the upload as soon as it is exceeded
+    - PDF dangerous-token checks run across chunk boundaries
+    """
+
+    MAGIC_PROBE_BYTES = 16
+    DANGEROUS_PDF_TOKENS = (
+        b"/JavaScript",
+        b"/JS",
+        b"/AcroForm",
+        b"/XFA",
+        b"/EmbeddedFile",
+        b"/Launch",
+        b"/SubmitForm",
+    )
+
+    def __init__(
+        self,
+        file_type: str,
+        filename: str,
+        max_size_mb: Optional[float] = None,
+        spool_dir: Optional[str] = None,
+    ):
+        super().__init__(allowed_types=[file_type])
+        if file_type not in self.ALLOWED_TYPES or not self.ALLOWED_TYPES[file_type][
+            "magic_bytes"
+        ]:
+            raise FileValidationError(
+                f"Streaming uploads are not supported for '{file_type}' files"
+            )
+        self.expected_type = file_type
+        self.filename = self.sanitize_filename(filename)
+        if Path(self.filename).suffix.lower() in self.DANGEROUS_EXTENSIONS:
+            raise FileValidationError(
+                f"Dangerous file extension: {Path(self.filename).suffix.lower()}"
+            )
+        limit = max_size_mb or self.ALLOWED_TYPES[file_type]["max_size_mb"]
+        self.max_bytes = int(limit * 1024 * 1024)
+
+        if spool_dir:
+            Path(spool_dir).mkdir(parents=True, exist_ok=True)
+            self._spool = tempfile.NamedTemporaryFile(
+                dir=spool_dir, suffix=".upload", delete=False
+            )
+            self.spool_path: Optional[str] = self._spool.name
+        else:
+            self._spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+            self.spool_path = None
+
+        self._hasher = hashlib.sha256()
+        self._size = 0
+        self._head = b""
+        self._mime_type: Optional[str] = None
+        self._warnings: List[str] = []
+        self._tail = b""
+        self._token_overlap = max(len(t) for t in self.DANGEROUS_PDF_TOKENS) - 1
+
+    def feed(self, chunk: bytes) -> None:
+        """Validate, hash and spool the next chunk"""
+        if not chunk:
+            return
+        self._size += len(chunk)
+        if self._size > self.max_bytes:
+            raise FileValidationError(
+                f"File too large: exceeds {self.max_bytes / (1024 * 1024):.0f}MB limit "
+                f"for {self.expected_type} files"
+            )
+
+        if self._mime_type is None:
+            self._head += chunk[: self.MAGIC_PROBE_BYTES]
+            if len(self._head) >= self.MAGIC_PROBE_BYTES:
+                self._check_header()
+
+        if self.expected_type == "pdf":
+            window = self._tail + chunk
+            if any(token in window for token in self.DANGEROUS_PDF_TOKENS):
+                raise FileValidationError("PDF contains potentially dangerous content")
+            self._tail = window[-self._token_overlap :]
+
+        self._hasher.update(chunk)
+        self._spool.write(chunk)
+
+    def _check_header(self) -> None:
+        detected = self._detect_by_magic_bytes(self._head)
+        if detected is None or detected[0] != self.expected_type:
+            raise FileValidationError(
+                f"Upload does not look like a {self.expected_type} file "
+                "(magic bytes mismatch)"
+            )
+        self._mime_type = detected[1]
+
+        if self.expected_type == "audio":
+            self._validate_audio_content(self._head, {"warnings": self._warnings})
+        elif self.expected_type == "pdf":
+            self._validate_pdf_content(self._head, {"warnings": self._warnings})
+
+    def finish(self) -> StreamedUpload:
+        """Complete validation and return the spooled upload, rewound"""
+        if self._size == 0:
+            raise FileValidationError("Empty upload")
+        if self._mime_type is None:
+            self._check_header()
+        self._spool.flush()
+        self._spool.seek(0)
+        return StreamedUpload(
+            file=self._spool,
+            filename=self.filename,
+            file_type=self.expected_type,
+            mime_type=self._mime_type,
+            size_bytes=self._size,
+            hash_sha256=self._hasher.hexdigest(),
+            warnings=self._warnings,
+            path=self.spool_path,
+        )
+
+    def abort(self) -> None:
+        """Discard the partially spooled upload"""
+        try:
+            self._spool.close()
+        finally:
+            if self.spool_path and os.path.exists(self.spool_path):
+                os.remove(self.spool_path)
+
+
+async def spool_upload(
+    chunks: AsyncIterator[bytes],
+    file_type: str,
+    filename: str,
+    max_size_mb: Optional[float] = None,
+    spool_dir: Optional[str] = None,
+) -> StreamedUpload:
+    """
+    Consume an async byte stream into a validated, spooled upload
+
+    Peak memory is bounded by the chunk size plus the spool threshold,
+    independent of the upload size.
+
+    Raises:
+        FileValidationError: If the stream fails validation; nothing is kept
+    """
+    validator = StreamingUploadValidator(
+        file_type, filename, max_size_mb=max_size_mb, spool_dir=spool_dir
+    )
+    try:
+        async for chunk in chunks:
+            validator.feed(chunk)
+        return validator.finish()
+    except BaseException:
+        validator.abort()
+        raise
+
+
 # Configuration for environment-based limits
 def get_file_size_limits() -> Dict[str, int]:
     """Get file size limits from environment variables"""
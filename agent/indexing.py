@@ -1,17 +1,22 @@
 # agent/indexing.py
+import asyncio
 import hashlib
 import os
 from pathlib import Path
-from typing import Any, Dict, Optional
-
-import requests
-from bs4 import BeautifulSoup
-from pypdf import PdfReader
-from readability import Document
+from typing import Any, Dict, List, Optional
 
+from .lazy_imports import LazyAttribute, LazyModule
 from .settings import get_settings
+from .single_flight import SingleFlight
+from .spans import current_span, traced
 from .utils import safe_call
 
+# Parsers and HTTP are only needed once something is indexed
+requests = LazyModule("requests")
+BeautifulSoup = LazyAttribute("bs4", "BeautifulSoup")
+PdfReader = LazyAttribute("pypdf", "PdfReader")
+Document = LazyAttribute("readability", "Document")
+
 try:
     from .embeddings import EmbeddingsManager
 except ImportError:
@@ -40,6 +45,33 @@ class VaultIndexer:
                 cache_dir = "agent/cache"
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._web_fetcher = None
+        self._pdf_extractor = None
+        # Concurrent fetches of the same URL share one download
+        self._fetch_flights = SingleFlight()
+
+    @property
+    def pdf_extractor(self):
+        """Page-parallel PDF extractor with a per-page text cache"""
+        if self._pdf_extractor is None:
+            from .pdf_extraction import PDFPageExtractor
+
+            self._pdf_extractor = PDFPageExtractor(str(self.cache_dir))
+        return self._pdf_extractor
+
+    @property
+    def web_fetcher(self):
+        """Shared async fetcher (connection pool + revalidating disk cache)"""
+        if self._web_fetcher is None:
+            from .web_fetcher import AsyncWebFetcher
+
+            self._web_fetcher = AsyncWebFetcher(str(self.cache_dir))
+        return self._web_fetcher
+
+    async def close_web_fetcher(self):
+        if self._web_fetcher is not None:
+            await self._web_fetcher.aclose()
+            self._web_fetcher = None
 
     # -------------------
     # Helper functions
@@ -140,6 +172,19 @@ class VaultIndexer:
     # Vault / Markdown
     # -------------------
 
+    def _add_chunks(self, content: str, path: str) -> int:
+        """Chunk a document and add it with offsets locating each chunk in it.
+
+        Returns the number of chunks.
+        """
+        spans = self.emb_mgr.chunk_spans(content)
+        if spans and getattr(self.emb_mgr, "add_documents", None):
+            self.emb_mgr.add_documents(
+                [span.text(content) for span in spans],
+                [{"note_path": path, **span.metadata()} for span in spans],
+            )
+        return len(spans)
+
     def index_vault(self, vault_path: str) -> Dict[str, int]:
         """Index all Markdown and PDF files in a vault directory."""
         results = {}
@@ -155,14 +200,7 @@ class VaultIndexer:
                         content = self._read_pdf(fp)
 
                     if content:
-                        chunks = (
-                            self.emb_mgr.chunk_text(content)
-                            if getattr(self.emb_mgr, "chunk_text", None)
-                            else [content]
-                        )
-                        if chunks and getattr(self.emb_mgr, "add_documents", None):
-                            self.emb_mgr.add_documents(chunks)
-                        results[fp] = len(chunks)
+                        results[fp] = self._add_chunks(content, fp)
 
                 safe_call(
                     do_index, error_msg=f"[VaultIndexer] Error indexing {full_path}"
@@ -181,15 +219,7 @@ class VaultIndexer:
         summary = {"files": 0, "chunks": 0}
 
         # Always attempt to clear collection even if directory doesn't exist
-        if getattr(self.emb_mgr, "clear_collection", None):
-            safe_call(
-                self.emb_mgr.clear_collection,
-                error_msg="[VaultIndexer] Error clearing collection",
-            )
-        elif getattr(self.emb_mgr, "reset_db", None):
-            safe_call(
-                self.emb_mgr.reset_db, error_msg="[VaultIndexer] Error resetting DB"
-            )
+        self.clear_index()
 
         if not os.path.isdir(vault_path):
             return summary
@@ -209,20 +239,13 @@ class VaultIndexer:
                     if not content:
                         return 0
 
-                    chunks = (
-                        self.emb_mgr.chunk_text(content)
-                        if getattr(self.emb_mgr, "chunk_text", None)
-                        else [content]
-                    )
-                    if not chunks:
+                    added = self._add_chunks(content, fp)
+                    if not added:
                         return 0
 
-                    if getattr(self.emb_mgr, "add_documents", None):
-                        self.emb_mgr.add_documents(chunks)
-
                     summary["files"] += 1
-                    summary["chunks"] += len(chunks)
-                    return len(chunks)
+                    summary["chunks"] += added
+                    return added
 
                 safe_call(
                     do_index_file,
@@ -231,21 +254,92 @@ class VaultIndexer:
 
         return summary
 
+    def clear_index(self) -> None:
+        """Clear the embeddings collection (or reset the DB as a fallback)."""
+        if getattr(self.emb_mgr, "clear_collection", None):
+            safe_call(
+                self.emb_mgr.clear_collection,
+                error_msg="[VaultIndexer] Error clearing collection",
+            )
+        elif getattr(self.emb_mgr, "reset_db", None):
+            safe_call(
+                self.emb_mgr.reset_db, error_msg="[VaultIndexer] Error resetting DB"
+            )
+
+    def list_vault_documents(self, vault_path: str) -> List[str]:
+        """Markdown and PDF files under ``vault_path`` in a stable sorted order.
+
+        The order is deterministic so background jobs can resume after the
+        last committed file.
+        """
+        documents = []
+        for root, _, files in os.walk(vault_path):
+            for file in files:
+                if file.endswith((".md", ".pdf")):
+                    documents.append(os.path.join(root, file))
+        return sorted(documents)
+
+    @traced("indexer.index_document")
+    def index_document(self, path: str) -> int:
+        """Index one Markdown or PDF file; returns the number of chunks added.
+
+        Errors propagate so callers (e.g. background jobs) can record them.
+        """
+        if path.endswith(".pdf"):
+            return self._index_pdf_pages(path)
+        if not path.endswith(".md"):
+            return 0
+        content = self._read_markdown(path)
+        if not content:
+            return 0
+
+        added = self._add_chunks(content, path)
+        current_span().set_attribute("index.chunks", added)
+        return added
+
     # -------------------
     # PDF
     # -------------------
 
+    def _index_pdf_pages(self, pdf_path: str, batch_size: int = 64) -> int:
+        """Chunk and embed a PDF page by page; returns the number of chunks.
+
+        Pages come from the per-page cache when the file is unchanged, and at
+        most ``batch_size`` chunks are buffered before they are added.
+        """
+        total = 0
+        chunks: List[str] = []
+        metadatas: List[Dict[str, Any]] = []
+        seen = set()
+
+        def flush():
+            if chunks:
+                self.emb_mgr.add_documents(list(chunks), list(metadatas))
+                chunks.clear()
+                metadatas.clear()
+                seen.clear()
+
+        for page, text in self.pdf_extractor.iter_pages(pdf_path):
+            for chunk in self.emb_mgr.chunk_text(text) if text else []:
+                total += 1
+                # Repeated boilerplate would collide on content-hash ids
+                if chunk in seen:
+                    continue
+                seen.add(chunk)
+                chunks.append(chunk)
+                metadatas.append({"note_path": pdf_path, "page": page})
+                if len(chunks) >= batch_size:
+                    flush()
+        flush()
+        return total
+
     def index_pdf(self, pdf_path: str) -> int:
-        """Extract and embed a PDF."""
+        """Extract and embed a PDF, streaming page by page."""
 
         def do_index_pdf():
-            # Use the internal, safe-called method for reading PDFs
-            text = self._read_pdf(pdf_path)
-            if not text:
+            if not Path(pdf_path).exists():
                 return 0
-            cache_key = self._hash_url(pdf_path)
-            cached_path = self._cache_file(cache_key, text)
-            return self.emb_mgr.index_file(str(cached_path))
+            return self._index_pdf_pages(pdf_path)
 
         return safe_call(
             do_index_pdf,
@@ -259,6 +353,11 @@ class VaultIndexer:
 
     def fetch_web_page(self, url: str, force: bool = False) -> Optional[str]:
         """Fetch and sanitize a web page with caching."""
+        return self._fetch_flights.do(
+            ("sync", url, force), self._fetch_web_page, url, force
+        )
+
+    def _fetch_web_page(self, url: str, force: bool) -> Optional[str]:
         cache_key = self._hash_url(url)
         cache_path = self.cache_dir / f"{cache_key}.txt"
 
@@ -291,6 +390,37 @@ class VaultIndexer:
             do_fetch, error_msg=f"[VaultIndexer] Failed to fetch {url}", default=None
         )
 
+    async def fetch_web_page_async(
+        self, url: str, force: bool = False
+    ) -> Optional[str]:
+        """Non-blocking ``fetch_web_page`` that revalidates stale cache entries."""
+        return await self._fetch_flights.do_async(
+            ("async", url, force), self.web_fetcher.fetch, url, force=force
+        )
+
+    async def index_web_pages(
+        self, urls: List[str], force: bool = False
+    ) -> Dict[str, int]:
+        """Fetch a batch of URLs concurrently and embed each page.
+
+        Returns {url: chunks indexed}; pages that could not be fetched map to 0.
+        """
+        texts = await self.web_fetcher.fetch_many(urls, force=force)
+        results = {}
+        for url, text in texts.items():
+            if not text:
+                results[url] = 0
+                continue
+            cached_path = self.cache_dir / f"{self._hash_url(url)}.txt"
+            # Embedding and the vector DB write block: keep them off the loop
+            results[url] = await asyncio.to_thread(
+                safe_call,
+                lambda p=cached_path: self.emb_mgr.index_file(str(p)),
+                error_msg=f"[VaultIndexer] Error indexing web page {url}",
+                default=0,
+            )
+        return results
+
     def index_web_page(self, url: str, force: bool = False) -> int:
         """Fetch and embed a web page."""
 
@@ -361,6 +491,19 @@ class IndexingService:
     def index_pdf(self, pdf_path: str) -> int:
         return self.vault_indexer.index_pdf(pdf_path)
 
+    async def fetch_web_page_async(
+        self, url: str, force: bool = False
+    ) -> Optional[str]:
+        return await self.vault_indexer.fetch_web_page_async(url, force=force)
+
+    async def index_web_pages(
+        self, urls: List[str], force: bool = False
+    ) -> Dict[str, int]:
+        return await self.vault_indexer.index_web_pages(urls, force=force)
+
+    async def close_web_fetcher(self):
+        await self.vault_indexer.close_web_fetcher()
+
     def index_web_page(self, url: str, force: bool = False) -> int:
         return self.vault_indexer.index_web_page(url, force=force)
 
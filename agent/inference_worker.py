@@ -0,0 +1,558 @@
+"""
+Inference Worker
+One process owns the loaded LLMs (llama.cpp / GPT4All) and serves every API
+worker over a Unix domain socket, so N uvicorn workers share one copy of each
+model and pay for one cold load.
+
+Protocol: every frame is a 4-byte big-endian length followed by a UTF-8 JSON
+object. Requests carry a client-chosen ``id`` so many generations can be in
+flight on one connection:
+
+- ``{"op": "generate", "id", "model", "model_path", "n_ctx", "prompt",
+  "max_tokens", "stop", "deadline_ms"}`` streams ``{"id", "type": "token",
+  "text"}`` frames and ends with ``{"id", "type": "done", "text", "reason"}``
+  (reason ``complete``, ``cancelled`` or ``deadline``) or
+  ``{"id", "type": "error", "error"}``
+- ``{"op": "cancel", "id"}`` stops that generation at the next token
+- ``{"op": "ping", "id"}`` answers ``{"id", "type": "pong", "models": {...}}``
+
+Run with ``python -m agent.inference_worker --socket /run/obsidian-ai/llm.sock``
+and point the API workers at it with ``INFERENCE_SOCKET``.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import queue
+import socket
+import struct
+import threading
+import time
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+_HEADER = struct.Struct(">I")
+MAX_FRAME = 16 * 1024 * 1024
+
+
+class InferenceWorkerError(RuntimeError):
+    """The worker is unreachable or failed the request"""
+
+
+def encode_frame(message: Dict[str, Any]) -> bytes:
+    data = json.dumps(message, separators=(",", ":")).encode("utf-8")
+    if len(data) > MAX_FRAME:
+        raise ValueError("frame too large")
+    return _HEADER.pack(len(data)) + data
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Optional[Dict[str, Any]]:
+    """Next frame from an asyncio stream, or None at EOF"""
+    try:
+        header = await reader.readexactly(_HEADER.size)
+        (length,) = _HEADER.unpack(header)
+        if length > MAX_FRAME:
+            raise ValueError("frame too large")
+        return json.loads(await reader.readexactly(length))
+    except asyncio.IncompleteReadError:
+        return None
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> Optional[bytes]:
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def recv_frame(sock: socket.socket) -> Optional[Dict[str, Any]]:
+    """Next frame from a blocking socket, or None at EOF"""
+    header = _recv_exactly(sock, _HEADER.size)
+    if header is None:
+        return None
+    (length,) = _HEADER.unpack(header)
+    if length > MAX_FRAME:
+        raise ValueError("frame too large")
+    data = _recv_exactly(sock, length)
+    return None if data is None else json.loads(data)
+
+
+# -------------------
+# Model backends
+# -------------------
+class LocalModelBackend:
+    """Loads llama.cpp / GPT4All models once and streams their tokens
+
+    Instances are keyed by (model, path, n_ctx); each has a lock because
+    neither library supports concurrent generation on one instance.
+    """
+
+    def __init__(self, n_threads: int = 4):
+        self.n_threads = n_threads
+        self._models: Dict[Tuple[str, str, int], Tuple[Any, threading.Lock]] = {}
+        self._lock = threading.Lock()
+
+    def available(self) -> Dict[str, bool]:
+        from .llm_router import GPT4All, Llama
+
+        return {"llama": bool(Llama), "gpt4all": bool(GPT4All)}
+
+    def _load(self, model: str, model_path: str, n_ctx: int):
+        from .llm_router import GPT4All, Llama
+
+        key = (model, model_path, n_ctx)
+        with self._lock:
+            if key not in self._models:
+                if not os.path.exists(model_path):
+                    raise FileNotFoundError(model_path)
+                if model == "llama":
+                    instance = Llama(
+                        model_path=model_path, n_ctx=n_ctx, n_threads=self.n_threads
+                    )
+                elif model == "gpt4all":
+                    instance = GPT4All(model_name=model_path)
+                else:
+                    raise ValueError(f"unknown model type {model!r}")
+                logging.info("[InferenceWorker] Loaded %s model %s", model, model_path)
+                self._models[key] = (instance, threading.Lock())
+            return self._models[key]
+
+    def stream(
+        self,
+        model: str,
+        model_path: str,
+        n_ctx: int,
+        prompt: str,
+        max_tokens: int,
+        stop: Optional[List[str]] = None,
+    ) -> Iterator[str]:
+        instance, lock = self._load(model, model_path, n_ctx)
+        with lock:
+            if model == "llama":
+                chunks = instance(
+                    prompt=prompt, max_tokens=max_tokens, stop=stop or [], stream=True
+                )
+                for chunk in chunks:
+                    yield chunk["choices"][0]["text"]
+            else:
+                yield from instance.generate(
+                    prompt, max_tokens=max_tokens, streaming=True
+                )
+
+    def loaded(self) -> List[str]:
+        with self._lock:
+            return [f"{model}:{path}" for model, path, _ in self._models]
+
+
+FAKE_VOCABULARY = (
+    "the vault note links to a summary of each idea and its sources".split()
+)
+
+
+def fake_tokens(prompt: str, count: int) -> List[str]:
+    """The tokens FakeBackend emits for ``prompt`` (deterministic)"""
+    seed = zlib.crc32(prompt.encode("utf-8"))
+    n = len(FAKE_VOCABULARY)
+    return [FAKE_VOCABULARY[(seed + i * 7) % n] + " " for i in range(count)]
+
+
+class FakeBackend:
+    """Deterministic tokens at a fixed rate, for tests and benchmarks"""
+
+    def __init__(self, tokens_per_second: float = 200.0, load_seconds: float = 0.0):
+        self.tokens_per_second = tokens_per_second
+        self.load_seconds = load_seconds
+        self.loads = 0
+        self._loaded: set = set()
+        self._lock = threading.Lock()
+
+    def available(self) -> Dict[str, bool]:
+        return {"llama": True, "gpt4all": True}
+
+    def stream(self, model, model_path, n_ctx, prompt, max_tokens, stop=None):
+        with self._lock:
+            if (model, model_path) not in self._loaded:
+                time.sleep(self.load_seconds)
+                self._loaded.add((model, model_path))
+                self.loads += 1
+        delay = 1.0 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+        for token in fake_tokens(prompt, max_tokens):
+            if delay:
+                time.sleep(delay)
+            yield token
+
+    def loaded(self) -> List[str]:
+        with self._lock:
+            return [f"{model}:{path}" for model, path in self._loaded]
+
+
+# -------------------
+# Worker (server side)
+# -------------------
+class InferenceWorker:
+    """Serves generations from one backend to many clients over a UDS"""
+
+    def __init__(self, socket_path: str, backend=None, max_concurrency: int = 4):
+        self.socket_path = socket_path
+        self.backend = backend if backend is not None else LocalModelBackend()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="inference"
+        )
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._handlers: set = set()
+        self._cancels: set = set()
+        self.stats = {"requests": 0, "completed": 0, "cancelled": 0, "errors": 0}
+
+    async def start_serving(self):
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)  # Stale socket from a previous run
+        os.makedirs(os.path.dirname(self.socket_path) or ".", exist_ok=True)
+        self._loop = asyncio.get_running_loop()
+        self._server = await asyncio.start_unix_server(
+            self._handle, path=self.socket_path
+        )
+        os.chmod(self.socket_path, 0o600)
+        logging.info("[InferenceWorker] Listening on %s", self.socket_path)
+
+    async def serve_forever(self):
+        await self.start_serving()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def start(self):
+        """Serve from a background thread; returns once the socket is bound"""
+        ready = threading.Event()
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(self.start_serving())
+            ready.set()
+            loop.run_forever()
+            loop.close()
+
+        self._thread = threading.Thread(
+            target=run, name="inference-worker", daemon=True
+        )
+        self._thread.start()
+        ready.wait(10)
+        return self
+
+    def stop(self):
+        """Cancel in-flight generations, close connections and the socket"""
+        for cancel in list(self._cancels):
+            cancel.set()
+        # Generation threads finish (and send their last frame) before the
+        # loop they write through goes away
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        if self._loop and self._thread:
+            asyncio.run_coroutine_threadsafe(self._close(), self._loop).result(5)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(5)
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    async def _close(self):
+        self._server.close()
+        for task in list(self._handlers):
+            task.cancel()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+
+    async def _handle(self, reader, writer):
+        write_lock = asyncio.Lock()
+        in_flight: Dict[str, threading.Event] = {}
+        handler = asyncio.current_task()
+        self._handlers.add(handler)
+
+        async def send(message):
+            async with write_lock:
+                writer.write(encode_frame(message))
+                await writer.drain()
+
+        try:
+            while True:
+                message = await read_frame(reader)
+                if message is None:
+                    break
+                op, request_id = message.get("op"), message.get("id")
+                if op == "generate":
+                    cancel = threading.Event()
+                    in_flight[request_id] = cancel
+                    self._cancels.add(cancel)
+                    self.stats["requests"] += 1
+                    # The budget covers time spent queued for a generation
+                    # thread, not just the generation itself
+                    deadline_ms = message.get("deadline_ms")
+                    deadline = (
+                        time.monotonic() + deadline_ms / 1000.0 if deadline_ms else None
+                    )
+                    task = self._loop.run_in_executor(
+                        self._executor, self._generate, message, cancel, send, deadline
+                    )
+                    task.add_done_callback(
+                        lambda _, rid=request_id: self._cancels.discard(
+                            in_flight.pop(rid, None)
+                        )
+                    )
+                elif op == "cancel":
+                    if request_id in in_flight:
+                        in_flight[request_id].set()
+                elif op == "ping":
+                    await send(
+                        {
+                            "id": request_id,
+                            "type": "pong",
+                            "models": self.backend.available(),
+                            "loaded": self.backend.loaded(),
+                            "stats": dict(self.stats),
+                        }
+                    )
+                else:
+                    await send({"id": request_id, "type": "error", "error": "bad op"})
+        except (ConnectionError, ValueError) as e:
+            logging.warning("[InferenceWorker] Dropping connection: %s", e)
+        finally:
+            # A client that went away gets nothing more; stop its generations
+            for cancel in in_flight.values():
+                cancel.set()
+            self._handlers.discard(handler)
+            writer.close()
+
+    def _generate(
+        self,
+        message,
+        cancel: threading.Event,
+        send,
+        deadline: Optional[float] = None,
+    ):
+        request_id = message.get("id")
+
+        def emit(frame):
+            asyncio.run_coroutine_threadsafe(send(frame), self._loop).result()
+
+        parts: List[str] = []
+        reason = "complete"
+        try:
+            if deadline is not None and time.monotonic() > deadline:
+                # Expired while queued behind other generations
+                reason = "deadline"
+            else:
+                tokens = self.backend.stream(
+                    message.get("model", "llama"),
+                    message.get("model_path", ""),
+                    int(message.get("n_ctx", 2048)),
+                    message.get("prompt", ""),
+                    int(message.get("max_tokens", 512)),
+                    message.get("stop"),
+                )
+                try:
+                    for token in tokens:
+                        if cancel.is_set():
+                            reason = "cancelled"
+                            break
+                        if deadline is not None and time.monotonic() > deadline:
+                            reason = "deadline"
+                            break
+                        parts.append(token)
+                        emit({"id": request_id, "type": "token", "text": token})
+                finally:
+                    tokens.close()
+            if reason == "cancelled":
+                self.stats["cancelled"] += 1
+            else:
+                self.stats["completed"] += 1
+            done = {"id": request_id, "type": "done", "reason": reason}
+            emit({**done, "text": "".join(parts)})
+        except Exception as e:
+            self.stats["errors"] += 1
+            logging.warning("[InferenceWorker] Generation failed: %s", e)
+            try:
+                emit({"id": request_id, "type": "error", "error": str(e)})
+            except Exception:
+                pass  # Connection already gone
+
+
+# -------------------
+# Client (API worker side)
+# -------------------
+class InferenceClient:
+    """Thread-safe client multiplexing requests over one worker connection"""
+
+    def __init__(self, socket_path: str, timeout: float = 120.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._pending: Dict[str, queue.Queue] = {}
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+
+    def _connection(self) -> socket.socket:
+        with self._lock:
+            if self._sock is None:
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                try:
+                    sock.connect(self.socket_path)
+                except OSError as e:
+                    sock.close()
+                    raise InferenceWorkerError(
+                        f"inference worker unavailable at {self.socket_path}: {e}"
+                    ) from e
+                self._sock = sock
+                threading.Thread(
+                    target=self._read_loop, args=(sock,), daemon=True
+                ).start()
+            return self._sock
+
+    def _read_loop(self, sock: socket.socket):
+        try:
+            while True:
+                frame = recv_frame(sock)
+                if frame is None:
+                    break
+                with self._lock:
+                    inbox = self._pending.get(frame.get("id"))
+                if inbox is not None:
+                    inbox.put(frame)
+        except (OSError, ValueError):
+            pass
+        with self._lock:
+            if self._sock is sock:
+                self._sock = None
+            pending = list(self._pending.values())
+        for inbox in pending:
+            inbox.put({"type": "error", "error": "inference worker connection lost"})
+        sock.close()
+
+    def _send(self, message: Dict[str, Any]):
+        sock = self._connection()
+        try:
+            with self._send_lock:
+                sock.sendall(encode_frame(message))
+        except OSError as e:
+            raise InferenceWorkerError(f"inference worker send failed: {e}") from e
+
+    def _frames(self, message: Dict[str, Any], timeout: float) -> Iterator[Dict]:
+        request_id = message["id"]
+        inbox: queue.Queue = queue.Queue()
+        with self._lock:
+            self._pending[request_id] = inbox
+        finished = False
+        try:
+            self._send(message)
+            end = time.monotonic() + timeout
+            while True:
+                try:
+                    frame = inbox.get(timeout=max(0.0, end - time.monotonic()))
+                except queue.Empty as err:
+                    raise TimeoutError(
+                        f"inference request {request_id} timed out"
+                    ) from err
+                if frame.get("type") == "error":
+                    raise InferenceWorkerError(frame.get("error", "unknown error"))
+                finished = frame.get("type") in ("done", "pong")
+                yield frame
+                if finished:
+                    return
+        finally:
+            with self._lock:
+                self._pending.pop(request_id, None)
+            if not finished and message.get("op") == "generate":
+                # Abandoned (timeout, error or caller stopped iterating)
+                try:
+                    self.cancel(request_id)
+                except InferenceWorkerError:
+                    pass
+
+    def stream(
+        self,
+        prompt: str,
+        *,
+        model: str = "llama",
+        model_path: str = "",
+        n_ctx: int = 2048,
+        max_tokens: int = 512,
+        stop: Optional[List[str]] = None,
+        timeout: Optional[float] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Token frames then the final ``done`` frame of one generation"""
+        timeout = self.timeout if timeout is None else timeout
+        message = {
+            "op": "generate",
+            "id": uuid.uuid4().hex,
+            "model": model,
+            "model_path": model_path,
+            "n_ctx": n_ctx,
+            "prompt": prompt,
+            "max_tokens": max_tokens,
+            "stop": stop,
+            "deadline_ms": int(timeout * 1000),
+        }
+        # The worker stops at the deadline; allow a little longer for the reply
+        return self._frames(message, timeout + 1.0)
+
+    def generate(self, prompt: str, **kwargs) -> str:
+        for frame in self.stream(prompt, **kwargs):
+            if frame["type"] == "done":
+                if frame.get("reason") == "deadline":
+                    raise TimeoutError("inference deadline exceeded")
+                return frame["text"]
+        raise InferenceWorkerError("generation ended without a result")
+
+    def cancel(self, request_id: str):
+        self._send({"op": "cancel", "id": request_id})
+
+    def ping(self, timeout: float = 5.0) -> Dict[str, Any]:
+        for frame in self._frames({"op": "ping", "id": uuid.uuid4().hex}, timeout):
+            return frame
+        raise InferenceWorkerError("no reply to ping")
+
+    def close(self):
+        with self._lock:
+            sock, self._sock = self._sock, None
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Shared LLM inference worker")
+    parser.add_argument("--socket", default=os.getenv("INFERENCE_SOCKET"))
+    parser.add_argument("--max-concurrency", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=4, help="llama.cpp threads")
+    parser.add_argument(
+        "--fake",
+        type=float,
+        metavar="TOKENS_PER_SECOND",
+        help="Serve deterministic fake tokens instead of loading models",
+    )
+    args = parser.parse_args(argv)
+    if not args.socket:
+        parser.error("--socket or INFERENCE_SOCKET is required")
+    logging.basicConfig(level=logging.INFO)
+    backend = (
+        FakeBackend(args.fake)
+        if args.fake is not None
+        else LocalModelBackend(n_threads=args.threads)
+    )
+    worker = InferenceWorker(args.socket, backend, args.max_concurrency)
+    try:
+        asyncio.run(worker.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,536 @@
+# agent/jobs.py
+
+"""
+Durable background jobs for long-running indexing work.
+
+Jobs (``reindex``, ``scan_vault``, ``index_pdf``) are persisted in a SQLite
+table and executed on the shared ``AsyncTaskQueue``:
+- Submitting returns a job ID immediately
+- Progress (files/chunks done, throughput, ETA) is committed per file
+- Jobs can be cancelled between files
+- Interrupted jobs resume from the last committed file; failed files are retried
+- Submitting the same target while a job is active returns the existing job
+- A job submitted for a tenant runs against that tenant's own indexer
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from enum import Enum
+from typing import Any, Callable, ContextManager, Dict, List, Optional, Set, Tuple
+
+from .performance import AsyncTaskQueue, get_task_queue
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatus(Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+ACTIVE_STATUSES = (JobStatus.QUEUED.value, JobStatus.RUNNING.value)
+JOB_KINDS = ("reindex", "scan_vault", "index_pdf")
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job when cancellation was requested"""
+
+
+class JobStore:
+    """SQLite persistence for jobs and their committed files"""
+
+    _COLUMNS = (
+        "job_id",
+        "kind",
+        "target",
+        "dedupe_key",
+        "status",
+        "created_at",
+        "started_at",
+        "finished_at",
+        "files_total",
+        "files_done",
+        "files_failed",
+        "chunks_done",
+        "resumed_files",
+        "resumed_chunks",
+        "error",
+        "result",
+        "tenant_id",
+    )
+
+    def __init__(self, db_path: str):
+        self.db_path = str(db_path)
+        if self.db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    target TEXT NOT NULL,
+                    dedupe_key TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    files_total INTEGER,
+                    files_done INTEGER NOT NULL DEFAULT 0,
+                    files_failed INTEGER NOT NULL DEFAULT 0,
+                    chunks_done INTEGER NOT NULL DEFAULT 0,
+                    resumed_files INTEGER NOT NULL DEFAULT 0,
+                    resumed_chunks INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    result TEXT,
+                    tenant_id TEXT
+                )
+                """
+            )
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+            if "tenant_id" not in columns:
+                self._conn.execute("ALTER TABLE jobs ADD COLUMN tenant_id TEXT")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_jobs_dedupe ON jobs(dedupe_key, status)"
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS job_files (
+                    job_id TEXT NOT NULL,
+                    path TEXT NOT NULL,
+                    chunks INTEGER NOT NULL,
+                    error TEXT,
+                    PRIMARY KEY (job_id, path)
+                )
+                """
+            )
+
+    def _row(self, row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def create(
+        self,
+        kind: str,
+        target: str,
+        dedupe_key: str,
+        tenant_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        job_id = uuid.uuid4().hex
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (job_id, kind, target, dedupe_key, status,"
+                " created_at, tenant_id) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    job_id,
+                    kind,
+                    target,
+                    dedupe_key,
+                    JobStatus.QUEUED.value,
+                    time.time(),
+                    tenant_id,
+                ),
+            )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        return self._row(row)
+
+    def find_active(self, dedupe_key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM jobs WHERE dedupe_key = ? AND status IN (?, ?)"
+                " ORDER BY created_at LIMIT 1",
+                (dedupe_key, *ACTIVE_STATUSES),
+            ).fetchone()
+        return self._row(row)
+
+    def list(
+        self,
+        status: Optional[str] = None,
+        limit: int = 50,
+        tenant_id: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        query = "SELECT * FROM jobs WHERE tenant_id IS ?"
+        params: Tuple = (tenant_id,)
+        if status:
+            query += " AND status = ?"
+            params += (status,)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(query, (*params, limit)).fetchall()
+        return [self._row(row) for row in rows]
+
+    def with_status(self, statuses: Tuple[str, ...]) -> List[Dict[str, Any]]:
+        placeholders = ",".join("?" for _ in statuses)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM jobs WHERE status IN ({placeholders})"  # nosec B608
+                " ORDER BY created_at",
+                statuses,
+            ).fetchall()
+        return [self._row(row) for row in rows]
+
+    def _assignments(self, fields: Dict[str, Any]) -> str:
+        unknown = set(fields) - set(self._COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown job fields: {sorted(unknown)}")
+        if "result" in fields and fields["result"] is not None:
+            fields["result"] = json.dumps(fields["result"])
+        return ", ".join(f"{name} = ?" for name in fields)
+
+    def update(self, job_id: str, **fields) -> None:
+        assignments = self._assignments(fields)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE job_id = ?",  # nosec B608
+                (*fields.values(), job_id),
+            )
+
+    def transition(self, job_id: str, current: str, status: str, **fields) -> bool:
+        """Move a job to ``status`` only if it is still ``current``"""
+        fields = {"status": status, **fields}
+        assignments = self._assignments(fields)
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                f"UPDATE jobs SET {assignments}"  # nosec B608
+                " WHERE job_id = ? AND status = ?",
+                (*fields.values(), job_id, current),
+            )
+        return cursor.rowcount == 1
+
+    def commit_file(
+        self, job_id: str, path: str, chunks: int, error: Optional[str] = None
+    ) -> None:
+        """
+        Record a processed file and advance the job counters atomically
+
+        A file that failed before is replaced by its retry: it stays counted
+        once in ``files_done`` and leaves ``files_failed`` if it now succeeds.
+        """
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT error FROM job_files WHERE job_id = ? AND path = ?",
+                (job_id, path),
+            ).fetchone()
+            if row is not None and row["error"] is None:
+                return  # Already committed
+            self._conn.execute(
+                "INSERT OR REPLACE INTO job_files (job_id, path, chunks, error)"
+                " VALUES (?, ?, ?, ?)",
+                (job_id, path, chunks, error),
+            )
+            self._conn.execute(
+                "UPDATE jobs SET files_done = files_done + ?,"
+                " files_failed = files_failed + ?,"
+                " chunks_done = chunks_done + ? WHERE job_id = ?",
+                (
+                    0 if row is not None else 1,
+                    (1 if error else 0) - (1 if row is not None else 0),
+                    chunks,
+                    job_id,
+                ),
+            )
+
+    def committed_files(self, job_id: str) -> Set[str]:
+        """Files indexed successfully; failed ones are retried on resume"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path FROM job_files WHERE job_id = ? AND error IS NULL",
+                (job_id,),
+            ).fetchall()
+        return {row["path"] for row in rows}
+
+    def failed_files(self, job_id: str) -> Dict[str, str]:
+        """Path -> error of the files whose last attempt failed"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, error FROM job_files"
+                " WHERE job_id = ? AND error IS NOT NULL",
+                (job_id,),
+            ).fetchall()
+        return {row["path"]: row["error"] for row in rows}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class JobManager:
+    """
+    Submit, track, cancel and resume indexing jobs.
+
+    Args:
+        indexer_provider: Called with a job's tenant ID (None for the global
+            services); returns a context manager yielding the ``VaultIndexer``
+            to use, held for the whole run
+        store: Job persistence
+        task_queue: Queue to run jobs on (defaults to the global queue)
+    """
+
+    def __init__(
+        self,
+        indexer_provider: Callable[[Optional[str]], ContextManager[Any]],
+        store: JobStore,
+        task_queue: Optional[AsyncTaskQueue] = None,
+    ):
+        self.indexer_provider = indexer_provider
+        self.store = store
+        self.task_queue = task_queue
+        self._cancel_events: Dict[str, threading.Event] = {}
+        self._submit_lock = asyncio.Lock()
+        self._recovered = False
+
+    @staticmethod
+    def dedupe_key(kind: str, target: str, tenant_id: Optional[str] = None) -> str:
+        key = f"{kind}:{os.path.realpath(target)}"
+        return f"{tenant_id}/{key}" if tenant_id else key
+
+    async def submit(
+        self, kind: str, target: str, tenant_id: Optional[str] = None
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        Queue a job unless one for the same target (and tenant) is already active
+
+        Returns:
+            (job, created) - ``created`` is False for a deduplicated submit
+        """
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        key = self.dedupe_key(kind, target, tenant_id)
+        async with self._submit_lock:
+            existing = self.store.find_active(key)
+            if existing:
+                return self.describe(existing), False
+            job = self.store.create(kind, target, key, tenant_id)
+        await self._enqueue(job["job_id"])
+        return self.get(job["job_id"]), True
+
+    async def _enqueue(self, job_id: str) -> None:
+        queue = self.task_queue or await get_task_queue()
+        coro = self._run(job_id)
+        if not await queue.submit_task(coro, category="indexing"):
+            coro.close()
+            self.store.update(
+                job_id,
+                status=JobStatus.FAILED.value,
+                error="Task queue is full",
+                finished_at=time.time(),
+            )
+
+    async def _run(self, job_id: str) -> None:
+        job = self.store.get(job_id)
+        # Conditional on QUEUED so a concurrent cancel() cannot be overwritten
+        if not job or not self.store.transition(
+            job_id,
+            JobStatus.QUEUED.value,
+            JobStatus.RUNNING.value,
+            started_at=time.time(),
+            resumed_files=job["files_done"],
+            resumed_chunks=job["chunks_done"],
+        ):
+            return  # Cancelled (or already handled) while waiting in the queue
+
+        cancel_event = self._cancel_events.setdefault(job_id, threading.Event())
+        try:
+            result = await asyncio.to_thread(self._execute, job, cancel_event)
+            self.store.update(
+                job_id,
+                status=JobStatus.COMPLETED.value,
+                result=result,
+                finished_at=time.time(),
+            )
+        except JobCancelled:
+            self.store.update(
+                job_id, status=JobStatus.CANCELLED.value, finished_at=time.time()
+            )
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}")
+            self.store.update(
+                job_id,
+                status=JobStatus.FAILED.value,
+                error=str(e),
+                finished_at=time.time(),
+            )
+        finally:
+            self._cancel_events.pop(job_id, None)
+
+    def _execute(self, job: Dict[str, Any], cancel_event: threading.Event) -> dict:
+        """Blocking job body, run with the indexer of the job's tenant"""
+        with self.indexer_provider(job["tenant_id"]) as indexer:
+            if indexer is None:
+                raise RuntimeError("Indexing service is not available")
+            return self._index(job, indexer, cancel_event)
+
+    def _index(
+        self, job: Dict[str, Any], indexer: Any, cancel_event: threading.Event
+    ) -> dict:
+        """Index the job's documents; commits progress after every file"""
+        job_id, kind, target = job["job_id"], job["kind"], job["target"]
+        if kind == "index_pdf":
+            if not os.path.isfile(target):
+                raise FileNotFoundError(f"PDF not found: {target}")
+            documents = [target]
+        else:
+            if not os.path.isdir(target):
+                raise FileNotFoundError(f"Vault path not found: {target}")
+            documents = indexer.list_vault_documents(target)
+
+        committed = self.store.committed_files(job_id)
+        if kind == "reindex" and not job["files_done"]:
+            indexer.clear_index()  # Only on the first run, never when resuming
+        self.store.update(job_id, files_total=len(documents))
+
+        for path in documents:
+            if cancel_event.is_set():
+                raise JobCancelled(job_id)
+            if path in committed:
+                continue
+            try:
+                if kind == "index_pdf":
+                    chunks = indexer.index_pdf(path)
+                else:
+                    chunks = indexer.index_document(path)
+                self.store.commit_file(job_id, path, int(chunks or 0))
+            except Exception as e:
+                logger.warning(f"Job {job_id}: failed to index {path}: {e}")
+                self.store.commit_file(job_id, path, 0, error=str(e))
+
+        final = self.store.get(job_id)
+        return {
+            "files": final["files_done"] - final["files_failed"],
+            "chunks": final["chunks_done"],
+            "failed_files": final["files_failed"],
+        }
+
+    async def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Cancel a queued job now, or a running job after its current file"""
+        job = self.store.get(job_id)
+        if job is None:
+            return None
+        if not self.store.transition(
+            job_id,
+            JobStatus.QUEUED.value,
+            JobStatus.CANCELLED.value,
+            finished_at=time.time(),
+        ):
+            # Not queued (any more): stop it between files if it is running
+            if self.store.get(job_id)["status"] == JobStatus.RUNNING.value:
+                self._cancel_events.setdefault(job_id, threading.Event()).set()
+        return self.get(job_id)
+
+    async def resume(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Re-queue a failed or cancelled job, or a completed one with failed files
+
+        Files indexed successfully are skipped; failed files are retried.
+        """
+        job = self.store.get(job_id)
+        if job is None:
+            return None
+        retry_failures = (
+            job["status"] == JobStatus.COMPLETED.value and job["files_failed"] > 0
+        )
+        if not retry_failures and job["status"] not in (
+            JobStatus.FAILED.value,
+            JobStatus.CANCELLED.value,
+        ):
+            raise ValueError(f"Job {job_id} is {job['status']} and cannot be resumed")
+        async with self._submit_lock:
+            existing = self.store.find_active(job["dedupe_key"])
+            if existing:
+                return self.describe(existing)
+            self.store.update(
+                job_id, status=JobStatus.QUEUED.value, error=None, finished_at=None
+            )
+        await self._enqueue(job_id)
+        return self.get(job_id)
+
+    async def recover(self) -> int:
+        """Re-queue jobs left queued or running by a previous process"""
+        if self._recovered:
+            return 0
+        self._recovered = True
+        interrupted = self.store.with_status(ACTIVE_STATUSES)
+        for job in interrupted:
+            self.store.update(job["job_id"], status=JobStatus.QUEUED.value)
+            await self._enqueue(job["job_id"])
+        if interrupted:
+            logger.info(f"Resumed {len(interrupted)} interrupted job(s)")
+        return len(interrupted)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.store.get(job_id)
+        return self.describe(job) if job else None
+
+    def list_jobs(
+        self,
+        status: Optional[str] = None,
+        limit: int = 50,
+        tenant_id: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Jobs of one tenant (None: jobs run on the global services)"""
+        jobs = self.store.list(status, limit, tenant_id)
+        return [self.describe(job) for job in jobs]
+
+    @staticmethod
+    def describe(job: Dict[str, Any]) -> Dict[str, Any]:
+        """Public job view with throughput and ETA for the current run"""
+        total = job["files_total"]
+        done = job["files_done"]
+        throughput = chunk_rate = eta = None
+        if job["started_at"]:
+            end = job["finished_at"] or time.time()
+            elapsed = max(end - job["started_at"], 1e-6)
+            run_files = done - job["resumed_files"]
+            throughput = round(run_files / elapsed, 3)
+            run_chunks = job["chunks_done"] - job["resumed_chunks"]
+            chunk_rate = round(run_chunks / elapsed, 3)
+            if (
+                job["status"] == JobStatus.RUNNING.value
+                and total is not None
+                and run_files > 0
+            ):
+                eta = round((total - done) / throughput, 1) if throughput else None
+
+        return {
+            "job_id": job["job_id"],
+            "kind": job["kind"],
+            "target": job["target"],
+            "tenant_id": job.get("tenant_id"),
+            "status": job["status"],
+            "created_at": job["created_at"],
+            "started_at": job["started_at"],
+            "finished_at": job["finished_at"],
+            "error": job["error"],
+            "result": job["result"],
+            "progress": {
+                "files_total": total,
+                "files_done": done,
+                "files_failed": job["files_failed"],
+                "chunks_done": job["chunks_done"],
+                "percent": round(100.0 * done / total, 1) if total else None,
+                "files_per_second": throughput,
+                "chunks_per_second": chunk_rate,
+                "eta_seconds": eta,
+            },
+        }
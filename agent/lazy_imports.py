@@ -0,0 +1,106 @@
+"""
+Lazy Imports
+Deferred loading for optional and heavy third-party dependencies.
+
+- ``LazyModule`` stands in for a module and imports it on first attribute
+  access; attribute writes go to the real module, so ``patch("pkg.mod.attr")``
+  keeps working through the stand-in
+- ``LazyAttribute`` stands in for a class or function and imports its module
+  on first call
+- Both are falsy when the import fails, matching the ``X = None`` fallback the
+  try/except import blocks they replace used: ``if Llama:`` still means
+  "llama_cpp is installed", but the answer is only worked out when asked
+- ``module_available`` answers the same question without importing anything
+"""
+
+import importlib
+import importlib.util
+import logging
+import threading
+from typing import Any, Optional
+
+_MISSING = object()
+
+
+def module_available(name: str) -> bool:
+    """True if top-level package ``name`` can be found (it is not imported)"""
+    try:
+        return importlib.util.find_spec(name.partition(".")[0]) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+class _Lazy:
+    _lock = threading.Lock()
+
+    def __init__(self, module: str):
+        object.__setattr__(self, "_module_name", module)
+        object.__setattr__(self, "_target", _MISSING)
+        object.__setattr__(self, "_error", None)
+
+    def _resolve_target(self, module: Any) -> Any:
+        return module
+
+    def _resolve(self) -> Optional[Any]:
+        """The imported object, or None if the import failed"""
+        target = object.__getattribute__(self, "_target")
+        if target is not _MISSING:
+            return target
+        with _Lazy._lock:
+            if self._target is _MISSING:
+                try:
+                    module = importlib.import_module(self._module_name)
+                    target = self._resolve_target(module)
+                except Exception as e:
+                    logging.debug("[lazy_imports] %s unavailable: %s", self, e)
+                    object.__setattr__(self, "_error", e)
+                    target = None
+                object.__setattr__(self, "_target", target)
+        return self._target
+
+    def _require(self) -> Any:
+        target = self._resolve()
+        if target is None:
+            raise ImportError(f"{self} is not available: {self._error}")
+        return target
+
+    def __bool__(self) -> bool:
+        return self._resolve() is not None
+
+    def __getattr__(self, attr: str) -> Any:
+        # Introspection (mock, inspect, copy) must not trigger the import, and
+        # getattr(x, name, default) on a missing package returns the default
+        target = None if attr.startswith("__") else self._resolve()
+        if target is None:
+            raise AttributeError(f"{self} has no attribute {attr!r}")
+        return getattr(target, attr)
+
+
+class LazyModule(_Lazy):
+    """Module stand-in that imports ``name`` on first attribute access"""
+
+    def __setattr__(self, attr: str, value: Any) -> None:
+        setattr(self._require(), attr, value)
+
+    def __delattr__(self, attr: str) -> None:
+        delattr(self._require(), attr)
+
+    def __repr__(self) -> str:
+        return f"<lazy module {self._module_name!r}>"
+
+
+class LazyAttribute(_Lazy):
+    """Stand-in for ``from module import name``, imported on first call"""
+
+    def __init__(self, module: str, name: str):
+        super().__init__(module)
+        object.__setattr__(self, "_attr_name", name)
+
+    def _resolve_target(self, module: Any) -> Any:
+        return getattr(module, self._attr_name)
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        return self._require()(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        return f"<lazy {self._module_name}.{self._attr_name}>"
@@ -2,24 +2,37 @@
 import os
 from typing import Dict, List, Optional
 
+from .inference_worker import InferenceClient
+from .lazy_imports import LazyAttribute
+from .spans import current_span, traced
 from .utils import safe_call
 
-# LLM backends
-try:
-    from llama_cpp import Llama
-except ImportError:
-    Llama = None
+# LLM backends, imported when a model is first loaded; both are falsy when
+# their package is not installed
+Llama = LazyAttribute("llama_cpp", "Llama")
+GPT4All = LazyAttribute("gpt4all", "GPT4All")
 
-try:
-    from gpt4all import GPT4All
-except ImportError:
-    GPT4All = None
+
+def _record_usage(output) -> None:
+    """Token counts reported by llama.cpp, on the current span"""
+    usage = output.get("usage") if isinstance(output, dict) else None
+    if isinstance(usage, dict):
+        current_span().set_attributes(
+            {
+                "llm.tokens_in": usage.get("prompt_tokens"),
+                "llm.tokens_out": usage.get("completion_tokens"),
+            }
+        )
 
 
 class HybridLLMRouter:
     """
     Hybrid LLM router that dynamically selects between LLaMA and GPT4All
     based on preferences, prompt length, and model availability.
+
+    With ``worker_socket`` set, models are never loaded in this process:
+    generation is forwarded to the shared inference worker
+    (see ``agent.inference_worker``).
     """
 
     def __init__(
@@ -29,18 +42,31 @@ class HybridLLMRouter:
         prefer_fast: bool = True,
         session_memory: bool = True,
         memory_limit: int = 5,
+        n_ctx: int = 2048,
+        worker_socket: Optional[str] = None,
+        worker_timeout: float = 120.0,
     ):
         self.prefer_fast = prefer_fast
+        self.n_ctx = n_ctx
         self.session_memory = session_memory
         self.memory_limit = memory_limit
         self.memory: List[Dict[str, str]] = []
         self._llama_model_path = llama_model_path
         self._gpt4all_model_path = gpt4all_model_path
+        self.worker = (
+            InferenceClient(worker_socket, timeout=worker_timeout)
+            if worker_socket
+            else None
+        )
+        if self.worker is not None:
+            self.llama = None
+            self.gpt4all = None
+            return
 
         # Load LLaMA with error boundary
         def do_load_llama():
             if Llama and os.path.exists(llama_model_path):
-                return Llama(model_path=llama_model_path, n_ctx=2048, n_threads=4)
+                return Llama(model_path=llama_model_path, n_ctx=n_ctx, n_threads=4)
             return None
 
         self.llama = safe_call(
@@ -81,26 +107,32 @@ class HybridLLMRouter:
     # -------------------
     # Model Selection
     # -------------------
+    @traced("llm.choose_model")
     def choose_model(self, prompt: str, prefer_fast: Optional[bool] = None) -> str:
+        model = self._choose_model(prompt, prefer_fast)
+        current_span().set_attribute("llm.model", model)
+        return model
+
+    def _choose_model(self, prompt: str, prefer_fast: Optional[bool]) -> str:
         pf = self.prefer_fast if prefer_fast is None else prefer_fast
 
         if pf:
             # Prefer llama when fast responses are requested if it's available
             # (or can be lazily created)
-            if Llama is not None:
+            if Llama:
                 return "llama"
         else:
             # When not preferring fast, lean toward GPT4All if available
-            if GPT4All is not None:
+            if GPT4All:
                 return "gpt4all"
 
         # Heuristic based on prompt length if explicit preference didn't decide
-        if len(prompt.split()) > 30 and GPT4All is not None:
+        if len(prompt.split()) > 30 and GPT4All:
             return "gpt4all"
         # Fallbacks
-        if Llama is not None:
+        if Llama:
             return "llama"
-        if GPT4All is not None:
+        if GPT4All:
             return "gpt4all"
         return "llama"  # Default fallback
 
@@ -121,18 +153,34 @@ class HybridLLMRouter:
                 max_tokens=max_tokens,
                 stop=["User:", "Assistant:"],
             )
+            _record_usage(output)
             return output["choices"][0]["text"].strip()
         output = self.llama(
             prompt=prompt,
             max_tokens=max_tokens,
             stop=["User:", "Assistant:"],
         )
+        _record_usage(output)
         return output["choices"][0]["text"].strip()
 
     def _invoke_gpt4all(self, prompt: str, max_tokens: int) -> str:
         """Invoke the GPT4All model."""
         return self.gpt4all.generate(prompt, max_tokens=max_tokens)
 
+    def _invoke_worker(self, model_choice: str, prompt: str, max_tokens: int) -> str:
+        """Generate in the shared inference worker process."""
+        is_llama = model_choice == "llama"
+        text = self.worker.generate(
+            prompt,
+            model=model_choice,
+            model_path=self._llama_model_path if is_llama else self._gpt4all_model_path,
+            n_ctx=self.n_ctx,
+            max_tokens=max_tokens,
+            stop=["User:", "Assistant:"] if is_llama else None,
+        )
+        return text.strip() if is_llama else text
+
+    @traced("llm.generate")
     def generate(
         self,
         prompt: str,
@@ -146,12 +194,14 @@ class HybridLLMRouter:
         text = "No model available."
 
         def do_generate():
+            if self.worker is not None:
+                return self._invoke_worker(model_choice, full_context, max_tokens)
             # Try lazy instantiation if class is available but instance missing
             if model_choice == "gpt4all" and self.gpt4all is None and GPT4All:
                 self.gpt4all = GPT4All(model_name=self._gpt4all_model_path)
             if model_choice == "llama" and self.llama is None and Llama:
                 self.llama = Llama(
-                    model_path=self._llama_model_path, n_ctx=2048, n_threads=4
+                    model_path=self._llama_model_path, n_ctx=self.n_ctx, n_threads=4
                 )
 
             if model_choice == "llama" and self.llama:
@@ -166,6 +216,23 @@ class HybridLLMRouter:
             error_msg="[HybridLLMRouter] Error during generation",
             default=text,
         )
+        span = current_span()
+        span.set_attributes(
+            {
+                "llm.model": model_choice,
+                "llm.backend": "worker" if self.worker is not None else "in_process",
+                "llm.max_tokens": max_tokens,
+            }
+        )
+        if "llm.tokens_in" not in span.attributes:
+            # No usage reported by the backend: whitespace-separated words
+            span.set_attributes(
+                {
+                    "llm.tokens_in": len(full_context.split()),
+                    "llm.tokens_out": len(str(text).split()),
+                    "llm.tokens_estimated": True,
+                }
+            )
         # Update memory
         self.add_to_memory("User", prompt)
         self.add_to_memory("Assistant", text)
@@ -175,6 +242,11 @@ class HybridLLMRouter:
     # Introspection helpers for tests
     # -------------------
     def get_available_models(self) -> Dict[str, bool]:
+        if self.worker is not None:
+            try:
+                return dict(self.worker.ping()["models"])
+            except Exception:
+                return {"llama": False, "gpt4all": False}
         return {
             "llama": self.llama is not None,
             "gpt4all": self.gpt4all is not None,
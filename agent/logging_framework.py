@@ -12,12 +12,15 @@ This module provides:
 - Multi-level log filtering
 - Dynamic log level configuration
 - Log aggregation and analysis
+- Optional asynchronous, batched log pipeline (QueueHandler/QueueListener)
 """
 
+import atexit
 import json
 import logging
 import logging.handlers
 import os
+import queue
 import re
 import sys
 import threading
@@ -88,7 +91,11 @@ class LogContext:
 
 
 class PIIRedactor:
-    """PII data redaction for secure logging"""
+    """PII data redaction for secure logging
+
+    All patterns are compiled into a single alternation so each string is
+    scanned once; earlier patterns win when several match at the same offset.
+    """
 
     def __init__(self):
         self.pii_patterns = {
@@ -108,20 +115,32 @@ class PIIRedactor:
             "ip_address": re.compile(r"\b(?:\d{1,3}\.){3}\d{1,3}\b"),
             "file_path": re.compile(r'(?i)(C:\\|/)[^\s<>"]*'),
         }
+        self._combined = self._compile_combined(self.pii_patterns)
+
+    @staticmethod
+    def _compile_combined(patterns: Dict[str, "re.Pattern"]) -> "re.Pattern":
+        """Merge individual patterns into one named-group alternation"""
+        parts = []
+        for name, pattern in patterns.items():
+            source = pattern.pattern
+            # Global inline flags are only legal at the start of a pattern
+            if source.startswith("(?i)"):
+                source = f"(?i:{source[4:]})"
+            parts.append(f"(?P<{name}>{source})")
+        return re.compile("|".join(parts))
+
+    def _replace(self, match: "re.Match") -> str:
+        if match.lastgroup == "password":
+            key = self.pii_patterns["password"].match(match.group()).group(1)
+            return f"{key}: [REDACTED]"
+        return "[REDACTED]"
 
     def redact_pii(self, text: str) -> str:
         """Redact PII data from text"""
         if not isinstance(text, str):
             return str(text)
 
-        redacted = text
-        for pii_type, pattern in self.pii_patterns.items():
-            if pii_type == "password":
-                redacted = pattern.sub(r"\1: [REDACTED]", redacted)
-            else:
-                redacted = pattern.sub("[REDACTED]", redacted)
-
-        return redacted
+        return self._combined.sub(self._replace, text)
 
     def redact_dict(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Redact PII data from dictionary"""
@@ -233,6 +252,33 @@ class RequestTracker:
         return context
 
 
+# LogRecord attributes that are not copied into the structured payload
+_RESERVED_RECORD_ATTRS = frozenset(
+    [
+        "name",
+        "msg",
+        "args",
+        "levelname",
+        "levelno",
+        "pathname",
+        "filename",
+        "module",
+        "lineno",
+        "funcName",
+        "created",
+        "msecs",
+        "relativeCreated",
+        "thread",
+        "threadName",
+        "processName",
+        "process",
+        "exc_info",
+        "exc_text",
+        "stack_info",
+    ]
+)
+
+
 class StructuredFormatter(logging.Formatter):
     """Custom formatter for structured JSON logging"""
 
@@ -240,6 +286,8 @@ class StructuredFormatter(logging.Formatter):
         super().__init__()
         self.pii_redactor = PIIRedactor()
         self.include_pii = include_pii
+        # Reused encoder; json.dumps() builds a new one per call for custom options
+        self._encoder = json.JSONEncoder(default=str, separators=(",", ":"))
 
     def format(self, record: logging.LogRecord) -> str:
         """Format log record as structured JSON"""
@@ -267,35 +315,236 @@ class StructuredFormatter(logging.Formatter):
 
         # Add custom fields from record
         for key, value in record.__dict__.items():
-            if key not in [
-                "name",
-                "msg",
-                "args",
-                "levelname",
-                "levelno",
-                "pathname",
-                "filename",
-                "module",
-                "lineno",
-                "funcName",
-                "created",
-                "msecs",
-                "relativeCreated",
-                "thread",
-                "threadName",
-                "processName",
-                "process",
-                "exc_info",
-                "exc_text",
-                "stack_info",
-            ]:
+            if key not in _RESERVED_RECORD_ATTRS:
                 log_entry[key] = value
 
         # Redact PII unless explicitly allowed
         if not self.include_pii:
             log_entry = self.pii_redactor.redact_dict(log_entry)
 
-        return json.dumps(log_entry, default=str, separators=(",", ":"))
+        return self._encoder.encode(log_entry)
+
+
+class AsyncLogStats:
+    """Thread-safe counters for the asynchronous logging pipeline"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.enqueued = 0
+        self.dropped = 0
+        self.blocked = 0
+        self.written = 0
+        self.batches = 0
+        self.write_errors = 0
+        self.max_queue_depth = 0
+
+    def increment(self, counter: str, amount: int = 1):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def observe_depth(self, depth: int):
+        if depth > self.max_queue_depth:
+            with self._lock:
+                self.max_queue_depth = max(self.max_queue_depth, depth)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enqueued": self.enqueued,
+                "dropped": self.dropped,
+                "blocked": self.blocked,
+                "written": self.written,
+                "batches": self.batches,
+                "write_errors": self.write_errors,
+                "max_queue_depth": self.max_queue_depth,
+            }
+
+
+class AsyncQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler with a bounded queue and an overflow policy
+
+    Records are tagged with a route so one listener thread can dispatch to the
+    handlers of several loggers (root, audit, security, performance).
+
+    Overflow policies:
+    - ``drop_newest``: discard the incoming record
+    - ``drop_oldest``: evict the oldest queued record to make room
+    - ``block``: wait up to ``block_timeout`` seconds, then drop
+
+    Records at ``ERROR`` or above always wait up to ``block_timeout`` before
+    being dropped so that errors and audit events are not shed first.
+    """
+
+    OVERFLOW_POLICIES = ("drop_newest", "drop_oldest", "block")
+
+    def __init__(
+        self,
+        log_queue: "queue.Queue",
+        route: str,
+        stats: AsyncLogStats,
+        overflow_policy: str = "drop_oldest",
+        block_timeout: float = 0.05,
+    ):
+        if overflow_policy not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"Invalid overflow policy: {overflow_policy}")
+        super().__init__(log_queue)
+        self.route = route
+        self.stats = stats
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Freeze the message without running the (expensive) formatter
+
+        The listener runs in the same process, so ``exc_info`` can travel with
+        the record and be formatted off the request thread.
+        """
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        item = (self.route, record)
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            if not self._handle_overflow(item):
+                self.stats.increment("dropped")
+                return
+        self.stats.increment("enqueued")
+        self.stats.observe_depth(self.queue.qsize())
+
+    def _handle_overflow(self, item) -> bool:
+        """Apply the overflow policy; return True if the item was queued"""
+        record = item[1]
+        if self.overflow_policy == "block" or record.levelno >= logging.ERROR:
+            self.stats.increment("blocked")
+            try:
+                self.queue.put(item, timeout=self.block_timeout)
+                return True
+            except queue.Full:
+                return False
+
+        if self.overflow_policy == "drop_oldest":
+            try:
+                self.queue.get_nowait()
+                self.stats.increment("dropped")
+            except queue.Empty:
+                pass
+            try:
+                self.queue.put_nowait(item)
+                return True
+            except queue.Full:
+                return False
+
+        return False
+
+
+class AsyncLogListener(logging.handlers.QueueListener):
+    """QueueListener that drains records in batches
+
+    Each batch is formatted once per distinct formatter and written to stream
+    handlers with a single ``write``/``flush``, so file I/O is amortised over
+    many records.
+    """
+
+    def __init__(
+        self,
+        log_queue: "queue.Queue",
+        routes: Dict[str, List[logging.Handler]],
+        stats: AsyncLogStats,
+        batch_size: int = 256,
+    ):
+        handlers = [h for route in routes.values() for h in route]
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.routes = routes
+        self.stats = stats
+        self.batch_size = max(1, batch_size)
+
+    def _monitor(self):
+        q = self.queue
+        has_task_done = hasattr(q, "task_done")
+        while True:
+            batch = [q.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(q.get_nowait())
+                except queue.Empty:
+                    break
+
+            items = [item for item in batch if item is not self._sentinel]
+            if items:
+                self.write_batch(items)
+            if has_task_done:
+                for _ in batch:
+                    q.task_done()
+            if len(items) != len(batch):
+                break
+
+    def write_batch(self, items: List[Any]):
+        """Dispatch a batch of ``(route, record)`` items to their handlers"""
+        by_route: Dict[str, List[logging.LogRecord]] = {}
+        for route, record in items:
+            by_route.setdefault(route, []).append(record)
+
+        formatted: Dict[Any, str] = {}
+        for route, records in by_route.items():
+            for handler in self.routes.get(route, []):
+                eligible = [
+                    r
+                    for r in records
+                    if r.levelno >= handler.level and handler.filter(r)
+                ]
+                if not eligible:
+                    continue
+                if isinstance(handler, logging.StreamHandler):
+                    self._write_stream_batch(handler, eligible, formatted)
+                else:
+                    for record in eligible:
+                        handler.handle(record)
+
+        self.stats.increment("written", len(items))
+        self.stats.increment("batches")
+
+    def _write_stream_batch(
+        self,
+        handler: logging.StreamHandler,
+        records: List[logging.LogRecord],
+        formatted: Dict[Any, str],
+    ):
+        formatter = handler.formatter or logging.Formatter()
+        lines = []
+        for record in records:
+            key = (id(formatter), id(record))
+            if key not in formatted:
+                try:
+                    formatted[key] = formatter.format(record)
+                except Exception:
+                    self.stats.increment("write_errors")
+                    handler.handleError(record)
+                    continue
+            lines.append(formatted[key])
+        if not lines:
+            return
+
+        handler.acquire()
+        try:
+            # Rollover is evaluated once per batch, so a file may exceed
+            # maxBytes by at most one batch.
+            if isinstance(handler, logging.handlers.BaseRotatingHandler):
+                if handler.shouldRollover(records[0]):
+                    handler.doRollover()
+            if isinstance(handler, logging.FileHandler) and handler.stream is None:
+                handler.stream = handler._open()
+            terminator = handler.terminator
+            handler.stream.write(terminator.join(lines) + terminator)
+            handler.flush()
+        except Exception:
+            self.stats.increment("write_errors")
+            handler.handleError(records[0])
+        finally:
+            handler.release()
 
 
 class LogManager:
@@ -308,6 +557,9 @@ class LogManager:
         self.request_tracker = RequestTracker()
         self._loggers: Dict[str, logging.Logger] = {}
         self._handlers: Dict[str, logging.Handler] = {}
+        self._formatters: Dict[bool, StructuredFormatter] = {}
+        self._async_listener: Optional[AsyncLogListener] = None
+        self._async_stats: Optional[AsyncLogStats] = None
         self._initialized = False
 
         # Default configuration
@@ -326,6 +578,12 @@ class LogManager:
             "security_enabled": True,
             "performance_enabled": True,
             "cleanup_days": 30,
+            # Asynchronous pipeline: format and write records on a listener thread
+            "async_enabled": False,
+            "async_queue_size": 10000,
+            "async_batch_size": 256,
+            "async_overflow_policy": "drop_oldest",  # drop_newest, drop_oldest, block
+            "async_block_timeout": 0.05,
         }
 
         # Merge with provided config
@@ -367,15 +625,83 @@ class LogManager:
         if self.config["performance_enabled"]:
             self._setup_performance_handler()
 
+        if self.config["async_enabled"]:
+            self._enable_async_pipeline()
+
         self._initialized = True
 
+    def _get_formatter(self, include_pii: bool) -> "StructuredFormatter":
+        """Share one structured formatter per PII setting across handlers"""
+        if include_pii not in self._formatters:
+            self._formatters[include_pii] = StructuredFormatter(include_pii=include_pii)
+        return self._formatters[include_pii]
+
+    def _enable_async_pipeline(self):
+        """Move configured handlers behind a QueueHandler/QueueListener pair
+
+        The request thread only enqueues records; formatting, PII redaction and
+        file writes happen in batches on the listener thread.
+        """
+        self._async_stats = AsyncLogStats()
+        log_queue: queue.Queue = queue.Queue(maxsize=self.config["async_queue_size"])
+
+        targets = {"root": logging.getLogger()}
+        targets.update(self._loggers)
+
+        routes: Dict[str, List[logging.Handler]] = {}
+        for route, logger in targets.items():
+            handlers = list(logger.handlers)
+            if not handlers:
+                continue
+            routes[route] = handlers
+            for handler in handlers:
+                logger.removeHandler(handler)
+
+            queue_handler = AsyncQueueHandler(
+                log_queue,
+                route,
+                self._async_stats,
+                overflow_policy=self.config["async_overflow_policy"],
+                block_timeout=self.config["async_block_timeout"],
+            )
+            # Skip enqueuing records that no target handler would accept
+            queue_handler.setLevel(min(h.level for h in handlers))
+            logger.addHandler(queue_handler)
+            self._handlers[f"{route}_queue"] = queue_handler
+
+        self._async_listener = AsyncLogListener(
+            log_queue,
+            routes,
+            self._async_stats,
+            batch_size=self.config["async_batch_size"],
+        )
+        self._async_listener.start()
+        atexit.register(self.shutdown)
+
+    def shutdown(self):
+        """Flush queued records and stop the async listener, if running"""
+        listener = self._async_listener
+        if listener is None:
+            return
+        self._async_listener = None
+        try:
+            listener.stop()
+        except Exception:
+            pass  # Listener thread already gone
+        for handlers in listener.routes.values():
+            for handler in handlers:
+                try:
+                    handler.flush()
+                except Exception:
+                    pass
+
     def _setup_console_handler(self):
         """Setup console logging handler"""
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setLevel(logging.INFO)
 
         if self.config["format"] == "structured":
-            formatter = StructuredFormatter(include_pii=self.config["include_pii"])
+            formatter = self._get_formatter(self.config["include_pii"])
         else:
             formatter = logging.Formatter(
                 "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -396,9 +722,7 @@ class LogManager:
             backupCount=self.config["backup_count"],
         )
         app_handler.setLevel(logging.DEBUG)
-        app_handler.setFormatter(
-            StructuredFormatter(include_pii=self.config["include_pii"])
-        )
+        app_handler.setFormatter(self._get_formatter(self.config["include_pii"]))
         logging.getLogger().addHandler(app_handler)
         self._handlers["app"] = app_handler
 
@@ -409,9 +733,7 @@ class LogManager:
             backupCount=self.config["backup_count"],
         )
         error_handler.setLevel(logging.ERROR)
-        error_handler.setFormatter(
-            StructuredFormatter(include_pii=self.config["include_pii"])
-        )
+        error_handler.setFormatter(self._get_formatter(self.config["include_pii"]))
         logging.getLogger().addHandler(error_handler)
         self._handlers["error"] = error_handler
 
@@ -427,7 +749,7 @@ class LogManager:
         )
         audit_handler.setLevel(LogLevel.AUDIT.value)
         audit_handler.setFormatter(
-            StructuredFormatter(include_pii=False)
+            self._get_formatter(False)
         )  # Never include PII in audit logs
 
         # Create audit logger
@@ -450,7 +772,7 @@ class LogManager:
             backupCount=365,  # Keep security logs for 1 year
         )
         security_handler.setLevel(logging.WARNING)
-        security_handler.setFormatter(StructuredFormatter(include_pii=False))
+        security_handler.setFormatter(self._get_formatter(False))
 
         # Create security logger
         security_logger = logging.getLogger("security")
@@ -472,7 +794,7 @@ class LogManager:
             backupCount=48,  # Keep 48 hours of performance logs
         )
         performance_handler.setLevel(logging.INFO)
-        performance_handler.setFormatter(StructuredFormatter(include_pii=False))
+        performance_handler.setFormatter(self._get_formatter(False))
 
         # Create performance logger
         performance_logger = logging.getLogger("performance")
@@ -657,6 +979,14 @@ class LogManager:
         # Add performance metrics
         stats["performance"] = self.performance_tracker.get_metrics()
 
+        if self._async_stats is not None:
+            stats["async"] = {
+                "running": self._async_listener is not None,
+                "overflow_policy": self.config["async_overflow_policy"],
+                "queue_size": self.config["async_queue_size"],
+                **self._async_stats.snapshot(),
+            }
+
         return stats
 
 
@@ -775,6 +1105,16 @@ def _auto_initialize():
             "yes",
         )
 
+    if "LOG_ASYNC" in os.environ:
+        config["async_enabled"] = os.environ["LOG_ASYNC"].lower() in (
+            "true",
+            "1",
+            "yes",
+        )
+
+    if "LOG_ASYNC_OVERFLOW" in os.environ:
+        config["async_overflow_policy"] = os.environ["LOG_ASYNC_OVERFLOW"].lower()
+
     initialize_logging(config)
     setup_error_logging_integration()
 
@@ -0,0 +1,284 @@
+"""
+Model Registry
+Persisted index of local model files with metadata read from GGUF headers.
+
+- Records path, size and mtime of every ``.gguf``/``.bin`` file under the
+  models directory in ``.model_registry.json``
+- ``refresh()`` walks the directory with ``os.scandir`` and only re-reads the
+  header of files whose size or mtime changed; unchanged entries come from
+  the registry file, removed files are dropped
+- GGUF headers give architecture, context length, quantization and (from the
+  tensor table) the parameter count without touching the weights
+"""
+
+import json
+import logging
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, Optional
+
+MODEL_SUFFIXES = {".gguf", ".bin"}
+REGISTRY_FILE = ".model_registry.json"
+GGUF_MAGIC = b"GGUF"
+
+# llama.cpp ``general.file_type`` values (LLAMA_FTYPE_*)
+GGUF_FILE_TYPES = {
+    0: "F32",
+    1: "F16",
+    2: "Q4_0",
+    3: "Q4_1",
+    7: "Q8_0",
+    8: "Q5_0",
+    9: "Q5_1",
+    10: "Q2_K",
+    11: "Q3_K_S",
+    12: "Q3_K_M",
+    13: "Q3_K_L",
+    14: "Q4_K_S",
+    15: "Q4_K_M",
+    16: "Q5_K_S",
+    17: "Q5_K_M",
+    18: "Q6_K",
+    19: "IQ2_XXS",
+    20: "IQ2_XS",
+    21: "Q2_K_S",
+    22: "IQ3_XS",
+    23: "IQ3_XXS",
+    24: "IQ1_S",
+    25: "IQ4_NL",
+    26: "IQ3_S",
+    27: "IQ3_M",
+    28: "IQ2_S",
+    29: "IQ2_M",
+    30: "IQ4_XS",
+    31: "IQ1_M",
+    32: "BF16",
+}
+
+# GGUF metadata value types: struct format for scalars
+_SCALARS = {
+    0: "<B",
+    1: "<b",
+    2: "<H",
+    3: "<h",
+    4: "<I",
+    5: "<i",
+    6: "<f",
+    7: "<?",
+    10: "<Q",
+    11: "<q",
+    12: "<d",
+}
+_STRING = 8
+_ARRAY = 9
+_MAX_STRING = 1 << 20  # Sanity bounds for corrupt or non-GGUF files
+_MAX_COUNT = 1 << 24
+
+
+class _Reader:
+    def __init__(self, f: BinaryIO):
+        self.f = f
+
+    def read(self, fmt: str):
+        size = struct.calcsize(fmt)
+        data = self.f.read(size)
+        if len(data) != size:
+            raise ValueError("truncated GGUF header")
+        return struct.unpack(fmt, data)[0]
+
+    def string(self, keep: bool = True) -> Optional[str]:
+        length = self.read("<Q")
+        if length > _MAX_STRING:
+            raise ValueError("GGUF string too long")
+        if not keep:
+            self.f.seek(length, os.SEEK_CUR)
+            return None
+        data = self.f.read(length)
+        if len(data) != length:
+            raise ValueError("truncated GGUF header")
+        return data.decode("utf-8", errors="replace")
+
+    def value(self, vtype: int, keep: bool = True) -> Any:
+        if vtype in _SCALARS:
+            return self.read(_SCALARS[vtype])
+        if vtype == _STRING:
+            return self.string(keep)
+        if vtype == _ARRAY:
+            item_type = self.read("<I")
+            count = self.read("<Q")
+            if count > _MAX_COUNT:
+                raise ValueError("GGUF array too long")
+            if item_type in _SCALARS:
+                # Fixed-size items (token scores, types) are skipped in one seek
+                item_size = struct.calcsize(_SCALARS[item_type])
+                self.f.seek(count * item_size, os.SEEK_CUR)
+            else:
+                for _ in range(count):
+                    self.value(item_type, keep=False)
+            return None  # Arrays (vocabularies, merges) are not recorded
+        raise ValueError(f"unknown GGUF value type {vtype}")
+
+
+def read_gguf_metadata(path: str) -> Dict[str, Any]:
+    """Scalar header metadata and a summary of a GGUF file (no weights read)"""
+    with open(path, "rb") as f:
+        if f.read(4) != GGUF_MAGIC:
+            raise ValueError(f"{path} is not a GGUF file")
+        reader = _Reader(f)
+        version = reader.read("<I")
+        if version < 2:
+            # v1 (32-bit lengths) predates every model llama.cpp still loads
+            raise ValueError(f"unsupported GGUF version {version}")
+        tensor_count = reader.read("<Q")
+        kv_count = reader.read("<Q")
+        if tensor_count > _MAX_COUNT or kv_count > _MAX_COUNT:
+            raise ValueError("GGUF counts out of range")
+
+        kv: Dict[str, Any] = {}
+        for _ in range(kv_count):
+            key = reader.string()
+            value = reader.value(reader.read("<I"))
+            if value is not None:
+                kv[key] = value
+
+        parameters = 0
+        for _ in range(tensor_count):
+            reader.string(keep=False)
+            n_dims = reader.read("<I")
+            elements = 1
+            for _ in range(n_dims):
+                elements *= reader.read("<Q")
+            reader.read("<I")  # tensor type
+            reader.read("<Q")  # data offset
+            parameters += elements
+
+    arch = kv.get("general.architecture")
+    file_type = kv.get("general.file_type")
+    return {
+        "format": "gguf",
+        "gguf_version": version,
+        "architecture": arch,
+        "name": kv.get("general.name"),
+        "context_length": kv.get(f"{arch}.context_length"),
+        "embedding_length": kv.get(f"{arch}.embedding_length"),
+        "block_count": kv.get(f"{arch}.block_count"),
+        "quantization": GGUF_FILE_TYPES.get(file_type),
+        "parameter_count": parameters,
+        "tensor_count": tensor_count,
+    }
+
+
+def read_model_metadata(path: str) -> Dict[str, Any]:
+    """GGUF header metadata, or just the format for other model files"""
+    try:
+        return read_gguf_metadata(path)
+    except (OSError, ValueError, struct.error) as e:
+        if Path(path).suffix == ".gguf":
+            logging.warning("[ModelRegistry] Unreadable GGUF header in %s: %s", path, e)
+        return {"format": Path(path).suffix.lstrip(".") or "unknown"}
+
+
+class ModelRegistry:
+    """Incrementally refreshed, persisted index of local model files"""
+
+    def __init__(self, models_dir: str, registry_path: Optional[str] = None):
+        self.models_dir = Path(models_dir)
+        self.registry_path = (
+            Path(registry_path) if registry_path else self.models_dir / REGISTRY_FILE
+        )
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.stats = {"refreshes": 0, "headers_read": 0, "reused": 0}
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.registry_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            entries = data.get("models", {}) if isinstance(data, dict) else {}
+            self._entries = {k: v for k, v in entries.items() if isinstance(v, dict)}
+        except (OSError, ValueError, AttributeError, TypeError):
+            self._entries = {}
+
+    def _save(self):
+        tmp = self.registry_path.with_name(f".{self.registry_path.name}.tmp")
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"updated": time.time(), "models": self._entries}, f, indent=2
+                )
+            os.replace(tmp, self.registry_path)
+        except OSError as e:
+            logging.warning("[ModelRegistry] Could not save registry: %s", e)
+
+    def _scan(self) -> Dict[str, os.stat_result]:
+        found: Dict[str, os.stat_result] = {}
+        stack = [str(self.models_dir)]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as it:
+                    for entry in it:
+                        if entry.name.startswith("."):
+                            continue
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif os.path.splitext(entry.name)[1] in MODEL_SUFFIXES:
+                            rel = os.path.relpath(entry.path, self.models_dir)
+                            found[Path(rel).as_posix()] = entry.stat()
+            except OSError:
+                continue
+        return found
+
+    def refresh(self) -> List[Dict[str, Any]]:
+        """Sync with the models directory; returns all entries"""
+        with self._lock:
+            self.stats["refreshes"] += 1
+            found = self._scan()
+            changed = set(self._entries) - set(found)
+            entries = {}
+            for rel, st in sorted(found.items()):
+                old = self._entries.get(rel)
+                if (
+                    old
+                    and old.get("size") == st.st_size
+                    and old.get("mtime_ns") == st.st_mtime_ns
+                ):
+                    entries[rel] = old
+                    self.stats["reused"] += 1
+                    continue
+                path = str(self.models_dir / rel)
+                entries[rel] = {
+                    "path": path,
+                    "name": Path(rel).name,
+                    "key": Path(rel).stem.lower(),
+                    "size": st.st_size,
+                    "mtime_ns": st.st_mtime_ns,
+                    "metadata": read_model_metadata(path),
+                }
+                self.stats["headers_read"] += 1
+                changed.add(rel)
+            self._entries = entries
+            if changed:
+                self._save()
+            return list(entries.values())
+
+    def entries(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._entries.values())
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Entry by model key (lower-case file stem), file name or path"""
+        key_lower = key.lower()
+        with self._lock:
+            for rel, entry in self._entries.items():
+                names = (entry.get("key"), rel.lower(), entry["name"].lower())
+                if key_lower in names or entry.get("path") == key:
+                    return entry
+        return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, "models": len(self._entries)}
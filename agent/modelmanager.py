@@ -3,13 +3,17 @@
 import os
 from pathlib import Path
 
-import huggingface_hub
 from dotenv import load_dotenv
 
+from .lazy_imports import LazyModule
 from .llm_router import HybridLLMRouter
+from .model_registry import ModelRegistry
 from .settings import get_settings
 from .utils import safe_call
 
+# Only needed to log in or download a model
+huggingface_hub = LazyModule("huggingface_hub")
+
 
 class ModelManager:
     """Manages local and Hugging Face models for LLMs."""
@@ -23,6 +27,9 @@ class ModelManager:
         hf_token: str = None,
         minimal_models=None,
         check_interval_hours=24,
+        max_context=4096,
+        inference_socket: str = None,
+        inference_timeout: float = 120.0,
     ):
         # Load environment variables from .env
         env_path = Path(env_file)
@@ -55,6 +62,10 @@ class ModelManager:
         self.models_dir = models_dir
         Path(self.models_dir).mkdir(exist_ok=True)
         self.loaded_models = {}
+        self.max_context = max_context
+        # Routers forward generation to the shared inference worker when set
+        self.inference_socket = inference_socket or None
+        self.inference_timeout = inference_timeout
 
         # Track last model update time
         self._last_model_check_file = Path(self.models_dir) / ".last_model_check"
@@ -85,17 +96,15 @@ class ModelManager:
         # Check for newer models once per day
         self._check_and_update_models()
 
-        # Dynamically discover local models by file extension
-        models_path = Path(self.models_dir)
-        if models_path.exists() and models_path.is_dir():
-            for model_file in models_path.rglob("*"):
-                if model_file.is_file() and model_file.suffix in {".bin", ".gguf"}:
-                    model_key = model_file.stem.lower()
-                    if model_key not in self.available_models:
-                        self.available_models[model_key] = f"local:{model_file.name}"
+        # Local models come from the persisted registry; only new or changed
+        # files have their headers read
+        self.registry = ModelRegistry(self.models_dir)
+        for entry in self.registry.refresh():
+            if entry["key"] not in self.available_models:
+                self.available_models[entry["key"]] = f"local:{entry['name']}"
         # Initialize LLM router for tests that expect it on init
         try:
-            self.llm_router = HybridLLMRouter()
+            self.llm_router = self._new_router()
         except Exception:
             self.llm_router = None
 
@@ -260,6 +269,13 @@ class ModelManager:
         except Exception as e:
             return {"status": "error", "error": str(e)}
 
+    def _new_router(self, **kwargs) -> HybridLLMRouter:
+        socket_path = getattr(self, "inference_socket", None)
+        if socket_path:
+            kwargs["worker_socket"] = socket_path
+            kwargs["worker_timeout"] = getattr(self, "inference_timeout", 120.0)
+        return HybridLLMRouter(**kwargs)
+
     def load_model(self, model_name: str = None):
         if not model_name:
             model_name = self.default_model
@@ -289,12 +305,13 @@ class ModelManager:
         def do_instantiate():
             # If the model_path is a file, use it directly. Otherwise, assume it's a directory.
             if model_path.is_file():
-                return HybridLLMRouter(
+                return self._new_router(
                     llama_model_path=str(model_path),
                     gpt4all_model_path=str(model_path),  # GPT4All can also load gguf
+                    n_ctx=self.context_window(str(model_path)),
                 )
             else:
-                return HybridLLMRouter(
+                return self._new_router(
                     llama_model_path=str(model_path / "model.bin"),
                     gpt4all_model_path=str(model_path / "gpt4all.bin"),
                 )
@@ -322,6 +339,8 @@ class ModelManager:
                 default_model=s.model_backend,
                 hf_token=os.getenv("HF_TOKEN"),  # Still use env for token
                 minimal_models=[],  # Disable automatic downloads for settings-based initialization
+                inference_socket=s.inference_socket,
+                inference_timeout=s.inference_timeout_s,
             )
         except Exception:
             # Fallback to default initialization
@@ -348,7 +367,7 @@ class ModelManager:
     ):
         # Initialize router on first use
         if not hasattr(self, "llm_router") or self.llm_router is None:
-            self.llm_router = HybridLLMRouter()
+            self.llm_router = self._new_router()
         kwargs = {"prefer_fast": prefer_fast, "max_tokens": max_tokens}
         if context is not None:
             kwargs["context"] = context
@@ -356,8 +375,20 @@ class ModelManager:
 
     def get_model_info(self):
         if not hasattr(self, "llm_router") or self.llm_router is None:
-            self.llm_router = HybridLLMRouter()
+            self.llm_router = self._new_router()
+        registry = getattr(self, "registry", None)
         return {
             "available_models": self.llm_router.get_available_models(),
             "default_model": self.default_model,
+            "local_models": registry.entries() if registry else [],
         }
+
+    def context_window(self, model: str) -> int:
+        """Context size to load ``model`` with: its trained context length from
+        the GGUF header, capped at ``max_context`` (2048 when unknown)"""
+        registry = getattr(self, "registry", None)
+        entry = registry.get(model) if registry else None
+        trained = (entry or {}).get("metadata", {}).get("context_length")
+        if not trained:
+            return 2048
+        return int(min(trained, self.max_context))
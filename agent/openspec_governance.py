@@ -4,22 +4,79 @@ Provides automated management and validation for OpenSpec changes
 """
 
 # Removed unused imports: os, json, yaml
+import copy
 import logging
+import os
 import shutil
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
 
+class GovernanceIndex:
+    """Parsed proposal/tasks metadata cached per file
+
+    Entries are keyed by path and validated against the file's
+    (mtime_ns, size, inode) on every lookup, so only files that changed
+    since the last call are re-read and re-parsed. Callers get deep copies.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Tuple[int, int, int], Dict]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def load(self, path: Path, parser: Callable[[str], Dict[str, Any]]) -> Dict:
+        """Return ``parser(path contents)``, re-parsing only if the file changed"""
+        st = os.stat(path)
+        signature = (st.st_mtime_ns, st.st_size, st.st_ino)
+        key = str(path)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and cached[0] == signature:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return copy.deepcopy(cached[1])
+            self.stats["misses"] += 1
+
+        parsed = parser(path.read_text(encoding="utf-8"))
+        with self._lock:
+            self._entries[key] = (signature, parsed)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return copy.deepcopy(parsed)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self.stats, "entries": len(self._entries)}
+
+
+_governance_index = GovernanceIndex()
+
+
 class OpenSpecChange:
     """Represents a single OpenSpec change proposal"""
 
-    def __init__(self, change_id: str, base_path: Path):
+    def __init__(
+        self, change_id: str, base_path: Path, index: Optional[GovernanceIndex] = None
+    ):
         self.change_id = change_id
         self.base_path = base_path
         self.change_path = base_path / "openspec" / "changes" / change_id
+        self.index = index or _governance_index
 
     def exists(self) -> bool:
         """Check if change directory exists"""
@@ -32,8 +89,7 @@ class OpenSpecChange:
             return {"error": "proposal.md not found"}
 
         try:
-            content = proposal_file.read_text(encoding="utf-8")
-            return self._parse_proposal(content)
+            return self.index.load(proposal_file, self._parse_proposal)
         except Exception as e:
             return {"error": f"Failed to parse proposal: {str(e)}"}
 
@@ -44,8 +100,7 @@ class OpenSpecChange:
             return {"error": "tasks.md not found"}
 
         try:
-            content = tasks_file.read_text(encoding="utf-8")
-            return self._parse_tasks(content)
+            return self.index.load(tasks_file, self._parse_tasks)
         except Exception as e:
             return {"error": f"Failed to parse tasks: {str(e)}"}
 
@@ -246,11 +301,21 @@ class OpenSpecChange:
 class OpenSpecGovernance:
     """Main governance system for managing OpenSpec changes"""
 
-    def __init__(self, base_path: str = "."):
+    def __init__(
+        self,
+        base_path: str = ".",
+        index: Optional[GovernanceIndex] = None,
+        max_workers: int = 8,
+    ):
         self.base_path = Path(base_path)
         self.changes_path = self.base_path / "openspec" / "changes"
         self.specs_path = self.base_path / "openspec" / "specs"
         self.archive_path = self.changes_path / "archive"
+        self.index = index or _governance_index
+        self.max_workers = max_workers
+
+    def _change(self, change_id: str) -> OpenSpecChange:
+        return OpenSpecChange(change_id, self.base_path, self.index)
 
     def list_changes(self, include_archived: bool = False) -> List[Dict[str, Any]]:
         """List all OpenSpec changes with their status"""
@@ -272,7 +337,7 @@ class OpenSpecGovernance:
                 for archived_change in change_dir.iterdir():
                     if archived_change.is_dir():
                         change_id = archived_change.name
-                        change = OpenSpecChange(change_id, self.base_path)
+                        change = self._change(change_id)
                         # Override path for archived changes
                         change.change_path = archived_change
                         changes.append(
@@ -289,7 +354,7 @@ class OpenSpecGovernance:
                 continue
 
             change_id = change_dir.name
-            change = OpenSpecChange(change_id, self.base_path)
+            change = self._change(change_id)
 
             changes.append(
                 {
@@ -317,7 +382,7 @@ class OpenSpecGovernance:
 
     def get_change_details(self, change_id: str) -> Dict[str, Any]:
         """Get detailed information about a specific change"""
-        change = OpenSpecChange(change_id, self.base_path)
+        change = self._change(change_id)
 
         if not change.exists():
             return {"error": f"Change '{change_id}' not found"}
@@ -332,7 +397,7 @@ class OpenSpecGovernance:
 
     def validate_change(self, change_id: str) -> Dict[str, Any]:
         """Validate a specific change"""
-        change = OpenSpecChange(change_id, self.base_path)
+        change = self._change(change_id)
 
         if not change.exists():
             return {"error": f"Change '{change_id}' not found"}
@@ -341,7 +406,7 @@ class OpenSpecGovernance:
 
     def apply_change(self, change_id: str, dry_run: bool = True) -> Dict[str, Any]:
         """Apply an approved change (implementation would depend on change type)"""
-        change = OpenSpecChange(change_id, self.base_path)
+        change = self._change(change_id)
 
         if not change.exists():
             return {"error": f"Change '{change_id}' not found"}
@@ -378,7 +443,7 @@ class OpenSpecGovernance:
         create_timestamp: bool = True,
     ) -> Dict[str, Any]:
         """Archive a completed change"""
-        change = OpenSpecChange(change_id, self.base_path)
+        change = self._change(change_id)
 
         if not change.exists():
             return {"error": f"Change '{change_id}' not found"}
@@ -423,8 +488,17 @@ class OpenSpecGovernance:
             "warnings": 0,
         }
 
-        for change_id in change_ids:
-            validation = self.validate_change(change_id)
+        # File reads dominate validation, so check changes concurrently
+        workers = min(self.max_workers, len(change_ids))
+        if workers > 1:
+            with ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="openspec-validate"
+            ) as pool:
+                validations = list(pool.map(self.validate_change, change_ids))
+        else:
+            validations = [self.validate_change(cid) for cid in change_ids]
+
+        for change_id, validation in zip(change_ids, validations):
             results[change_id] = validation
 
             if "error" in validation:
@@ -456,9 +530,9 @@ class OpenSpecGovernance:
         completed_tasks = 0
 
         for change in non_archived:
-            change_details = self.get_change_details(change["change_id"])
-            if "tasks" in change_details and "error" not in change_details["tasks"]:
-                tasks = change_details["tasks"]
+            # Only task counts are needed; skip proposal parsing and validation
+            tasks = self._change(change["change_id"]).get_tasks()
+            if "error" not in tasks:
                 total_tasks += tasks.get("total_tasks", 0)
                 completed_tasks += tasks.get("completed_tasks", 0)
 
@@ -4,19 +4,26 @@
 Performance optimization module implementing Phase 1 optimizations:
 - Advanced caching with multi-level cache hierarchy
 - Connection pooling for database and AI model operations
-- Async processing with background task queues
+- Async processing with background task queues (priority, deadlines and
+  per-category concurrency limits)
 """
 
 import asyncio
+import heapq
 import inspect
+import itertools
 import json
 import logging
 import threading
 import time
-from dataclasses import dataclass
+from collections import deque
+from dataclasses import dataclass, field
 from functools import wraps
 from pathlib import Path
-from typing import Any, Awaitable, Callable, Dict, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .single_flight import SingleFlight
+from .spans import current_span, start_span
 
 logger = logging.getLogger(__name__)
 
@@ -116,6 +123,7 @@ class MultiLevelCache:
             if not entry.is_expired():
                 entry.touch()
                 self._stats["l1_hits"] += 1
+                current_span().set_attribute("cache.tier", "l1")
                 return entry.value
             else:
                 del self.l1_cache[key]
@@ -129,19 +137,26 @@ class MultiLevelCache:
                     # Promote to L1
                     self._promote_to_l1(key, entry)
                     self._stats["l2_hits"] += 1
+                    current_span().set_attribute("cache.tier", "l2")
                     return entry.value
                 else:
                     del self.l2_cache[key]
         # Check L3 (slower, compressed)
         if hasattr(self, "l3_cache"):
-            l3_entry = self._decompress_from_l3(key)
+            if key in self.l3_cache:
+                with start_span("cache.l3_decompress"):
+                    l3_entry = self._decompress_from_l3(key)
+            else:
+                l3_entry = None
             if l3_entry:
                 # Promote to L2/L1
                 self._promote_to_l2(key, l3_entry)
                 self._promote_to_l1(key, l3_entry)
                 self._stats["l3_hits"] += 1
+                current_span().set_attribute("cache.tier", "l3")
                 return l3_entry.value
         self._stats["misses"] += 1
+        current_span().set_attribute("cache.tier", "miss")
         return default
 
     def set(self, key: str, value: Any, ttl: int = 3600):
@@ -605,25 +620,106 @@ class ConnectionPool:
             self._pool = kept_connections
 
 
+@dataclass(order=True)
+class ScheduledTask:
+    """Queued coroutine; ordered by priority (higher first), then submission"""
+
+    sort_key: Tuple[int, int]
+    coro: Awaitable = field(compare=False)
+    category: str = field(compare=False, default="default")
+    priority: int = field(compare=False, default=0)
+    submitted_at: float = field(compare=False, default=0.0)
+    deadline: Optional[float] = field(compare=False, default=None)
+    on_deadline: str = field(compare=False, default="drop")
+
+
+class _LatencyWindow:
+    """Recent latency samples (seconds) reported as millisecond percentiles"""
+
+    def __init__(self, size: int = 1000):
+        self.samples = deque(maxlen=size)
+
+    def add(self, seconds: float):
+        self.samples.append(seconds)
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        if not self.samples:
+            return {"p50_ms": None, "p95_ms": None, "max_ms": None}
+        ordered = sorted(self.samples)
+        last = len(ordered) - 1
+        return {
+            "p50_ms": round(ordered[last // 2] * 1000, 3),
+            "p95_ms": round(ordered[int(last * 0.95)] * 1000, 3),
+            "max_ms": round(ordered[last] * 1000, 3),
+        }
+
+
 class AsyncTaskQueue:
     """
     High-performance async task queue for background processing
+
+    - Tasks run highest ``priority`` first (FIFO within a priority)
+    - Optional per-task start deadline: stale tasks are dropped or demoted
+    - Per-category concurrency limits (e.g. one indexing task at a time)
+    - Queue-wait and run-time latency percentiles per category
+    - ``stop()`` drains queued work before shutting workers down
     """
 
-    def __init__(self, max_workers: int = 4, max_queue_size: int = 1000):
+    DEFAULT_CATEGORY_LIMITS = {"indexing": 1, "maintenance": 2}
+    DEPRIORITIZED = -(10**9)  # Priority assigned to tasks past their deadline
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        max_queue_size: int = 1000,
+        category_limits: Optional[Dict[str, int]] = None,
+    ):
         self.max_workers = max_workers
         self.max_queue_size = max_queue_size
+        self.category_limits = {
+            **self.DEFAULT_CATEGORY_LIMITS,
+            **(category_limits or {}),
+        }
 
-        self.queue = asyncio.Queue(maxsize=max_queue_size)
+        self._pending: Dict[str, List[ScheduledTask]] = {}
+        self._pending_count = 0
+        self._active: Dict[str, int] = {}
+        self._seq = itertools.count()
+        self._cond: Optional[asyncio.Condition] = None
         self.workers = []
         self.stats = {
             "tasks_queued": 0,
             "tasks_completed": 0,
             "tasks_failed": 0,
+            "tasks_rejected": 0,
+            "tasks_expired": 0,
+            "tasks_deprioritized": 0,
+            "tasks_dropped": 0,
             "queue_size": 0,
         }
+        self._category_stats: Dict[str, Dict[str, Any]] = {}
 
         self._running = False
+        self._accepting = True
+
+    @property
+    def _condition(self) -> asyncio.Condition:
+        # Created lazily so the queue can be constructed outside an event loop
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        return self._cond
+
+    def _category(self, name: str) -> Dict[str, Any]:
+        if name not in self._category_stats:
+            self._category_stats[name] = {
+                "queued": 0,
+                "completed": 0,
+                "failed": 0,
+                "expired": 0,
+                "wait": _LatencyWindow(),
+                "run": _LatencyWindow(),
+            }
+        return self._category_stats[name]
 
     async def start(self):
         """Start background workers"""
@@ -631,93 +727,225 @@ class AsyncTaskQueue:
             return
 
         self._running = True
+        self._accepting = True
         self.workers = [
             asyncio.create_task(self._worker(f"worker-{i}"))
             for i in range(self.max_workers)
         ]
         logger.info(f"Started {self.max_workers} async workers")
 
-    async def stop(self):
-        """Stop all workers gracefully"""
-        self._running = False
+    async def stop(self, drain: bool = True, timeout: Optional[float] = None):
+        """
+        Stop all workers gracefully
 
-        # Add sentinel values to wake up workers
-        for _ in range(self.max_workers):
-            await self.queue.put(None)
+        Args:
+            drain: Run tasks that are already queued before stopping
+            timeout: Seconds to wait for draining; leftovers are dropped
+        """
+        self._accepting = False
+        if drain and self.workers:
+            try:
+                await asyncio.wait_for(self.join(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning("Task queue drain timed out; dropping remaining tasks")
+
+        self._running = False
+        async with self._condition:
+            self._drop_pending()
+            self._condition.notify_all()
 
-        # Wait for workers to finish
+        # Wait for workers to finish their current task
         if self.workers:
             await asyncio.gather(*self.workers, return_exceptions=True)
 
         self.workers = []
         logger.info("All async workers stopped")
 
-    async def submit_task(self, coro: Awaitable, priority: int = 0) -> bool:
+    async def join(self):
+        """Wait until no tasks are queued or running"""
+        async with self._condition:
+            await self._condition.wait_for(
+                lambda: self._pending_count == 0 and not any(self._active.values())
+            )
+
+    def _drop_pending(self):
+        for heap in self._pending.values():
+            for task in heap:
+                task.coro.close()
+                self.stats["tasks_dropped"] += 1
+            heap.clear()
+        self._pending_count = 0
+        self.stats["queue_size"] = 0
+
+    def submit_nowait(
+        self,
+        coro: Awaitable,
+        priority: int = 0,
+        category: str = "default",
+        deadline: Optional[float] = None,
+        on_deadline: str = "drop",
+    ) -> None:
+        """
+        Queue a coroutine or raise ``asyncio.QueueFull``
+
+        Args:
+            coro: Coroutine to execute
+            priority: Task priority (higher = more urgent)
+            category: Concurrency-limit / metrics bucket
+            deadline: Seconds from now by which the task must start
+            on_deadline: ``"drop"`` (close the coroutine) or ``"deprioritize"``
+        """
+        if on_deadline not in ("drop", "deprioritize"):
+            raise ValueError(f"Invalid on_deadline policy: {on_deadline}")
+        if not self._accepting:
+            raise RuntimeError("Task queue is shutting down")
+        if self._pending_count >= self.max_queue_size:
+            self.stats["tasks_rejected"] += 1
+            raise asyncio.QueueFull()
+
+        now = time.monotonic()
+        task = ScheduledTask(
+            sort_key=(-priority, next(self._seq)),
+            coro=coro,
+            category=category,
+            priority=priority,
+            submitted_at=now,
+            deadline=now + deadline if deadline is not None else None,
+            on_deadline=on_deadline,
+        )
+        heapq.heappush(self._pending.setdefault(category, []), task)
+        self._pending_count += 1
+        self._category(category)["queued"] += 1
+        self.stats["tasks_queued"] += 1
+        self.stats["queue_size"] = self._pending_count
+
+    async def submit_task(
+        self,
+        coro: Awaitable,
+        priority: int = 0,
+        category: str = "default",
+        deadline: Optional[float] = None,
+        on_deadline: str = "drop",
+    ) -> bool:
         """
         Submit coroutine for background execution
 
         Args:
             coro: Coroutine to execute
             priority: Task priority (higher = more urgent)
+            category: Concurrency-limit / metrics bucket
+            deadline: Seconds from now by which the task must start
+            on_deadline: ``"drop"`` or ``"deprioritize"`` stale tasks
 
         Returns:
-            True if task was queued, False if queue is full
+            True if task was queued, False if the queue is full or stopping
+            (the caller still owns the coroutine in that case)
         """
         try:
-            task_item = (priority, time.time(), coro)
-            await self.queue.put(task_item)
-
-            self.stats["tasks_queued"] += 1
-            self.stats["queue_size"] = self.queue.qsize()
-            return True
+            self.submit_nowait(coro, priority, category, deadline, on_deadline)
         except asyncio.QueueFull:
             logger.warning("Task queue is full, dropping task")
             return False
+        except RuntimeError:
+            logger.warning("Task queue is shutting down, rejecting task")
+            return False
+        async with self._condition:
+            self._condition.notify()
+        return True
+
+    def _has_capacity(self, category: str) -> bool:
+        limit = self.category_limits.get(category)
+        return limit is None or self._active.get(category, 0) < limit
+
+    def _next_task(self) -> Optional[ScheduledTask]:
+        """Pop the best runnable task, expiring stale ones on the way"""
+        now = time.monotonic()
+        while True:
+            best = None
+            for category, heap in self._pending.items():
+                if heap and self._has_capacity(category):
+                    if best is None or heap[0] < best[0]:
+                        best = heap[0], category
+            if best is None:
+                return None
+
+            task = heapq.heappop(self._pending[best[1]])
+            if task.deadline is None or now <= task.deadline:
+                self._pending_count -= 1
+                self.stats["queue_size"] = self._pending_count
+                return task
+
+            if task.on_deadline == "deprioritize":
+                task.deadline = None
+                task.sort_key = (-self.DEPRIORITIZED, task.sort_key[1])
+                heapq.heappush(self._pending[task.category], task)
+                self.stats["tasks_deprioritized"] += 1
+            else:
+                task.coro.close()
+                self._pending_count -= 1
+                self.stats["queue_size"] = self._pending_count
+                self.stats["tasks_expired"] += 1
+                self._category(task.category)["expired"] += 1
 
     async def _worker(self, worker_name: str):
         """Background worker coroutine"""
         logger.debug(f"Worker {worker_name} started")
-
-        while self._running:
-            try:
-                # Get task with timeout
-                task_item = await asyncio.wait_for(self.queue.get(), timeout=1.0)
-
-                if task_item is None:  # Sentinel to stop
+        cond = self._condition
+
+        while True:
+            async with cond:
+                task = None
+                while self._running:
+                    task = self._next_task()
+                    if task is not None:
+                        break
+                    await cond.wait()
+                if task is None:
                     break
+                self._active[task.category] = self._active.get(task.category, 0) + 1
 
-                priority, submit_time, coro = task_item
-
-                # Execute the coroutine
-                start_time = time.time()
-                try:
-                    await coro
-                    self.stats["tasks_completed"] += 1
-
-                    execution_time = time.time() - start_time
-                    logger.debug(f"Task completed in {execution_time:.3f}s")
-
-                except Exception as e:
-                    self.stats["tasks_failed"] += 1
-                    logger.error(f"Task failed: {e}")
-
-                finally:
-                    self.stats["queue_size"] = self.queue.qsize()
-                    self.queue.task_done()
-
-            except asyncio.TimeoutError:
-                continue  # Check if still running
+            category = self._category(task.category)
+            start_time = time.monotonic()
+            category["wait"].add(start_time - task.submitted_at)
+            try:
+                await task.coro
+                self.stats["tasks_completed"] += 1
+                category["completed"] += 1
             except Exception as e:
-                logger.error(f"Worker {worker_name} error: {e}")
+                self.stats["tasks_failed"] += 1
+                category["failed"] += 1
+                logger.error(f"Task failed: {e}")
+            finally:
+                execution_time = time.monotonic() - start_time
+                category["run"].add(execution_time)
+                logger.debug(f"Task completed in {execution_time:.3f}s")
+                async with cond:
+                    self._active[task.category] -= 1
+                    cond.notify_all()
 
         logger.debug(f"Worker {worker_name} stopped")
 
     def get_stats(self) -> Dict[str, Any]:
         """Get queue performance statistics"""
+        categories = {}
+        for name, data in self._category_stats.items():
+            categories[name] = {
+                "pending": len(self._pending.get(name, ())),
+                "running": self._active.get(name, 0),
+                "limit": self.category_limits.get(name),
+                "queued": data["queued"],
+                "completed": data["completed"],
+                "failed": data["failed"],
+                "expired": data["expired"],
+                "wait": data["wait"].summary(),
+                "run": data["run"].summary(),
+            }
         return {
             **self.stats,
             "workers_active": len([w for w in self.workers if not w.done()]),
+            "tasks_running": sum(self._active.values()),
             "queue_utilization": self.stats["queue_size"] / self.max_queue_size,
+            "categories": categories,
         }
 
 
@@ -751,60 +979,133 @@ async def get_task_queue() -> AsyncTaskQueue:
     return _task_queue
 
 
-def cached(ttl: int = 3600, key_func: Optional[Callable] = None):
+# Marks entries stored by ``cached(..., stale_while_revalidate=...)``
+_FRESH_UNTIL = "__fresh_until__"
+
+
+def _cache_key(func, key_func, args, kwargs) -> str:
+    if key_func:
+        return key_func(*args, **kwargs)
+    return f"{func.__name__}:{hash((args, tuple(sorted(kwargs.items()))))}"
+
+
+def cached(
+    ttl: int = 3600,
+    key_func: Optional[Callable] = None,
+    stale_while_revalidate: int = 0,
+):
     """
     Decorator for caching function results
 
+    Concurrent misses for the same key run the function once. With
+    ``stale_while_revalidate``, an entry older than ``ttl`` is still returned
+    for that many more seconds while one background call refreshes it, so hot
+    entries are renewed instead of expiring together and stampeding.
+
     Args:
         ttl: Time to live in seconds
         key_func: Optional function to generate cache key
+        stale_while_revalidate: Seconds a stale entry may be served while it
+            is refreshed in the background (0 disables)
     """
 
     def decorator(func):
+        flights = SingleFlight()
+        refreshing: set = set()
+        refresh_lock = threading.Lock()
+        refresh_tasks: set = set()  # Keeps background tasks referenced
+
+        def store(cache, cache_key, result):
+            if stale_while_revalidate > 0:
+                entry = {_FRESH_UNTIL: time.time() + ttl, "value": result}
+                cache.set(cache_key, entry, ttl=ttl + stale_while_revalidate)
+            else:
+                cache.set(cache_key, result, ttl=ttl)
+
+        def lookup(cache, cache_key) -> Tuple[Any, bool]:
+            """Cached value (None on a miss) and whether it is stale"""
+            entry = cache.get(cache_key)
+            if isinstance(entry, dict) and _FRESH_UNTIL in entry:
+                return entry["value"], time.time() >= entry[_FRESH_UNTIL]
+            return entry, False
+
+        def claim_refresh(cache_key) -> bool:
+            with refresh_lock:
+                if cache_key in refreshing:
+                    return False
+                refreshing.add(cache_key)
+                return True
+
+        def refresh_done(cache_key):
+            with refresh_lock:
+                refreshing.discard(cache_key)
+
+        async def compute_async(cache, cache_key, args, kwargs):
+            result = await func(*args, **kwargs)
+            store(cache, cache_key, result)
+            return result
+
+        async def refresh_async(cache, cache_key, args, kwargs):
+            try:
+                await flights.do_async(
+                    cache_key, compute_async, cache, cache_key, args, kwargs
+                )
+            except Exception as e:
+                logger.warning(f"Background refresh of {cache_key} failed: {e}")
+            finally:
+                refresh_done(cache_key)
+
         @wraps(func)
         async def async_wrapper(*args, **kwargs):
             cache = get_cache_manager()
+            cache_key = _cache_key(func, key_func, args, kwargs)
 
-            # Generate cache key
-            if key_func:
-                cache_key = key_func(*args, **kwargs)
-            else:
-                cache_key = (
-                    f"{func.__name__}:{hash((args, tuple(sorted(kwargs.items()))))}"
-                )
-
-            # Check cache first
-            cached_result = cache.get(cache_key)
+            # Check cache first; a stale hit is served while it is refreshed
+            cached_result, stale = lookup(cache, cache_key)
             if cached_result is not None:
+                if stale and claim_refresh(cache_key):
+                    task = asyncio.ensure_future(
+                        refresh_async(cache, cache_key, args, kwargs)
+                    )
+                    refresh_tasks.add(task)
+                    task.add_done_callback(refresh_tasks.discard)
                 return cached_result
 
-            # Execute function and cache result
-            if inspect.iscoroutinefunction(func):
-                result = await func(*args, **kwargs)
-            else:
-                result = func(*args, **kwargs)
+            # Execute function once for concurrent misses and cache result
+            return await flights.do_async(
+                cache_key, compute_async, cache, cache_key, args, kwargs
+            )
 
-            cache.set(cache_key, result, ttl=ttl)
+        def compute_sync(cache, cache_key, args, kwargs):
+            result = func(*args, **kwargs)
+            store(cache, cache_key, result)
             return result
 
+        def refresh_sync(cache, cache_key, args, kwargs):
+            try:
+                flights.do(cache_key, compute_sync, cache, cache_key, args, kwargs)
+            except Exception as e:
+                logger.warning(f"Background refresh of {cache_key} failed: {e}")
+            finally:
+                refresh_done(cache_key)
+
         @wraps(func)
         def sync_wrapper(*args, **kwargs):
             cache = get_cache_manager()
+            cache_key = _cache_key(func, key_func, args, kwargs)
 
-            if key_func:
-                cache_key = key_func(*args, **kwargs)
-            else:
-                cache_key = (
-                    f"{func.__name__}:{hash((args, tuple(sorted(kwargs.items()))))}"
-                )
-
-            cached_result = cache.get(cache_key)
+            cached_result, stale = lookup(cache, cache_key)
             if cached_result is not None:
+                if stale and claim_refresh(cache_key):
+                    threading.Thread(
+                        target=refresh_sync,
+                        args=(cache, cache_key, args, kwargs),
+                        name="cache-refresh",
+                        daemon=True,
+                    ).start()
                 return cached_result
 
-            result = func(*args, **kwargs)
-            cache.set(cache_key, result, ttl=ttl)
-            return result
+            return flights.do(cache_key, compute_sync, cache, cache_key, args, kwargs)
 
         if inspect.iscoroutinefunction(func):
             return async_wrapper
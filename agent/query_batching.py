@@ -0,0 +1,161 @@
+"""
+Query Embedding Cache and Micro-Batching
+Keeps repeated search queries off the embedding model and folds concurrent
+searches into one ``encode`` call and one multi-query vector lookup.
+
+- ``QueryEmbeddingCache`` is a bounded LRU of query vectors keyed by model and
+  normalized query text (whitespace collapsed, Unicode NFC), so the near
+  identical queries the plugin sends while typing are encoded once
+- ``MicroBatcher`` lets the first caller wait up to ``window`` seconds (or
+  until ``max_batch`` calls are queued), then runs the batch function once for
+  every queued call; batches run one at a time, so calls arriving meanwhile
+  form the next batch, whose oldest caller takes over
+"""
+
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence
+
+
+def normalize_query(text: str) -> str:
+    """Canonical form of a query for cache lookups"""
+    return unicodedata.normalize("NFC", " ".join(text.split()))
+
+
+class QueryEmbeddingCache:
+    """Bounded LRU cache of query embeddings"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, model: str, query: str) -> Optional[List[float]]:
+        key = (model, normalize_query(query))
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return vector
+
+    def put(self, model: str, query: str, vector: Sequence[float]) -> None:
+        if self.max_entries <= 0:
+            return
+        key = (model, normalize_query(query))
+        with self._lock:
+            self._entries[key] = list(vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+            }
+
+
+class _Call:
+    __slots__ = ("item", "result", "error", "finished", "done")
+
+    def __init__(self, item: Any):
+        self.item = item
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.finished = False
+        self.done = threading.Event()
+
+
+class MicroBatcher:
+    """Run ``fn(items) -> results`` once for concurrent calls within a window"""
+
+    def __init__(
+        self,
+        fn: Callable[[List[Any]], List[Any]],
+        window: float = 0.002,
+        max_batch: int = 32,
+    ):
+        self.fn = fn
+        self.window = window
+        self.max_batch = max(1, max_batch)
+        self._cond = threading.Condition()
+        self._queue: List[_Call] = []
+        self._leading = False
+        self.stats = {"calls": 0, "batches": 0, "max_batch_seen": 0}
+
+    def __call__(self, item: Any) -> Any:
+        call = _Call(item)
+        with self._cond:
+            self.stats["calls"] += 1
+            self._queue.append(call)
+            lead = not self._leading
+            self._leading = True
+            if len(self._queue) >= self.max_batch:
+                self._cond.notify_all()
+
+        if lead:
+            self._lead()
+        while not call.finished:
+            call.done.wait()
+            if not call.finished:
+                # Handed the lead by the previous batch
+                call.done.clear()
+                self._lead()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def _lead(self) -> None:
+        deadline = time.monotonic() + self.window
+        with self._cond:
+            while len(self._queue) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = self._queue[: self.max_batch]
+            del self._queue[: self.max_batch]
+            self.stats["batches"] += 1
+            self.stats["max_batch_seen"] = max(self.stats["max_batch_seen"], len(batch))
+
+        try:
+            results = self.fn([c.item for c in batch])
+            for c, result in zip(batch, results, strict=True):
+                c.result = result
+        except BaseException as e:
+            for c in batch:
+                c.error = e
+        for c in batch:
+            c.finished = True
+            c.done.set()
+
+        # Calls that queued up while this batch ran go next, led by the oldest
+        with self._cond:
+            successor = self._queue[0] if self._queue else None
+            self._leading = successor is not None
+        if successor is not None:
+            successor.done.set()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._cond:
+            batches = self.stats["batches"]
+            return {
+                **self.stats,
+                "avg_batch": self.stats["calls"] / batches if batches else 0.0,
+            }
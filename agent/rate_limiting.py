@@ -16,6 +16,8 @@ from typing import Dict, Optional, Tuple
 from fastapi import HTTPException, Request
 from fastapi.responses import JSONResponse
 
+from .file_validation import is_streaming_upload
+
 logger = logging.getLogger(__name__)
 
 
@@ -190,7 +192,10 @@ class AdvancedRateLimitMiddleware:
 
             # Get request body if available
             body_text = ""
-            if request.method in ["POST", "PUT", "PATCH"]:
+            # Streamed uploads are validated chunk by chunk by their endpoint
+            if request.method in ["POST", "PUT", "PATCH"] and not is_streaming_upload(
+                request.url.path
+            ):
                 try:
                     body = await request.body()
                     if body:
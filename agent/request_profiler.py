@@ -0,0 +1,318 @@
+"""
+On-demand Request Profiling
+
+Profiles a single request with a sampling profiler when an admin sends
+``X-Profile: 1``; every other request passes straight through.
+
+- A background thread samples Python stacks (``sys._current_frames``) every
+  ``interval`` seconds while the request runs; threads that are only waiting
+  (idle pool workers, the selector) are skipped
+- All busy threads are sampled, so work handed to ``asyncio.to_thread`` shows
+  up; concurrent requests on the same threads can appear in the profile too
+- Profiles are written as speedscope JSON and collapsed stacks (for
+  flamegraph.pl / inferno) under ``<log_dir>/profiles``, tagged with the
+  ``RequestTracer`` request ID, and listed by ``/api/performance/profiles``
+- One profile runs at a time; other ``X-Profile`` requests are answered with
+  ``X-Profile: busy`` and are not profiled
+"""
+
+import asyncio
+import inspect
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from starlette.requests import Request
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID = re.compile(r"^[0-9a-f]{16}$")
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+# Leaf frames of threads that are blocked, not working
+_IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+
+Frame = Tuple[str, str, int]  # function name, file, first line
+
+
+class StackSampler:
+    """Samples the stacks of busy threads from a background thread"""
+
+    def __init__(self, interval: float = 0.002):
+        self.interval = interval
+        # thread name -> [(stack root-first, seconds since previous sample)]
+        self.samples: Dict[str, List[Tuple[Tuple[Frame, ...], float]]] = {}
+        self.ticks = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self, skip: int, elapsed: float):
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == skip:
+                continue
+            code = frame.f_code
+            if (os.path.basename(code.co_filename), code.co_name) in _IDLE_LEAVES:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            stack.reverse()
+            name = names.get(ident, str(ident))
+            self.samples.setdefault(name, []).append((tuple(stack), elapsed))
+
+    def _run(self):
+        me = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            self._sample(me, now - last)
+            self.ticks += 1
+            last = now
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._run, name="request-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def _frame_label(frame: Frame) -> str:
+    name, filename, line = frame
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+def to_collapsed(samples: Dict[str, List]) -> str:
+    """``thread;outer;...;leaf count`` lines (Brendan Gregg's folded format)"""
+    counts: Counter = Counter()
+    for thread, stacks in samples.items():
+        for stack, _ in stacks:
+            counts[";".join([thread] + [_frame_label(f) for f in stack])] += 1
+    return "".join(f"{stack} {n}\n" for stack, n in sorted(counts.items()))
+
+
+def to_speedscope(samples: Dict[str, List], name: str, duration: float) -> Dict:
+    """Sampled speedscope profile per thread, weighted by measured time"""
+    frames: List[Dict[str, Any]] = []
+    index: Dict[Frame, int] = {}
+    profiles = []
+    for thread, stacks in samples.items():
+        encoded, weights = [], []
+        for stack, weight in stacks:
+            ids = []
+            for frame in stack:
+                if frame not in index:
+                    index[frame] = len(frames)
+                    name_, file_, line = frame
+                    frames.append({"name": name_, "file": file_, "line": line})
+                ids.append(index[frame])
+            encoded.append(ids)
+            weights.append(weight)
+        profiles.append(
+            {
+                "type": "sampled",
+                "name": thread,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": max(duration, sum(weights)),
+                "samples": encoded,
+                "weights": weights,
+            }
+        )
+    return {
+        "$schema": SPEEDSCOPE_SCHEMA,
+        "name": name,
+        "exporter": "obsidian-ai-agent",
+        "shared": {"frames": frames},
+        "profiles": profiles,
+    }
+
+
+class ProfileStore:
+    """Profile files under one directory, oldest removed past ``max_profiles``"""
+
+    def __init__(self, directory: str, max_profiles: int = 50):
+        self.directory = Path(directory)
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+
+    def save(self, meta: Dict[str, Any], samples: Dict[str, List]) -> Dict[str, Any]:
+        profile_id = meta["profile_id"]
+        name = f"{meta['method']} {meta['path']} ({meta['request_id']})"
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            speedscope = to_speedscope(samples, name, meta["duration_ms"] / 1000.0)
+            files = {
+                ".speedscope.json": json.dumps(speedscope),
+                ".collapsed.txt": to_collapsed(samples),
+                ".json": json.dumps(meta, indent=2),  # Written last: lists it
+            }
+            for suffix, content in files.items():
+                (self.directory / f"{profile_id}{suffix}").write_text(content)
+            self._prune()
+        return meta
+
+    def _meta_paths(self) -> List[Path]:
+        if not self.directory.is_dir():
+            return []
+        return [
+            path
+            for path in self.directory.glob("*.json")
+            if PROFILE_ID.match(path.name[: -len(".json")])
+        ]
+
+    def _prune(self):
+        metas = sorted(self._meta_paths(), key=os.path.getmtime)
+        for path in metas[: max(0, len(metas) - self.max_profiles)]:
+            stem = path.name[: -len(".json")]
+            for suffix in (".json", ".speedscope.json", ".collapsed.txt"):
+                (self.directory / f"{stem}{suffix}").unlink(missing_ok=True)
+
+    def list(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Metadata of stored profiles, newest first"""
+        profiles = []
+        for path in self._meta_paths():
+            try:
+                profiles.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                continue
+        profiles.sort(key=lambda m: m.get("created", ""), reverse=True)
+        return profiles[:limit]
+
+    def path(self, profile_id: str, fmt: str = "speedscope") -> Optional[Path]:
+        if not PROFILE_ID.match(profile_id):
+            return None
+        suffix = ".collapsed.txt" if fmt == "collapsed" else ".speedscope.json"
+        path = self.directory / f"{profile_id}{suffix}"
+        return path if path.exists() else None
+
+
+_profile_store: Optional[ProfileStore] = None
+
+
+def get_profile_store() -> ProfileStore:
+    global _profile_store
+    if _profile_store is None:
+        try:
+            from .settings import get_settings
+
+            log_dir = get_settings().abs_log_dir
+        except Exception:
+            log_dir = Path(os.environ.get("LOG_DIR", "./agent/logs"))
+        _profile_store = ProfileStore(str(Path(log_dir) / "profiles"))
+    return _profile_store
+
+
+class RequestProfilerMiddleware:
+    """Pure ASGI middleware: profiles requests carrying ``X-Profile: 1`` when
+    ``authorize(request)`` allows it (admins); a header lookup otherwise"""
+
+    def __init__(
+        self,
+        app,
+        authorize: Optional[Callable[[Request], Any]] = None,
+        store: Optional[ProfileStore] = None,
+        interval: float = 0.002,
+    ):
+        self.app = app
+        self.authorize = authorize
+        self.store = store
+        self.interval = interval
+        self._busy = threading.Lock()
+
+    async def _allowed(self, scope) -> bool:
+        if self.authorize is None:
+            return False
+        try:
+            allowed = self.authorize(Request(scope))
+            if inspect.isawaitable(allowed):
+                allowed = await allowed
+            return bool(allowed)
+        except Exception:
+            return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or (
+            dict(scope.get("headers") or []).get(PROFILE_HEADER) != b"1"
+        ):
+            await self.app(scope, receive, send)
+            return
+        if not await self._allowed(scope):
+            # Silently unprofiled: the header is not a way to probe for admins
+            await self.app(scope, receive, send)
+            return
+        if not self._busy.acquire(blocking=False):
+            busy = _with_headers(send, [(PROFILE_HEADER, b"busy")])
+            await self.app(scope, receive, busy)
+            return
+        try:
+            await self._profile(scope, receive, send)
+        finally:
+            self._busy.release()
+
+    async def _profile(self, scope, receive, send):
+        profile_id = uuid.uuid4().hex[:16]
+        status = {"code": None}
+
+        async def send_tagged(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        tagged = _with_headers(send_tagged, [(b"x-profile-id", profile_id.encode())])
+        sampler = StackSampler(self.interval)
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, tagged)
+        finally:
+            sampler.stop()
+            duration = time.perf_counter() - start
+            state = scope.get("state") or {}
+            trace = state.get("trace_context") or {}
+            meta = {
+                "profile_id": profile_id,
+                "request_id": trace.get("request_id") or state.get("request_id"),
+                "method": scope.get("method"),
+                "path": scope.get("path"),
+                "status_code": status["code"],
+                "duration_ms": round(duration * 1000, 3),
+                "samples": sum(len(s) for s in sampler.samples.values()),
+                "interval_ms": self.interval * 1000,
+                "threads": sorted(sampler.samples),
+                "created": datetime.now(timezone.utc).isoformat(),
+            }
+            store = self.store or get_profile_store()
+            try:
+                await asyncio.to_thread(store.save, meta, sampler.samples)
+            except Exception as e:
+                logging.warning("[RequestProfiler] Could not save profile: %s", e)
+
+
+def _with_headers(send, headers: List[Tuple[bytes, bytes]]):
+    async def wrapped(message):
+        if message["type"] == "http.response.start":
+            message["headers"] = list(message.get("headers", [])) + headers
+        await send(message)
+
+    return wrapped
@@ -21,6 +21,7 @@ from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.types import ASGIApp
 
 from .logging_framework import LogCategory, get_logger
+from .spans import get_span_tracer
 
 logger = get_logger("request_tracing", LogCategory.PERFORMANCE)
 
@@ -344,27 +345,39 @@ class RequestTracingMiddleware(BaseHTTPMiddleware):
         response = None
         exception = None
 
-        try:
-            # Process request
-            response = await call_next(request)
-
-            # Add request ID to response headers
-            response.headers["X-Request-ID"] = context["request_id"]
-            response.headers["X-Response-Time"] = (
-                f"{(time.perf_counter() - context['start_time']) * 1000:.2f}ms"
-            )
-
-        except BaseException as exc:
-            # Don't swallow exceptions; record and re-raise so FastAPI handlers run
-            exception = exc
-            raise
-        finally:
-            # End tracing with whatever we have (response may be None on exception)
+        # Root span of the request; phase spans opened by handlers nest under it
+        with get_span_tracer().start_span(
+            f"{request.method} {request.url.path}",
+            {
+                "http.request.method": request.method,
+                "url.path": request.url.path,
+                "request.id": context["request_id"],
+            },
+            kind="SERVER",
+        ) as span:
+            context["trace_id"] = span.trace_id
             try:
-                self.tracer.end_request(context, response, exception)
-            except Exception:
-                # Tracing must never crash the request lifecycle
-                pass
+                # Process request
+                response = await call_next(request)
+                span.set_attribute("http.response.status_code", response.status_code)
+
+                # Add request ID to response headers
+                response.headers["X-Request-ID"] = context["request_id"]
+                response.headers["X-Response-Time"] = (
+                    f"{(time.perf_counter() - context['start_time']) * 1000:.2f}ms"
+                )
+
+            except BaseException as exc:
+                # Don't swallow exceptions; record and re-raise so handlers run
+                exception = exc
+                raise
+            finally:
+                # End tracing with whatever we have (None response on exception)
+                try:
+                    self.tracer.end_request(context, response, exception)
+                except Exception:
+                    # Tracing must never crash the request lifecycle
+                    pass
 
         return response
 
@@ -15,19 +15,24 @@ Date: October 16, 2025
 
 import asyncio
 import hashlib
+import heapq
 import hmac
 import json
 import os
 import re
 import secrets
+import sqlite3
+import threading
 from datetime import datetime, timedelta, timezone
 from enum import Enum
-from typing import Any, Dict, List, Optional, Set
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 from fastapi import Request, Response, status
 from starlette.middleware.base import BaseHTTPMiddleware
 
 from .error_handling import SecurityError, error_context
+from .file_validation import is_streaming_upload
 from .logging_framework import LogCategory, get_logger, log_audit, log_security
 from .utils import is_test_mode
 
@@ -111,35 +116,279 @@ class SecurityContext:
         }
 
 
+class SessionStore:
+    """Indexed in-memory session store with optional SQLite persistence
+
+    - ``sessions`` maps session id to session data (O(1) lookup)
+    - ``user_index`` maps user id to that user's session ids in creation
+      order, so per-user counts and oldest-session eviction are O(1)
+    - a min-heap of ``(deadline, session_id)`` drives expiry; entries are
+      invalidated lazily, so activity updates never touch the heap and
+      cleanup only visits sessions whose deadline has passed
+
+    When ``db_path`` is set, sessions are written to SQLite on create and
+    delete, activity timestamps are flushed in batches, and only unexpired
+    rows are loaded on startup (via an index on ``expires_at``).
+    """
+
+    def __init__(
+        self,
+        session_timeout: timedelta,
+        idle_timeout: timedelta,
+        db_path: Optional[str] = None,
+    ):
+        self.session_timeout = session_timeout
+        self.idle_timeout = idle_timeout
+        self.sessions: Dict[str, Dict[str, Any]] = {}
+        self.user_index: Dict[str, Dict[str, None]] = {}
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._dirty: Set[str] = set()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+
+        if db_path:
+            self._open_database(db_path)
+
+    # ------------------------------------------------------------------
+    # Expiry bookkeeping
+    # ------------------------------------------------------------------
+    def deadline(self, session: Dict[str, Any]) -> float:
+        """Earliest of the absolute and idle expiry, as a POSIX timestamp"""
+        absolute = session["created_at"] + self.session_timeout
+        idle = session["last_activity"] + self.idle_timeout
+        return min(absolute, idle).timestamp()
+
+    def _schedule(self, session_id: str, session: Dict[str, Any]):
+        heapq.heappush(self._expiry_heap, (self.deadline(session), session_id))
+
+    def reschedule_all(self):
+        """Rebuild the expiry heap, e.g. after the timeouts change"""
+        self._expiry_heap = [
+            (self.deadline(s), sid) for sid, s in self.sessions.items()
+        ]
+        heapq.heapify(self._expiry_heap)
+
+    def pop_expired(self, now: datetime) -> List[str]:
+        """Return ids of sessions whose deadline has passed
+
+        Heap entries for removed sessions are discarded; entries whose
+        session was active since they were pushed are re-pushed with the
+        current deadline.
+        """
+        now_ts = now.timestamp()
+        expired = []
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= now_ts:
+            _, session_id = heapq.heappop(heap)
+            session = self.sessions.get(session_id)
+            if session is None:
+                continue
+            current = self.deadline(session)
+            if current <= now_ts:
+                expired.append(session_id)
+            else:
+                heapq.heappush(heap, (current, session_id))
+        return expired
+
+    # ------------------------------------------------------------------
+    # Session operations
+    # ------------------------------------------------------------------
+    def add(self, session: Dict[str, Any]):
+        session_id = session["session_id"]
+        self.sessions[session_id] = session
+        self.user_index.setdefault(session["user_id"], {})[session_id] = None
+        self._schedule(session_id, session)
+        self._persist(session)
+
+    def remove(self, session_id: str) -> Optional[Dict[str, Any]]:
+        session = self.sessions.pop(session_id, None)
+        if session is None:
+            return None
+        user_sessions = self.user_index.get(session["user_id"])
+        if user_sessions is not None:
+            user_sessions.pop(session_id, None)
+            if not user_sessions:
+                del self.user_index[session["user_id"]]
+        self._dirty.discard(session_id)
+        self._delete(session_id)
+        return session
+
+    def touch(self, session_id: str):
+        """Record activity; persisted on the next ``flush``"""
+        if self._db is not None:
+            self._dirty.add(session_id)
+
+    def user_session_count(self, user_id: str) -> int:
+        return len(self.user_index.get(user_id, ()))
+
+    def oldest_user_session(self, user_id: str) -> Optional[str]:
+        return next(iter(self.user_index.get(user_id, ())), None)
+
+    # ------------------------------------------------------------------
+    # SQLite persistence
+    # ------------------------------------------------------------------
+    def _open_database(self, db_path: str):
+        path = Path(db_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        with self._db_lock, self._db:
+            self._db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS sessions (
+                    session_id TEXT PRIMARY KEY,
+                    user_id TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_activity REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    data TEXT NOT NULL
+                )
+                """
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS idx_sessions_expires"
+                " ON sessions(expires_at)"
+            )
+        self._load()
+
+    def _load(self):
+        now_ts = datetime.now(timezone.utc).timestamp()
+        with self._db_lock, self._db:
+            self._db.execute("DELETE FROM sessions WHERE expires_at <= ?", (now_ts,))
+            rows = self._db.execute(
+                "SELECT created_at, last_activity, data FROM sessions "
+                "ORDER BY created_at"
+            ).fetchall()
+
+        for created_at, last_activity, data in rows:
+            session = json.loads(data)
+            session["created_at"] = datetime.fromtimestamp(created_at, timezone.utc)
+            session["last_activity"] = datetime.fromtimestamp(
+                last_activity, timezone.utc
+            )
+            session_id = session["session_id"]
+            self.sessions[session_id] = session
+            self.user_index.setdefault(session["user_id"], {})[session_id] = None
+            self._schedule(session_id, session)
+
+    def _persist(self, session: Dict[str, Any]):
+        if self._db is None:
+            return
+        data = {
+            k: v for k, v in session.items() if k not in ("created_at", "last_activity")
+        }
+        with self._db_lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    session["session_id"],
+                    session["user_id"],
+                    session["created_at"].timestamp(),
+                    session["last_activity"].timestamp(),
+                    self.deadline(session),
+                    json.dumps(data, default=str),
+                ),
+            )
+
+    def _delete(self, session_id: str):
+        if self._db is None:
+            return
+        with self._db_lock, self._db:
+            self._db.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def flush(self):
+        """Write pending activity updates in a single batch"""
+        if self._db is None or not self._dirty:
+            return
+        rows = []
+        for session_id in self._dirty:
+            session = self.sessions.get(session_id)
+            if session is not None:
+                rows.append(
+                    (
+                        session["last_activity"].timestamp(),
+                        self.deadline(session),
+                        json.dumps(
+                            {
+                                k: v
+                                for k, v in session.items()
+                                if k not in ("created_at", "last_activity")
+                            },
+                            default=str,
+                        ),
+                        session_id,
+                    )
+                )
+        self._dirty.clear()
+        with self._db_lock, self._db:
+            self._db.executemany(
+                "UPDATE sessions SET last_activity = ?, expires_at = ?, data = ? "
+                "WHERE session_id = ?",
+                rows,
+            )
+
+    def close(self):
+        if self._db is not None:
+            self.flush()
+            self._db.close()
+            self._db = None
+
+
 class SessionManager:
     """Advanced session management with security features"""
 
-    def __init__(self):
-        self.active_sessions: Dict[str, Dict[str, Any]] = {}
+    def __init__(self, db_path: Optional[str] = None):
         self.session_history: Dict[str, List[Dict[str, Any]]] = {}
         self.blocked_sessions: Set[str] = set()
         self.security_logger = get_logger("security.session", LogCategory.SECURITY)
 
         # Session configuration
-        self.session_timeout = timedelta(hours=24)
-        self.idle_timeout = timedelta(hours=2)
+        self._session_timeout = timedelta(hours=24)
+        self._idle_timeout = timedelta(hours=2)
         self.max_sessions_per_user = 5
         self.session_rotation_interval = timedelta(hours=4)
 
+        # Indexed store; SESSION_DB_PATH enables persistence across restarts
+        self.store = SessionStore(
+            self._session_timeout,
+            self._idle_timeout,
+            db_path=db_path or os.getenv("SESSION_DB_PATH"),
+        )
+        self.active_sessions: Dict[str, Dict[str, Any]] = self.store.sessions
+
+    @property
+    def session_timeout(self) -> timedelta:
+        return self._session_timeout
+
+    @session_timeout.setter
+    def session_timeout(self, value: timedelta):
+        self._session_timeout = value
+        self.store.session_timeout = value
+        self.store.reschedule_all()
+
+    @property
+    def idle_timeout(self) -> timedelta:
+        return self._idle_timeout
+
+    @idle_timeout.setter
+    def idle_timeout(self, value: timedelta):
+        self._idle_timeout = value
+        self.store.idle_timeout = value
+        self.store.reschedule_all()
+
+    def active_user_count(self) -> int:
+        """Number of distinct users with at least one active session"""
+        return len(self.store.user_index)
+
     def create_session(self, user_id: str, client_ip: str, user_agent: str) -> str:
         """Create a new secure session"""
         with error_context("create_session", reraise=False):
             session_id = secrets.token_urlsafe(32)
 
             # Check for too many sessions
-            user_sessions = [
-                s for s in self.active_sessions.values() if s.get("user_id") == user_id
-            ]
-            if len(user_sessions) >= self.max_sessions_per_user:
+            if self.store.user_session_count(user_id) >= self.max_sessions_per_user:
                 # Remove oldest session
-                oldest_session = min(user_sessions, key=lambda x: x["created_at"])
                 self.terminate_session(
-                    oldest_session["session_id"], "max_sessions_exceeded"
+                    self.store.oldest_user_session(user_id), "max_sessions_exceeded"
                 )
 
             # Create session
@@ -155,7 +404,7 @@ class SessionManager:
                 "is_suspicious": False,
             }
 
-            self.active_sessions[session_id] = session_data
+            self.store.add(session_data)
 
             # Log session creation
             self.security_logger.info(
@@ -222,15 +471,16 @@ class SessionManager:
                 severity="HIGH",
             )
 
-        # Update session activity
+        # Update session activity (the expiry heap is corrected lazily)
         session["last_activity"] = now
         session["activity_count"] += 1
+        self.store.touch(session_id)
 
         return session
 
     def terminate_session(self, session_id: str, reason: str):
         """Terminate a session"""
-        session = self.active_sessions.pop(session_id, None)
+        session = self.store.remove(session_id)
         if session:
             # Add to history
             if session["user_id"] not in self.session_history:
@@ -277,20 +527,14 @@ class SessionManager:
     def cleanup_expired_sessions(self):
         """Clean up expired sessions"""
         now = datetime.now(timezone.utc)
-        expired_sessions = []
-
-        for session_id, session in self.active_sessions.items():
-            if (
-                now - session["created_at"] > self.session_timeout
-                or now - session["last_activity"] > self.idle_timeout
-            ):
-                expired_sessions.append(session_id)
 
-        for session_id in expired_sessions:
+        for session_id in self.store.pop_expired(now):
             self.terminate_session(session_id, "cleanup_expired")
 
+        # Persist batched activity updates
+        self.store.flush()
+
         # Clean up old blocked sessions (24 hours)
-        cleanup_time = now - timedelta(hours=24)
         self.blocked_sessions = {
             s
             for s in self.blocked_sessions
@@ -504,9 +748,113 @@ class RequestSigner:
             return False
 
 
+class ThreatScanner:
+    """Precompiled multi-pattern scanner with a literal prefilter
+
+    Every threat pattern requires one or more literals (for example
+    ``union`` and ``select``) to be present before it can match.  Each input
+    is case-folded once and checked for those literals with C-level substring
+    search; only patterns whose literals are all present are confirmed with
+    their precompiled regex.  Clean input - the common case - therefore costs
+    one pass plus a handful of ``in`` checks instead of one regex scan per
+    pattern.  Patterns without registered literals are always confirmed.
+
+    Case folding and ``re.IGNORECASE`` only agree on ASCII (``"\u0130"`` folds
+    to ``"i\u0307"`` yet matches ``i``), so non-ASCII input confirms every
+    pattern.
+    """
+
+    def __init__(
+        self,
+        threat_patterns: Dict[str, List[str]],
+        pattern_literals: Optional[Dict[str, Tuple[str, ...]]] = None,
+        max_scan_chars: int = 256 * 1024,
+    ):
+        pattern_literals = pattern_literals or {}
+        self.max_scan_chars = max_scan_chars
+        # (threat_type, compiled pattern, required literals)
+        self._entries: List[Tuple[str, "re.Pattern", Tuple[str, ...]]] = [
+            (
+                threat_type,
+                re.compile(pattern, re.IGNORECASE),
+                tuple(lit.casefold() for lit in pattern_literals.get(pattern, ())),
+            )
+            for threat_type, patterns in threat_patterns.items()
+            for pattern in patterns
+        ]
+        self._literals = sorted({lit for _, _, lits in self._entries for lit in lits})
+
+    def _candidates(self, text: str) -> List[Tuple[str, "re.Pattern"]]:
+        """Return the patterns whose required literals all occur in ``text``"""
+        if not text.isascii():
+            return [(threat_type, pattern) for threat_type, pattern, _ in self._entries]
+        folded = text.casefold()
+        present = {lit for lit in self._literals if lit in folded}
+        return [
+            (threat_type, pattern)
+            for threat_type, pattern, lits in self._entries
+            if all(lit in present for lit in lits)
+        ]
+
+    def scan(self, text: str) -> List[str]:
+        """Return the threat type of every pattern matching ``text``
+
+        A threat type appears once per matching pattern, so callers can score
+        per pattern exactly as the per-regex loop did.  Input beyond
+        ``max_scan_chars`` is not inspected.
+        """
+        if not text:
+            return []
+        text = text[: self.max_scan_chars]
+        return [
+            threat_type
+            for threat_type, pattern in self._candidates(text)
+            if pattern.search(text)
+        ]
+
+    def scan_many(self, texts: List[str]) -> List[str]:
+        """Scan several values, prefiltering them together in a single pass"""
+        texts = [t[: self.max_scan_chars] for t in texts if t]
+        if not texts:
+            return []
+        candidates = self._candidates("\n".join(texts))
+        return [
+            threat_type
+            for text in texts
+            for threat_type, pattern in candidates
+            if pattern.search(text)
+        ]
+
+
 class ThreatDetector:
     """Advanced threat detection and behavioral analysis"""
 
+    # Literals that must all be present (case-insensitively) for a pattern to match
+    PATTERN_LITERALS: Dict[str, Tuple[str, ...]] = {
+        r"(\bunion\b.*\bselect\b)": ("union", "select"),
+        r"(\bselect\b.*\bfrom\b.*\bwhere\b)": ("select", "from", "where"),
+        r"(\bdrop\b.*\btable\b)": ("drop", "table"),
+        r"(\binsert\b.*\binto\b)": ("insert", "into"),
+        r"(\bupdate\b.*\bset\b)": ("update", "set"),
+        r"(\bdelete\b.*\bfrom\b)": ("delete", "from"),
+        r"<script[^>]*>": ("<script",),
+        r"javascript:": ("javascript:",),
+        r"on\w+\s*=": ("on", "="),
+        r"<iframe[^>]*>": ("<iframe",),
+        r"<object[^>]*>": ("<object",),
+        r"<embed[^>]*>": ("<embed",),
+        r"\.\./": ("../",),
+        r"\.\.\\": ("..\\",),
+        r"%2e%2e%2f": ("%2e%2e%2f",),
+        r"%2e%2e%5c": ("%2e%2e%5c",),
+        r"\.\.%2f": ("..%2f",),
+        r"\.\.%5c": ("..%5c",),
+        r";\s*(rm|del|format)": (";",),
+        r";\s*(cat|type)\s+": (";",),
+        r";\s*(wget|curl)\s+": (";",),
+        r";\s*(nc|netcat)\s+": (";",),
+    }
+
     def __init__(self):
         self.threat_patterns = {
             # Suspicious patterns in requests
@@ -542,6 +890,11 @@ class ThreatDetector:
             ],
         }
 
+        self.max_scan_bytes = int(os.getenv("SECURITY_MAX_SCAN_BYTES", 256 * 1024))
+        self.scanner = ThreatScanner(
+            self.threat_patterns, self.PATTERN_LITERALS, self.max_scan_bytes
+        )
+
         self.behavioral_tracker: Dict[str, Dict[str, Any]] = {}
         self.anomaly_thresholds = {
             "request_frequency": 100,  # requests per minute
@@ -558,24 +911,19 @@ class ThreatDetector:
         """Analyze request for threats and return threat score"""
         threat_score = 0.0
 
-        # Pattern-based analysis
-        for threat_type, patterns in self.threat_patterns.items():
-            for pattern in patterns:
-                # Check in URL path
-                if re.search(pattern, context.request_path, re.IGNORECASE):
-                    threat_score += 5.0
-                    context.add_security_flag(f"pattern_{threat_type}_path")
+        # Pattern-based analysis: path, headers and body are each scanned once
+        for threat_type in self.scanner.scan(context.request_path):
+            threat_score += 5.0
+            context.add_security_flag(f"pattern_{threat_type}_path")
 
-                # Check in headers
-                for header_value in context.headers.values():
-                    if re.search(pattern, str(header_value), re.IGNORECASE):
-                        threat_score += 3.0
-                        context.add_security_flag(f"pattern_{threat_type}_header")
+        header_values = [str(v) for v in context.headers.values()]
+        for threat_type in self.scanner.scan_many(header_values):
+            threat_score += 3.0
+            context.add_security_flag(f"pattern_{threat_type}_header")
 
-                # Check in request body
-                if request_body and re.search(pattern, request_body, re.IGNORECASE):
-                    threat_score += 7.0
-                    context.add_security_flag(f"pattern_{threat_type}_body")
+        for threat_type in self.scanner.scan(request_body):
+            threat_score += 7.0
+            context.add_security_flag(f"pattern_{threat_type}_body")
 
         # Behavioral analysis
         behavior_score = self._analyze_behavior(context)
@@ -755,7 +1103,10 @@ class SecurityHardeningMiddleware(BaseHTTPMiddleware):
         try:
             # Read request body for analysis
             body = b""
-            if request.method in ["POST", "PUT", "PATCH"]:
+            # Streamed uploads are validated chunk by chunk by their endpoint
+            if request.method in ["POST", "PUT", "PATCH"] and not is_streaming_upload(
+                context.request_path
+            ):
                 body = await request.body()
                 # Store body for signature validation
                 request._body = body
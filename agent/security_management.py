@@ -139,9 +139,7 @@ async def get_security_system_status():
         session_stats = {
             "active_sessions": len(session_manager.active_sessions),
             "blocked_sessions": len(session_manager.blocked_sessions),
-            "total_users": len(
-                set(s["user_id"] for s in session_manager.active_sessions.values())
-            ),
+            "total_users": session_manager.active_user_count(),
         }
 
         api_key_stats = {
@@ -214,8 +214,15 @@ class Settings(BaseModel):
     # LLM / embeddings / vector DB
     model_backend: str = "llama_cpp"
     model_path: str = "./models/gpt4all/llama-7b.gguf"
+    inference_socket: str = ""  # shared inference worker UDS ("" = in-process)
+    inference_timeout_s: float = 120.0  # per-request deadline in the worker
     embed_model: str = "sentence-transformers/all-MiniLM-L6-v2"
-    vector_db: str = "chroma"
+    vector_db: str = "chroma"  # "chroma" or "numpy" (in-process store)
+    vector_ivf_lists: int = 0  # numpy store: IVF partitions for large vaults
+    vector_quantization: str = "none"  # numpy store: "none", "float16" or "int8"
+    query_cache_size: int = 1024  # cached query embeddings (0 disables)
+    search_batch_window_ms: float = 2.0  # concurrent searches batched within
+    span_buffer_traces: int = 256  # recent traces kept in memory (0 disables)
     gpu: bool = True
     top_k: int = 10
     chunk_size: int = 800
@@ -434,8 +441,15 @@ def _merge_env(overrides: dict) -> dict:
         "CACHE_DIR": "cache_dir",
         "MODEL_BACKEND": "model_backend",
         "MODEL_PATH": "model_path",
+        "INFERENCE_SOCKET": "inference_socket",
+        "INFERENCE_TIMEOUT_S": "inference_timeout_s",
         "EMBED_MODEL": "embed_model",
         "VECTOR_DB": "vector_db",
+        "VECTOR_IVF_LISTS": "vector_ivf_lists",
+        "VECTOR_QUANTIZATION": "vector_quantization",
+        "QUERY_CACHE_SIZE": "query_cache_size",
+        "SEARCH_BATCH_WINDOW_MS": "search_batch_window_ms",
+        "SPAN_BUFFER_TRACES": "span_buffer_traces",
         "GPU": "gpu",
         "TOP_K": "top_k",
         "CHUNK_SIZE": "chunk_size",
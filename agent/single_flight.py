@@ -0,0 +1,109 @@
+"""
+Single-flight Request Coalescing
+Concurrent callers doing the same work (the same question, the same text to
+embed, the same URL) share one execution instead of each repeating it.
+
+- ``SingleFlight.do(key, fn, ...)`` for threads and ``await do_async(key, fn,
+  ...)`` for coroutines: the first caller of a key runs ``fn``, callers
+  arriving before it finishes get the same result or exception
+- Flights are ``concurrent.futures.Future`` objects, so thread and async
+  callers of one key coalesce with each other, across event loops
+- A key is forgotten as soon as its flight lands; nothing is cached, so the
+  leader is expected to fill a cache that later callers check first
+- If the leader is cancelled or interrupted, the waiting callers retry and
+  one of them leads the next flight
+"""
+
+import asyncio
+import inspect
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from .spans import current_span
+
+
+class _Abandoned(Exception):
+    """The leading call stopped without a result (cancelled or interrupted)"""
+
+
+class SingleFlight:
+    """Keyed coalescing of identical in-flight calls"""
+
+    def __init__(self):
+        self._flights: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "executions": 0, "shared": 0}
+
+    def _join(self, key: Hashable) -> Tuple[Future, bool]:
+        with self._lock:
+            self.stats["calls"] += 1
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.stats["shared"] += 1
+                return flight, False
+            flight = self._flights[key] = Future()
+            self.stats["executions"] += 1
+            return flight, True
+
+    def _land(self, key: Hashable, flight: Future, result=None, error=None):
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        if error is None:
+            flight.set_result(result)
+        elif isinstance(error, Exception):
+            flight.set_exception(error)
+        else:
+            # Cancelled or interrupted: waiters retry rather than inherit it
+            flight.set_exception(_Abandoned())
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run ``fn(*args, **kwargs)`` once for all concurrent callers of ``key``"""
+        while True:
+            flight, leader = self._join(key)
+            if leader:
+                try:
+                    result = fn(*args, **kwargs)
+                except BaseException as e:
+                    self._land(key, flight, error=e)
+                    raise
+                self._land(key, flight, result)
+                return result
+            current_span().set_attribute("singleflight.shared", True)
+            try:
+                return flight.result()
+            except _Abandoned:
+                continue
+
+    async def do_async(
+        self, key: Hashable, fn: Callable[..., Any], *args, **kwargs
+    ) -> Any:
+        """Await ``fn(*args, **kwargs)`` once for all concurrent callers of
+        ``key``; ``fn`` may return an awaitable or a plain value"""
+        while True:
+            flight, leader = self._join(key)
+            if leader:
+                try:
+                    result = fn(*args, **kwargs)
+                    if inspect.isawaitable(result):
+                        result = await result
+                except BaseException as e:
+                    self._land(key, flight, error=e)
+                    raise
+                self._land(key, flight, result)
+                return result
+            current_span().set_attribute("singleflight.shared", True)
+            try:
+                # Shielded: a waiter being cancelled must not cancel the flight
+                return await asyncio.shield(asyncio.wrap_future(flight))
+            except _Abandoned:
+                continue
+
+    def in_flight(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._flights
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, "in_flight": len(self._flights)}
@@ -0,0 +1,365 @@
+"""
+Phase-level Spans
+A small in-process tracer following the OpenTelemetry data model, so a slow
+request can be broken down into embedding, vector query, cache tiers and
+token generation.
+
+- Spans nest through a context variable: ``asyncio`` tasks and
+  ``asyncio.to_thread`` inherit the current span, plain threads start new traces
+- Each request gets a root span from ``RequestTracingMiddleware``; phases are
+  added with ``@traced("name")`` or ``with start_span("name")`` and annotated
+  through ``current_span().set_attribute(...)``
+- ``@traced`` and ``start_span`` only record inside an existing trace, so
+  background jobs and cache warmers do not push request traces out of the
+  buffer
+- Finished traces are kept in a bounded ring buffer (oldest dropped first) and
+  exported as OTLP-JSON: one ``ExportTraceServiceRequest`` per line, as read
+  by the OpenTelemetry Collector's ``otlpjsonfile`` receiver
+- With the buffer size set to 0 spans are not recorded and cost one check
+"""
+
+import functools
+import json
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+SERVICE_NAME = "obsidian-ai-agent"
+SCOPE_NAME = "agent.spans"
+
+# OTLP enum values
+SPAN_KINDS = {"INTERNAL": 1, "SERVER": 2, "CLIENT": 3}
+STATUS_CODES = {"UNSET": 0, "OK": 1, "ERROR": 2}
+
+
+class Span:
+    """One timed operation: ids, parent, attributes, status and events"""
+
+    __slots__ = (
+        "name",
+        "trace_id",
+        "span_id",
+        "parent_span_id",
+        "kind",
+        "start_ns",
+        "end_ns",
+        "attributes",
+        "events",
+        "status",
+        "status_message",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_span_id: Optional[str] = None,
+        kind: str = "INTERNAL",
+        attributes: Optional[Dict[str, Any]] = None,
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent_span_id
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.events: List[Dict[str, Any]] = []
+        self.status = "UNSET"
+        self.status_message = ""
+
+    @property
+    def recording(self) -> bool:
+        return True
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if value is not None:
+            self.attributes[key] = value
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+
+    def add_event(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        self.events.append(
+            {"name": name, "time_ns": time.time_ns(), "attributes": attributes or {}}
+        )
+
+    def record_exception(self, exc: BaseException) -> None:
+        self.add_event(
+            "exception",
+            {"exception.type": type(exc).__name__, "exception.message": str(exc)},
+        )
+        self.status = "ERROR"
+        self.status_message = str(exc)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_span_id,
+            "kind": self.kind,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": dict(self.attributes),
+            "events": list(self.events),
+            "status": self.status,
+        }
+
+
+class _NonRecordingSpan:
+    """Stand-in returned while tracing is off; every call is a no-op"""
+
+    recording = False
+    trace_id = span_id = None
+    attributes: Dict[str, Any] = {}
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        pass
+
+    def add_event(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        pass
+
+    def record_exception(self, exc: BaseException) -> None:
+        pass
+
+
+NON_RECORDING_SPAN = _NonRecordingSpan()
+_current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_span():
+    """The active span, or a no-op span outside of any trace"""
+    return _current.get() or NON_RECORDING_SPAN
+
+
+class SpanTracer:
+    """Creates spans and keeps the most recent ``max_traces`` traces"""
+
+    def __init__(self, max_traces: int = 256, max_spans_per_trace: int = 512):
+        self.max_traces = max_traces
+        self.max_spans_per_trace = max_spans_per_trace
+        self._traces: "OrderedDict[str, List[Span]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"spans": 0, "dropped_spans": 0, "evicted_traces": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_traces > 0
+
+    @contextmanager
+    def start_span(
+        self,
+        name: str,
+        attributes: Optional[Dict[str, Any]] = None,
+        kind: str = "INTERNAL",
+    ) -> Iterator[Any]:
+        if not self.enabled:
+            yield NON_RECORDING_SPAN
+            return
+        parent = _current.get()
+        span = Span(
+            name,
+            trace_id=parent.trace_id if parent else secrets.token_hex(16),
+            parent_span_id=parent.span_id if parent else None,
+            kind=kind,
+            attributes=attributes,
+        )
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.record_exception(exc)
+            raise
+        finally:
+            _current.reset(token)
+            span.end_ns = time.time_ns()
+            self._record(span)
+
+    def _record(self, span: Span) -> None:
+        with self._lock:
+            self.stats["spans"] += 1
+            spans = self._traces.get(span.trace_id)
+            if spans is None:
+                spans = self._traces[span.trace_id] = []
+                while len(self._traces) > self.max_traces:
+                    self._traces.popitem(last=False)
+                    self.stats["evicted_traces"] += 1
+            self._traces.move_to_end(span.trace_id)
+            # The root ends last and is always kept
+            if len(spans) >= self.max_spans_per_trace and span.parent_span_id:
+                self.stats["dropped_spans"] += 1
+                return
+            spans.append(span)
+
+    def get_trace(self, trace_id: str) -> List[Span]:
+        """Finished spans of one trace, in start order"""
+        with self._lock:
+            spans = list(self._traces.get(trace_id, ()))
+        return sorted(spans, key=lambda s: s.start_ns)
+
+    def recent(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Newest traces first, with the time spent per phase"""
+        with self._lock:
+            trace_ids = list(self._traces)[-limit:] if limit > 0 else []
+        summaries = []
+        for trace_id in reversed(trace_ids):
+            spans = self.get_trace(trace_id)
+            if not spans:
+                continue
+            root = next((s for s in spans if s.parent_span_id is None), spans[0])
+            phases: Dict[str, float] = {}
+            for span in spans:
+                if span is not root:
+                    phases[span.name] = phases.get(span.name, 0.0) + span.duration_ms
+            summaries.append(
+                {
+                    "trace_id": trace_id,
+                    "name": root.name,
+                    "request_id": root.attributes.get("request.id"),
+                    "duration_ms": round(root.duration_ms, 3),
+                    "status": root.status,
+                    "spans": len(spans),
+                    "phases_ms": {k: round(v, 3) for k, v in phases.items()},
+                }
+            )
+        return summaries
+
+    def to_otlp(self, trace_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+        """OTLP-JSON ``ExportTraceServiceRequest`` of the given (or all) traces"""
+        with self._lock:
+            ids = list(self._traces) if trace_ids is None else trace_ids
+        spans = [span for trace_id in ids for span in self.get_trace(trace_id)]
+        return to_otlp(spans)
+
+    def export_otlp(self, path: str, trace_ids: Optional[List[str]] = None) -> int:
+        """Write traces to ``path`` as OTLP-JSON; returns the span count"""
+        payload = self.to_otlp(trace_ids)
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(target.name + ".tmp")
+        tmp.write_text(json.dumps(payload), encoding="utf-8")
+        os.replace(tmp, target)
+        return len(payload["resourceSpans"][0]["scopeSpans"][0]["spans"])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._traces.clear()
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_otlp_value(v) for v in value]}}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": k, "value": _otlp_value(v)} for k, v in attributes.items()]
+
+
+def to_otlp(spans: List[Span]) -> Dict[str, Any]:
+    """Spans in the OTLP/HTTP JSON encoding (hex ids, nanosecond strings)"""
+    encoded = []
+    for span in spans:
+        item = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": SPAN_KINDS.get(span.kind, 1),
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns or span.start_ns),
+            "attributes": _otlp_attributes(span.attributes),
+            "status": {"code": STATUS_CODES[span.status]},
+        }
+        if span.parent_span_id:
+            item["parentSpanId"] = span.parent_span_id
+        if span.status_message:
+            item["status"]["message"] = span.status_message
+        if span.events:
+            item["events"] = [
+                {
+                    "name": event["name"],
+                    "timeUnixNano": str(event["time_ns"]),
+                    "attributes": _otlp_attributes(event["attributes"]),
+                }
+                for event in span.events
+            ]
+        encoded.append(item)
+    resource = {"service.name": SERVICE_NAME, "process.pid": os.getpid()}
+    return {
+        "resourceSpans": [
+            {
+                "resource": {"attributes": _otlp_attributes(resource)},
+                "scopeSpans": [{"scope": {"name": SCOPE_NAME}, "spans": encoded}],
+            }
+        ]
+    }
+
+
+_tracer: Optional[SpanTracer] = None
+
+
+def get_span_tracer() -> SpanTracer:
+    global _tracer
+    if _tracer is None:
+        try:
+            from .settings import get_settings
+
+            max_traces = get_settings().span_buffer_traces
+        except Exception:
+            max_traces = 256
+        _tracer = SpanTracer(max_traces=max_traces)
+    return _tracer
+
+
+@contextmanager
+def start_span(
+    name: str, attributes: Optional[Dict[str, Any]] = None, kind: str = "INTERNAL"
+) -> Iterator[Any]:
+    """``with start_span("phase") as span:`` as a child of the current span;
+    a no-op outside of a trace (roots come from ``SpanTracer.start_span``)"""
+    if _current.get() is None:
+        yield NON_RECORDING_SPAN
+        return
+    with get_span_tracer().start_span(name, attributes, kind) as span:
+        yield span
+
+
+def traced(name: str):
+    """Decorator running the function inside a child span called ``name``"""
+
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            tracer = _tracer or get_span_tracer()
+            if not tracer.enabled or _current.get() is None:
+                return fn(*args, **kwargs)
+            with tracer.start_span(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
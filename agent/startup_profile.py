@@ -0,0 +1,95 @@
+"""
+Startup Profiling
+Where backend cold start time goes: per-module import cost and the phases of
+``init_services``. Used by ``python start_server.py --profile-startup``.
+
+- Import timings come from ``python -X importtime`` in a fresh interpreter,
+  so modules already imported by the caller do not hide their cost
+- ``self`` is time spent executing a module's own body, ``cumulative``
+  includes everything it imported first
+"""
+
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+_IMPORTTIME = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+def parse_importtime(output: str) -> List[Dict]:
+    """Rows of ``-X importtime`` output as dicts (times in seconds)"""
+    rows = []
+    for line in output.splitlines():
+        match = _IMPORTTIME.match(line)
+        if match:
+            rows.append(
+                {
+                    "module": match.group(4),
+                    "self": int(match.group(1)) / 1e6,
+                    "cumulative": int(match.group(2)) / 1e6,
+                    "depth": (len(match.group(3)) - 1) // 2,
+                }
+            )
+    return rows
+
+
+def profile_imports(module: str = "agent.backend", timeout: float = 300) -> List[Dict]:
+    """Import ``module`` in a fresh interpreter and return its import timings"""
+    env = dict(os.environ, PYTHONPATH=str(PROJECT_ROOT))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=str(PROJECT_ROOT),
+        env=env,
+        timeout=timeout,
+        check=False,
+    )
+    rows = parse_importtime(proc.stderr)
+    if proc.returncode != 0 and not rows:
+        raise RuntimeError(f"importing {module} failed: {proc.stderr[-2000:]}")
+    return rows
+
+
+def profile_init_services() -> Dict[str, object]:
+    """Time importing the backend and each ``init_services`` phase in-process"""
+    start = time.perf_counter()
+    from . import backend
+
+    import_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    backend.init_services()
+    return {
+        "import_seconds": import_seconds,
+        "init_seconds": time.perf_counter() - start,
+        "phases": dict(backend.init_phase_timings),
+    }
+
+
+def format_report(
+    imports: List[Dict], init: Optional[Dict] = None, top: int = 25
+) -> str:
+    lines = []
+    if imports:
+        total = max(row["cumulative"] for row in imports)
+        lines.append(f"Imports: {len(imports)} modules, {total * 1000:.0f} ms total")
+        lines.append(f"{'self ms':>9} {'cumul ms':>9}  module")
+        for row in sorted(imports, key=lambda r: r["self"], reverse=True)[:top]:
+            lines.append(
+                f"{row['self'] * 1000:9.1f} {row['cumulative'] * 1000:9.1f}  "
+                f"{row['module']}"
+            )
+    if init:
+        lines.append("")
+        lines.append(
+            f"Backend import {init['import_seconds'] * 1000:.0f} ms, "
+            f"init_services {init['init_seconds'] * 1000:.0f} ms"
+        )
+        for name, seconds in init["phases"].items():
+            lines.append(f"{seconds * 1000:9.1f}  {name}")
+    return "\n".join(lines)
@@ -0,0 +1,186 @@
+"""
+Tenant Resource Pool
+Per-tenant embedding collections, answer caches and indexers.
+
+- Each tenant gets its own vector DB, answer cache and indexer under the
+  directory from ``TenantIsolation.get_tenant_cache_path``, so a search only
+  scans that tenant's vectors and a reindex only clears that tenant's data
+- Resources are opened lazily on first use and closed least-recently-used
+  once more than ``max_open`` tenants are open; leased resources are never
+  closed while a request is still using them
+- The embedding model is loaded once and shared between tenants
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TenantResources:
+    """Open handles for one tenant"""
+
+    tenant_id: str
+    embeddings: Any
+    indexer: Any
+    answers: Any
+    base_path: Optional[str] = None  # Tenant-private storage (uploads, indexes)
+    leases: int = 0
+
+    def close(self):
+        close = getattr(self.embeddings, "close", None)
+        if callable(close):
+            close()
+
+
+def open_tenant_resources(
+    tenant_id: str, base_path: str, shared_model: Any = None
+) -> TenantResources:
+    """Default factory: Chroma DB, answer cache and indexer under ``base_path``"""
+    from .caching import CacheManager
+    from .embeddings import EmbeddingsManager
+    from .indexing import VaultIndexer
+    from .settings import get_settings
+
+    base = Path(base_path)
+    s = get_settings()
+    embeddings = EmbeddingsManager(
+        chunk_size=s.chunk_size,
+        overlap=s.chunk_overlap,
+        top_k=s.top_k,
+        db_path=str(base / "vector_db"),
+        model_name=s.embed_model,
+        model=shared_model,
+        vector_db=s.vector_db,
+        ivf_lists=s.vector_ivf_lists,
+        quantization=s.vector_quantization,
+        query_cache_size=s.query_cache_size,
+        search_batch_window_ms=s.search_batch_window_ms,
+    )
+    return TenantResources(
+        tenant_id=tenant_id,
+        embeddings=embeddings,
+        indexer=VaultIndexer(emb_mgr=embeddings, cache_dir=str(base / "indexer")),
+        answers=CacheManager(cache_dir=str(base), ttl=3600),
+        base_path=str(base),
+    )
+
+
+class TenantResourcePool:
+    """Lazily opened, LRU-bounded set of per-tenant resources"""
+
+    def __init__(
+        self,
+        path_resolver: Callable[[str], str],
+        factory: Optional[Callable[[str, str], TenantResources]] = None,
+        max_open: int = 8,
+    ):
+        self.path_resolver = path_resolver
+        self.factory = factory or open_tenant_resources
+        self.max_open = max_open
+        self._open: "OrderedDict[str, TenantResources]" = OrderedDict()
+        self._opening: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "opens": 0, "evictions": 0, "open_failures": 0}
+
+    @contextmanager
+    def lease(self, tenant_id: str) -> Iterator[TenantResources]:
+        """Use a tenant's resources; they stay open until the lease ends"""
+        resources = self._acquire(tenant_id)
+        try:
+            yield resources
+        finally:
+            with self._lock:
+                resources.leases -= 1
+                evicted = self._evict_locked()
+            self._close(evicted)
+
+    def _acquire(self, tenant_id: str) -> TenantResources:
+        while True:
+            with self._lock:
+                resources = self._open.get(tenant_id)
+                if resources is not None:
+                    self._open.move_to_end(tenant_id)
+                    resources.leases += 1
+                    self.stats["hits"] += 1
+                    return resources
+                pending = self._opening.get(tenant_id)
+                if pending is None:
+                    # This caller opens the tenant; others wait for it
+                    pending = self._opening[tenant_id] = threading.Event()
+                    break
+            pending.wait()
+
+        try:
+            resources = self.factory(tenant_id, self.path_resolver(tenant_id))
+        except Exception:
+            with self._lock:
+                self.stats["open_failures"] += 1
+                del self._opening[tenant_id]
+            pending.set()
+            raise
+
+        with self._lock:
+            resources.leases = 1
+            self._open[tenant_id] = resources
+            self.stats["opens"] += 1
+            del self._opening[tenant_id]
+            evicted = self._evict_locked()
+        pending.set()
+        self._close(evicted)
+        logger.info(f"Opened resources for tenant {tenant_id}")
+        return resources
+
+    def _evict_locked(self) -> List[TenantResources]:
+        evicted = []
+        excess = len(self._open) - self.max_open
+        if excess > 0:
+            # Oldest first; tenants with active leases are skipped for now
+            for tenant_id, resources in list(self._open.items()):
+                if excess == 0:
+                    break
+                if resources.leases == 0:
+                    del self._open[tenant_id]
+                    evicted.append(resources)
+                    excess -= 1
+            self.stats["evictions"] += len(evicted)
+        return evicted
+
+    def _close(self, evicted: List[TenantResources]):
+        for resources in evicted:
+            try:
+                resources.close()
+            except Exception as e:
+                logger.warning(f"Failed to close tenant {resources.tenant_id}: {e}")
+
+    def invalidate(self, tenant_id: str) -> bool:
+        """Close a tenant's resources (e.g. after the tenant is deleted)"""
+        with self._lock:
+            resources = self._open.get(tenant_id)
+            if resources is None or resources.leases:
+                return False
+            del self._open[tenant_id]
+        self._close([resources])
+        return True
+
+    def close_all(self):
+        with self._lock:
+            evicted = list(self._open.values())
+            self._open.clear()
+        self._close(evicted)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.stats,
+                "open": len(self._open),
+                "max_open": self.max_open,
+                "tenants": list(self._open),
+                "leased": sum(1 for r in self._open.values() if r.leases),
+            }
@@ -0,0 +1,244 @@
+"""
+Verified Token Cache
+Caches verified JWT claims and resolved user context so repeat requests with
+the same bearer token skip signature verification and tenant/RBAC lookups.
+
+- Entries are keyed by a SHA-256 digest of the token (raw tokens are never stored)
+  and by the verifier that checked it, so claims verified against one key are
+  never returned to a verifier using another
+- Claims live until the token's ``exp`` (capped by ``max_ttl``)
+- Resolved context (tenant, permissions) uses a shorter TTL and is dropped
+  when a user's roles or their tenant's status change
+- Logout revokes a token until it expires (at most ``max_revoked`` are kept);
+  API key rotation flushes the cache
+"""
+
+import hashlib
+import heapq
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+_MISSING = object()
+
+
+class _TokenEntry:
+    __slots__ = ("claims", "expires_at", "subject", "contexts")
+
+    def __init__(self, claims: Dict[str, Any], expires_at: float, subject: Any):
+        self.claims = claims
+        self.expires_at = expires_at
+        self.subject = subject
+        self.contexts: Dict[str, tuple] = {}  # name -> (value, expires_at)
+
+
+class VerifiedTokenCache:
+    """Bounded LRU cache of verified JWT claims and derived user context"""
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        max_ttl: float = 300.0,
+        context_ttl: float = 60.0,
+        max_revoked: Optional[int] = None,
+    ):
+        self.max_entries = max_entries
+        self.max_ttl = max_ttl
+        self.context_ttl = context_ttl
+        self.max_revoked = max_revoked or max_entries
+        self._entries: "OrderedDict[str, _TokenEntry]" = OrderedDict()
+        self._revoked: Dict[str, float] = {}  # digest -> token expiry
+        self._verifiers = set()
+        self._lock = threading.Lock()
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "context_hits": 0,
+            "context_misses": 0,
+            "evictions": 0,
+            "revocations": 0,
+            "revocation_evictions": 0,
+            "flushes": 0,
+        }
+
+    @staticmethod
+    def digest(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _expiry(claims: Dict[str, Any]) -> Optional[float]:
+        exp = claims.get("exp")
+        if hasattr(exp, "timestamp"):
+            return exp.timestamp()
+        if isinstance(exp, (int, float)):
+            return float(exp)
+        return None
+
+    def _key(self, token: str, verifier: str) -> str:
+        return f"{verifier}:{self.digest(token)}"
+
+    def _live_entry(self, key: str, now: float) -> Optional[_TokenEntry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def get_claims(
+        self, token: str, verifier: str = "backend"
+    ) -> Optional[Dict[str, Any]]:
+        """Return claims ``verifier`` cached for a token, or None if unknown or
+        expired"""
+        key = self._key(token, verifier)
+        with self._lock:
+            entry = self._live_entry(key, time.time())
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            self.stats["hits"] += 1
+            return entry.claims
+
+    def put_claims(
+        self, token: str, claims: Dict[str, Any], verifier: str = "backend"
+    ) -> None:
+        """Cache claims that ``verifier`` just checked the signature of"""
+        now = time.time()
+        ttl = self.max_ttl
+        exp = self._expiry(claims)
+        if exp is not None:
+            ttl = min(ttl, exp - now)
+        if ttl <= 0:
+            return
+
+        digest = self.digest(token)
+        key = f"{verifier}:{digest}"
+        subject = claims.get("sub") or claims.get("user_id")
+        with self._lock:
+            if digest in self._revoked:
+                return
+            self._verifiers.add(verifier)
+            self._entries[key] = _TokenEntry(dict(claims), now + ttl, subject)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def get_context(
+        self, token: str, name: str = "user", verifier: str = "backend"
+    ) -> Any:
+        """Return cached resolved context ``name`` for a token, or None"""
+        key = self._key(token, verifier)
+        now = time.time()
+        with self._lock:
+            entry = self._live_entry(key, now)
+            cached = entry.contexts.get(name, _MISSING) if entry else _MISSING
+            if cached is _MISSING or cached[1] <= now:
+                self.stats["context_misses"] += 1
+                return None
+            self.stats["context_hits"] += 1
+            return cached[0]
+
+    def put_context(
+        self, token: str, value: Any, name: str = "user", verifier: str = "backend"
+    ) -> None:
+        """Attach resolved context to a cached token (no-op if not cached)"""
+        key = self._key(token, verifier)
+        now = time.time()
+        with self._lock:
+            entry = self._live_entry(key, now)
+            if entry is not None:
+                expires = min(entry.expires_at, now + self.context_ttl)
+                entry.contexts[name] = (value, expires)
+
+    def is_revoked(self, token: str) -> bool:
+        key = self.digest(token)
+        with self._lock:
+            expires = self._revoked.get(key)
+            if expires is None:
+                return False
+            if expires <= time.time():
+                del self._revoked[key]
+                return False
+            return True
+
+    def revoke_token(self, token: str, claims: Optional[Dict[str, Any]] = None):
+        """Reject a token (e.g. on logout) for every verifier until it would have
+        expired anyway; only call this for tokens whose signature verified"""
+        digest = self.digest(token)
+        now = time.time()
+        with self._lock:
+            exp = self._expiry(claims) if claims else None
+            for verifier in self._verifiers:
+                entry = self._entries.pop(f"{verifier}:{digest}", None)
+                if exp is None and entry is not None:
+                    exp = self._expiry(entry.claims)
+            self._revoked[digest] = exp if exp is not None else now + self.max_ttl
+            self.stats["revocations"] += 1
+            self._purge_revoked(now)
+
+    def invalidate_subject(self, subject: Any) -> int:
+        """Drop cached entries for a user so the next request re-verifies"""
+        return self._invalidate(
+            lambda e: subject in (e.subject, e.claims.get("user_id"))
+        )
+
+    def invalidate_tenant(self, tenant_id: Any) -> int:
+        """Drop cached entries of a tenant's users (e.g. after suspension)"""
+        return self._invalidate(lambda e: e.claims.get("tenant_id") == tenant_id)
+
+    def _invalidate(self, matches: Callable[[_TokenEntry], bool]) -> int:
+        with self._lock:
+            keys = [k for k, e in self._entries.items() if matches(e)]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def invalidate_all(self, *_args) -> None:
+        """Flush every cached token (e.g. after API key rotation)"""
+        with self._lock:
+            self._entries.clear()
+            self.stats["flushes"] += 1
+
+    def _purge_revoked(self, now: float) -> None:
+        if len(self._revoked) <= self.max_revoked:
+            return
+        for key in [k for k, exp in self._revoked.items() if exp <= now]:
+            del self._revoked[key]
+        excess = len(self._revoked) - self.max_revoked
+        if excess > 0:
+            # Hard cap: forget the revocations that would lapse soonest
+            for key in heapq.nsmallest(excess, self._revoked, key=self._revoked.get):
+                del self._revoked[key]
+            self.stats["revocation_evictions"] += excess
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "size": len(self._entries),
+                "revoked": len(self._revoked),
+                "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+            }
+
+
+_token_cache: Optional[VerifiedTokenCache] = None
+_token_cache_lock = threading.Lock()
+
+
+def get_token_cache() -> VerifiedTokenCache:
+    """Process-wide token cache; flushed whenever an API key is rotated"""
+    global _token_cache
+    if _token_cache is None:
+        with _token_cache_lock:
+            if _token_cache is None:
+                from .api_key_management import APIKeyManager
+
+                cache = VerifiedTokenCache()
+                APIKeyManager.add_revocation_listener(cache.invalidate_all)
+                _token_cache = cache
+    return _token_cache
@@ -0,0 +1,583 @@
+"""
+Vector Stores
+Pluggable vector store backends for EmbeddingsManager.
+
+``VectorStore`` is the subset of the Chroma collection API that
+EmbeddingsManager uses (add/upsert/query/get/delete/count), so a Chroma
+collection and the built-in ``NumpyVectorStore`` are interchangeable.
+
+NumpyVectorStore (``vector_db: numpy``):
+- Embeddings are L2-normalised float32 rows in ``.npy`` segment files opened
+  with ``mmap_mode="r"``; an in-memory ID map points each id at its segment/row
+- Queries are exact cosine top-k via vectorised dot products per segment, or,
+  once ``ivf_lists`` is set and the store holds ``ivf_min_size`` vectors, an
+  IVF scan of the ``nprobe`` nearest k-means partitions
+- New rows are buffered and written as a new segment by ``persist``; every
+  file is written to a temporary name and renamed into place, and the
+  manifest (listing live segments and deleted rows) is replaced last, so a
+  crash leaves either the old or the new state on disk
+- With ``quantization="float16"`` or ``"int8"`` (per-row symmetric scalar
+  quantization) a compact copy of each segment is scanned for the first pass
+  and the ``rerank_factor * k`` best candidates are re-scored against the
+  full-precision rows, which stay on disk and are paged in only for them
+- Buffered rows are flushed automatically every ``flush_rows`` rows; once
+  there are more than ``max_segments`` segments the newer ones are merged
+  (and everything is merged when they outgrow the oldest), so write cost
+  stays amortised while a vault is being indexed
+"""
+
+import json
+import logging
+import os
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+PENDING = -1
+QUANTIZATIONS = ("none", "float16", "int8")
+
+
+class VectorStore(ABC):
+    """Chroma-collection-compatible vector store interface"""
+
+    @abstractmethod
+    def add(self, ids, documents=None, embeddings=None, metadatas=None): ...
+
+    @abstractmethod
+    def upsert(self, ids, documents=None, embeddings=None, metadatas=None): ...
+
+    @abstractmethod
+    def query(self, query_embeddings, n_results: int = 10) -> Dict[str, List]: ...
+
+    @abstractmethod
+    def get(self, ids=None, include=None) -> Dict[str, List]: ...
+
+    @abstractmethod
+    def delete(self, ids): ...
+
+    @abstractmethod
+    def count(self) -> int: ...
+
+    def persist(self):  # noqa: B027 - optional hook, write-through stores skip it
+        """Flush buffered writes to disk (no-op for stores that write through)"""
+
+    @abstractmethod
+    def reset(self): ...
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32, copy=False)
+
+
+def quantize(
+    vectors: np.ndarray, kind: str
+) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Compact codes for first-pass search, plus per-row scales for int8"""
+    if kind == "float16":
+        return vectors.astype(np.float16), None
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def approximate_scores(
+    codes: np.ndarray,
+    scales: Optional[np.ndarray],
+    query: np.ndarray,
+    rows: Optional[np.ndarray] = None,
+    block: int = 1024,
+) -> np.ndarray:
+    """Dot products of ``query`` with quantized rows, widened block by block"""
+    # Small blocks keep each widened float32 copy in cache
+    n = len(codes) if rows is None else len(rows)
+    scores = np.empty(n, dtype=np.float32)
+    for start in range(0, n, block):
+        stop = start + block
+        sel = slice(start, stop) if rows is None else rows[start:stop]
+        part = np.asarray(codes[sel], dtype=np.float32) @ query
+        if scales is not None:
+            part *= scales[sel]
+        scores[start:stop] = part
+    return scores
+
+
+def _write_atomic(path: Path, write: Callable[[Any], None], mode: str = "wb"):
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    with open(tmp, mode) as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+@dataclass
+class _Segment:
+    name: str
+    vectors: np.ndarray  # memory-mapped (rows, dim)
+    ids: List[str]
+    documents: List[Optional[str]]
+    metadatas: List[Optional[Dict]]
+    deleted: np.ndarray  # bool per row
+    assign: Optional[np.ndarray] = None  # IVF partition per row
+    codes: Optional[np.ndarray] = None  # quantized rows (memory-mapped)
+    scales: Optional[np.ndarray] = None  # int8 dequantization scale per row
+
+
+class NumpyVectorStore(VectorStore):
+    """Memory-mapped float32 vector store with exact and IVF top-k search"""
+
+    def __init__(
+        self,
+        path: str,
+        embed_fn: Optional[Callable[[List[str]], Sequence]] = None,
+        ivf_lists: int = 0,
+        nprobe: int = 8,
+        ivf_min_size: int = 20000,
+        max_segments: int = 8,
+        flush_rows: int = 4096,
+        quantization: str = "none",
+        rerank_factor: int = 4,
+    ):
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"quantization must be one of {QUANTIZATIONS}")
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.embed_fn = embed_fn
+        self.ivf_lists = ivf_lists
+        self.nprobe = nprobe
+        self.ivf_min_size = ivf_min_size
+        self.max_segments = max_segments
+        self.flush_rows = flush_rows
+        self.quantization = quantization
+        self.rerank_factor = max(1, rerank_factor)
+        self.dim: Optional[int] = None
+        self._lock = threading.RLock()
+        self._segments: List[_Segment] = []
+        self._index: Dict[str, Tuple[int, int]] = {}
+        self._centroids: Optional[np.ndarray] = None
+        self._centroid_file: Optional[str] = None
+        self._ivf_size = 0
+        self._next_segment = 0
+        self._clear_pending()
+        self._load()
+
+    # ----------------------
+    # Persistence
+    # ----------------------
+
+    def _clear_pending(self):
+        self._pending_vectors: List[np.ndarray] = []
+        self._pending_ids: List[str] = []
+        self._pending_documents: List[Optional[str]] = []
+        self._pending_metadatas: List[Optional[Dict]] = []
+        self._dirty = False
+
+    def _load(self):
+        manifest_path = self.path / "manifest.json"
+        if not manifest_path.exists():
+            return
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        self.dim = manifest.get("dim")
+        self._next_segment = manifest.get("next_segment", 0)
+        for entry in manifest.get("segments", []):
+            name = entry["name"]
+            vectors = np.load(self.path / f"{name}.npy", mmap_mode="r")
+            meta = json.loads((self.path / f"{name}.json").read_text("utf-8"))
+            deleted = np.zeros(len(meta["ids"]), dtype=bool)
+            deleted[entry.get("deleted", [])] = True
+            self._segments.append(
+                _Segment(
+                    name,
+                    vectors,
+                    meta["ids"],
+                    meta["documents"],
+                    meta["metadatas"],
+                    deleted,
+                )
+            )
+        for seg_no, seg in enumerate(self._segments):
+            self._attach_codes(seg)
+            for row, id_ in enumerate(seg.ids):
+                if not seg.deleted[row]:
+                    self._index[id_] = (seg_no, row)
+        if manifest.get("centroids"):
+            self._centroid_file = manifest["centroids"]
+            self._centroids = np.load(self.path / self._centroid_file)
+            for seg in self._segments:
+                seg.assign = self._assign(seg.vectors)
+            self._ivf_size = len(self._index)
+        self._remove_orphans()
+
+    def _remove_orphans(self):
+        """Delete files left behind by an interrupted write or compaction"""
+        live = {"manifest.json", self._centroid_file}
+        for seg in self._segments:
+            live.update({f"{seg.name}.npy", f"{seg.name}.json"})
+            if seg.codes is not None:
+                live.add(f"{seg.name}.{self.quantization}.npy")
+            if seg.scales is not None:
+                live.add(f"{seg.name}.scale.npy")
+        for f in self.path.iterdir():
+            if f.is_file() and f.name not in live:
+                f.unlink(missing_ok=True)
+
+    def _write_manifest(self):
+        manifest = {
+            "dim": self.dim,
+            "next_segment": self._next_segment,
+            "centroids": self._centroid_file,
+            "segments": [
+                {"name": s.name, "deleted": np.flatnonzero(s.deleted).tolist()}
+                for s in self._segments
+            ],
+        }
+        _write_atomic(
+            self.path / "manifest.json",
+            lambda f: f.write(json.dumps(manifest)),
+            mode="w",
+        )
+
+    def _write_segment(
+        self,
+        vectors: np.ndarray,
+        ids: List[str],
+        documents: List[Optional[str]],
+        metadatas: List[Optional[Dict]],
+    ) -> _Segment:
+        name = f"segment-{self._next_segment:06d}"
+        self._next_segment += 1
+        _write_atomic(self.path / f"{name}.npy", lambda f: np.save(f, vectors))
+        meta = {"ids": ids, "documents": documents, "metadatas": metadatas}
+        _write_atomic(
+            self.path / f"{name}.json", lambda f: f.write(json.dumps(meta)), mode="w"
+        )
+        segment = _Segment(
+            name,
+            np.load(self.path / f"{name}.npy", mmap_mode="r"),
+            ids,
+            documents,
+            metadatas,
+            np.zeros(len(ids), dtype=bool),
+        )
+        self._attach_codes(segment)
+        if self._centroids is not None:
+            segment.assign = self._assign(segment.vectors)
+        return segment
+
+    def _attach_codes(self, seg: _Segment):
+        """Open (or build, for segments written without them) quantized rows"""
+        if self.quantization == "none":
+            return
+        codes_path = self.path / f"{seg.name}.{self.quantization}.npy"
+        scales_path = self.path / f"{seg.name}.scale.npy"
+        if not codes_path.exists():
+            codes, scales = quantize(np.asarray(seg.vectors), self.quantization)
+            if scales is not None:
+                _write_atomic(scales_path, lambda f: np.save(f, scales))
+            _write_atomic(codes_path, lambda f: np.save(f, codes))
+        seg.codes = np.load(codes_path, mmap_mode="r")
+        if self.quantization == "int8":
+            seg.scales = np.load(scales_path)
+
+    def persist(self):
+        with self._lock:
+            if self._pending_ids:
+                segment = self._write_segment(
+                    np.vstack(self._pending_vectors),
+                    self._pending_ids,
+                    self._pending_documents,
+                    self._pending_metadatas,
+                )
+                self._segments.append(segment)
+                seg_no = len(self._segments) - 1
+                for row, id_ in enumerate(segment.ids):
+                    self._index[id_] = (seg_no, row)
+                self._clear_pending()
+                self._dirty = True
+            if len(self._segments) > self.max_segments:
+                self._compact()
+            if self._needs_ivf():
+                self._build_ivf()
+            if self._dirty:
+                self._write_manifest()
+                self._dirty = False
+                self._remove_orphans()
+
+    def _compact(self):
+        """Merge segments, dropping deleted rows
+
+        Only the segments after the first (base) one are merged unless they
+        hold more rows than the base, which keeps merge cost geometric.
+        """
+        base, tail = self._segments[0], self._segments[1:]
+        if sum(len(s.ids) for s in tail) > len(base.ids):
+            base, tail = None, self._segments
+        live = [(seg, np.flatnonzero(~seg.deleted)) for seg in tail]
+        vectors = np.vstack([np.asarray(seg.vectors[rows]) for seg, rows in live])
+        ids, documents, metadatas = [], [], []
+        for seg, rows in live:
+            ids.extend(seg.ids[r] for r in rows)
+            documents.extend(seg.documents[r] for r in rows)
+            metadatas.extend(seg.metadatas[r] for r in rows)
+        merged = self._write_segment(vectors, ids, documents, metadatas)
+        self._segments = [merged] if base is None else [base, merged]
+        seg_no = len(self._segments) - 1
+        for row, id_ in enumerate(ids):
+            self._index[id_] = (seg_no, row)
+        self._dirty = True
+
+    # ----------------------
+    # IVF partitioning
+    # ----------------------
+
+    def _needs_ivf(self) -> bool:
+        if not self.ivf_lists or len(self._index) < self.ivf_min_size:
+            return False
+        # Re-train once the store has doubled since the partitions were built
+        return self._centroids is None or len(self._index) >= 2 * self._ivf_size
+
+    def _build_ivf(self, iterations: int = 10, seed: int = 0):
+        """Spherical k-means over a sample of the stored vectors"""
+        rng = np.random.default_rng(seed)
+        sample_size = min(len(self._index), self.ivf_lists * 64)
+        lists = min(self.ivf_lists, sample_size)
+        picks = rng.choice(len(self._index), size=sample_size, replace=False)
+        locations = list(self._index.values())
+        sample = np.stack(
+            [self._segments[locations[i][0]].vectors[locations[i][1]] for i in picks]
+        )
+        centroids = sample[rng.choice(sample_size, lists, replace=False)]
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            for k in range(lists):
+                members = sample[labels == k]
+                if len(members):
+                    centroids[k] = members.mean(axis=0)
+            centroids = _normalize(centroids)
+
+        name = f"centroids-{self._next_segment:06d}.npy"
+        self._next_segment += 1
+        _write_atomic(self.path / name, lambda f: np.save(f, centroids))
+        self._centroids, self._centroid_file = centroids, name
+        self._ivf_size = len(self._index)
+        for seg in self._segments:
+            seg.assign = self._assign(seg.vectors)
+        self._dirty = True
+
+    def _assign(self, vectors: np.ndarray, block: int = 65536) -> np.ndarray:
+        labels = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), block):
+            scores = np.asarray(vectors[start : start + block]) @ self._centroids.T
+            labels[start : start + block] = np.argmax(scores, axis=1)
+        return labels
+
+    # ----------------------
+    # Writes
+    # ----------------------
+
+    def _prepare(self, ids, documents, embeddings, metadatas) -> np.ndarray:
+        if embeddings is None:
+            if documents is None or self.embed_fn is None:
+                raise ValueError("embeddings or documents with an embed_fn required")
+            embeddings = self.embed_fn(list(documents))
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if vectors.ndim != 2 or len(vectors) != len(ids):
+            raise ValueError("expected one embedding per id")
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"embedding dimension {vectors.shape[1]} != {self.dim}")
+        return _normalize(vectors)
+
+    def _append(self, ids, documents, vectors, metadatas):
+        for i, id_ in enumerate(ids):
+            self._index[id_] = (PENDING, len(self._pending_ids))
+            self._pending_ids.append(id_)
+            self._pending_vectors.append(vectors[i : i + 1])
+            self._pending_documents.append(
+                None if documents is None else documents[i]
+            )
+            self._pending_metadatas.append(
+                None if metadatas is None else metadatas[i]
+            )
+        if len(self._pending_ids) >= self.flush_rows:
+            self.persist()
+
+    def add(self, ids, documents=None, embeddings=None, metadatas=None):
+        """Insert new ids; ids that already exist are left unchanged (as Chroma)"""
+        with self._lock:
+            keep = [i for i, id_ in enumerate(ids) if id_ not in self._index]
+            if not keep:
+                return
+            ids = [ids[i] for i in keep]
+            documents = None if documents is None else [documents[i] for i in keep]
+            if embeddings is not None:
+                embeddings = [embeddings[i] for i in keep]
+            metadatas = None if metadatas is None else [metadatas[i] for i in keep]
+            vectors = self._prepare(ids, documents, embeddings, metadatas)
+            self._append(ids, documents, vectors, metadatas)
+
+    def upsert(self, ids, documents=None, embeddings=None, metadatas=None):
+        with self._lock:
+            vectors = self._prepare(ids, documents, embeddings, metadatas)
+            self.delete([id_ for id_ in ids if id_ in self._index])
+            self._append(list(ids), documents, vectors, metadatas)
+
+    def delete(self, ids):
+        with self._lock:
+            pending_removed = False
+            for id_ in ids:
+                location = self._index.pop(id_, None)
+                if location is None:
+                    continue
+                seg_no, row = location
+                if seg_no == PENDING:
+                    self._pending_ids[row] = None
+                    pending_removed = True
+                else:
+                    self._segments[seg_no].deleted[row] = True
+                    self._dirty = True
+            if pending_removed:
+                self._drop_removed_pending()
+
+    def _drop_removed_pending(self):
+        rows = [i for i, id_ in enumerate(self._pending_ids) if id_ is not None]
+        self._pending_ids = [self._pending_ids[i] for i in rows]
+        self._pending_vectors = [self._pending_vectors[i] for i in rows]
+        self._pending_documents = [self._pending_documents[i] for i in rows]
+        self._pending_metadatas = [self._pending_metadatas[i] for i in rows]
+        for row, id_ in enumerate(self._pending_ids):
+            self._index[id_] = (PENDING, row)
+
+    def reset(self):
+        """Remove every vector and file"""
+        with self._lock:
+            self._segments = []
+            self._index = {}
+            self._centroids = self._centroid_file = None
+            self.dim = None
+            self._clear_pending()
+            self._write_manifest()
+            self._remove_orphans()
+
+    # ----------------------
+    # Reads
+    # ----------------------
+
+    def count(self) -> int:
+        return len(self._index)
+
+    def _record(self, seg_no: int, row: int):
+        if seg_no == PENDING:
+            return (
+                self._pending_ids[row],
+                self._pending_documents[row],
+                self._pending_metadatas[row],
+            )
+        seg = self._segments[seg_no]
+        return seg.ids[row], seg.documents[row], seg.metadatas[row]
+
+    def _vector(self, seg_no: int, row: int) -> np.ndarray:
+        if seg_no == PENDING:
+            return self._pending_vectors[row][0]
+        return np.asarray(self._segments[seg_no].vectors[row])
+
+    def _segment_candidates(
+        self, seg_no: int, seg: _Segment, query: np.ndarray, k: int, probes
+    ) -> List[Tuple[float, int, int]]:
+        rows = None
+        if probes is not None and seg.assign is not None:
+            rows = np.flatnonzero(np.isin(seg.assign, probes) & ~seg.deleted)
+
+        shortlist = k
+        if seg.codes is not None:
+            scores = approximate_scores(seg.codes, seg.scales, query, rows)
+            shortlist = k * self.rerank_factor
+        elif rows is not None:
+            scores = np.asarray(seg.vectors[rows]) @ query
+        else:
+            scores = np.asarray(seg.vectors @ query)
+        if rows is None:
+            scores[seg.deleted] = -np.inf
+
+        if len(scores) > shortlist:
+            top = np.argpartition(-scores, shortlist)[:shortlist]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.isfinite(scores[top])]
+        candidates = np.sort(top if rows is None else rows[top])
+        if seg.codes is not None:
+            # Re-rank the shortlist with the full-precision rows
+            scores = np.asarray(seg.vectors[candidates]) @ query
+            if len(scores) > k:
+                keep = np.argpartition(-scores, k)[:k]
+                candidates, scores = candidates[keep], scores[keep]
+            return [(float(s), seg_no, int(r)) for s, r in zip(scores, candidates)]
+        if rows is None:
+            return [(float(scores[r]), seg_no, int(r)) for r in candidates]
+        return [(float(scores[i]), seg_no, int(rows[i])) for i in top]
+
+    def query(self, query_embeddings, n_results: int = 10) -> Dict[str, List]:
+        """Top ``n_results`` by cosine similarity; distances are 1 - similarity"""
+        results = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        with self._lock:
+            queries = np.asarray(query_embeddings, dtype=np.float32)
+            if queries.ndim == 1:
+                queries = queries[None, :]
+            if self.dim is None or not self._index:
+                for key in results:
+                    results[key] = [[] for _ in queries]
+                return results
+            queries = _normalize(queries)
+            pending = np.vstack(self._pending_vectors) if self._pending_ids else None
+
+            for query in queries:
+                probes = None
+                if self._centroids is not None:
+                    nearest = np.argsort(-(self._centroids @ query))
+                    probes = nearest[: self.nprobe]
+                candidates = []
+                for seg_no, seg in enumerate(self._segments):
+                    candidates.extend(
+                        self._segment_candidates(seg_no, seg, query, n_results, probes)
+                    )
+                if pending is not None:
+                    scores = pending @ query
+                    candidates.extend(
+                        (float(s), PENDING, row) for row, s in enumerate(scores)
+                    )
+                candidates.sort(key=lambda c: -c[0])
+                top = candidates[:n_results]
+                records = [self._record(seg_no, row) for _, seg_no, row in top]
+                results["ids"].append([r[0] for r in records])
+                results["documents"].append([r[1] for r in records])
+                results["metadatas"].append([r[2] or {} for r in records])
+                results["distances"].append([1.0 - score for score, _, _ in top])
+        return results
+
+    def get(self, ids=None, include=None) -> Dict[str, List]:
+        include = include or ["documents", "metadatas"]
+        with self._lock:
+            wanted = ids if ids is not None else list(self._index)
+            found = [i for i in wanted if i in self._index]
+            locations = [self._index[i] for i in found]
+            result: Dict[str, List] = {"ids": found}
+            if "documents" in include:
+                result["documents"] = [self._record(*loc)[1] for loc in locations]
+            if "metadatas" in include:
+                result["metadatas"] = [self._record(*loc)[2] for loc in locations]
+            if "embeddings" in include:
+                result["embeddings"] = [
+                    self._vector(*loc).tolist() for loc in locations
+                ]
+        return result
@@ -8,17 +8,24 @@ Notes for tests:
 - If default model path is missing, get_vosk_model() raises RuntimeError
 - If env-provided path is missing, we log and return None
 - Router exposes POST /api/voice_transcribe using vosk.KaldiRecognizer
+- TranscriptionService reuses the loaded model with a pool of recognizers
+    (sized to CPU cores) and runs recognition in a worker thread pool
 """
 
 from __future__ import annotations
 
+import asyncio
 import builtins as _builtins
 import json
 import logging
 import os
 import tempfile
+import threading
+import time
 import wave
-from typing import Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Dict, List, Optional, Union
 
 from fastapi import APIRouter, UploadFile
 
@@ -93,6 +100,400 @@ except RuntimeError as e:
 router = APIRouter()
 
 
+_WAV_FORMAT_ERROR = "Audio must be mono PCM WAV with 16kHz or 8kHz sample rate."
+_FRAMES_PER_READ = 4000
+
+
+def _check_wav_format(wf) -> Optional[str]:
+    if (
+        wf.getnchannels() != 1
+        or wf.getsampwidth() != 2
+        or wf.getframerate() not in [16000, 8000]
+    ):
+        return _WAV_FORMAT_ERROR
+    return None
+
+
+def _decode_frames(rec, wf) -> str:
+    """Feed all frames of an open wave file to a recognizer; return the text"""
+    result = []
+    # Process the audio file in chunks
+    while data := wf.readframes(_FRAMES_PER_READ):
+        if rec.AcceptWaveform(data):
+            part = json.loads(rec.Result())  # Let JSONDecodeError propagate
+            if "text" in part:
+                result.append(part["text"])
+
+    final = json.loads(rec.FinalResult())
+    if "text" in final:
+        result.append(final["text"])
+    return " ".join([r for r in result if r])
+
+
+def transcribe_wav(source: Union[str, BinaryIO]) -> dict:
+    """Transcribe a mono 16-bit PCM WAV from a path or an open binary file.
+
+    Frames are read incrementally, so file handles from streamed uploads
+    are consumed without loading the whole recording into memory.
+    """
+    # Use a 'with' statement to ensure the wave file is closed when done
+    with wave.open(source, "rb") as wf:
+        error = _check_wav_format(wf)
+        if error:
+            return {"error": error}
+        rec = vosk.KaldiRecognizer(model, wf.getframerate())
+        return {"transcription": _decode_frames(rec, wf)}
+
+
+# ----------------------------------------------------------------------
+# Pooled transcription service
+# ----------------------------------------------------------------------
+
+
+class TranscriberBusyError(RuntimeError):
+    """Raised when no recognizer becomes available before the timeout"""
+
+
+class RecognizerPool:
+    """Bounded pool of reusable KaldiRecognizers sharing one model.
+
+    Recognizers are created lazily per sample rate up to ``size``; when the
+    pool is full and only recognizers for another rate are idle, one of
+    those is dropped to make room.
+    """
+
+    def __init__(self, vosk_model, size: int):
+        self.model = vosk_model
+        self.size = max(1, size)
+        self._idle: Dict[int, List[object]] = {}
+        self._created = 0
+        self._in_use = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, sample_rate: int, timeout: Optional[float] = None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                idle = self._idle.get(sample_rate)
+                if idle:
+                    self._in_use += 1
+                    return idle.pop()
+                if self._created < self.size or self._evict_other_rate(sample_rate):
+                    self._created += 1
+                    self._in_use += 1
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TranscriberBusyError("All speech recognizers are busy")
+                self._cond.wait(remaining)
+        try:
+            return vosk.KaldiRecognizer(self.model, sample_rate)
+        except Exception:
+            self._forget()
+            raise
+
+    def release(self, rec, sample_rate: int) -> None:
+        """Return a recognizer; it is reset so the next user starts clean"""
+        try:
+            reset = getattr(rec, "Reset", None)
+            if reset is not None:
+                reset()
+        except Exception:
+            self._forget()
+            return
+        with self._cond:
+            self._in_use -= 1
+            self._idle.setdefault(sample_rate, []).append(rec)
+            self._cond.notify()
+
+    def _forget(self) -> None:
+        with self._cond:
+            self._created -= 1
+            self._in_use -= 1
+            self._cond.notify()
+
+    def _evict_other_rate(self, sample_rate: int) -> bool:
+        for rate, recs in self._idle.items():
+            if rate != sample_rate and recs:
+                recs.pop()
+                self._created -= 1
+                return True
+        return False
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {
+                "size": self.size,
+                "created": self._created,
+                "in_use": self._in_use,
+                "idle": sum(len(recs) for recs in self._idle.values()),
+            }
+
+
+class TranscriptionMetrics:
+    """Thread-safe counters and real-time factor (processing / audio time)"""
+
+    def __init__(self, window: int = 256):
+        self._lock = threading.Lock()
+        self._rtf = deque(maxlen=window)
+        self.requests = 0
+        self.streams = 0
+        self.active_streams = 0
+        self.errors = 0
+        self.audio_seconds = 0.0
+        self.processing_seconds = 0.0
+
+    def record(self, audio_seconds: float, processing_seconds: float) -> None:
+        with self._lock:
+            self.audio_seconds += audio_seconds
+            self.processing_seconds += processing_seconds
+            if audio_seconds > 0:
+                self._rtf.append(processing_seconds / audio_seconds)
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            recent = sorted(self._rtf)
+            return {
+                "requests": self.requests,
+                "streams": self.streams,
+                "active_streams": self.active_streams,
+                "errors": self.errors,
+                "audio_seconds": round(self.audio_seconds, 3),
+                "processing_seconds": round(self.processing_seconds, 3),
+                "real_time_factor": (
+                    round(self.processing_seconds / self.audio_seconds, 4)
+                    if self.audio_seconds
+                    else None
+                ),
+                "rtf_p50": round(recent[len(recent) // 2], 4) if recent else None,
+                "rtf_p95": (
+                    round(recent[min(len(recent) - 1, int(len(recent) * 0.95))], 4)
+                    if recent
+                    else None
+                ),
+            }
+
+
+class StreamingRecognition:
+    """One streaming session holding a pooled recognizer.
+
+    Use as ``async with service.open_stream(16000) as stream``; feed 16-bit
+    mono PCM with ``accept`` and call ``finish`` for the final text.
+    """
+
+    def __init__(self, service: "TranscriptionService", sample_rate: int):
+        if sample_rate not in (8000, 16000):
+            raise ValueError("Sample rate must be 8000 or 16000")
+        self.service = service
+        self.sample_rate = sample_rate
+        self.audio_seconds = 0.0
+        self.processing_seconds = 0.0
+        self._rec = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._segments: List[str] = []
+
+    async def __aenter__(self) -> "StreamingRecognition":
+        self._slots = await self.service._acquire_slot()
+        try:
+            self._rec = await self.service._run(
+                self.service.pool.acquire,
+                self.sample_rate,
+                self.service.acquire_timeout,
+            )
+        except BaseException:
+            self._slots.release()
+            self._slots = None
+            raise
+        self.service.metrics.increment("streams")
+        self.service.metrics.increment("active_streams")
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        if self._rec is not None:
+            self.service.pool.release(self._rec, self.sample_rate)
+            self._rec = None
+            self.service.metrics.increment("active_streams", -1)
+            self.service.metrics.record(self.audio_seconds, self.processing_seconds)
+        if self._slots is not None:
+            self._slots.release()
+            self._slots = None
+
+    def _accept(self, pcm: bytes) -> dict:
+        started = time.perf_counter()
+        if self._rec.AcceptWaveform(pcm):
+            text = json.loads(self._rec.Result()).get("text", "")
+            if text:
+                self._segments.append(text)
+            message = {"type": "result", "text": text}
+        else:
+            partial = json.loads(self._rec.PartialResult()).get("partial", "")
+            message = {"type": "partial", "text": partial}
+        self.processing_seconds += time.perf_counter() - started
+        self.audio_seconds += len(pcm) / (2 * self.sample_rate)
+        return message
+
+    def _finish(self) -> dict:
+        started = time.perf_counter()
+        text = json.loads(self._rec.FinalResult()).get("text", "")
+        if text:
+            self._segments.append(text)
+        self.processing_seconds += time.perf_counter() - started
+        return {
+            "type": "final",
+            "text": " ".join(self._segments),
+            "audio_seconds": round(self.audio_seconds, 3),
+            "real_time_factor": (
+                round(self.processing_seconds / self.audio_seconds, 4)
+                if self.audio_seconds
+                else None
+            ),
+        }
+
+    async def accept(self, pcm: bytes) -> dict:
+        """Feed a PCM chunk; returns a partial or a completed-segment result"""
+        return await self.service._run(self._accept, pcm)
+
+    async def finish(self) -> dict:
+        """Flush the recognizer and return the full transcript"""
+        return await self.service._run(self._finish)
+
+
+class TranscriptionService:
+    """Vosk transcription with a shared model, recognizer pool and workers.
+
+    The model is loaded once (the module-level ``model`` unless one is
+    passed in); recognition runs in a thread pool sized like the recognizer
+    pool so decoding never blocks the event loop. Async callers first wait
+    for one of ``pool_size`` slots on the event loop, so a caller queued for
+    a recognizer never occupies a decode thread that a stream holding one
+    needs.
+    """
+
+    def __init__(
+        self,
+        vosk_model=None,
+        pool_size: Optional[int] = None,
+        acquire_timeout: float = 30.0,
+    ):
+        self._model = vosk_model
+        self.pool_size = pool_size or os.cpu_count() or 1
+        self.acquire_timeout = acquire_timeout
+        self.metrics = TranscriptionMetrics()
+        self._pool: Optional[RecognizerPool] = None
+        self._pool_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.pool_size, thread_name_prefix="vosk"
+        )
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop = None
+
+    @property
+    def model(self):
+        return self._model if self._model is not None else model
+
+    @property
+    def available(self) -> bool:
+        return self.model is not None
+
+    @property
+    def pool(self) -> RecognizerPool:
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    if not self.available:
+                        raise RuntimeError("Vosk model is not loaded")
+                    self._pool = RecognizerPool(self.model, self.pool_size)
+        return self._pool
+
+    async def _acquire_slot(self) -> asyncio.Semaphore:
+        """Wait on the event loop until a recognizer is free for this caller"""
+        loop = asyncio.get_running_loop()
+        if self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self.pool_size)
+            self._slots_loop = loop
+        slots = self._slots
+        try:
+            await asyncio.wait_for(slots.acquire(), self.acquire_timeout)
+        except asyncio.TimeoutError:
+            raise TranscriberBusyError("All speech recognizers are busy") from None
+        return slots
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    def transcribe_file(self, source: Union[str, BinaryIO]) -> dict:
+        """Blocking transcription of a WAV path or file handle"""
+        self.metrics.increment("requests")
+        with wave.open(source, "rb") as wf:
+            error = _check_wav_format(wf)
+            if error:
+                self.metrics.increment("errors")
+                return {"error": error}
+            rate = wf.getframerate()
+            audio_seconds = wf.getnframes() / rate
+            rec = self.pool.acquire(rate, self.acquire_timeout)
+            started = time.perf_counter()
+            try:
+                text = _decode_frames(rec, wf)
+            except Exception:
+                self.metrics.increment("errors")
+                raise
+            finally:
+                self.pool.release(rec, rate)
+            elapsed = time.perf_counter() - started
+        self.metrics.record(audio_seconds, elapsed)
+        return {
+            "transcription": text,
+            "audio_seconds": round(audio_seconds, 3),
+            "processing_ms": round(elapsed * 1000, 1),
+            "real_time_factor": (
+                round(elapsed / audio_seconds, 4) if audio_seconds else None
+            ),
+        }
+
+    async def transcribe(self, source: Union[str, BinaryIO]) -> dict:
+        """Transcribe a WAV off the event loop"""
+        slots = await self._acquire_slot()
+        try:
+            return await self._run(self.transcribe_file, source)
+        finally:
+            slots.release()
+
+    def open_stream(self, sample_rate: int = 16000) -> StreamingRecognition:
+        return StreamingRecognition(self, sample_rate)
+
+    def get_metrics(self) -> dict:
+        return {
+            "available": self.available,
+            "workers": self.pool_size,
+            "pool": self._pool.stats() if self._pool is not None else None,
+            **self.metrics.snapshot(),
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_transcription_service: Optional[TranscriptionService] = None
+_service_lock = threading.Lock()
+
+
+def get_transcription_service() -> TranscriptionService:
+    """Process-wide transcription service (created on first use)"""
+    global _transcription_service
+    if _transcription_service is None:
+        with _service_lock:
+            if _transcription_service is None:
+                size = int(os.getenv("VOSK_POOL_SIZE", "0")) or None
+                _transcription_service = TranscriptionService(pool_size=size)
+    return _transcription_service
+
+
 @router.post("/api/voice_transcribe")
 async def voice_transcribe(file: UploadFile) -> dict:
     # Even if model is None, allow processing with patched recognizer in tests
@@ -110,31 +511,10 @@ async def voice_transcribe(file: UploadFile) -> dict:
             temp_path = temp_file.name
             temp_file.write(audio_data)
 
-        # Use a 'with' statement to ensure the wave file is closed before deletion
-        with wave.open(temp_path, "rb") as wf:
-            if (
-                wf.getnchannels() != 1
-                or wf.getsampwidth() != 2
-                or wf.getframerate() not in [16000, 8000]
-            ):
-                return {
-                    "error": (
-                        "Audio must be mono PCM WAV with 16kHz or 8kHz sample rate."
-                    )
-                }
-            rec = vosk.KaldiRecognizer(model, wf.getframerate())
-            result = []
-            # Process the audio file in chunks
-            while data := wf.readframes(4000):
-                if rec.AcceptWaveform(data):
-                    part = json.loads(rec.Result())  # Let JSONDecodeError propagate
-                    if "text" in part:
-                        result.append(part["text"])
-
-            final = json.loads(rec.FinalResult())
-            if "text" in final:
-                result.append(final["text"])
-            text = " ".join([r for r in result if r])
+        result = transcribe_wav(temp_path)
+        if "error" in result:
+            return result
+        text = result["transcription"]
     finally:
         # Ensure the temporary file is always cleaned up
         if temp_path and os.path.exists(temp_path):
@@ -144,6 +524,12 @@ async def voice_transcribe(file: UploadFile) -> dict:
     return {"transcription": text}
 
 
+@router.get("/api/voice/metrics")
+async def voice_metrics() -> dict:
+    """Recognizer pool usage and real-time factor of pooled transcription"""
+    return get_transcription_service().get_metrics()
+
+
 # Make the model object accessible as a global name for tests that reference `model` directly
 try:
     _builtins.model = model
@@ -0,0 +1,222 @@
+"""
+Async Web Fetcher
+Pooled, revalidating web page fetcher for web indexing.
+
+- One shared ``httpx.AsyncClient`` keeps HTTP connections alive between pages
+- Concurrent requests to the same host are capped by a per-host semaphore
+- Extracted text is cached as ``<md5(url)>.txt`` in ``cache_dir`` (the layout
+  ``VaultIndexer.fetch_web_page`` already uses) with the response's ETag and
+  Last-Modified stored next to it in ``<md5(url)>.meta.json``; once a cached page
+  is older than ``max_age`` it is revalidated with a conditional GET and a
+  304 reuses the cached text without downloading or re-extracting the page
+- Readability extraction is CPU-bound and runs in a worker thread pool so it
+  never blocks the event loop
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+from urllib.parse import urlsplit
+
+import httpx
+from bs4 import BeautifulSoup
+from readability import Document
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "ObsidianAssistant/1.0"
+
+
+def extract_readable_text(html: str) -> str:
+    """Main article text of an HTML page (readability + BeautifulSoup)"""
+    summary_html = Document(html).summary()
+    soup = BeautifulSoup(summary_html, "html.parser")
+    return soup.get_text(separator=" ", strip=True)
+
+
+class AsyncWebFetcher:
+    """Fetch web pages over a shared connection pool with conditional GETs"""
+
+    def __init__(
+        self,
+        cache_dir: str,
+        max_age: float = 3600.0,
+        per_host_limit: int = 4,
+        max_connections: int = 32,
+        timeout: float = 10.0,
+        extract_workers: int = 2,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_age = max_age
+        self.per_host_limit = per_host_limit
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(
+            max_workers=extract_workers, thread_name_prefix="web-extract"
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self.stats = {
+            "fetched": 0,
+            "fresh_hits": 0,
+            "not_modified": 0,
+            "stale_served": 0,
+            "errors": 0,
+        }
+
+    # -------------------
+    # Cache files
+    # -------------------
+
+    @staticmethod
+    def cache_key(url: str) -> str:
+        return hashlib.md5(url.encode("utf-8"), usedforsecurity=False).hexdigest()
+
+    def _paths(self, url: str):
+        key = self.cache_key(url)
+        return self.cache_dir / f"{key}.txt", self.cache_dir / f"{key}.meta.json"
+
+    def _load_meta(self, text_path: Path, meta_path: Path) -> Dict[str, Any]:
+        try:
+            return json.loads(meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            # Pages cached before validators were stored: age from the text file
+            return {"fetched_at": text_path.stat().st_mtime}
+
+    @staticmethod
+    def _write_atomic(path: Path, data: str):
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(data, encoding="utf-8")
+        os.replace(tmp, path)
+
+    def _store(self, url: str, text: str, response: httpx.Response):
+        text_path, meta_path = self._paths(url)
+        fetched_at = time.time()
+        last_modified = response.headers.get("last-modified")
+        if last_modified is None and response.headers.get("etag") is None:
+            # Still allow revalidation against servers that honour dates
+            last_modified = formatdate(fetched_at, usegmt=True)
+        self._write_atomic(text_path, text)
+        meta = {
+            "url": url,
+            "etag": response.headers.get("etag"),
+            "last_modified": last_modified,
+            "fetched_at": fetched_at,
+        }
+        self._write_atomic(meta_path, json.dumps(meta))
+
+    # -------------------
+    # HTTP
+    # -------------------
+
+    def _get_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            # Clients and semaphores are bound to the loop that created them
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                follow_redirects=True,
+                headers={"User-Agent": USER_AGENT},
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+            self._client_loop = loop
+            self._host_limits = {}
+        return self._client
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc.lower()
+        limit = self._host_limits.get(host)
+        if limit is None:
+            limit = self._host_limits[host] = asyncio.Semaphore(self.per_host_limit)
+        return limit
+
+    async def fetch(self, url: str, force: bool = False) -> Optional[str]:
+        """Return the readable text of ``url``, from cache when still valid
+
+        ``force`` skips both the freshness window and revalidation. Returns
+        None when the page cannot be fetched and no cached copy exists.
+        """
+        text_path, meta_path = self._paths(url)
+        cached_text = None
+        headers = {}
+        if not force and text_path.exists():
+            try:
+                meta = self._load_meta(text_path, meta_path)
+                cached_text = text_path.read_text(encoding="utf-8")
+            except OSError as e:
+                logger.warning(f"Ignoring unreadable cache for {url}: {e}")
+                meta = {}
+        if cached_text is not None:
+            if time.time() - meta.get("fetched_at", 0) < self.max_age:
+                self.stats["fresh_hits"] += 1
+                return cached_text
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        client = self._get_client()
+        try:
+            async with self._host_limit(url):
+                response = await client.get(url, headers=headers)
+            if response.status_code == 304 and cached_text is not None:
+                self.stats["not_modified"] += 1
+                # Restart the freshness window; a 304 may carry a new ETag
+                meta["fetched_at"] = time.time()
+                meta["etag"] = response.headers.get("etag", meta.get("etag"))
+                self._write_atomic(meta_path, json.dumps(meta))
+                return cached_text
+            response.raise_for_status()
+            loop = asyncio.get_running_loop()
+            text = await loop.run_in_executor(
+                self._executor, extract_readable_text, response.text
+            )
+        except Exception as e:
+            self.stats["errors"] += 1
+            if cached_text is not None:
+                logger.warning(f"Revalidating {url} failed, serving cached copy: {e}")
+                self.stats["stale_served"] += 1
+                return cached_text
+            logger.error(f"[AsyncWebFetcher] Failed to fetch {url}: {e}")
+            return None
+
+        self.stats["fetched"] += 1
+        if not text:
+            return None
+        self._store(url, text, response)
+        return text
+
+    async def fetch_many(
+        self, urls: Iterable[str], force: bool = False
+    ) -> Dict[str, Optional[str]]:
+        """Fetch several URLs concurrently; result keys keep input order"""
+        unique = list(dict.fromkeys(urls))
+        texts = await asyncio.gather(*(self.fetch(u, force=force) for u in unique))
+        return dict(zip(unique, texts))
+
+    async def aclose(self):
+        """Close the connection pool and extraction workers (at shutdown)"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._client_loop = None
+        self._executor.shutdown(wait=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "hosts": len(self._host_limits),
+            "per_host_limit": self.per_host_limit,
+        }
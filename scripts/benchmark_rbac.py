@@ -0,0 +1,182 @@
+"""
+RBAC Permission Check Benchmark
+
+Loads ``--users`` users into each of ``--tenants`` tenants, then compares the
+legacy set-based permission check (``"user:tenant"`` key, ``datetime`` expiry
+check, ``in`` on a set of enums) with the compiled bitmask
+``RBACManager.has_permission``. It also times a batch permission check for an
+admin listing page against the equivalent per-user loop, and verifies that both
+paths return the same decisions.
+
+Usage:
+    python scripts/benchmark_rbac.py
+    python scripts/benchmark_rbac.py --users 10000 --tenants 5 --checks 200000
+"""
+
+import argparse
+import gc
+import json
+import random
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from agent.enterprise_rbac import Permission, RBACManager, UserRole  # noqa: E402
+
+ROLE_MIX = [
+    [UserRole.READONLY],
+    [UserRole.USER],
+    [UserRole.USER],
+    [UserRole.USER, UserRole.POWER_USER],
+    [UserRole.TEAM_ADMIN],
+    [UserRole.TENANT_ADMIN],
+]
+LISTING_PERMISSIONS = [
+    Permission.view_users,
+    Permission.manage_users,
+    Permission.assign_roles,
+    Permission.export_data,
+]
+
+
+def legacy_has_permission(manager: RBACManager, user_id, tenant_id, permission):
+    """Reference implementation: string key, datetime expiry, set membership"""
+    user_perms = manager.user_permissions.get(f"{user_id}:{tenant_id}")
+    if not user_perms:
+        return False
+    if user_perms.expires_at and datetime.utcnow() > user_perms.expires_at:
+        return False
+    return permission in user_perms.effective_permissions
+
+
+def populate(users: int, tenants: int) -> Tuple[RBACManager, float]:
+    manager = RBACManager()
+    start = time.perf_counter()
+    for t in range(tenants):
+        tenant_id = f"tenant{t}"
+        for u in range(users):
+            for role in ROLE_MIX[(u + t) % len(ROLE_MIX)]:
+                manager.assign_role(f"user{u}", tenant_id, role, "bench")
+    return manager, time.perf_counter() - start
+
+
+def _time(fn, repeat: int) -> float:
+    # Like timeit: keep collector passes over a million grants out of the timing
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        return time.perf_counter() - start
+    finally:
+        gc.enable()
+
+
+def run(users: int, tenants: int, checks: int, page: int, seed: int) -> Dict:
+    import logging
+
+    logging.getLogger("agent.enterprise_rbac").setLevel(logging.WARNING)
+    manager, load_s = populate(users, tenants)
+
+    rng = random.Random(seed)
+    permissions = list(Permission)
+    # Include ~10% unknown users so misses are exercised too
+    samples: List[Tuple[str, str, Permission]] = [
+        (
+            f"user{rng.randrange(int(users * 1.1))}",
+            f"tenant{rng.randrange(tenants)}",
+            rng.choice(permissions),
+        )
+        for _ in range(checks)
+    ]
+
+    for user_id, tenant_id, perm in samples[:10000]:
+        if legacy_has_permission(
+            manager, user_id, tenant_id, perm
+        ) != manager.has_permission(user_id, tenant_id, perm):
+            raise AssertionError(f"Decision mismatch for {user_id}/{tenant_id}")
+
+    legacy_s = _time(
+        lambda: [legacy_has_permission(manager, *s) for s in samples], 1
+    )
+    mask_s = _time(lambda: [manager.has_permission(*s) for s in samples], 1)
+
+    page_ids = [f"user{u}" for u in range(page)]
+
+    def legacy_page():
+        return {
+            uid: {
+                p.value: legacy_has_permission(manager, uid, "tenant0", p)
+                for p in LISTING_PERMISSIONS
+            }
+            for uid in page_ids
+        }
+
+    def batch_page():
+        return manager.check_permissions_batch(
+            "tenant0", page_ids, LISTING_PERMISSIONS
+        )
+
+    if legacy_page() != batch_page():
+        raise AssertionError("Batch check mismatch")
+    repeat = 20
+    legacy_page_s = _time(legacy_page, repeat) / repeat
+    batch_page_s = _time(batch_page, repeat) / repeat
+
+    return {
+        "grants": len(manager.user_permissions),
+        "load_seconds": load_s,
+        "role_combinations": len(manager._combination_masks),
+        "single_check": {
+            "legacy_ns": legacy_s / checks * 1e9,
+            "bitmask_ns": mask_s / checks * 1e9,
+            "speedup": legacy_s / mask_s if mask_s else 0.0,
+        },
+        "listing_page": {
+            "users": page,
+            "permissions": len(LISTING_PERMISSIONS),
+            "legacy_ms": legacy_page_s * 1000,
+            "batch_ms": batch_page_s * 1000,
+            "speedup": legacy_page_s / batch_page_s if batch_page_s else 0.0,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RBAC permission check benchmark")
+    parser.add_argument("--users", type=int, default=100_000, help="Users per tenant")
+    parser.add_argument("--tenants", type=int, default=10)
+    parser.add_argument("--checks", type=int, default=1_000_000)
+    parser.add_argument("--page", type=int, default=500, help="Listing page size")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="Emit JSON results")
+    args = parser.parse_args()
+
+    results = run(args.users, args.tenants, args.checks, args.page, args.seed)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    single = results["single_check"]
+    listing = results["listing_page"]
+    print(
+        f"grants: {results['grants']:,} loaded in {results['load_seconds']:.1f}s "
+        f"({results['role_combinations']} distinct role combinations)"
+    )
+    print(
+        f"has_permission: legacy {single['legacy_ns']:.0f} ns, "
+        f"bitmask {single['bitmask_ns']:.0f} ns ({single['speedup']:.1f}x)"
+    )
+    print(
+        f"listing page ({listing['users']} users x {listing['permissions']} perms): "
+        f"legacy {listing['legacy_ms']:.2f} ms, batch {listing['batch_ms']:.2f} ms "
+        f"({listing['speedup']:.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
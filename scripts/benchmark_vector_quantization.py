@@ -0,0 +1,124 @@
+"""
+Vector Quantization Benchmark
+
+Builds a ``NumpyVectorStore`` over ``--vectors`` clustered embeddings once per
+storage mode (``none``, ``float16``, ``int8``) and runs the same ``--queries``
+against each. Reports recall@k of the quantized first pass + float32 re-rank
+against exact search, the mean per-query latency, and the bytes the first pass
+scans per query.
+
+Usage:
+    python scripts/benchmark_vector_quantization.py
+    python scripts/benchmark_vector_quantization.py --vectors 500000 --dim 768
+"""
+
+import argparse
+import gc
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from agent.vector_store import QUANTIZATIONS, NumpyVectorStore  # noqa: E402
+
+
+def make_vectors(n: int, dim: int, seed: int) -> np.ndarray:
+    # Clustered like real note embeddings, so near neighbours are close calls
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(1, n // 500), dim))
+    labels = rng.integers(0, len(centers), size=n)
+    vectors = centers[labels] + 0.3 * rng.normal(size=(n, dim))
+    return vectors.astype(np.float32)
+
+
+def _time(fn, repeat: int) -> float:
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        return time.perf_counter() - start
+    finally:
+        gc.enable()
+
+
+def run(
+    vectors: int, dim: int, queries: int, k: int, rerank_factor: int, seed: int
+) -> Dict:
+    data = make_vectors(vectors, dim, seed)
+    ids = [str(i) for i in range(vectors)]
+    probes = data[np.random.default_rng(seed + 1).choice(vectors, queries)]
+    probes = probes + 0.1 * np.random.default_rng(seed + 2).normal(size=probes.shape)
+
+    results = {"vectors": vectors, "dim": dim, "queries": queries, "k": k}
+    exact_ids = None
+    with tempfile.TemporaryDirectory() as tmp:
+        for kind in QUANTIZATIONS:
+            store = NumpyVectorStore(
+                str(Path(tmp) / kind),
+                quantization=kind,
+                rerank_factor=rerank_factor,
+                flush_rows=vectors,
+            )
+            start = time.perf_counter()
+            store.add(ids=ids, embeddings=data)
+            store.persist()
+            build_s = time.perf_counter() - start
+
+            found = [store.query([q], n_results=k)["ids"][0] for q in probes]
+            if exact_ids is None:
+                exact_ids = found
+            hits = sum(len(set(a) & set(b)) for a, b in zip(found, exact_ids))
+            query_s = _time(
+                lambda: [store.query([q], n_results=k) for q in probes], 1
+            )
+            itemsize = {"none": 4, "float16": 2, "int8": 1}[kind]
+            results[kind] = {
+                "build_seconds": build_s,
+                "recall": hits / (queries * k),
+                "query_ms": query_s / queries * 1000,
+                "scan_bytes": vectors * dim * itemsize,
+            }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vector quantization benchmark")
+    parser.add_argument("--vectors", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--rerank-factor", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="Emit JSON results")
+    args = parser.parse_args()
+
+    results = run(
+        args.vectors, args.dim, args.queries, args.k, args.rerank_factor, args.seed
+    )
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(
+        f"{results['vectors']:,} vectors x {results['dim']} dims, "
+        f"{results['queries']} queries, top {results['k']}"
+    )
+    base = results["none"]["query_ms"]
+    for kind in QUANTIZATIONS:
+        r = results[kind]
+        print(
+            f"{kind:>8}: recall@{results['k']} {r['recall']:.3f}, "
+            f"{r['query_ms']:.2f} ms/query ({base / r['query_ms']:.1f}x), "
+            f"first pass scans {r['scan_bytes'] / 2**20:.0f} MiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,49 @@
-import uvicorn
-from agent.backend import app
-
 #!/usr/bin/env python3
-"""Simple backend server starter"""
+"""Simple backend server starter
+
+Usage:
+    python start_server.py
+    python start_server.py --profile-startup [--top 40] [--json]
+"""
+
+import argparse
+import json
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Start the backend server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="Report per-module import and init_services timings, then exit",
+    )
+    parser.add_argument("--top", type=int, default=25, help="Slowest imports shown")
+    parser.add_argument("--json", action="store_true", help="Emit JSON results")
+    args = parser.parse_args()
+
+    if args.profile_startup:
+        from agent.startup_profile import (
+            format_report,
+            profile_imports,
+            profile_init_services,
+        )
+
+        imports = profile_imports()
+        init = profile_init_services()
+        if args.json:
+            print(json.dumps({"imports": imports, "init_services": init}, indent=2))
+        else:
+            print(format_report(imports, init, top=args.top))
+        return
+
+    import uvicorn
+
+    from agent.backend import app
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="info")
 
 
 if __name__ == "__main__":
-    pass
-    uvicorn.run(app, host="127.0.0.1", port=8000, log_level="info")
+    main()
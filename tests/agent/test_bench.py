@@ -0,0 +1,105 @@
+"""
+Tests for the in-process HTTP load benchmark (python -m agent.bench).
+
+Tests cover:
+- Traffic mix parsing and percentiles
+- Budget comparison (latency above, throughput below tolerance)
+- Hashing embedder stand-in
+- A short end-to-end run against a recorded baseline, restoring the
+  backend's services afterwards
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+from agent import bench
+
+
+def test_parse_mix():
+    assert bench.parse_mix("ask=3,search=1,health") == {
+        "ask": 3.0,
+        "search": 1.0,
+        "health": 1.0,
+    }
+    with pytest.raises(ValueError):
+        bench.parse_mix("upload=1")
+    with pytest.raises(ValueError):
+        bench.parse_mix("ask=0")
+
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert bench.percentile(values, 50) == 51
+    assert bench.percentile(values, 99) == 99
+    assert bench.percentile([], 95) == 0.0
+
+
+def test_compare_budgets():
+    baseline = {"throughput_rps": 100.0, "ask.p95_ms": 40.0, "rss_mb": 100.0}
+    within = {"throughput_rps": 80.0, "ask.p95_ms": 48.0, "rss_mb": 110.0}
+    assert bench.compare(within, baseline, tolerance=0.25) == []
+
+    worse = {"throughput_rps": 70.0, "ask.p95_ms": 60.0, "rss_mb": 130.0}
+    regressions = bench.compare(worse, baseline, tolerance=0.25)
+    assert [r.split(":")[0] for r in regressions] == [
+        "throughput_rps",
+        "ask.p95_ms",
+        "rss_mb",
+    ]
+
+
+def test_errors_have_no_tolerance():
+    baseline = {"ask.p95_ms": 40.0, "ask.errors": 0, "errors": 0}
+    # Failing fast lowers latency but still fails the run
+    failing = {"ask.p95_ms": 5.0, "ask.errors": 3, "errors": 3, "search.errors": 1}
+    assert bench.compare(failing, baseline, tolerance=0.5) == [
+        "ask.errors: 3 > 0",
+        "errors: 3 > 0",
+        "search.errors: 1 > 0",
+    ]
+    assert bench.compare({"ask.errors": 0, "errors": 0}, baseline, 0.5) == []
+
+
+def test_hashing_embedder():
+    embedder = bench.HashingEmbedder(dim=64)
+    a, b, c = embedder.encode(["vector search notes", "search notes vector", "x"])
+
+    assert a.shape == (64,)
+    assert np.isclose(np.linalg.norm(a), 1.0)
+    assert np.allclose(a, b)  # Bag of words: order does not matter
+    assert np.allclose(embedder.encode("vector search notes"), a)
+    assert float(a @ c) < 0.5
+
+
+def _report(out: str) -> dict:
+    # The JSON report is the last thing printed
+    return json.loads(out[out.index("{\n") :])
+
+
+def test_end_to_end_run(tmp_path, capsys, monkeypatch):
+    import agent.backend as backend
+
+    monkeypatch.setenv("TEST_MODE", "1")
+    before = backend.emb_manager
+    baseline = tmp_path / "baseline.json"
+    args = "--requests 40 --warmup 0 --concurrency 4 --llm-latency-ms 1 --notes 3"
+    args = args.split() + ["--baseline", str(baseline), "--json"]
+
+    assert bench.main(args + ["--update-baseline"]) == 0
+    report = _report(capsys.readouterr().out)
+    assert report["errors"] == 0
+    assert sum(e["count"] for e in report["endpoints"].values()) == 40
+    assert report["throughput_rps"] > 0
+    assert backend.emb_manager is before
+
+    recorded = json.loads(baseline.read_text())
+    assert recorded["metrics"]["search.p95_ms"] >= 0
+    assert recorded["metrics"]["errors"] == recorded["metrics"]["ask.errors"] == 0
+    # Impossible budgets fail the run
+    recorded["metrics"] = {k: 0.0 for k in recorded["metrics"]}
+    recorded["metrics"]["throughput_rps"] = 1e9
+    baseline.write_text(json.dumps(recorded))
+    assert bench.main(args) == 1
+    assert _report(capsys.readouterr().out)["regressions"]
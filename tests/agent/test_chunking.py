@@ -0,0 +1,160 @@
+"""
+Tests for the offset-based Markdown chunker.
+
+Tests cover:
+- Chunks as offsets/line numbers into the original text
+- Frontmatter, heading and code fence boundaries
+- Splitting oversized blocks with overlap
+- Tokenizer-based sizing with a word-count fallback
+- EmbeddingsManager and VaultIndexer recording offsets in index metadata
+"""
+
+from unittest.mock import Mock, patch
+
+from agent.chunking import MarkdownChunker, count_words, tokenizer_counter
+
+NOTE = """---
+title: Trip
+---
+# Plans
+
+Pack the bags.
+Book the train.
+
+## Code
+
+```python
+# not a heading
+print("hi")
+```
+
+Closing words.
+"""
+
+
+class TestMarkdownChunker:
+    def test_offsets_slice_original_text(self):
+        chunks = MarkdownChunker(max_tokens=50).chunk(NOTE)
+
+        texts = [c.text(NOTE) for c in chunks]
+        assert texts[0] == "---\ntitle: Trip\n---"
+        assert texts[1] == "# Plans\n\nPack the bags.\nBook the train."
+        assert texts[2].startswith("## Code\n\n```python\n# not a heading")
+        assert texts[2].endswith("Closing words.")
+        assert [(c.line_start, c.line_end) for c in chunks] == [(1, 3), (4, 7), (9, 16)]
+
+    def test_heading_path_and_kinds(self):
+        chunks = MarkdownChunker(max_tokens=50).chunk(NOTE)
+
+        assert chunks[0].kind == "frontmatter"
+        assert chunks[1].heading == "Plans"
+        assert chunks[2].heading == "Plans > Code"
+        assert chunks[2].metadata()["start"] == NOTE.index("## Code")
+
+    def test_crlf_line_endings(self):
+        crlf = NOTE.replace("\n", "\r\n")
+        chunks = MarkdownChunker(max_tokens=50).chunk(crlf)
+        expected = MarkdownChunker(max_tokens=50).chunk(NOTE)
+
+        assert [c.text(crlf) for c in chunks] == [
+            c.text(NOTE).replace("\n", "\r\n") for c in expected
+        ]
+        assert [(c.heading, c.kind, c.line_start, c.line_end) for c in chunks] == [
+            (c.heading, c.kind, c.line_start, c.line_end) for c in expected
+        ]
+
+        text = "# A\r\n\r\ntext one\r\n## B\r\nmore"
+        chunks = MarkdownChunker(max_tokens=50).chunk(text)
+        assert [(c.heading, c.text(text)) for c in chunks] == [
+            ("A", "# A\r\n\r\ntext one"),
+            ("A > B", "## B\r\nmore"),
+        ]
+
+    def test_code_block_kept_whole(self):
+        chunks = MarkdownChunker(max_tokens=8).chunk(NOTE)
+        code = [c.text(NOTE) for c in chunks if c.kind == "code"]
+
+        assert code == ['```python\n# not a heading\nprint("hi")\n```']
+
+    def test_oversized_paragraph_split_with_overlap(self):
+        text = " ".join(f"w{i}" for i in range(12))
+        chunks = MarkdownChunker(max_tokens=5, overlap=2).chunk(text)
+
+        texts = [c.text(text) for c in chunks]
+        assert texts[0] == "w0 w1 w2 w3 w4"
+        assert texts[1].startswith("w3 w4")
+        assert texts[-1].endswith("w11")
+        assert all(count_words(t) <= 5 for t in texts)
+
+    def test_short_and_empty_text(self):
+        chunker = MarkdownChunker(max_tokens=5)
+        assert chunker.chunk("") == []
+        assert [c.text(" word \n") for c in chunker.chunk(" word \n")] == ["word"]
+
+    def test_tokenizer_counter(self):
+        tokenizer = Mock(
+            side_effect=lambda t, add_special_tokens: {
+                "input_ids": [c for c in t if not c.isspace()]
+            }
+        )
+        count = tokenizer_counter(tokenizer)
+        assert count("abc def", 0, 5) == 4
+
+        chunks = MarkdownChunker(max_tokens=4, token_counter=count).chunk("ab\n\ncd")
+        assert len(chunks) == 1  # 2 + 2 non-space characters
+
+        # Tokenizers that do not return token ids fall back to word counts
+        assert tokenizer_counter(Mock()) is None
+        assert tokenizer_counter(None) is None
+
+
+class TestEmbeddingsManagerChunking:
+    def test_index_file_records_offsets(self, tmp_path):
+        from agent.embeddings import EmbeddingsManager
+
+        with patch(
+            "agent.embeddings.SentenceTransformer", side_effect=Exception("no model")
+        ):
+            mgr = EmbeddingsManager(chunk_size=50, overlap=5)
+        mgr.collection = Mock()
+        mgr.chroma_client = Mock()
+        note = tmp_path / "trip.md"
+        note.write_text(NOTE, encoding="utf-8")
+
+        assert mgr.index_file(str(note)) == 3
+        kwargs = mgr.collection.add.call_args.kwargs
+        meta = kwargs["metadatas"][1]
+        assert kwargs["documents"][1] == NOTE[meta["start"] : meta["end"]]
+        assert meta["note_path"] == str(note)
+        assert meta["line_start"] == 4
+        assert meta["heading"] == "Plans"
+
+    def test_vault_indexer_records_offsets(self, tmp_path):
+        from agent.embeddings import EmbeddingsManager
+        from agent.indexing import VaultIndexer
+
+        with patch(
+            "agent.embeddings.SentenceTransformer", side_effect=Exception("no model")
+        ):
+            mgr = EmbeddingsManager(chunk_size=50, overlap=5)
+        mgr.collection = Mock()
+        mgr.chroma_client = Mock()
+        vault = tmp_path / "vault"
+        vault.mkdir()
+        note = vault / "trip.md"
+        note.write_text(NOTE, encoding="utf-8")
+        indexer = VaultIndexer(emb_mgr=mgr, cache_dir=str(tmp_path / "cache"))
+
+        # /api/scan_vault, /api/reindex and background jobs
+        for index in (
+            indexer.index_vault,
+            indexer.reindex,
+            lambda _: indexer.index_document(str(note)),
+        ):
+            mgr.collection.add.reset_mock()
+            index(str(vault))
+            kwargs = mgr.collection.add.call_args.kwargs
+            meta = kwargs["metadatas"][1]
+            assert kwargs["documents"][1] == NOTE[meta["start"] : meta["end"]]
+            assert meta["note_path"] == str(note)
+            assert (meta["line_start"], meta["heading"]) == (4, "Plans")
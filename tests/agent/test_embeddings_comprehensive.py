@@ -81,6 +81,8 @@ def mock_settings():
     mock_settings.chunk_overlap = 100
     mock_settings.top_k = 8
     mock_settings.embed_model = "sentence-transformers/all-mpnet-base-v2"
+    mock_settings.query_cache_size = 1024
+    mock_settings.search_batch_window_ms = 2.0
     return mock_settings
 
 
@@ -10,12 +10,15 @@ import pytest
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from agent.enterprise_rbac import (
+    ALL_PERMISSIONS_MASK,
     AuditLogger,
     Permission,
     RBACManager,
     Role,
     UserPermissions,
     UserRole,
+    mask_to_permissions,
+    permissions_to_mask,
     require_permission,
     require_role,
 )
@@ -678,5 +681,138 @@ class TestRBACIntegration:
         assert has_perm_t2 is False
 
 
+class TestPermissionBitmasks:
+    """Test suite for compiled permission masks and batch checks."""
+
+    def setup_method(self):
+        self.rbac_manager = RBACManager()
+
+    def test_mask_round_trip(self):
+        perms = {Permission.read_config, Permission.billing_access}
+        assert mask_to_permissions(permissions_to_mask(perms)) == perms
+        assert permissions_to_mask(Permission) == ALL_PERMISSIONS_MASK
+
+    def test_transitive_custom_role_inheritance(self):
+        self.rbac_manager.create_custom_role(
+            "auditor",
+            "Auditor",
+            "Reads audit logs",
+            [Permission.view_audit_logs],
+            inherits_from=UserRole.READONLY,
+        )
+        self.rbac_manager.create_custom_role(
+            "lead_auditor",
+            "Lead Auditor",
+            "Auditor who can export",
+            [Permission.export_data],
+            inherits_from="auditor",
+        )
+        self.rbac_manager.assign_role("u1", "t1", "lead_auditor", "admin")
+
+        # Two levels up: lead_auditor -> auditor -> readonly
+        for perm in (
+            Permission.export_data,
+            Permission.view_audit_logs,
+            Permission.read_documents,
+        ):
+            assert self.rbac_manager.has_permission("u1", "t1", perm)
+        assert not self.rbac_manager.has_permission("u1", "t1", Permission.manage_users)
+        user_perms = self.rbac_manager.get_user_permissions("u1", "t1")
+        assert Permission.read_documents in user_perms.effective_permissions
+
+    def test_inheritance_cycle_rejected(self):
+        self.rbac_manager.create_custom_role("a", "A", "", [], inherits_from="b")
+        with pytest.raises(ValueError):
+            self.rbac_manager.create_custom_role("b", "B", "", [], inherits_from="a")
+        assert "b" not in self.rbac_manager.custom_roles
+
+    def test_role_removal_updates_mask(self):
+        self.rbac_manager.assign_role("u1", "t1", UserRole.USER, "admin")
+        self.rbac_manager.assign_role("u1", "t1", UserRole.TENANT_ADMIN, "admin")
+        assert self.rbac_manager.has_permission("u1", "t1", Permission.billing_access)
+
+        self.rbac_manager.remove_role("u1", "t1", UserRole.TENANT_ADMIN)
+        assert not self.rbac_manager.has_permission(
+            "u1", "t1", Permission.billing_access
+        )
+        assert self.rbac_manager.has_permission("u1", "t1", Permission.ask_questions)
+
+    def test_expired_grant_denied(self):
+        past = datetime.utcnow() - timedelta(minutes=1)
+        self.rbac_manager.assign_role("u1", "t1", UserRole.USER, "admin", past)
+        assert not self.rbac_manager.has_permission(
+            "u1", "t1", Permission.read_documents
+        )
+        assert self.rbac_manager.list_users_with_permission(
+            "t1", Permission.read_documents
+        ) == []
+
+    def test_has_permissions_all_and_any(self):
+        self.rbac_manager.assign_role("u1", "t1", UserRole.READONLY, "admin")
+        perms = [Permission.read_documents, Permission.write_documents]
+        assert not self.rbac_manager.has_permissions("u1", "t1", perms)
+        assert self.rbac_manager.has_permissions("u1", "t1", perms, require_all=False)
+
+    def test_batch_checks(self):
+        self.rbac_manager.assign_role("admin", "t1", UserRole.TENANT_ADMIN, "root")
+        self.rbac_manager.assign_role("reader", "t1", UserRole.READONLY, "root")
+        self.rbac_manager.assign_role("other", "t2", UserRole.TENANT_ADMIN, "root")
+
+        results = self.rbac_manager.check_permissions_batch(
+            "t1",
+            ["admin", "reader", "other"],
+            [Permission.manage_users, Permission.read_documents],
+        )
+        assert results["admin"] == {"manage_users": True, "read_documents": True}
+        assert results["reader"] == {"manage_users": False, "read_documents": True}
+        assert results["other"] == {"manage_users": False, "read_documents": False}
+        assert self.rbac_manager.list_users_with_permission(
+            "t1", Permission.manage_users
+        ) == ["admin"]
+
+    def test_admin_endpoints_scoped_to_caller_tenant(self):
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+
+        from agent.enterprise_rbac import RBACEndpoints
+
+        self.rbac_manager.assign_role("admin", "t1", UserRole.TENANT_ADMIN, "root")
+        self.rbac_manager.assign_role("reader", "t1", UserRole.READONLY, "root")
+        self.rbac_manager.assign_role("other", "t2", UserRole.TENANT_ADMIN, "root")
+        app = FastAPI()
+        caller = {"user_id": "admin", "tenant_id": "t1"}
+
+        @app.middleware("http")
+        async def authenticate(request, call_next):
+            request.state.user = caller
+            return await call_next(request)
+
+        RBACEndpoints(app, self.rbac_manager, Mock())
+        client = TestClient(app)
+
+        own = client.get("/admin/tenants/t1/users")
+        assert own.status_code == 200
+        assert sorted(own.json()["users"]) == ["admin", "reader"]
+        filtered = client.get("/admin/tenants/t1/users?permission=manage_users")
+        assert filtered.json()["users"] == ["admin"]
+        assert client.get("/admin/tenants/t2/users").json()["status_code"] == 403
+
+        body = {"user_ids": ["other"], "permissions": ["manage_users"]}
+        cross = {**body, "tenant_id": "t2"}
+        denied = client.post("/admin/permissions/check", json=cross)
+        assert denied.json()["status_code"] == 403
+        result = client.post("/admin/permissions/check", json=body).json()
+        assert result["tenant_id"] == "t1"
+        assert result["results"]["other"] == {"manage_users": False}
+
+        # The caller's own permissions are enforced
+        caller["user_id"] = "reader"
+        forbidden = client.get("/admin/tenants/t1/users").json()
+        assert forbidden == {
+            "error": "Permission view_users required",
+            "status_code": 403,
+        }
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
@@ -1350,20 +1350,177 @@ class TestMultiTenantMiddleware:
 
     @pytest.mark.asyncio
     async def test_middleware_concurrent_limit_exceeded(self):
-        """Test middleware behavior when concurrent limit is exceeded."""
-        # Set concurrent requests to limit
-        self.tenant_manager.update_tenant_usage(
-            self.tenant_id,
-            concurrent_requests=self.tenant.limits.max_concurrent_requests,
-        )
+        """Test middleware behavior when concurrent and queue limits are full."""
+        import asyncio
+        import json
+        from unittest.mock import MagicMock
+
+        release = asyncio.Event()
+
+        async def slow_call_next(request):
+            await release.wait()
+            return MagicMock(status_code=200)
+
+        limits = self.tenant.limits
+        held = limits.max_concurrent_requests + limits.max_queued_requests
+        pending = [
+            asyncio.create_task(self.middleware(self.mock_request, slow_call_next))
+            for _ in range(held)
+        ]
+        await asyncio.sleep(0)
 
         response = await self.middleware(self.mock_request, self.mock_call_next)
 
         assert response.status_code == 429
-        import json
-
+        assert response.headers["Retry-After"]
         content = json.loads(response.body.decode())
         assert "limit" in content["error"].lower()
+        assert content["reason"] == "queue_full"
+
+        # Queued requests are admitted as running ones finish
+        release.set()
+        responses = await asyncio.gather(*pending)
+        assert [r.status_code for r in responses] == [200] * held
+        usage = self.tenant_manager.get_tenant_usage(self.tenant_id)
+        assert usage.concurrent_requests == 0
+
+    @pytest.mark.asyncio
+    async def test_middleware_rejects_suspended_tenant(self):
+        """Test that suspended and terminated tenants are not served."""
+        import json
+
+        for status in ("suspended", "terminated"):
+            self.tenant_manager.update_tenant_status(self.tenant_id, status)
+            response = await self.middleware(self.mock_request, self.mock_call_next)
+
+            assert response.status_code == 429
+            assert json.loads(response.body.decode())["reason"] == "tenant_inactive"
+        self.mock_call_next.assert_not_called()
+        usage = self.tenant_manager.get_tenant_usage(self.tenant_id)
+        assert usage.concurrent_requests == 0
+
+    @pytest.mark.asyncio
+    async def test_middleware_queue_timeout(self):
+        """Test that queued requests give up after the queue timeout."""
+        import asyncio
+        from unittest.mock import MagicMock
+
+        from agent.enterprise_tenant import (
+            MultiTenantMiddleware,
+            TenantAdmissionController,
+        )
+
+        middleware = MultiTenantMiddleware(
+            self.tenant_manager,
+            TenantAdmissionController(self.tenant_manager, queue_timeout=0.05),
+        )
+        release = asyncio.Event()
+
+        async def slow_call_next(request):
+            await release.wait()
+            return MagicMock(status_code=200)
+
+        limit = self.tenant.limits.max_concurrent_requests
+        running = [
+            asyncio.create_task(middleware(self.mock_request, slow_call_next))
+            for _ in range(limit)
+        ]
+        await asyncio.sleep(0)
+
+        response = await middleware(self.mock_request, self.mock_call_next)
+        assert response.status_code == 429
+
+        release.set()
+        await asyncio.gather(*running)
+        metrics = middleware.admission.get_metrics(self.tenant_id)
+        assert metrics["rejected_timeout"] == 1
+        assert metrics["admitted"] == limit
+        assert metrics["in_flight"] == 0
+
+
+class TestTenantAdmissionController:
+    """Test per-tenant admission control and weighted fair scheduling."""
+
+    def setup_method(self):
+        from agent.enterprise_tenant import TenantManager, TenantTier
+
+        self.tenant_manager = TenantManager()
+        self.basic = self.tenant_manager.create_tenant(
+            "Basic", "a@basic.com", TenantTier.BASIC
+        ).tenant_id
+        self.enterprise = self.tenant_manager.create_tenant(
+            "Big", "a@big.com", TenantTier.ENTERPRISE
+        ).tenant_id
+
+    @pytest.mark.asyncio
+    async def test_semaphore_never_exceeds_limit(self):
+        import asyncio
+
+        from agent.enterprise_tenant import TenantAdmissionController
+
+        controller = TenantAdmissionController(self.tenant_manager, queue_timeout=5)
+        limit = self.tenant_manager.get_tenant(self.basic).limits
+        active = peak = 0
+
+        async def request():
+            nonlocal active, peak
+            async with controller.admit(self.basic):
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0.01)
+                active -= 1
+
+        total = limit.max_concurrent_requests + limit.max_queued_requests
+        await asyncio.gather(*(request() for _ in range(total)))
+
+        assert peak == limit.max_concurrent_requests
+        metrics = controller.get_metrics(self.basic)
+        assert metrics["admitted"] == total
+        assert metrics["queued"] == limit.max_queued_requests
+        assert metrics["queue_wait"]["max_ms"] > 0
+
+    @pytest.mark.asyncio
+    async def test_expensive_pool_is_weighted_fair(self):
+        import asyncio
+
+        from agent.enterprise_tenant import TenantAdmissionController
+
+        controller = TenantAdmissionController(
+            self.tenant_manager, queue_timeout=5, expensive_slots=1
+        )
+        order = []
+        gate = asyncio.Event()
+
+        async def request(tenant_id):
+            async with controller.admit(tenant_id, expensive=True):
+                order.append(tenant_id)
+                await gate.wait()
+
+        # Occupy the only slot, then queue equal backlogs for both tenants
+        first = asyncio.create_task(request(self.basic))
+        await asyncio.sleep(0)
+        backlog = [
+            asyncio.create_task(request(tenant_id))
+            for _ in range(4)
+            for tenant_id in (self.basic, self.enterprise)
+        ]
+        await asyncio.sleep(0)
+        gate.set()
+        await asyncio.gather(first, *backlog)
+
+        # Weight 4 vs 1: the enterprise tenant drains its backlog first
+        served = order[1:6]
+        assert served.count(self.enterprise) == 4
+        assert controller.get_metrics()["expensive_pool"]["available"] == 1
+
+    def test_expensive_paths(self):
+        from agent.enterprise_tenant import TenantAdmissionController
+
+        controller = TenantAdmissionController(self.tenant_manager)
+        assert controller.is_expensive("/api/ask")
+        assert controller.is_expensive("/api/reindex")
+        assert not controller.is_expensive("/health")
+        assert not controller.is_expensive(None)
 
 
 if __name__ == "__main__":
@@ -5,6 +5,7 @@ Tests for file upload validation.
 These tests verify secure file handling for PDFs, audio files, and other uploads.
 """
 
+import asyncio
 import base64
 import hashlib
 import os
@@ -17,7 +18,10 @@ import pytest
 from agent.file_validation import (
     FileValidationError,
     FileValidator,
+    StreamingUploadValidator,
     get_file_size_limits,
+    is_streaming_upload,
+    spool_upload,
     validate_base64_audio,
     validate_pdf_path,
 )
@@ -465,5 +469,204 @@ class TestPerformanceAndLimits:
         assert len(set(hashes)) == 10  # All unique
 
 
+class TestStreamingUploads:
+    """Chunked validation, hashing and spooling of uploads"""
+
+    WAV = b"RIFF" + (36).to_bytes(4, "little") + b"WAVEfmt " + b"\x00" * 64
+
+    @staticmethod
+    def _chunks(data: bytes, size: int = 7):
+        async def gen():
+            for i in range(0, len(data), size):
+                yield data[i : i + size]
+
+        return gen()
+
+    def test_hash_and_size_match_buffered_validation(self):
+        upload = asyncio.run(spool_upload(self._chunks(self.WAV), "audio", "a.wav"))
+        try:
+            buffered = FileValidator(allowed_types=["audio"]).validate_file(
+                self.WAV, "a.wav"
+            )
+            assert upload.hash_sha256 == buffered["hash_sha256"]
+            assert upload.size_bytes == len(self.WAV)
+            assert upload.file.read() == self.WAV
+        finally:
+            upload.close()
+
+    def test_magic_bytes_rejected_from_first_chunk(self):
+        validator = StreamingUploadValidator("audio", "a.wav")
+        with pytest.raises(FileValidationError, match="magic bytes"):
+            validator.feed(b"MZ\x90\x00 definitely not audio")
+        validator.abort()
+
+    def test_size_cap_aborts_without_reading_rest(self):
+        consumed = []
+
+        async def endless():
+            yield self.WAV
+            while True:
+                consumed.append(1)
+                yield b"\x00" * 1024
+
+        with pytest.raises(FileValidationError, match="File too large"):
+            asyncio.run(spool_upload(endless(), "audio", "a.wav", max_size_mb=0.01))
+        assert len(consumed) <= 11
+
+    def test_pdf_token_split_across_chunks(self):
+        data = b"%PDF-1.7\n" + b"x" * 100 + b"/JavaScript" + b"y" * 10
+        with pytest.raises(FileValidationError, match="dangerous content"):
+            asyncio.run(spool_upload(self._chunks(data, 5), "pdf", "doc.pdf"))
+
+    def test_named_spool_removed_on_failure(self, tmp_path):
+        with pytest.raises(FileValidationError):
+            asyncio.run(
+                spool_upload(
+                    self._chunks(b"%PDF-1.7 /Launch"),
+                    "pdf",
+                    "doc.pdf",
+                    spool_dir=str(tmp_path),
+                )
+            )
+        assert list(tmp_path.iterdir()) == []
+
+    def test_named_spool_kept_until_closed(self, tmp_path):
+        data = b"%PDF-1.7\nplain body"
+        upload = asyncio.run(
+            spool_upload(self._chunks(data), "pdf", "doc.pdf", spool_dir=str(tmp_path))
+        )
+        assert open(upload.path, "rb").read() == data
+        upload.close()
+        assert not os.path.exists(upload.path)
+
+    def test_dangerous_extension_and_unsupported_type(self):
+        with pytest.raises(FileValidationError, match="Dangerous"):
+            StreamingUploadValidator("audio", "payload.exe")
+        with pytest.raises(FileValidationError, match="not supported"):
+            StreamingUploadValidator("text", "notes.md")
+
+    def test_streaming_paths(self):
+        assert is_streaming_upload("/api/upload/pdf")
+        assert is_streaming_upload("/api/voice_transcribe/stream")
+        assert not is_streaming_upload("/api/voice_transcribe")
+
+
+class TestStreamingUploadEndpoints:
+    """Streaming endpoints accept raw and multipart bodies"""
+
+    @pytest.fixture
+    def client(self):
+        from fastapi.testclient import TestClient
+
+        from agent.backend import app
+
+        return TestClient(app)
+
+    def test_voice_stream_raw_body(self, client):
+        wav = TestStreamingUploads.WAV
+        response = client.post(
+            "/api/voice_transcribe/stream",
+            content=wav,
+            headers={"Content-Type": "audio/wav"},
+        )
+        assert response.status_code == 200
+        info = response.json()["audio_info"]
+        assert info["size_bytes"] == len(wav)
+        assert info["hash"].startswith(hashlib.sha256(wav).hexdigest()[:16])
+
+    def test_voice_stream_multipart_rejects_non_audio(self, client):
+        response = client.post(
+            "/api/voice_transcribe/stream",
+            files={"file": ("a.wav", b"<html>nope</html>", "audio/wav")},
+        )
+        assert response.status_code == 400
+
+    def test_pdf_upload_indexes_stored_copy(self, client, tmp_path):
+        from agent import backend
+
+        data = b"%PDF-1.7\nhello"
+        indexer = Mock()
+        indexer.index_pdf.return_value = 3
+        settings = Mock(abs_cache_dir=tmp_path, pdf_max_size_mb=1)
+        with patch.object(backend, "vault_indexer", indexer), patch.object(
+            backend, "get_settings", return_value=settings
+        ):
+            response = client.post("/api/upload/pdf", content=data)
+
+        assert response.status_code == 200
+        stored = tmp_path / "uploads" / f"{hashlib.sha256(data).hexdigest()}.pdf"
+        assert response.json()["chunks_indexed"] == 3
+        assert stored.read_bytes() == data
+        indexer.index_pdf.assert_called_once_with(str(stored))
+
+    def test_pdf_upload_multipart(self, client, tmp_path):
+        from agent import backend
+
+        data = b"%PDF-1.7\n" + b"x" * 70000
+        indexer = Mock()
+        indexer.index_pdf.return_value = 1
+        settings = Mock(abs_cache_dir=tmp_path, pdf_max_size_mb=1)
+        with patch.object(backend, "vault_indexer", indexer), patch.object(
+            backend, "get_settings", return_value=settings
+        ):
+            response = client.post(
+                "/api/upload/pdf",
+                data={"note": "before the file"},
+                files={"file": ("doc.pdf", data, "application/pdf")},
+            )
+            missing = client.post("/api/upload/pdf", data={"note": "no file"})
+
+        assert response.status_code == 200
+        stored = tmp_path / "uploads" / f"{hashlib.sha256(data).hexdigest()}.pdf"
+        assert stored.read_bytes() == data
+        assert missing.status_code == 400
+
+    def test_multipart_size_cap_aborts_mid_body(self):
+        from starlette.requests import Request
+
+        from fastapi import HTTPException
+
+        from agent.backend import _spool_request
+
+        consumed = []
+        head = (
+            b"--b\r\nContent-Disposition: form-data; name=\"file\";"
+            b' filename="a.wav"\r\nContent-Type: audio/wav\r\n\r\n'
+        )
+
+        async def receive():
+            if not consumed:
+                consumed.append(1)
+                body = head + TestStreamingUploads.WAV
+            else:
+                consumed.append(1)
+                body = b"\x00" * 1024
+            return {"type": "http.request", "body": body, "more_body": True}
+
+        scope = {
+            "type": "http",
+            "method": "POST",
+            "headers": [(b"content-type", b"multipart/form-data; boundary=b")],
+        }
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(
+                _spool_request(
+                    Request(scope, receive), "audio", "a.wav", max_size_mb=0.01
+                )
+            )
+        assert exc.value.status_code == 413
+        assert len(consumed) <= 12
+
+    def test_pdf_upload_over_limit_is_413(self, client, tmp_path):
+        from agent import backend
+
+        settings = Mock(abs_cache_dir=tmp_path, pdf_max_size_mb=0.001)
+        with patch.object(backend, "get_settings", return_value=settings):
+            response = client.post(
+                "/api/upload/pdf", content=b"%PDF-1.7\n" + b"x" * 4096
+            )
+        assert response.status_code == 413
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -9,6 +9,7 @@ from unittest.mock import Mock, patch
 import pytest
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+from agent.chunking import Chunk
 from agent.embeddings import EmbeddingsManager
 from agent.indexing import VaultIndexer
 
@@ -27,6 +28,12 @@ def mock_embeddings_manager():
     mock_emb.add_documents = Mock()
     mock_emb.clear_collection = Mock()
     mock_emb.chunk_text = Mock(return_value=["chunk1", "chunk2"])
+    # Like EmbeddingsManager, one span per chunk_text chunk
+    mock_emb.chunk_spans = Mock(
+        side_effect=lambda text: [
+            Chunk(0, len(text), 1, 1) for _ in mock_emb.chunk_text(text)
+        ]
+    )
     return mock_emb
 
 
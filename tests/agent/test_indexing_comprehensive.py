@@ -47,12 +47,20 @@ def temp_vault_dir():
 @pytest.fixture
 def mock_embeddings_manager():
     """Mock EmbeddingsManager with all necessary methods."""
+    from agent.chunking import Chunk
+
     mock_emb = Mock()
     mock_emb.add_embedding = Mock()
     mock_emb.add_documents = Mock()
     mock_emb.clear_collection = Mock()
     mock_emb.reset_db = Mock()
     mock_emb.chunk_text = Mock(return_value=["chunk1", "chunk2", "chunk3"])
+    # Like EmbeddingsManager, one span per chunk_text chunk
+    mock_emb.chunk_spans = Mock(
+        side_effect=lambda text: [
+            Chunk(0, len(text), 1, 1) for _ in mock_emb.chunk_text(text)
+        ]
+    )
     mock_emb.index_file = Mock(return_value=3)
     return mock_emb
 
@@ -675,13 +683,20 @@ class TestPDFIndexing:
             emb_mgr=mock_embeddings_manager, cache_dir=temp_cache_dir
         )
 
-        pdf_path = str(Path(temp_cache_dir) / "document.pdf")
+        pdf_path = Path(temp_cache_dir) / "document.pdf"
+        pdf_path.write_bytes(b"%PDF")
+        mock_embeddings_manager.chunk_text.side_effect = lambda t: t.split()
+        pages = [(1, "alpha beta"), (2, ""), (3, "gamma")]
 
-        with patch.object(indexer, "_read_pdf", return_value="PDF content"):
-            result = indexer.index_pdf(pdf_path)
+        with patch.object(
+            indexer.pdf_extractor, "iter_pages", return_value=iter(pages)
+        ):
+            result = indexer.index_pdf(str(pdf_path))
 
-        assert result == 3  # Mock index_file returns 3
-        mock_embeddings_manager.index_file.assert_called_once()
+        assert result == 3
+        chunks, metadatas = mock_embeddings_manager.add_documents.call_args[0]
+        assert chunks == ["alpha", "beta", "gamma"]
+        assert [m["page"] for m in metadatas] == [1, 1, 3]
 
     def test_index_pdf_empty_text(self, temp_cache_dir, mock_embeddings_manager):
         """Test PDF indexing with empty extracted text."""
@@ -691,13 +706,16 @@ class TestPDFIndexing:
             emb_mgr=mock_embeddings_manager, cache_dir=temp_cache_dir
         )
 
-        pdf_path = str(Path(temp_cache_dir) / "empty.pdf")
+        pdf_path = Path(temp_cache_dir) / "empty.pdf"
+        pdf_path.write_bytes(b"%PDF")
 
-        with patch.object(indexer, "_read_pdf", return_value=""):
-            result = indexer.index_pdf(pdf_path)
+        with patch.object(
+            indexer.pdf_extractor, "iter_pages", return_value=iter([(1, "")])
+        ):
+            result = indexer.index_pdf(str(pdf_path))
 
         assert result == 0
-        mock_embeddings_manager.index_file.assert_not_called()
+        mock_embeddings_manager.add_documents.assert_not_called()
 
     def test_index_pdf_extraction_error(self, temp_cache_dir, mock_embeddings_manager):
         """Test PDF indexing with extraction error."""
@@ -707,12 +725,10 @@ class TestPDFIndexing:
             emb_mgr=mock_embeddings_manager, cache_dir=temp_cache_dir
         )
 
-        pdf_path = str(Path(temp_cache_dir) / "corrupt.pdf")
+        pdf_path = Path(temp_cache_dir) / "corrupt.pdf"
+        pdf_path.write_bytes(b"corrupt pdf content")
 
-        with patch.object(
-            indexer, "_read_pdf", side_effect=Exception("Extraction failed")
-        ):
-            result = indexer.index_pdf(pdf_path)
+        result = indexer.index_pdf(str(pdf_path))
 
         assert result == 0
 
@@ -0,0 +1,174 @@
+"""
+Tests for the shared inference worker.
+
+Tests cover:
+- Length-prefixed framing
+- End-to-end generation over a Unix domain socket with a fake backend
+- One model load shared by several routers (API workers)
+- Multiplexing concurrent requests on one connection
+- Cancellation and per-request deadlines
+- Routers degrading gracefully when the worker is unreachable
+"""
+
+import shutil
+import socket
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from agent.inference_worker import (
+    FakeBackend,
+    InferenceClient,
+    InferenceWorker,
+    InferenceWorkerError,
+    encode_frame,
+    fake_tokens,
+    recv_frame,
+)
+from agent.llm_router import HybridLLMRouter
+
+
+def wait_for(condition, timeout=5.0):
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def socket_dir():
+    # AF_UNIX paths are limited to ~100 bytes; pytest's tmp_path can be longer
+    path = tempfile.mkdtemp(prefix="llm-")
+    yield path
+    shutil.rmtree(path, ignore_errors=True)
+
+
+@pytest.fixture
+def worker(socket_dir):
+    backend = FakeBackend(tokens_per_second=500.0, load_seconds=0.05)
+    worker = InferenceWorker(f"{socket_dir}/worker.sock", backend).start()
+    yield worker
+    worker.stop()
+
+
+def test_frame_round_trip():
+    a, b = socket.socketpair()
+    with a, b:
+        a.sendall(encode_frame({"id": "1", "text": "héllo"}) + encode_frame({}))
+        assert recv_frame(b) == {"id": "1", "text": "héllo"}
+        assert recv_frame(b) == {}
+        a.close()
+        assert recv_frame(b) is None
+
+
+class TestInferenceWorker:
+    def test_generate_end_to_end(self, worker):
+        client = InferenceClient(worker.socket_path)
+        frames = list(client.stream("hello", model_path="m.gguf", max_tokens=5))
+
+        assert [f["text"] for f in frames[:-1]] == fake_tokens("hello", 5)
+        assert frames[-1]["type"] == "done"
+        assert frames[-1]["reason"] == "complete"
+        assert frames[-1]["text"] == "".join(fake_tokens("hello", 5))
+        client.close()
+
+    def test_routers_share_one_model_load(self, worker):
+        routers = [
+            HybridLLMRouter(
+                llama_model_path="shared.gguf",
+                session_memory=False,
+                worker_socket=worker.socket_path,
+            )
+            for _ in range(3)
+        ]
+        texts = [r.generate("summarize", max_tokens=4) for r in routers]
+
+        assert all(r.llama is None for r in routers)
+        assert set(texts) == {"".join(fake_tokens("summarize", 4)).strip()}
+        assert worker.backend.loads == 1
+        assert routers[0].get_available_models() == {"llama": True, "gpt4all": True}
+
+    def test_concurrent_requests_multiplexed(self, worker):
+        client = InferenceClient(worker.socket_path)
+        prompts = [f"prompt {i}" for i in range(12)]
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            texts = list(pool.map(lambda p: client.generate(p, max_tokens=6), prompts))
+
+        assert texts == ["".join(fake_tokens(p, 6)) for p in prompts]
+        assert client._sock is not None  # All requests shared one connection
+        client.close()
+
+    def test_cancel_stops_generation(self, worker):
+        worker.backend.tokens_per_second = 50.0
+        client = InferenceClient(worker.socket_path)
+        frames = client.stream("long answer", max_tokens=500)
+        assert next(frames)["type"] == "token"
+        frames.close()  # Caller stops reading: the client cancels
+
+        assert wait_for(lambda: worker.stats["cancelled"] == 1)
+        assert worker.stats["completed"] == 0
+        client.close()
+
+    def test_deadline(self, worker):
+        worker.backend.tokens_per_second = 50.0
+        client = InferenceClient(worker.socket_path)
+        start = time.monotonic()
+        with pytest.raises(TimeoutError):
+            client.generate("slow", max_tokens=500, timeout=0.2)
+
+        assert time.monotonic() - start < 2.0
+        client.close()
+
+    def test_deadline_counts_time_queued(self, socket_dir):
+        backend = FakeBackend(tokens_per_second=50.0, load_seconds=0.0)
+        worker = InferenceWorker(
+            f"{socket_dir}/worker.sock", backend, max_concurrency=1
+        ).start()
+        try:
+            client = InferenceClient(worker.socket_path)
+            blocker = client.stream("busy", max_tokens=500)
+            assert next(blocker)["type"] == "token"
+            # Queued behind the blocker for longer than its whole budget
+            threading.Timer(0.5, blocker.close).start()
+            frames = list(client.stream("queued", max_tokens=50, timeout=0.2))
+
+            assert [f["type"] for f in frames] == ["done"]
+            assert frames[0]["reason"] == "deadline"
+            client.close()
+        finally:
+            worker.stop()
+
+    def test_disconnect_cancels_in_flight(self, worker):
+        worker.backend.tokens_per_second = 50.0
+        client = InferenceClient(worker.socket_path)
+        started = threading.Event()
+
+        def consume():
+            try:
+                for _ in client.stream("abandoned", max_tokens=500):
+                    started.set()
+            except InferenceWorkerError:
+                pass
+
+        thread = threading.Thread(target=consume)
+        thread.start()
+        assert started.wait(5)
+        client.close()
+        thread.join(5)
+
+        assert wait_for(lambda: worker.stats["cancelled"] == 1)
+
+
+def test_router_without_worker(socket_dir):
+    client = InferenceClient(f"{socket_dir}/missing.sock")
+    with pytest.raises(InferenceWorkerError):
+        client.generate("hello")
+
+    router = HybridLLMRouter(worker_socket=f"{socket_dir}/missing.sock")
+    assert router.generate("hello") == "No model available."
+    assert router.get_available_models() == {"llama": False, "gpt4all": False}
@@ -0,0 +1,325 @@
+"""
+Tests for the durable background job system.
+
+Tests cover:
+- Submitting and completing reindex / scan_vault / index_pdf jobs
+- Progress counters, throughput and ETA
+- Deduplication of active jobs for the same target
+- Cancellation of queued and running jobs
+- Resuming interrupted jobs from the last committed file
+- Retrying failed files on resume
+"""
+
+import asyncio
+import threading
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+import pytest
+
+from agent.jobs import JobManager, JobStatus, JobStore
+from agent.performance import AsyncTaskQueue
+
+pytestmark = pytest.mark.asyncio
+
+
+class FakeIndexer:
+    """VaultIndexer double recording calls; optionally blocks per file"""
+
+    def __init__(self, gate: threading.Event = None, fail_on: str = None):
+        self.indexed = []
+        self.cleared = 0
+        self.gate = gate
+        self.fail_on = fail_on
+        self.started = threading.Event()
+
+    def list_vault_documents(self, vault_path):
+        return sorted(str(p) for p in Path(vault_path).rglob("*.md"))
+
+    def clear_index(self):
+        self.cleared += 1
+
+    def index_document(self, path):
+        self.started.set()
+        if self.gate is not None:
+            self.gate.wait(5)
+        if self.fail_on and path.endswith(self.fail_on):
+            raise ValueError("unreadable")
+        self.indexed.append(path)
+        return 2
+
+    def index_pdf(self, path):
+        self.indexed.append(path)
+        return 5
+
+
+@pytest.fixture
+def vault(tmp_path):
+    root = tmp_path / "vault"
+    (root / "sub").mkdir(parents=True)
+    for name in ["a.md", "b.md", "sub/c.md", "skip.txt"]:
+        (root / name).write_text(f"# {name}")
+    return root
+
+
+@pytest.fixture
+async def queue():
+    q = AsyncTaskQueue(max_workers=2)
+    await q.start()
+    yield q
+    await q.stop()
+
+
+def _manager(tmp_path, indexer, queue):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    return JobManager(lambda tenant_id: nullcontext(indexer), store, task_queue=queue)
+
+
+async def _wait_for(manager, job_id, statuses, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = manager.get(job_id)
+        if job["status"] in statuses:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"Job {job_id} stuck in {manager.get(job_id)['status']}")
+
+
+class TestJobExecution:
+    async def test_reindex_completes_with_progress(self, tmp_path, vault, queue):
+        indexer = FakeIndexer()
+        manager = _manager(tmp_path, indexer, queue)
+
+        job, created = await manager.submit("reindex", str(vault))
+        assert created
+        job = await _wait_for(manager, job["job_id"], {"completed"})
+
+        assert indexer.cleared == 1
+        assert len(indexer.indexed) == 3
+        assert job["result"] == {"files": 3, "chunks": 6, "failed_files": 0}
+        progress = job["progress"]
+        assert progress["files_total"] == 3
+        assert progress["files_done"] == 3
+        assert progress["percent"] == 100.0
+        assert progress["files_per_second"] > 0
+
+    async def test_failed_file_is_recorded_and_skipped(self, tmp_path, vault, queue):
+        indexer = FakeIndexer(fail_on="b.md")
+        manager = _manager(tmp_path, indexer, queue)
+
+        job, _ = await manager.submit("scan_vault", str(vault))
+        job = await _wait_for(manager, job["job_id"], {"completed"})
+
+        assert indexer.cleared == 0  # scan_vault never clears the collection
+        assert job["result"]["failed_files"] == 1
+        assert job["progress"]["files_failed"] == 1
+
+    async def test_index_pdf_job(self, tmp_path, queue):
+        pdf = tmp_path / "doc.pdf"
+        pdf.write_bytes(b"%PDF-1.7")
+        manager = _manager(tmp_path, FakeIndexer(), queue)
+
+        job, _ = await manager.submit("index_pdf", str(pdf))
+        job = await _wait_for(manager, job["job_id"], {"completed"})
+        assert job["result"]["chunks"] == 5
+
+    async def test_missing_vault_fails(self, tmp_path, queue):
+        manager = _manager(tmp_path, FakeIndexer(), queue)
+        job, _ = await manager.submit("reindex", str(tmp_path / "missing"))
+        job = await _wait_for(manager, job["job_id"], {"failed"})
+        assert "not found" in job["error"]
+
+    async def test_unknown_kind_rejected(self, tmp_path, queue):
+        manager = _manager(tmp_path, FakeIndexer(), queue)
+        with pytest.raises(ValueError):
+            await manager.submit("delete_everything", str(tmp_path))
+
+
+class TestDedupeAndCancel:
+    async def test_same_vault_is_deduplicated(self, tmp_path, vault, queue):
+        gate = threading.Event()
+        manager = _manager(tmp_path, FakeIndexer(gate=gate), queue)
+
+        first, created = await manager.submit("reindex", str(vault))
+        second, created_again = await manager.submit("reindex", str(vault) + "/")
+        gate.set()
+
+        assert created and not created_again
+        assert second["job_id"] == first["job_id"]
+        await _wait_for(manager, first["job_id"], {"completed"})
+
+        # A finished job no longer deduplicates new submissions
+        third, created = await manager.submit("reindex", str(vault))
+        assert created and third["job_id"] != first["job_id"]
+        gate.set()
+        await _wait_for(manager, third["job_id"], {"completed"})
+
+    async def test_cancel_running_job_stops_between_files(
+        self, tmp_path, vault, queue
+    ):
+        gate = threading.Event()
+        indexer = FakeIndexer(gate=gate)
+        manager = _manager(tmp_path, indexer, queue)
+
+        job, _ = await manager.submit("reindex", str(vault))
+        await asyncio.to_thread(indexer.started.wait, 5)
+        await manager.cancel(job["job_id"])
+        gate.set()
+
+        job = await _wait_for(manager, job["job_id"], {"cancelled"})
+        assert job["progress"]["files_done"] == 1
+        assert len(indexer.indexed) == 1
+
+    async def test_cancel_queued_job(self, tmp_path, vault):
+        idle_queue = AsyncTaskQueue(max_workers=1)  # Never started
+        manager = _manager(tmp_path, FakeIndexer(), idle_queue)
+
+        job, _ = await manager.submit("reindex", str(vault))
+        cancelled = await manager.cancel(job["job_id"])
+        assert cancelled["status"] == JobStatus.CANCELLED.value
+
+        # The queued coroutine is skipped when it eventually runs
+        await idle_queue.start()
+        await idle_queue.stop()
+        assert idle_queue.get_stats()["tasks_completed"] == 1
+        assert manager.get(job["job_id"])["status"] == JobStatus.CANCELLED.value
+
+    async def test_cancel_after_start_does_not_overwrite_running(
+        self, tmp_path, vault
+    ):
+        manager = _manager(tmp_path, FakeIndexer(), AsyncTaskQueue(max_workers=1))
+        job = manager.store.create("reindex", str(vault), "key")
+        assert manager.store.transition(job["job_id"], "queued", "running")
+        assert not manager.store.transition(job["job_id"], "queued", "running")
+
+        # cancel() lost the race with _run: it signals the run instead
+        cancelled = await manager.cancel(job["job_id"])
+        assert cancelled["status"] == JobStatus.RUNNING.value
+        assert manager._cancel_events[job["job_id"]].is_set()
+
+
+class TestResume:
+    async def test_interrupted_job_resumes_after_last_committed_file(
+        self, tmp_path, vault, queue
+    ):
+        # Simulate a crash: job left running with the first file committed
+        store = JobStore(str(tmp_path / "jobs.db"))
+        key = JobManager.dedupe_key("reindex", str(vault))
+        job = store.create("reindex", str(vault), key)
+        first = sorted(str(p) for p in vault.rglob("*.md"))[0]
+        store.update(job["job_id"], status="running", started_at=time.time())
+        store.commit_file(job["job_id"], first, 2)
+        store.close()
+
+        indexer = FakeIndexer()
+        manager = _manager(tmp_path, indexer, queue)
+        assert await manager.recover() == 1
+        job = await _wait_for(manager, job["job_id"], {"completed"})
+
+        assert first not in indexer.indexed
+        assert len(indexer.indexed) == 2
+        assert indexer.cleared == 0  # Resuming must not wipe committed work
+        assert job["result"] == {"files": 3, "chunks": 6, "failed_files": 0}
+
+    async def test_resume_cancelled_job(self, tmp_path, vault, queue):
+        gate = threading.Event()
+        indexer = FakeIndexer(gate=gate)
+        manager = _manager(tmp_path, indexer, queue)
+
+        job, _ = await manager.submit("scan_vault", str(vault))
+        await asyncio.to_thread(indexer.started.wait, 5)
+        await manager.cancel(job["job_id"])
+        gate.set()
+        await _wait_for(manager, job["job_id"], {"cancelled"})
+
+        resumed = await manager.resume(job["job_id"])
+        assert resumed["job_id"] == job["job_id"]
+        job = await _wait_for(manager, job["job_id"], {"completed"})
+        assert sorted(indexer.indexed) == sorted(set(indexer.indexed))
+        assert job["progress"]["files_done"] == 3
+
+    async def test_failed_files_are_retried_on_resume(self, tmp_path, vault, queue):
+        indexer = FakeIndexer(fail_on="b.md")
+        manager = _manager(tmp_path, indexer, queue)
+        job, _ = await manager.submit("scan_vault", str(vault))
+        await _wait_for(manager, job["job_id"], {"completed"})
+        assert list(manager.store.failed_files(job["job_id"]).values()) == [
+            "unreadable"
+        ]
+
+        indexer.fail_on = None
+        await manager.resume(job["job_id"])
+        job = await _wait_for(manager, job["job_id"], {"completed"})
+
+        assert sorted(indexer.indexed) == sorted(set(indexer.indexed))
+        assert len(indexer.indexed) == 3
+        assert manager.store.failed_files(job["job_id"]) == {}
+        assert job["result"] == {"files": 3, "chunks": 6, "failed_files": 0}
+        assert job["progress"]["files_done"] == 3
+
+    async def test_completed_job_cannot_be_resumed(self, tmp_path, vault, queue):
+        manager = _manager(tmp_path, FakeIndexer(), queue)
+        job, _ = await manager.submit("scan_vault", str(vault))
+        await _wait_for(manager, job["job_id"], {"completed"})
+        with pytest.raises(ValueError):
+            await manager.resume(job["job_id"])
+
+
+class TestDescribe:
+    def test_eta_from_current_run_throughput(self):
+        now = time.time()
+        job = {
+            "job_id": "j",
+            "kind": "reindex",
+            "target": "/v",
+            "status": "running",
+            "created_at": now - 20,
+            "started_at": now - 10,
+            "finished_at": None,
+            "files_total": 100,
+            "files_done": 60,
+            "files_failed": 0,
+            "chunks_done": 120,
+            "resumed_files": 40,
+            "resumed_chunks": 80,
+            "error": None,
+            "result": None,
+        }
+        progress = JobManager.describe(job)["progress"]
+        assert progress["files_per_second"] == pytest.approx(2.0, rel=0.05)
+        assert progress["chunks_per_second"] == pytest.approx(4.0, rel=0.05)
+        assert progress["eta_seconds"] == pytest.approx(20.0, rel=0.05)
+
+
+class TestJobEndpoints:
+    async def test_submit_poll_and_errors(self, tmp_path, vault, monkeypatch):
+        from httpx import ASGITransport, AsyncClient
+
+        from agent import backend
+
+        queue = AsyncTaskQueue(max_workers=1)
+        await queue.start()
+        manager = _manager(tmp_path, FakeIndexer(), queue)
+        monkeypatch.setattr(backend, "_job_manager", manager)
+        try:
+            transport = ASGITransport(app=backend.app)
+            async with AsyncClient(transport=transport, base_url="http://t") as client:
+                bad = await client.post("/api/jobs", json={"kind": "x", "target": "v"})
+                assert bad.status_code == 400
+
+                response = await client.post(
+                    "/api/reindex?background=true", json={"vault_path": str(vault)}
+                )
+                assert response.status_code == 200
+                job_id = response.json()["job"]["job_id"]
+                await _wait_for(manager, job_id, {"completed"})
+
+                job = (await client.get(f"/api/jobs/{job_id}")).json()
+                assert job["result"]["files"] == 3
+                listed = (await client.get("/api/jobs")).json()["jobs"]
+                assert [j["job_id"] for j in listed] == [job_id]
+                missing = await client.get("/api/jobs/nope")
+                assert missing.status_code == 404
+        finally:
+            await queue.stop()
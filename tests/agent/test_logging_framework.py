@@ -0,0 +1,245 @@
+"""
+Tests for the logging framework's PII redactor and asynchronous pipeline.
+
+Tests cover:
+- Single-pass redactor parity with per-pattern redaction
+- Queue overflow policies and drop counters
+- Batched writes from the listener thread
+- Shutdown flushing of queued records
+"""
+
+import json
+import logging
+import queue
+import shutil
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from agent.logging_framework import (
+    AsyncLogListener,
+    AsyncLogStats,
+    AsyncQueueHandler,
+    LogManager,
+    PIIRedactor,
+    StructuredFormatter,
+)
+
+# ============================================================================
+# Test Fixtures
+# ============================================================================
+
+
+@pytest.fixture
+def temp_log_dir():
+    """Create a temporary log directory"""
+    temp_dir = tempfile.mkdtemp()
+    yield Path(temp_dir)
+    shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+@pytest.fixture
+def preserve_logging():
+    """Restore global logger handlers mutated by LogManager setup"""
+    names = ["", "audit", "security", "performance"]
+    saved = {
+        name: (list(logging.getLogger(name).handlers), logging.getLogger(name).level)
+        for name in names
+    }
+    yield
+    for name, (handlers, level) in saved.items():
+        logger = logging.getLogger(name)
+        logger.handlers[:] = handlers
+        logger.setLevel(level)
+
+
+def _make_record(msg: str, level: int = logging.INFO) -> logging.LogRecord:
+    return logging.LogRecord("test", level, __file__, 1, msg, None, None)
+
+
+# ============================================================================
+# PII Redactor Tests
+# ============================================================================
+
+
+class TestPIIRedactor:
+    """Single-pass redactor must match sequential per-pattern redaction"""
+
+    @staticmethod
+    def _sequential(redactor: PIIRedactor, text: str) -> str:
+        for pii_type, pattern in redactor.pii_patterns.items():
+            replacement = r"\1: [REDACTED]" if pii_type == "password" else "[REDACTED]"
+            text = pattern.sub(replacement, text)
+        return text
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            "contact john.doe@example.com today",
+            "call 555-123-4567",
+            "ssn 123-45-6789",
+            "card 4111 1111 1111 1111",
+            "key abcdefghijklmnopqrstuvwxyz0123456789",
+            "token eyJhbGciOi.eyJzdWIi.abc-def",
+            "password=hunter2 ok",
+            "Password: 'secret'",
+            "from 192.168.1.10",
+            "path /home/user/file.txt",
+            "pwd:abc, user@x.io",
+            "nothing sensitive here",
+        ],
+    )
+    def test_matches_sequential_redaction(self, text):
+        redactor = PIIRedactor()
+        assert redactor.redact_pii(text) == self._sequential(redactor, text)
+
+    def test_redact_dict_nested(self):
+        redactor = PIIRedactor()
+        result = redactor.redact_dict(
+            {"user": {"email": "a@b.com"}, "tags": ["x@y.org", 3], "count": 2}
+        )
+        assert result == {
+            "user": {"email": "[REDACTED]"},
+            "tags": ["[REDACTED]", 3],
+            "count": 2,
+        }
+
+
+# ============================================================================
+# Async Pipeline Tests
+# ============================================================================
+
+
+class TestAsyncQueueHandler:
+    """Overflow policies and counters"""
+
+    def test_invalid_policy_rejected(self):
+        with pytest.raises(ValueError):
+            AsyncQueueHandler(queue.Queue(), "root", AsyncLogStats(), "bogus")
+
+    def test_drop_newest_counts_drops(self):
+        stats = AsyncLogStats()
+        handler = AsyncQueueHandler(
+            queue.Queue(maxsize=2), "root", stats, "drop_newest"
+        )
+        for i in range(5):
+            handler.handle(_make_record(f"msg {i}"))
+
+        snapshot = stats.snapshot()
+        assert snapshot["enqueued"] == 2
+        assert snapshot["dropped"] == 3
+        assert [r.msg for _, r in list(handler.queue.queue)] == ["msg 0", "msg 1"]
+
+    def test_drop_oldest_keeps_latest(self):
+        stats = AsyncLogStats()
+        handler = AsyncQueueHandler(
+            queue.Queue(maxsize=2), "root", stats, "drop_oldest"
+        )
+        for i in range(5):
+            handler.handle(_make_record(f"msg {i}"))
+
+        assert stats.snapshot()["dropped"] == 3
+        assert [r.msg for _, r in list(handler.queue.queue)] == ["msg 3", "msg 4"]
+
+    def test_errors_wait_before_drop(self):
+        stats = AsyncLogStats()
+        handler = AsyncQueueHandler(
+            queue.Queue(maxsize=1), "root", stats, "drop_newest", block_timeout=0.01
+        )
+        handler.handle(_make_record("first"))
+        handler.handle(_make_record("boom", logging.ERROR))
+
+        snapshot = stats.snapshot()
+        assert snapshot["blocked"] == 1
+        assert snapshot["dropped"] == 1
+
+    def test_prepare_freezes_message(self):
+        handler = AsyncQueueHandler(queue.Queue(), "root", AsyncLogStats())
+        record = logging.LogRecord("t", logging.INFO, __file__, 1, "a %s", ("b",), None)
+        prepared = handler.prepare(record)
+        assert prepared.msg == "a b"
+        assert prepared.args is None
+
+
+class TestAsyncLogListener:
+    """Batched dispatch to stream handlers"""
+
+    def test_batch_written_once_per_handler(self, temp_log_dir):
+        path = temp_log_dir / "batch.log"
+        file_handler = logging.FileHandler(path)
+        file_handler.setFormatter(StructuredFormatter())
+        stats = AsyncLogStats()
+        listener = AsyncLogListener(queue.Queue(), {"root": [file_handler]}, stats)
+
+        listener.write_batch([("root", _make_record(f"line {i}")) for i in range(10)])
+        file_handler.close()
+
+        lines = path.read_text().splitlines()
+        assert [json.loads(line)["message"] for line in lines] == [
+            f"line {i}" for i in range(10)
+        ]
+        assert stats.snapshot()["batches"] == 1
+        assert stats.snapshot()["written"] == 10
+
+    def test_routes_respect_handler_level(self, temp_log_dir):
+        info_handler = logging.FileHandler(temp_log_dir / "info.log")
+        error_handler = logging.FileHandler(temp_log_dir / "error.log")
+        error_handler.setLevel(logging.ERROR)
+        listener = AsyncLogListener(
+            queue.Queue(),
+            {"root": [info_handler, error_handler], "audit": []},
+            AsyncLogStats(),
+        )
+
+        listener.write_batch(
+            [
+                ("root", _make_record("ok")),
+                ("root", _make_record("bad", logging.ERROR)),
+            ]
+        )
+        info_handler.close()
+        error_handler.close()
+
+        assert (temp_log_dir / "info.log").read_text().splitlines() == ["ok", "bad"]
+        assert (temp_log_dir / "error.log").read_text().splitlines() == ["bad"]
+
+
+class TestLogManagerAsync:
+    """End-to-end async mode on LogManager"""
+
+    def test_async_mode_writes_and_reports_stats(self, temp_log_dir, preserve_logging):
+        manager = LogManager(
+            {
+                "log_dir": str(temp_log_dir),
+                "console_enabled": False,
+                "async_enabled": True,
+                "async_batch_size": 8,
+            }
+        )
+        try:
+            assert "root_queue" in manager.get_log_stats()["handlers"]
+            logger = logging.getLogger("tests.async")
+            for i in range(20):
+                logger.info("async %d", i)
+            manager.log_performance_metric("op", 0.5)
+        finally:
+            manager.shutdown()
+
+        app_lines = (temp_log_dir / "app.log").read_text().splitlines()
+        messages = [json.loads(line)["message"] for line in app_lines]
+        assert [m for m in messages if m.startswith("async")] == [
+            f"async {i}" for i in range(20)
+        ]
+        perf = (temp_log_dir / "performance.log").read_text()
+        assert "Performance: op" in perf
+
+        stats = manager.get_log_stats()["async"]
+        assert stats["running"] is False
+        assert stats["dropped"] == 0
+        assert stats["written"] >= 21
+
+    def test_sync_mode_has_no_async_stats(self, temp_log_dir, preserve_logging):
+        manager = LogManager({"log_dir": str(temp_log_dir), "console_enabled": False})
+        assert "async" not in manager.get_log_stats()
+        manager.shutdown()  # No-op without a listener
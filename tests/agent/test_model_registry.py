@@ -0,0 +1,123 @@
+"""
+Tests for the persisted model registry.
+
+Tests cover:
+- GGUF header parsing (architecture, context length, quantization,
+  parameter count) without reading weights
+- Non-GGUF and corrupt files recorded by format only
+- Incremental refresh: unchanged files reuse the saved entry, changed files
+  are re-read and removed files dropped
+- ModelManager listing local models and sizing the context from the registry
+"""
+
+import os
+import struct
+from unittest.mock import patch
+
+from agent.model_registry import ModelRegistry, read_gguf_metadata
+
+
+def _string(text):
+    data = text.encode("utf-8")
+    return struct.pack("<Q", len(data)) + data
+
+
+def write_gguf(path, context_length=8192, file_type=15, tensors=((4096, 32000),)):
+    kv = [
+        _string("general.architecture") + struct.pack("<I", 8) + _string("llama"),
+        _string("general.name") + struct.pack("<I", 8) + _string("Tiny Llama"),
+        _string("llama.context_length")
+        + struct.pack("<I", 4)
+        + struct.pack("<I", context_length),
+        _string("general.file_type")
+        + struct.pack("<I", 4)
+        + struct.pack("<I", file_type),
+        # Arrays are skipped: strings item by item, scalars in one seek
+        _string("tokenizer.ggml.tokens")
+        + struct.pack("<IIQ", 9, 8, 3)
+        + b"".join(_string(t) for t in ("<s>", "</s>", "hello")),
+        _string("tokenizer.ggml.scores")
+        + struct.pack("<IIQ", 9, 6, 3)
+        + struct.pack("<3f", 0.0, 0.0, -1.5),
+    ]
+    infos = []
+    for i, dims in enumerate(tensors):
+        infos.append(
+            _string(f"blk.{i}.weight")
+            + struct.pack("<I", len(dims))
+            + struct.pack(f"<{len(dims)}Q", *dims)
+            + struct.pack("<IQ", 12, 0)
+        )
+    header = b"GGUF" + struct.pack("<IQQ", 3, len(tensors), len(kv))
+    with open(path, "wb") as f:
+        f.write(header + b"".join(kv) + b"".join(infos) + b"\0" * 64)
+    return str(path)
+
+
+class TestGgufHeader:
+    def test_metadata(self, tmp_path):
+        path = write_gguf(tmp_path / "tiny.gguf", tensors=((4096, 32000), (4096,)))
+        meta = read_gguf_metadata(path)
+
+        assert meta["architecture"] == "llama"
+        assert meta["name"] == "Tiny Llama"
+        assert meta["context_length"] == 8192
+        assert meta["quantization"] == "Q4_K_M"
+        assert meta["parameter_count"] == 4096 * 32000 + 4096
+        assert meta["tensor_count"] == 2
+
+    def test_non_gguf_files(self, tmp_path):
+        (tmp_path / "old.bin").write_bytes(b"ggml weights")
+        (tmp_path / "broken.gguf").write_bytes(b"GGUF\x03\x00")
+        registry = ModelRegistry(str(tmp_path))
+        entries = {e["name"]: e for e in registry.refresh()}
+
+        assert entries["old.bin"]["metadata"] == {"format": "bin"}
+        assert entries["broken.gguf"]["metadata"] == {"format": "gguf"}
+
+
+class TestModelRegistry:
+    def test_incremental_refresh(self, tmp_path):
+        write_gguf(tmp_path / "a.gguf")
+        (tmp_path / "sub").mkdir()
+        write_gguf(tmp_path / "sub" / "b.gguf", context_length=2048)
+        (tmp_path / "notes.txt").write_text("not a model")
+        first = ModelRegistry(str(tmp_path))
+        assert sorted(e["name"] for e in first.refresh()) == ["a.gguf", "b.gguf"]
+        assert first.get_stats()["headers_read"] == 2
+
+        # A new instance starts from the saved registry
+        second = ModelRegistry(str(tmp_path))
+        assert len(second.entries()) == 2
+        with patch("agent.model_registry.read_model_metadata") as read:
+            second.refresh()
+        read.assert_not_called()
+        assert second.get("B")["metadata"]["context_length"] == 2048
+
+        write_gguf(tmp_path / "sub" / "b.gguf", context_length=16384)
+        os.utime(tmp_path / "sub" / "b.gguf", ns=(1, 1))
+        os.remove(tmp_path / "a.gguf")
+        entries = second.refresh()
+
+        assert [e["name"] for e in entries] == ["b.gguf"]
+        assert second.get("sub/b.gguf")["metadata"]["context_length"] == 16384
+        assert second.get_stats()["headers_read"] == 1
+
+
+class TestModelManagerRegistry:
+    def test_local_models_and_context_window(self, tmp_path):
+        from agent.modelmanager import ModelManager
+
+        write_gguf(tmp_path / "Tiny-Chat.gguf", context_length=32768)
+        write_gguf(tmp_path / "short.gguf", context_length=1024)
+        with patch("agent.modelmanager.load_dotenv"), patch(
+            "os.getenv", return_value=None
+        ), patch("agent.modelmanager.HybridLLMRouter"):
+            manager = ModelManager(models_dir=str(tmp_path), max_context=4096)
+
+        assert manager.available_models["tiny-chat"] == "local:Tiny-Chat.gguf"
+        assert manager.context_window("tiny-chat") == 4096
+        assert manager.context_window(str(tmp_path / "short.gguf")) == 1024
+        assert manager.context_window("unknown") == 2048
+        info = {m["name"]: m for m in manager.get_model_info()["local_models"]}
+        assert info["Tiny-Chat.gguf"]["metadata"]["architecture"] == "llama"
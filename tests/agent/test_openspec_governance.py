@@ -5,6 +5,7 @@ Tests cover:
 - OpenSpecChange class (parsing, validation, status)
 - OpenSpecGovernance class (listing, details, validation, application, archiving)
 - Bulk operations (bulk validation, metrics)
+- Governance index caching parsed metadata by file signature
 - Error handling and edge cases
 """
 
@@ -17,6 +18,7 @@ from unittest.mock import MagicMock, Mock, patch
 import pytest
 
 from agent.openspec_governance import (
+    GovernanceIndex,
     OpenSpecChange,
     OpenSpecGovernance,
     get_openspec_governance,
@@ -866,3 +868,68 @@ def test_bulk_validate_with_mixed_results(temp_openspec_dir):
     assert result["summary"]["total"] == 2
     assert result["summary"]["valid"] == 1
     assert result["summary"]["invalid"] == 1
+
+
+# ============================================================================
+# Governance Index Tests
+# ============================================================================
+
+
+def test_index_reuses_parse_until_file_changes(sample_change_dir):
+    """Unchanged files are served from the index; edited files are re-parsed"""
+    change_path, change_id = sample_change_dir
+    base_path = change_path.parent.parent.parent
+    index = GovernanceIndex()
+    change = OpenSpecChange(change_id, base_path, index)
+
+    with patch.object(
+        OpenSpecChange, "_parse_tasks", wraps=change._parse_tasks
+    ) as parse:
+        first = change.get_tasks()
+        first["total_tasks"] = -1  # Callers get copies, not the cached dict
+        second = change.get_tasks()
+        assert parse.call_count == 1
+        assert second["total_tasks"] != -1
+
+        (change_path / "tasks.md").write_text(
+            "- [x] Only task\n", encoding="utf-8"
+        )
+        third = change.get_tasks()
+        assert parse.call_count == 2
+
+    assert third["total_tasks"] == 1
+    assert index.get_stats()["hits"] == 1
+
+
+def test_index_does_not_cache_errors(temp_openspec_dir):
+    """Unreadable files keep returning errors and are retried"""
+    change_path = temp_openspec_dir / "openspec" / "changes" / "bad"
+    change_path.mkdir(parents=True)
+    (change_path / "proposal.md").write_bytes(b"\xff\xfe bad")
+    index = GovernanceIndex()
+    change = OpenSpecChange("bad", temp_openspec_dir, index)
+
+    assert "error" in change.get_proposal()
+    assert index.get_stats()["entries"] == 0
+
+    (change_path / "proposal.md").write_text("# Fixed", encoding="utf-8")
+    assert change.get_proposal()["title"] == "Fixed"
+
+
+def test_bulk_validate_parallel_matches_sequential(temp_openspec_dir):
+    """Concurrent bulk validation returns the same results as one worker"""
+    changes = temp_openspec_dir / "openspec" / "changes"
+    for i in range(12):
+        path = changes / f"change-{i:02d}"
+        path.mkdir()
+        if i % 3:
+            (path / "proposal.md").write_text(f"# Change {i}", encoding="utf-8")
+            (path / "tasks.md").write_text("- [ ] Task", encoding="utf-8")
+
+    parallel = OpenSpecGovernance(str(temp_openspec_dir), GovernanceIndex())
+    sequential = OpenSpecGovernance(
+        str(temp_openspec_dir), GovernanceIndex(), max_workers=1
+    )
+
+    assert parallel.bulk_validate() == sequential.bulk_validate()
+    assert parallel.bulk_validate()["summary"]["invalid"] == 4
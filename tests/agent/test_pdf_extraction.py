@@ -0,0 +1,122 @@
+"""
+Tests for page-parallel PDF extraction.
+
+Tests cover:
+- Page-by-page extraction in order, in-process and across a process pool
+- Per-page cache keyed by file digest (unchanged files are not re-extracted)
+- Re-extraction after the file changes and resuming partially cached files
+- VaultIndexer.index_pdf streaming pages into the embeddings manager
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from agent.pdf_extraction import PDFPageExtractor
+
+
+class FakePage:
+    def __init__(self, text):
+        self.text = text
+
+    def extract_text(self):
+        return self.text
+
+
+class FakePdfReader:
+    """Stands in for pypdf (mocked in this suite): pages split on form feeds"""
+
+    opened = 0
+
+    def __init__(self, path):
+        FakePdfReader.opened += 1
+        with open(path, encoding="utf-8") as f:
+            self.pages = [FakePage(t) for t in f.read().split("\f")]
+
+
+def make_pdf(path, texts):
+    path.write_text("\f".join(texts), encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture(autouse=True)
+def fake_reader():
+    FakePdfReader.opened = 0
+    with patch("agent.pdf_extraction.PdfReader", FakePdfReader):
+        yield FakePdfReader
+
+
+@pytest.fixture
+def pdf(tmp_path):
+    return make_pdf(tmp_path / "manual.pdf", [f"Section {i} body" for i in range(6)])
+
+
+class TestPDFPageExtractor:
+    def test_pages_in_order(self, pdf, tmp_path):
+        extractor = PDFPageExtractor(str(tmp_path / "cache"))
+        pages = list(extractor.iter_pages(pdf))
+
+        assert pages == [(i + 1, f"Section {i} body") for i in range(6)]
+        assert extractor.get_stats()["pages_extracted"] == 6
+
+    def test_process_pool_matches_serial(self, tmp_path):
+        texts = [f"Chapter {i} text" for i in range(40)]
+        path = make_pdf(tmp_path / "big.pdf", texts)
+        extractor = PDFPageExtractor(
+            str(tmp_path / "cache"), max_workers=2, pages_per_task=7
+        )
+
+        with patch("agent.pdf_extraction.ProcessPoolExecutor") as pool_cls:
+            from concurrent.futures import ProcessPoolExecutor
+
+            pool_cls.side_effect = ProcessPoolExecutor
+            pages = [text for _, text in extractor.iter_pages(path)]
+
+        assert pages == texts
+        pool_cls.assert_called_once_with(max_workers=2)
+
+    def test_unchanged_file_served_from_cache(self, pdf, tmp_path):
+        extractor = PDFPageExtractor(str(tmp_path / "cache"))
+        first = list(extractor.iter_pages(pdf))
+
+        FakePdfReader.opened = 0
+        second = list(extractor.iter_pages(pdf))
+        assert FakePdfReader.opened == 0
+
+        assert second == first
+        assert extractor.get_stats()["pages_cached"] == 6
+
+    def test_changed_file_is_re_extracted(self, pdf, tmp_path):
+        extractor = PDFPageExtractor(str(tmp_path / "cache"))
+        list(extractor.iter_pages(pdf))
+
+        make_pdf(tmp_path / "manual.pdf", ["Rewritten page"])
+        assert list(extractor.iter_pages(pdf)) == [(1, "Rewritten page")]
+
+    def test_resumes_partially_cached_file(self, pdf, tmp_path):
+        extractor = PDFPageExtractor(str(tmp_path / "cache"))
+        pages = extractor.iter_pages(pdf)
+        next(pages)
+        next(pages)
+        pages.close()  # Interrupted after two pages; no manifest written
+
+        list(extractor.iter_pages(pdf))
+        assert extractor.get_stats()["pages_extracted"] == 6
+        assert extractor.get_stats()["pages_cached"] == 2
+
+
+class TestVaultIndexerPdf:
+    def test_index_pdf_streams_pages(self, pdf, tmp_path):
+        from agent.indexing import VaultIndexer
+
+        emb = MagicMock()
+        emb.chunk_text.side_effect = lambda text: [text]
+        indexer = VaultIndexer(emb_mgr=emb, cache_dir=str(tmp_path / "cache"))
+
+        assert indexer.index_pdf(pdf) == 6
+        assert indexer.index_pdf(pdf) == 6  # Second run comes from the page cache
+
+        chunks, metadatas = emb.add_documents.call_args[0]
+        assert chunks[0] == "Section 0 body"
+        assert metadatas[5] == {"note_path": pdf, "page": 6}
+        assert indexer.pdf_extractor.get_stats()["pages_cached"] == 6
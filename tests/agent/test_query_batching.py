@@ -0,0 +1,146 @@
+"""
+Tests for query embedding caching and search micro-batching.
+
+Tests cover:
+- LRU cache keyed by model and normalized query text
+- Concurrent calls grouped into one batch, overflow into a following batch
+- Errors from the batch function reaching every caller
+- EmbeddingsManager.search encoding repeated queries once and answering
+  concurrent searches with one encode and one multi-query lookup
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+
+from agent.query_batching import MicroBatcher, QueryEmbeddingCache, normalize_query
+
+
+class TestQueryEmbeddingCache:
+    def test_normalized_lookup(self):
+        cache = QueryEmbeddingCache()
+        cache.put("m", "  cats   and\tdogs ", [1.0, 2.0])
+
+        assert normalize_query("cats and dogs\n") == "cats and dogs"
+        assert cache.get("m", "cats and dogs") == [1.0, 2.0]
+        assert cache.get("other-model", "cats and dogs") is None
+        assert cache.get_stats()["hits"] == 1
+
+    def test_lru_eviction(self):
+        cache = QueryEmbeddingCache(max_entries=2)
+        cache.put("m", "a", [1.0])
+        cache.put("m", "b", [2.0])
+        cache.get("m", "a")
+        cache.put("m", "c", [3.0])
+
+        assert cache.get("m", "b") is None
+        assert cache.get("m", "a") == [1.0]
+        assert cache.get_stats()["evictions"] == 1
+
+    def test_disabled(self):
+        cache = QueryEmbeddingCache(max_entries=0)
+        cache.put("m", "a", [1.0])
+        assert cache.get("m", "a") is None
+
+
+class TestMicroBatcher:
+    def test_concurrent_calls_share_a_batch(self):
+        batches = []
+        batcher = MicroBatcher(
+            lambda items: batches.append(list(items)) or [i * 2 for i in items],
+            window=5.0,
+            max_batch=4,
+        )
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(batcher, range(4)))
+
+        # A full batch is dispatched without waiting out the window
+        assert results == [0, 2, 4, 6]
+        assert len(batches) == 1
+        assert sorted(batches[0]) == [0, 1, 2, 3]
+
+    def test_overflow_runs_next_batch(self):
+        release = threading.Event()
+        batches = []
+
+        def fn(items):
+            batches.append(list(items))
+            release.wait(5)
+            return items
+
+        batcher = MicroBatcher(fn, window=0.0, max_batch=2)
+        with ThreadPoolExecutor(max_workers=5) as pool:
+            first = pool.submit(batcher, "first")
+            while not batches:
+                pass
+            rest = [pool.submit(batcher, i) for i in range(4)]
+            while batcher.get_stats()["calls"] < 5:
+                pass
+            release.set()
+            assert first.result() == "first"
+            assert sorted(f.result() for f in rest) == [0, 1, 2, 3]
+
+        # Calls queued behind the first batch were served two at a time
+        assert [len(b) for b in batches] == [1, 2, 2]
+
+    def test_errors_reach_every_caller(self):
+        def fn(items):
+            raise RuntimeError("encode failed")
+
+        batcher = MicroBatcher(fn, window=0.0)
+        with pytest.raises(RuntimeError):
+            batcher("q")
+
+
+def make_manager(window_ms=0.0):
+    from agent.embeddings import EmbeddingsManager
+
+    model = Mock()
+    model.encode.side_effect = lambda texts: np.array(
+        [[len(t), 1.0] for t in texts] if isinstance(texts, list) else [len(texts), 1.0]
+    )
+    mgr = EmbeddingsManager(model=model, search_batch_window_ms=window_ms)
+    mgr.chroma_client = Mock()
+    mgr.collection = Mock()
+    mgr.collection.query.side_effect = lambda query_embeddings, n_results: {
+        "documents": [[f"doc{i}" for i in range(n_results)] for _ in query_embeddings],
+        "metadatas": [
+            [{"note_path": f"{v[0]:.0f}.md"} for _ in range(n_results)]
+            for v in query_embeddings
+        ],
+    }
+    return mgr, model
+
+
+class TestEmbeddingsManagerSearch:
+    def test_repeated_query_encoded_once(self):
+        mgr, model = make_manager()
+
+        first = mgr.search("cats", top_k=2)
+        second = mgr.search(" cats ", top_k=2)
+
+        assert first == second == [
+            {"text": "doc0", "source": "4.md"},
+            {"text": "doc1", "source": "4.md"},
+        ]
+        model.encode.assert_called_once_with("cats")
+        assert mgr.get_search_stats()["query_cache"]["hits"] == 1
+
+    def test_concurrent_searches_batched(self):
+        mgr, model = make_manager(window_ms=200.0)
+        queries = [("a", 1), ("bb", 3), ("ccc", 2), ("bb", 1)]
+        mgr._search_batcher.max_batch = len(queries)
+
+        with ThreadPoolExecutor(max_workers=len(queries)) as pool:
+            results = list(pool.map(lambda q: mgr.search(*q), queries))
+
+        model.encode.assert_called_once()
+        assert sorted(model.encode.call_args[0][0]) == ["a", "bb", "ccc"]
+        mgr.collection.query.assert_called_once()
+        assert mgr.collection.query.call_args.kwargs["n_results"] == 3
+        assert [len(r) for r in results] == [1, 3, 2, 1]
+        assert results[1][0]["source"] == "2.md"
+        assert results[2][0]["source"] == "3.md"
@@ -0,0 +1,169 @@
+"""
+Tests for on-demand per-request profiling (X-Profile: 1).
+
+Tests cover:
+- Collapsed-stack and speedscope output from synthetic samples
+- Profile store listing, pruning and id validation
+- Middleware: admin-only, tagged with the request ID, one profile at a time
+- The /api/performance/profiles endpoints
+"""
+
+import asyncio
+import json
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from agent import request_profiler
+from agent.request_profiler import (
+    ProfileStore,
+    RequestProfilerMiddleware,
+    to_collapsed,
+    to_speedscope,
+)
+
+OUTER = ("handle", "/srv/app.py", 10)
+INNER = ("search", "/srv/index.py", 42)
+SAMPLES = {
+    "MainThread": [((OUTER, INNER), 0.002), ((OUTER, INNER), 0.003), ((OUTER,), 0.001)]
+}
+
+
+def _meta(profile_id, created="2026-01-01T00:00:00+00:00"):
+    return {
+        "profile_id": profile_id,
+        "request_id": "req-1",
+        "method": "GET",
+        "path": "/api/search",
+        "duration_ms": 6.0,
+        "created": created,
+    }
+
+
+def test_collapsed_stacks():
+    assert to_collapsed(SAMPLES) == (
+        "MainThread;handle (app.py:10) 1\n"
+        "MainThread;handle (app.py:10);search (index.py:42) 2\n"
+    )
+
+
+def test_speedscope_profile():
+    doc = to_speedscope(SAMPLES, "GET /api/search", duration=0.01)
+    names = [f["name"] for f in doc["shared"]["frames"]]
+    profile = doc["profiles"][0]
+
+    assert doc["$schema"] == request_profiler.SPEEDSCOPE_SCHEMA
+    assert names == ["handle", "search"]
+    assert profile["type"] == "sampled"
+    assert profile["samples"] == [[0, 1], [0, 1], [0]]
+    assert profile["weights"] == [0.002, 0.003, 0.001]
+    assert profile["endValue"] == 0.01
+
+
+def test_store_lists_and_prunes(tmp_path):
+    store = ProfileStore(str(tmp_path), max_profiles=2)
+    ids = ["0" * 15 + str(i) for i in range(3)]
+    for i, profile_id in enumerate(ids):
+        store.save(_meta(profile_id, f"2026-01-01T00:00:0{i}+00:00"), SAMPLES)
+        time.sleep(0.01)  # Distinct mtimes for pruning
+
+    assert [m["profile_id"] for m in store.list()] == [ids[2], ids[1]]
+    assert store.path(ids[0]) is None
+    assert json.loads(store.path(ids[2]).read_text())["profiles"]
+    assert "search (index.py:42)" in store.path(ids[2], "collapsed").read_text()
+    assert store.path("../../etc/passwd") is None
+
+
+def _app(store, authorize, handler_delay=0.05):
+    app = FastAPI()
+
+    @app.get("/work")
+    async def work():
+        await asyncio.sleep(handler_delay)
+        return {"ok": True}
+
+    async def tracer(scope, receive, send):
+        # Stands in for RequestTracingMiddleware inside the profiler
+        scope.setdefault("state", {})["trace_context"] = {"request_id": "trace-123"}
+        await app(scope, receive, send)
+
+    return RequestProfilerMiddleware(tracer, authorize=authorize, store=store)
+
+
+async def _get(app, headers=None):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+        return await c.get("/work", headers=headers or {})
+
+
+class TestRequestProfilerMiddleware:
+    def test_profiles_admin_request(self, tmp_path):
+        store = ProfileStore(str(tmp_path))
+        app = _app(store, authorize=lambda request: True)
+        response = asyncio.run(_get(app, {"X-Profile": "1"}))
+
+        assert response.status_code == 200
+        (meta,) = store.list()
+        assert response.headers["x-profile-id"] == meta["profile_id"]
+        assert meta["request_id"] == "trace-123"
+        assert meta["status_code"] == 200
+        assert meta["duration_ms"] >= 50
+        assert store.path(meta["profile_id"]) is not None
+
+    def test_unprofiled_requests(self, tmp_path):
+        store = ProfileStore(str(tmp_path))
+        allowed = _app(store, authorize=lambda request: True)
+        denied = _app(store, authorize=lambda request: False)
+
+        assert "x-profile-id" not in asyncio.run(_get(allowed)).headers
+        response = asyncio.run(_get(denied, {"X-Profile": "1"}))
+        assert response.status_code == 200
+        assert "x-profile-id" not in response.headers
+        assert store.list() == []
+
+    def test_one_profile_at_a_time(self, tmp_path):
+        store = ProfileStore(str(tmp_path))
+        app = _app(store, authorize=lambda request: True, handler_delay=0.2)
+
+        async def both():
+            first = asyncio.create_task(_get(app, {"X-Profile": "1"}))
+            await asyncio.sleep(0.05)
+            return await asyncio.gather(first, _get(app, {"X-Profile": "1"}))
+
+        first, second = asyncio.run(both())
+        assert "x-profile-id" in first.headers
+        assert second.headers["x-profile"] == "busy"
+        assert second.status_code == 200
+        assert len(store.list()) == 1
+
+
+def test_profiles_endpoints(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import agent.backend as backend
+
+    monkeypatch.setenv("TEST_MODE", "1")
+    store = ProfileStore(str(tmp_path))
+    store.save(_meta("abcdef0123456789"), SAMPLES)
+    monkeypatch.setattr(request_profiler, "_profile_store", store)
+    client = TestClient(backend.app)
+
+    listing = client.get("/api/performance/profiles")
+    assert listing.status_code == 200
+    assert listing.json()["profiles"][0]["profile_id"] == "abcdef0123456789"
+
+    doc = client.get("/api/performance/profiles/abcdef0123456789")
+    assert doc.status_code == 200
+    assert doc.json()["profiles"][0]["type"] == "sampled"
+    folded = client.get(
+        "/api/performance/profiles/abcdef0123456789", params={"format": "collapsed"}
+    )
+    assert folded.text.startswith("MainThread;")
+    assert client.get("/api/performance/profiles/0000000000000000").status_code == 404
+    assert (
+        client.get(
+            "/api/performance/profiles/abcdef0123456789", params={"format": "svg"}
+        ).status_code
+        == 400
+    )
@@ -16,7 +16,7 @@ enabled as the implementation is completed.
 """
 
 import json
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from unittest.mock import AsyncMock, MagicMock, Mock, patch
 
 import pytest
@@ -124,6 +124,87 @@ def test_threat_detector_suspicious_user_agent():
     assert threat_score >= 0.0
 
 
+def _legacy_pattern_hits(detector, text):
+    """Per-regex reference used before the prefiltered scanner"""
+    import re
+
+    return sorted(
+        threat_type
+        for threat_type, patterns in detector.threat_patterns.items()
+        for pattern in patterns
+        if re.search(pattern, text, re.IGNORECASE)
+    )
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        '{"data": "normal"}',
+        "SELECT * FROM users WHERE id=1 OR 1=1",
+        "1 UNION ALL SELECT password",
+        "<script>alert(1)</script><IFRAME src=x>",
+        "<img src=x onerror=alert(1)>",
+        "../../etc/passwd and ..\\windows and %2E%2E%2F",
+        "; rm -rf / ; cat /etc/passwd ; curl http://x",
+        "drop the table, insert into, update then set",
+        "\u017fELECT x FROM t WHERE y",  # long s case-folds to "s"
+        "\u0130NSERT INTO x",  # dotted capital I folds to "i" + combining dot
+        "UN\u0130ON SELECT",
+        "DELETE FROM \u212a",  # Kelvin sign next to otherwise ASCII hits
+        "r\u00e9sum\u00e9 ; curl http://x",
+        "",
+    ],
+)
+def test_threat_scanner_matches_legacy_loop(text):
+    """Prefiltered scanner reports exactly the per-regex hits"""
+    detector = ThreatDetector()
+    assert sorted(detector.scanner.scan(text)) == _legacy_pattern_hits(detector, text)
+
+
+def test_threat_scanner_scan_many_per_value_hits():
+    """Header values are prefiltered together but scored individually"""
+    detector = ThreatDetector()
+    values = ["javascript:alert(1)", "normal", "javascript:void(0)"]
+    hits = detector.scanner.scan_many(values)
+    assert hits == ["xss_patterns", "xss_patterns"]
+    assert detector.scanner.scan_many(["caf\u00e9", "UN\u0130ON SELECT"]) == [
+        "sql_injection"
+    ]
+
+
+def test_threat_scanner_caps_scanned_input():
+    """Content beyond the scan cap is not inspected"""
+    detector = ThreatDetector()
+    detector.scanner.max_scan_chars = 64
+    assert detector.scanner.scan("a" * 64 + "<script>") == []
+    assert detector.scanner.scan("<script>" + "a" * 64) == ["xss_patterns"]
+
+
+def test_threat_detector_scores_per_pattern():
+    """Scores match the legacy weighting of path, header and body hits"""
+    detector = ThreatDetector()
+
+    request = Mock(spec=Request)
+    request.url.path = "/api/../secret"
+    request.method = "POST"
+    request.headers = Headers({"user-agent": "Mozilla/5.0", "referer": "javascript:x"})
+    request.client.host = "203.0.113.5"
+
+    context = SecurityContext(request)
+    body = '{"q": "<script>x</script> UNION SELECT 1"}'
+    with patch.object(detector, "_analyze_behavior", return_value=0.0):
+        score = detector.analyze_request(context, body)
+
+    # path: 1 traversal pattern (5), header: 1 xss (3), body: 1 xss + 1 sql (14)
+    assert score == 22.0
+    assert {
+        "pattern_path_traversal_path",
+        "pattern_xss_patterns_header",
+        "pattern_xss_patterns_body",
+        "pattern_sql_injection_body",
+    } <= context.security_flags
+
+
 # ============================================================================
 # APIKeyManager Tests - SKIPPED (Implementation API mismatch)
 # ============================================================================
@@ -385,6 +466,80 @@ def test_session_manager_ip_mismatch():
     # Adjust assertion based on actual security policy
 
 
+def test_session_manager_evicts_oldest_per_user():
+    """Per-user index evicts the oldest session without scanning others"""
+    manager = SessionManager()
+    manager.max_sessions_per_user = 2
+    for i in range(3):
+        manager.create_session(f"other{i}", "10.0.0.1", "Mozilla/5.0")
+
+    first = manager.create_session("alice", "10.0.0.2", "Mozilla/5.0")
+    second = manager.create_session("alice", "10.0.0.2", "Mozilla/5.0")
+    third = manager.create_session("alice", "10.0.0.2", "Mozilla/5.0")
+
+    assert first not in manager.active_sessions
+    assert list(manager.store.user_index["alice"]) == [second, third]
+    assert manager.session_history["alice"][-1]["termination_reason"] == (
+        "max_sessions_exceeded"
+    )
+    assert manager.active_user_count() == 4
+
+
+def test_session_manager_cleanup_uses_expiry_heap():
+    """Cleanup expires only due sessions and honours recent activity"""
+    manager = SessionManager()
+    idle = manager.create_session("bob", "10.0.0.3", "Mozilla/5.0")
+    active = manager.create_session("bob", "10.0.0.3", "Mozilla/5.0")
+
+    past = datetime.now(timezone.utc) - timedelta(hours=3)
+    for session_id in (idle, active):
+        manager.active_sessions[session_id]["last_activity"] = past
+    manager.store.reschedule_all()
+    # Activity after scheduling must be picked up lazily
+    manager.active_sessions[active]["last_activity"] = datetime.now(timezone.utc)
+
+    manager.cleanup_expired_sessions()
+
+    assert idle not in manager.active_sessions
+    assert active in manager.active_sessions
+    assert list(manager.store.user_index["bob"]) == [active]
+
+
+def test_session_manager_timeout_change_reschedules():
+    """Shortening the absolute timeout takes effect on the next cleanup"""
+    manager = SessionManager()
+    session_id = manager.create_session("carol", "10.0.0.4", "Mozilla/5.0")
+    manager.active_sessions[session_id]["created_at"] -= timedelta(hours=2)
+
+    manager.session_timeout = timedelta(hours=1)
+    manager.cleanup_expired_sessions()
+
+    assert session_id not in manager.active_sessions
+    assert "carol" not in manager.store.user_index
+
+
+def test_session_store_sqlite_persistence(tmp_path):
+    """Sessions survive a restart; expired rows are dropped on load"""
+    db_path = str(tmp_path / "sessions.db")
+    manager = SessionManager(db_path=db_path)
+    live = manager.create_session("dave", "10.0.0.5", "Mozilla/5.0")
+    stale = manager.create_session("erin", "10.0.0.6", "Mozilla/5.0")
+    manager.validate_session(live, "10.0.0.5", "Mozilla/5.0")
+    manager.active_sessions[stale]["last_activity"] -= timedelta(hours=3)
+    manager.store.touch(stale)
+    manager.store.close()
+
+    restored = SessionManager(db_path=db_path)
+    try:
+        assert set(restored.active_sessions) == {live}
+        session = restored.active_sessions[live]
+        assert session["user_id"] == "dave"
+        assert session["activity_count"] == 2
+        assert restored.validate_session(live, "10.0.0.5", "Mozilla/5.0") is not None
+    finally:
+        restored.store.close()
+
+
 # ============================================================================
 # RequestSigner Tests - SKIPPED (secret_key parameter not supported)
 # ============================================================================
@@ -0,0 +1,218 @@
+"""
+Tests for single-flight request coalescing and stale-while-revalidate.
+
+Tests cover:
+- One execution per key for concurrent thread and async callers
+- Shared errors, and retries when the leader is cancelled
+- Coalesced asks, embeddings and web page fetches
+- cached(): single-flight misses and background refresh of stale entries
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from agent import performance
+from agent.single_flight import SingleFlight
+
+
+class SlowCounter:
+    def __init__(self, delay=0.1):
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, value):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return f"result {value} #{self.calls}"
+
+    async def run_async(self, value):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return f"result {value} #{self.calls}"
+
+
+def test_threads_share_one_call():
+    flights, work = SingleFlight(), SlowCounter()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: flights.do("k", work, "a"), range(8)))
+
+    assert work.calls == 1
+    assert set(results) == {"result a #1"}
+    assert flights.get_stats() == {
+        "calls": 8,
+        "executions": 1,
+        "shared": 7,
+        "in_flight": 0,
+    }
+    # Landed flights are forgotten: the next call runs again
+    assert flights.do("k", work, "a") == "result a #2"
+
+
+def test_errors_are_shared():
+    flights = SingleFlight()
+    calls = []
+
+    def fail():
+        calls.append(1)
+        time.sleep(0.1)
+        raise ValueError("model unavailable")
+
+    def call(_):
+        with pytest.raises(ValueError, match="model unavailable"):
+            flights.do("k", fail)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(call, range(4)))
+    assert len(calls) == 1
+
+
+def test_async_and_thread_callers_coalesce():
+    flights, work = SingleFlight(), SlowCounter(delay=0.2)
+
+    async def main():
+        leader = asyncio.ensure_future(flights.do_async("k", work.run_async, "a"))
+        await asyncio.sleep(0.05)
+        from_thread = asyncio.to_thread(flights.do, "k", work, "a")
+        others = [flights.do_async("k", work.run_async, "a") for _ in range(3)]
+        return await asyncio.gather(leader, from_thread, *others)
+
+    assert asyncio.run(main()) == ["result a #1"] * 5
+    assert work.calls == 1
+
+
+def test_cancelled_leader_hands_over():
+    flights, work = SingleFlight(), SlowCounter(delay=0.2)
+
+    async def main():
+        leader = asyncio.ensure_future(flights.do_async("k", work.run_async, "a"))
+        await asyncio.sleep(0.05)
+        follower = asyncio.ensure_future(flights.do_async("k", work.run_async, "a"))
+        await asyncio.sleep(0.05)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(main()) == "result a #2"
+    assert work.calls == 2
+
+
+def test_identical_asks_coalesce(monkeypatch):
+    import agent.backend as backend
+
+    work = SlowCounter()
+    monkeypatch.setattr(
+        backend, "_ask_impl", lambda request, tenant: {"answer": work(request.question)}
+    )
+
+    async def main():
+        asks = [backend.AskRequest(question=q) for q in ("a", "a", "a", "b")]
+        return await asyncio.gather(*(backend._ask_coalesced(r) for r in asks))
+
+    results = asyncio.run(main())
+    assert work.calls == 2
+    assert results[0] == results[1] == results[2]
+    assert results[3]["answer"].startswith("result b")
+
+
+def test_embedding_coalesced(tmp_path):
+    from agent.embeddings import EmbeddingsManager
+
+    class SlowModel:
+        calls = 0
+
+        def encode(self, text):
+            SlowModel.calls += 1
+            time.sleep(0.1)
+            return np.ones(4)
+
+    manager = EmbeddingsManager(
+        db_path=str(tmp_path), model=SlowModel(), vector_db="numpy"
+    )
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        vectors = list(pool.map(lambda _: manager.compute_embedding("note"), range(4)))
+
+    assert SlowModel.calls == 1
+    assert vectors == [[1.0] * 4] * 4
+    manager.close()
+
+
+def test_web_page_fetch_coalesced(tmp_path, monkeypatch):
+    from agent.indexing import VaultIndexer
+
+    indexer = VaultIndexer(emb_mgr=object(), cache_dir=str(tmp_path))
+    work = SlowCounter()
+    monkeypatch.setattr(indexer, "_fetch_web_page", lambda url, force: work(url))
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        texts = list(
+            pool.map(lambda _: indexer.fetch_web_page("https://a.test"), range(4))
+        )
+
+    assert work.calls == 1
+    assert set(texts) == {"result https://a.test #1"}
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = performance.MultiLevelCache(cache_dir=str(tmp_path))
+    monkeypatch.setattr(performance, "_cache_manager", cache)
+    return cache
+
+
+class TestCachedDecorator:
+    def test_concurrent_misses_run_once(self, cache):
+        work = SlowCounter()
+
+        @performance.cached(ttl=60)
+        def lookup(value):
+            return work(value)
+
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            results = list(pool.map(lambda _: lookup("q"), range(6)))
+        assert work.calls == 1
+        assert set(results) == {"result q #1"}
+        assert lookup("q") == "result q #1"
+
+    def test_stale_while_revalidate_sync(self, cache):
+        work = SlowCounter(delay=0.05)
+
+        @performance.cached(ttl=1, stale_while_revalidate=60)
+        def lookup(value):
+            return work(value)
+
+        assert lookup("q") == "result q #1"
+        time.sleep(1.1)
+        # Stale: served at once while one background call refreshes it
+        assert [lookup("q") for _ in range(5)] == ["result q #1"] * 5
+        deadline = time.monotonic() + 5
+        while lookup("q") != "result q #2" and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert lookup("q") == "result q #2"
+        assert work.calls == 2
+
+    def test_stale_while_revalidate_async(self, cache):
+        work = SlowCounter(delay=0.05)
+
+        @performance.cached(ttl=1, stale_while_revalidate=60)
+        async def lookup(value):
+            return await work.run_async(value)
+
+        async def main():
+            first = await lookup("q")
+            await asyncio.sleep(1.1)
+            stale = await asyncio.gather(*(lookup("q") for _ in range(5)))
+            await asyncio.sleep(0.2)
+            return first, stale, await lookup("q")
+
+        first, stale, refreshed = asyncio.run(main())
+        assert first == "result q #1"
+        assert stale == ["result q #1"] * 5
+        assert refreshed == "result q #2"
+        assert work.calls == 2
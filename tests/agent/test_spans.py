@@ -0,0 +1,196 @@
+"""
+Tests for phase-level spans (agent.spans).
+
+Tests cover:
+- Nesting, attributes and error status
+- Ring buffer bounds and child-only decorators
+- Context propagation into asyncio.to_thread
+- OTLP-JSON encoding and export
+- Phase spans under a request's root span (search, ask, LLM router)
+"""
+
+import asyncio
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from agent import spans
+from agent.spans import SpanTracer, current_span, start_span, traced
+
+
+@pytest.fixture
+def tracer(monkeypatch):
+    tracer = SpanTracer(max_traces=8)
+    monkeypatch.setattr(spans, "_tracer", tracer)
+    return tracer
+
+
+@traced("phase")
+def _phase(value):
+    current_span().set_attribute("phase.value", value)
+    return value
+
+
+def test_nested_spans(tracer):
+    with tracer.start_span("GET /x", {"request.id": "r1"}, kind="SERVER") as root:
+        assert _phase(3) == 3
+        with start_span("inner") as inner:
+            inner.set_attributes({"n": 1, "skipped": None})
+
+    spans_ = tracer.get_trace(root.trace_id)
+    assert [s.name for s in spans_] == ["GET /x", "phase", "inner"]
+    assert all(s.parent_span_id == root.span_id for s in spans_[1:])
+    assert spans_[1].attributes == {"phase.value": 3}
+    assert spans_[2].attributes == {"n": 1}
+    (summary,) = tracer.recent()
+    assert summary["request_id"] == "r1"
+    assert set(summary["phases_ms"]) == {"phase", "inner"}
+
+
+def test_exception_marks_span(tracer):
+    with pytest.raises(ValueError):
+        with tracer.start_span("root") as root:
+            raise ValueError("boom")
+
+    (span,) = tracer.get_trace(root.trace_id)
+    assert span.status == "ERROR"
+    assert span.events[0]["attributes"]["exception.type"] == "ValueError"
+
+
+def test_child_only_outside_trace(tracer):
+    assert _phase(1) == 1
+    with start_span("orphan") as span:
+        assert span is spans.NON_RECORDING_SPAN
+    assert tracer.recent() == []
+
+
+def test_ring_buffer_bounds(tracer):
+    tracer.max_spans_per_trace = 3
+    for i in range(10):
+        with tracer.start_span(f"root {i}"):
+            for _ in range(4):
+                _phase(i)
+
+    recent = tracer.recent(limit=100)
+    assert len(recent) == 8
+    assert recent[0]["name"] == "root 9"
+    assert tracer.stats["evicted_traces"] == 2
+    assert tracer.stats["dropped_spans"] == 10  # The fourth phase of each trace
+    assert len(tracer.get_trace(recent[0]["trace_id"])) == 4
+
+
+def test_disabled_tracer(monkeypatch):
+    tracer = SpanTracer(max_traces=0)
+    monkeypatch.setattr(spans, "_tracer", tracer)
+    with tracer.start_span("root") as root:
+        assert _phase(2) == 2
+    assert root is spans.NON_RECORDING_SPAN
+    assert tracer.stats["spans"] == 0
+
+
+def test_context_reaches_threads(tracer):
+    async def handler():
+        with tracer.start_span("request") as root:
+            await asyncio.to_thread(_phase, 5)
+        return root
+
+    root = asyncio.run(handler())
+    assert [s.name for s in tracer.get_trace(root.trace_id)] == ["request", "phase"]
+
+
+def test_otlp_export(tracer, tmp_path):
+    with tracer.start_span("root", kind="SERVER") as root:
+        _phase(7)
+        current_span().set_attributes({"ok": True, "ratio": 0.5, "tags": ["a"]})
+
+    path = tmp_path / "traces" / "otlp.json"
+    assert tracer.export_otlp(str(path)) == 2
+    doc = json.loads(path.read_text())
+    (resource,) = doc["resourceSpans"]
+    (scope,) = resource["scopeSpans"]
+    server, phase = sorted(scope["spans"], key=lambda s: "parentSpanId" in s)
+
+    assert scope["scope"]["name"] == "agent.spans"
+    assert server["traceId"] == root.trace_id and len(server["traceId"]) == 32
+    assert server["kind"] == 2
+    assert phase["parentSpanId"] == server["spanId"]
+    assert int(phase["endTimeUnixNano"]) >= int(phase["startTimeUnixNano"])
+    attributes = {a["key"]: a["value"] for a in server["attributes"]}
+    assert attributes == {
+        "ok": {"boolValue": True},
+        "ratio": {"doubleValue": 0.5},
+        "tags": {"arrayValue": {"values": [{"stringValue": "a"}]}},
+    }
+    assert phase["attributes"] == [{"key": "phase.value", "value": {"intValue": "7"}}]
+
+
+def test_llm_router_spans(tracer):
+    from agent.llm_router import HybridLLMRouter
+
+    router = HybridLLMRouter(session_memory=False)
+    router.llama = MagicMock(
+        return_value={
+            "choices": [{"text": " answer "}],
+            "usage": {"prompt_tokens": 12, "completion_tokens": 3},
+        },
+        side_effect=None,
+    )
+    router.choose_model = MagicMock(return_value="llama")
+    with tracer.start_span("root") as root:
+        assert router.generate("question", max_tokens=8) == "answer"
+
+    generate = tracer.get_trace(root.trace_id)[1]
+    assert generate.name == "llm.generate"
+    assert generate.attributes["llm.model"] == "llama"
+    assert generate.attributes["llm.tokens_in"] == 12
+    assert generate.attributes["llm.tokens_out"] == 3
+    assert "llm.tokens_estimated" not in generate.attributes
+
+
+def test_cache_tier_attribute(tracer, tmp_path):
+    from agent.performance import MultiLevelCache
+
+    cache = MultiLevelCache(cache_dir=str(tmp_path), enable_prediction=False)
+    cache.set("answer", "42")
+    with tracer.start_span("root") as root:
+        with start_span("hit"):
+            cache.get("answer")
+        with start_span("miss"):
+            cache.get("missing")
+
+    spans_ = tracer.get_trace(root.trace_id)
+    tiers = {s.name: s.attributes.get("cache.tier") for s in spans_}
+    assert tiers == {"root": None, "hit": "l1", "miss": "miss"}
+
+
+def test_request_phases(tracer, tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import agent.backend as backend
+    from agent import bench
+
+    monkeypatch.setenv("TEST_MODE", "1")
+    with bench.stand_in_services(tmp_path, llm_latency_ms=1, notes=3, seed=1):
+        bench.authorize_bench_token()
+        client = TestClient(
+            backend.app, headers={"Authorization": f"Bearer {bench.BENCH_TOKEN}"}
+        )
+        assert client.post("/api/search", params={"query": "vector"}).status_code == 200
+        assert client.post("/api/ask", json={"question": "cache"}).status_code == 200
+
+    by_name = {t["name"]: t for t in tracer.recent()}
+    search = by_name["POST /api/search"]
+    assert {"embeddings.search", "embeddings.embed_queries", "vector.query"} <= set(
+        search["phases_ms"]
+    )
+    assert search["request_id"]
+
+    ask = tracer.get_trace(by_name["POST /api/ask"]["trace_id"])
+    names = [s.name for s in ask]
+    assert names[0] == "POST /api/ask"
+    assert {"ask", "cache.get", "cache.set"} <= set(names)
+    lookup = next(s for s in ask if s.name == "cache.get")
+    assert lookup.attributes["cache.hit"] is False
+    assert lookup.attributes["cache.provider"] == "multi_level"
+    assert next(s for s in ask if s.name == "ask").attributes["ask.cache_hit"] is False
@@ -0,0 +1,113 @@
+"""
+Tests for lazy imports and the backend import-time budget.
+
+Tests cover:
+- Lazy module/attribute stand-ins (deferred import, falsy when missing,
+  patching through the stand-in)
+- Importing agent.backend in a fresh interpreter without loading heavy
+  optional dependencies, within an import-time budget
+- Dependency bootstrap locating packages by import name instead of importing
+- Parsing ``-X importtime`` output for start_server.py --profile-startup
+"""
+
+import os
+import subprocess
+import sys
+from unittest.mock import patch
+
+import pytest
+
+from agent.lazy_imports import LazyAttribute, LazyModule, module_available
+from agent.startup_profile import PROJECT_ROOT, parse_importtime
+
+# Optional subsystems that must only load when first used
+HEAVY_MODULES = [
+    "sentence_transformers",
+    "chromadb",
+    "torch",
+    "transformers",
+    "llama_cpp",
+    "gpt4all",
+    "pypdf",
+    "readability",
+    "bs4",
+    "huggingface_hub",
+]
+IMPORT_BUDGET_SECONDS = float(os.getenv("IMPORT_TIME_BUDGET_S", "8"))
+
+
+class TestLazyImports:
+    def test_module_imported_on_first_access(self):
+        lazy = LazyModule("json")
+        assert object.__getattribute__(lazy, "_target") is not None
+        assert lazy.dumps({"a": 1}) == '{"a": 1}'
+        assert lazy
+
+    def test_missing_module_is_falsy(self):
+        lazy = LazyAttribute("no_such_package_xyz", "Thing")
+        assert not lazy
+        with pytest.raises(ImportError):
+            lazy()
+        assert not module_available("no_such_package_xyz")
+        assert module_available("json")
+
+    def test_patch_through_stand_in(self):
+        import agent.indexing
+
+        with patch("agent.indexing.requests.get") as get:
+            agent.indexing.requests.get("http://example.invalid")
+        get.assert_called_once()
+        import requests
+
+        assert not isinstance(requests.get, type(get))
+
+
+class TestImportBudget:
+    def test_backend_import_skips_heavy_modules(self):
+        code = (
+            "import sys, time\n"
+            "start = time.perf_counter()\n"
+            "import agent.backend\n"
+            "print(time.perf_counter() - start)\n"
+            f"print([m for m in {HEAVY_MODULES!r} if m in sys.modules])\n"
+        )
+        proc = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            cwd=str(PROJECT_ROOT),
+            env=dict(os.environ, PYTHONPATH=str(PROJECT_ROOT)),
+            timeout=120,
+        )
+        assert proc.returncode == 0, proc.stderr[-2000:]
+        seconds, loaded = proc.stdout.strip().splitlines()[-2:]
+
+        assert loaded == "[]"
+        assert float(seconds) < IMPORT_BUDGET_SECONDS
+
+    def test_dependency_check_does_not_import(self):
+        from agent import deps
+
+        with patch.object(deps, "_run") as run, patch(
+            "importlib.util.find_spec"
+        ) as find_spec:
+            assert deps.ensure_minimal_dependencies()
+        run.assert_not_called()
+        # Packages are checked by their import names, not their pip names
+        checked = {c.args[0] for c in find_spec.call_args_list}
+        assert {"dotenv", "multipart", "bs4"} <= checked
+
+
+def test_parse_importtime():
+    output = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |     json.decoder\n"
+        "import time:      1500 |       1620 |   json\n"
+        "noise\n"
+    )
+    rows = parse_importtime(output)
+
+    assert rows == [
+        {"module": "json.decoder", "self": 0.00012, "cumulative": 0.00012, "depth": 2},
+        {"module": "json", "self": 0.0015, "cumulative": 0.00162, "depth": 1},
+    ]
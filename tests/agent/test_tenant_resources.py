@@ -0,0 +1,301 @@
+"""
+Tests for per-tenant resource partitioning.
+
+Tests cover:
+- Lazy opening and LRU closing of tenant resources
+- Leased tenants surviving eviction until released
+- Concurrent first use opening a tenant only once
+- Backend search/reindex/ask and background jobs using only the current
+  tenant's resources
+"""
+
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from agent.enterprise_tenant import current_tenant_id
+from agent.tenant_resources import TenantResourcePool, TenantResources
+
+
+class FakeEmbeddings:
+    def __init__(self, tenant_id):
+        self.tenant_id = tenant_id
+        self.closed = False
+
+    def search(self, query, top_k=5):
+        return [{"text": f"{self.tenant_id}:{query}"}]
+
+    def close(self):
+        self.closed = True
+
+
+class FakeIndexer:
+    def __init__(self, tenant_id):
+        self.tenant_id = tenant_id
+        self.reindexed = []
+
+    def reindex(self, vault_path):
+        self.reindexed.append(vault_path)
+        return {"tenant": self.tenant_id}
+
+    def list_vault_documents(self, vault_path):
+        return [f"{vault_path}/note.md"]
+
+    def clear_index(self):
+        self.reindexed.append("cleared")
+
+    def index_document(self, path):
+        self.reindexed.append(path)
+        return 1
+
+
+class FakeAnswers:
+    def __init__(self):
+        self.data = {}
+
+    def get_cached_answer(self, key):
+        return self.data.get(key)
+
+    def store_answer(self, key, answer):
+        self.data[key] = answer
+
+
+def make_pool(max_open=2, delay=0.0):
+    opened = []
+
+    def factory(tenant_id, path):
+        time.sleep(delay)
+        opened.append((tenant_id, path))
+        return TenantResources(
+            tenant_id,
+            FakeEmbeddings(tenant_id),
+            FakeIndexer(tenant_id),
+            FakeAnswers(),
+        )
+
+    pool = TenantResourcePool(lambda t: f"/cache/tenant_{t}", factory, max_open)
+    return pool, opened
+
+
+class TestTenantResourcePool:
+    def test_lazy_open_and_reuse(self):
+        pool, opened = make_pool()
+        assert opened == []
+
+        with pool.lease("a") as first:
+            pass
+        with pool.lease("a") as second:
+            pass
+
+        assert first is second
+        assert opened == [("a", "/cache/tenant_a")]
+        assert pool.get_stats()["hits"] == 1
+
+    def test_lru_closes_oldest(self):
+        pool, _ = make_pool(max_open=2)
+        handles = {}
+        for tenant in ["a", "b", "a", "c"]:
+            with pool.lease(tenant) as res:
+                handles[tenant] = res
+
+        assert handles["b"].embeddings.closed
+        assert not handles["a"].embeddings.closed
+        assert pool.get_stats()["tenants"] == ["a", "c"]
+        assert pool.get_stats()["evictions"] == 1
+
+    def test_leased_tenant_not_closed(self):
+        pool, _ = make_pool(max_open=1)
+        with pool.lease("a") as held:
+            with pool.lease("b"):
+                pass
+            assert not held.embeddings.closed
+            assert pool.get_stats()["open"] == 1  # "b" was the idle one
+
+        with pool.lease("c"):
+            pass
+        assert held.embeddings.closed
+
+    def test_concurrent_first_use_opens_once(self):
+        pool, opened = make_pool(delay=0.05)
+        results = []
+
+        def use():
+            with pool.lease("a") as res:
+                results.append(res)
+
+        threads = [threading.Thread(target=use) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(opened) == 1
+        assert len({id(r) for r in results}) == 1
+
+    def test_failed_open_can_retry(self):
+        calls = []
+
+        def factory(tenant_id, path):
+            calls.append(tenant_id)
+            if len(calls) == 1:
+                raise RuntimeError("db locked")
+            return TenantResources(tenant_id, None, None, None)
+
+        pool = TenantResourcePool(lambda t: t, factory)
+        with pytest.raises(RuntimeError):
+            with pool.lease("a"):
+                pass
+        with pool.lease("a") as res:
+            assert res.tenant_id == "a"
+
+
+class TestBackendTenantScope:
+    @pytest.fixture
+    def pool(self):
+        pool, _ = make_pool()
+        with patch("agent.backend._get_tenant_pool", return_value=pool):
+            yield pool
+
+    async def test_search_uses_tenant_collection(self, pool):
+        from agent import backend
+
+        global_emb = MagicMock()
+        with patch.object(backend, "emb_manager", global_emb):
+            token = current_tenant_id.set("acme")
+            try:
+                result = await backend.search("notes", top_k=3)
+            finally:
+                current_tenant_id.reset(token)
+
+            assert result == {"results": [{"text": "acme:notes"}]}
+            global_emb.search.assert_not_called()
+
+            # Without a tenant the global collection is still used
+            global_emb.search.return_value = []
+            assert await backend.search("notes") == {"results": []}
+
+    async def test_reindex_only_touches_tenant(self, pool):
+        from agent import backend
+
+        global_indexer = MagicMock()
+        with patch.object(backend, "vault_indexer", global_indexer):
+            token = current_tenant_id.set("acme")
+            try:
+                result = await backend.api_reindex(
+                    backend.ReindexRequest(vault_path="vault")
+                )
+            finally:
+                current_tenant_id.reset(token)
+
+        assert result == {"tenant": "acme"}
+        global_indexer.reindex.assert_not_called()
+
+    async def test_pdf_upload_stored_and_indexed_per_tenant(self, tmp_path):
+        import hashlib
+
+        from starlette.requests import Request
+
+        from agent import backend
+
+        indexer = MagicMock()
+        indexer.index_pdf.return_value = 2
+        pool = TenantResourcePool(
+            lambda t: str(tmp_path / t),
+            lambda t, path: TenantResources(t, None, indexer, None, base_path=path),
+        )
+        data = b"%PDF-1.7\ntenant"
+
+        async def receive():
+            return {"type": "http.request", "body": data, "more_body": False}
+
+        scope = {"type": "http", "method": "POST", "headers": [], "query_string": b""}
+        request = Request(scope, receive)
+        global_indexer = MagicMock()
+        settings = MagicMock(abs_cache_dir=tmp_path / "global", pdf_max_size_mb=1)
+        with patch("agent.backend._get_tenant_pool", return_value=pool), patch.object(
+            backend, "vault_indexer", global_indexer
+        ), patch.object(backend, "get_settings", return_value=settings):
+            token = current_tenant_id.set("acme")
+            try:
+                result = await backend.api_upload_pdf(request)
+            finally:
+                current_tenant_id.reset(token)
+
+        digest = hashlib.sha256(data).hexdigest()
+        stored = tmp_path / "acme" / "uploads" / f"{digest}.pdf"
+        assert result["chunks_indexed"] == 2
+        assert stored.read_bytes() == data
+        indexer.index_pdf.assert_called_once_with(str(stored))
+        global_indexer.index_pdf.assert_not_called()
+        assert not (tmp_path / "global" / "uploads").exists()
+
+    async def test_background_reindex_only_touches_tenant(self, pool, tmp_path):
+        import asyncio
+
+        from agent import backend
+        from agent.jobs import JobManager, JobStore
+        from agent.performance import AsyncTaskQueue
+
+        queue = AsyncTaskQueue(max_workers=1)
+        await queue.start()
+        manager = JobManager(
+            backend._job_indexer, JobStore(str(tmp_path / "jobs.db")), queue
+        )
+        global_indexer = MagicMock()
+        request = backend.ReindexRequest(vault_path=str(tmp_path))
+        try:
+            with patch.object(backend, "vault_indexer", global_indexer), patch.object(
+                backend, "_job_manager", manager
+            ):
+                token = current_tenant_id.set("acme")
+                try:
+                    submitted = await backend.api_reindex(request, background=True)
+                finally:
+                    current_tenant_id.reset(token)
+                job_id = submitted["job"]["job_id"]
+                for _ in range(500):
+                    if manager.get(job_id)["status"] == "completed":
+                        break
+                    await asyncio.sleep(0.01)
+                # Another tenant's (or the global) job listing does not show it
+                assert (await backend.list_jobs())["jobs"] == []
+        finally:
+            await queue.stop()
+
+        job = manager.get(job_id)
+        assert job["status"] == "completed"
+        assert job["tenant_id"] == "acme"
+        with pool.lease("acme") as tenant:
+            assert tenant.indexer.reindexed == ["cleared", f"{tmp_path}/note.md"]
+        global_indexer.clear_index.assert_not_called()
+        global_indexer.index_document.assert_not_called()
+
+
+        from agent import backend
+
+        model = MagicMock()
+        model.generate.return_value = "tenant answer"
+        unified = MagicMock()
+        unified.get.return_value = None
+        request = backend.AskRequest(question="What is new?")
+        with patch.object(backend, "model_manager", model), patch.object(
+            backend, "cache_manager", MagicMock()
+        ), patch.object(
+            backend, "get_unified_cache_manager", return_value=unified
+        ), pool.lease(
+            "acme"
+        ) as tenant:
+            first = backend._ask_impl(request, tenant)
+            second = backend._ask_impl(request, tenant)
+
+        assert first["cached"] is False
+        assert second == {
+            "answer": "tenant answer",
+            "cached": True,
+            "cache_level": "tenant",
+            "model": request.model_name,
+        }
+        assert model.generate.call_count == 1
+        unified.set.assert_not_called()
@@ -0,0 +1,328 @@
+"""
+Tests for the verified JWT token cache.
+
+Tests cover:
+- Claims cached until the token's exp and keyed by digest and verifier
+- Bounded LRU eviction and context TTL
+- Revocation on logout and flush on API key rotation
+- get_current_user skipping jwt.decode on repeat calls
+- Enterprise middleware reusing resolved tenant/RBAC context
+"""
+
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock, patch
+
+import jwt
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from fastapi.testclient import TestClient
+
+from agent.api_key_management import APIKeyManager
+from agent.token_cache import VerifiedTokenCache
+
+# ============================================================================
+# Cache unit tests
+# ============================================================================
+
+
+class TestVerifiedTokenCache:
+    def test_claims_cached_by_digest(self):
+        cache = VerifiedTokenCache()
+        cache.put_claims("tok", {"sub": "alice", "exp": time.time() + 60})
+
+        assert cache.get_claims("tok")["sub"] == "alice"
+        assert cache.get_claims("other") is None
+        assert "tok" not in cache._entries  # Raw tokens are never stored
+        assert cache.get_stats()["hits"] == 1
+
+    def test_claims_scoped_by_verifier(self):
+        cache = VerifiedTokenCache()
+        cache.put_claims("tok", {"sub": "alice"})
+        cache.put_context("tok", {"perms": {"admin"}}, "enterprise")
+
+        assert cache.get_claims("tok", verifier="enterprise") is None
+        assert cache.get_context("tok", "enterprise", verifier="enterprise") is None
+        cache.put_claims("tok", {"sub": "bob"}, verifier="enterprise")
+        assert cache.get_claims("tok", verifier="enterprise")["sub"] == "bob"
+        assert cache.get_claims("tok")["sub"] == "alice"
+
+        cache.revoke_token("tok")  # Logout applies to every verifier
+        assert cache.get_claims("tok") is None
+        assert cache.get_claims("tok", verifier="enterprise") is None
+
+    def test_entry_expires_with_token(self):
+        cache = VerifiedTokenCache()
+        cache.put_claims("soon", {"sub": "a", "exp": time.time() + 0.05})
+        cache.put_claims("past", {"sub": "a", "exp": time.time() - 1})
+        assert cache.get_claims("past") is None
+        time.sleep(0.06)
+        assert cache.get_claims("soon") is None
+
+    def test_lru_bound(self):
+        cache = VerifiedTokenCache(max_entries=2)
+        for name in ["a", "b"]:
+            cache.put_claims(name, {"sub": name})
+        cache.get_claims("a")  # "b" becomes least recently used
+        cache.put_claims("c", {"sub": "c"})
+
+        assert cache.get_claims("b") is None
+        assert cache.get_claims("a") is not None
+        assert cache.get_stats()["evictions"] == 1
+
+    def test_context_ttl_shorter_than_claims(self):
+        cache = VerifiedTokenCache(context_ttl=0.05)
+        cache.put_claims("tok", {"sub": "a"})
+        cache.put_context("tok", {"perms": {"read"}}, "enterprise")
+        assert cache.get_context("tok", "enterprise") == {"perms": {"read"}}
+        time.sleep(0.06)
+        assert cache.get_context("tok", "enterprise") is None
+        assert cache.get_claims("tok") is not None
+
+    def test_revoke_token_blocks_recaching(self):
+        cache = VerifiedTokenCache()
+        claims = {"sub": "a", "exp": time.time() + 60}
+        cache.put_claims("tok", claims)
+        cache.revoke_token("tok")
+
+        assert cache.is_revoked("tok")
+        assert cache.get_claims("tok") is None
+        cache.put_claims("tok", claims)
+        assert cache.get_claims("tok") is None
+
+    def test_revocations_are_capped(self):
+        cache = VerifiedTokenCache(max_revoked=3)
+        now = time.time()
+        for i in range(5):
+            cache.revoke_token(f"tok{i}", {"exp": now + 60 + i})
+
+        assert cache.get_stats()["revoked"] == 3
+        assert cache.get_stats()["revocation_evictions"] == 2
+        assert not cache.is_revoked("tok0")  # Lapsed soonest, forgotten first
+        assert cache.is_revoked("tok4")
+
+    def test_invalidate_subject(self):
+        cache = VerifiedTokenCache()
+        cache.put_claims("t1", {"sub": "alice"})
+        cache.put_claims("t2", {"sub": "alice"})
+        cache.put_claims("t3", {"sub": "bob"})
+        assert cache.invalidate_subject("alice") == 2
+        assert cache.get_claims("t3") is not None
+
+    def test_invalidate_tenant(self):
+        cache = VerifiedTokenCache()
+        cache.put_claims("t1", {"user_id": "u1", "tenant_id": "a"}, "enterprise")
+        cache.put_claims("t2", {"user_id": "u2", "tenant_id": "b"}, "enterprise")
+        assert cache.invalidate_tenant("a") == 1
+        assert cache.get_claims("t2", verifier="enterprise") is not None
+
+    def test_api_key_rotation_flushes(self):
+        cache = VerifiedTokenCache()
+        APIKeyManager.add_revocation_listener(cache.invalidate_all)
+        cache.put_claims("tok", {"sub": "a"})
+
+        APIKeyManager.rotate_key(APIKeyManager.generate_key())
+
+        assert cache.get_claims("tok") is None
+        assert cache.get_stats()["flushes"] == 1
+
+
+# ============================================================================
+# Backend integration
+# ============================================================================
+
+
+@pytest.fixture
+def fresh_cache():
+    cache = VerifiedTokenCache()
+    with patch("agent.backend.get_token_cache", return_value=cache):
+        yield cache
+
+
+class TestGetCurrentUser:
+    def _token(self, **kwargs):
+        from agent.backend import create_access_token
+
+        return create_access_token("alice", roles=["user"], **kwargs)
+
+    def test_repeat_calls_skip_signature_verification(self, fresh_cache):
+        from agent import backend
+
+        token = self._token()
+        creds = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+        with patch("agent.backend.is_test_mode", return_value=False), patch(
+            "agent.backend.jwt.decode", wraps=jwt.decode
+        ) as decode:
+            first = backend.get_current_user(creds)
+            first["roles"].append("mutated")
+            second = backend.get_current_user(creds)
+
+        assert decode.call_count == 1
+        assert second["username"] == "alice"
+        assert fresh_cache.get_stats()["context_hits"] == 1
+
+    def test_logout_revokes_token(self, fresh_cache):
+        from agent import backend
+
+        token = self._token()
+        creds = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+        client = TestClient(backend.app)
+        with patch("agent.backend.is_test_mode", return_value=False):
+            assert backend.get_current_user(creds)["username"] == "alice"
+            response = client.post(
+                "/api/auth/logout", headers={"Authorization": f"Bearer {token}"}
+            )
+            assert response.status_code == 200
+            with pytest.raises(HTTPException) as exc:
+                backend.get_current_user(creds)
+
+        assert exc.value.status_code == 401
+        assert "revoked" in exc.value.detail
+
+    def test_logout_rejects_unverified_token(self, fresh_cache):
+        from agent import backend
+
+        client = TestClient(backend.app)
+        for token in ["garbage", self._token() + "x"]:
+            response = client.post(
+                "/api/auth/logout", headers={"Authorization": f"Bearer {token}"}
+            )
+            assert response.status_code == 401
+        assert fresh_cache.get_stats()["revoked"] == 0
+
+    def test_enterprise_logout_requires_verified_token(self, fresh_cache):
+        from agent import backend
+
+        sso = Mock()
+        sso.verify_jwt_token = AsyncMock(
+            side_effect=lambda t: {"user_id": "u1"} if t == "good" else None
+        )
+        client = TestClient(backend.app)
+        with patch.object(backend, "ENTERPRISE_AVAILABLE", True), patch.object(
+            backend,
+            "enterprise_integration",
+            SimpleNamespace(sso_manager=sso),
+            create=True,
+        ):
+            bad = client.post("/api/enterprise/auth/logout?token=forged")
+            assert fresh_cache.get_stats()["revoked"] == 0
+            good = client.post("/api/enterprise/auth/logout?token=good")
+
+        assert bad.status_code == 401
+        assert good.status_code == 200
+        assert fresh_cache.is_revoked("good")
+
+    def test_invalid_token_not_cached(self, fresh_cache):
+        from agent import backend
+
+        creds = HTTPAuthorizationCredentials(scheme="Bearer", credentials="bad.token")
+        with patch("agent.backend.is_test_mode", return_value=False):
+            with pytest.raises(HTTPException):
+                backend.get_current_user(creds)
+        assert fresh_cache.get_stats()["size"] == 0
+
+
+# ============================================================================
+# Enterprise middleware
+# ============================================================================
+
+
+class TestEnterpriseAuthMiddlewareCache:
+    def _app(self, cache):
+        from agent.enterprise_integration import EnterpriseAuthMiddleware
+
+        sso = Mock()
+        sso.verify_jwt_token = AsyncMock(
+            return_value={
+                "user_id": "u1",
+                "tenant_id": "t1",
+                "email": "u1@example.com",
+                "roles": ["user"],
+                "exp": time.time() + 60,
+            }
+        )
+        tenants = Mock()
+        tenants.get_tenant.return_value = SimpleNamespace(status="active")
+        rbac = Mock()
+        rbac.get_user_permissions.return_value = {"user"}
+
+        app = FastAPI()
+
+        @app.get("/notes")
+        async def notes():
+            return {"ok": True}
+
+        app.add_middleware(
+            EnterpriseAuthMiddleware,
+            sso_manager=sso,
+            rbac_manager=rbac,
+            tenant_manager=tenants,
+            token_cache=cache,
+        )
+        return TestClient(app), sso, tenants, rbac
+
+    def test_second_request_skips_verification_and_lookups(self):
+        cache = VerifiedTokenCache()
+        client, sso, tenants, rbac = self._app(cache)
+        headers = {"Authorization": "Bearer enterprise-token"}
+
+        for _ in range(3):
+            assert client.get("/notes", headers=headers).status_code == 200
+
+        assert sso.verify_jwt_token.await_count == 1
+        assert tenants.get_tenant.call_count == 1
+        assert rbac.get_user_permissions.call_count == 1
+
+    def test_backend_verified_claims_not_trusted(self):
+        cache = VerifiedTokenCache()
+        client, sso, _, _ = self._app(cache)
+        # Verified by the backend against JWT_SECRET_KEY, not by the SSO issuer
+        cache.put_claims("enterprise-token", {"user_id": "u2", "tenant_id": "t2"})
+        sso.verify_jwt_token.return_value = None
+
+        response = client.get(
+            "/notes", headers={"Authorization": "Bearer enterprise-token"}
+        )
+        assert response.status_code == 401
+        assert sso.verify_jwt_token.await_count == 1
+
+    def test_revoked_token_rejected(self):
+        cache = VerifiedTokenCache()
+        client, _, _, _ = self._app(cache)
+        headers = {"Authorization": "Bearer enterprise-token"}
+        assert client.get("/notes", headers=headers).status_code == 200
+
+        cache.revoke_token("enterprise-token")
+        assert client.get("/notes", headers=headers).status_code == 401
+
+    def test_role_and_tenant_changes_drop_cached_context(self):
+        from agent.enterprise_integration import EnterpriseIntegration
+        from agent.enterprise_rbac import UserRole
+        from agent.enterprise_tenant import TenantTier
+
+        cache = VerifiedTokenCache()
+        with patch("agent.enterprise_integration.get_token_cache", return_value=cache):
+            integration = EnterpriseIntegration()
+        tenant = integration.tenant_manager.create_tenant(
+            "Acme", "admin@acme.test", TenantTier.BASIC
+        )
+        claims = {"user_id": "u1", "tenant_id": tenant.tenant_id}
+
+        def cache_context():
+            cache.put_claims("tok", claims, verifier="enterprise")
+            cache.put_context("tok", {"permissions": set()}, "enterprise", "enterprise")
+
+        cache_context()
+        integration.rbac_manager.assign_role(
+            "u1", tenant.tenant_id, UserRole.USER, "admin"
+        )
+        assert cache.get_context("tok", "enterprise", "enterprise") is None
+
+        cache_context()
+        integration.rbac_manager.remove_role("u1", tenant.tenant_id, UserRole.USER)
+        assert cache.get_context("tok", "enterprise", "enterprise") is None
+
+        cache_context()
+        integration.tenant_manager.suspend_tenant(tenant.tenant_id, "billing")
+        assert cache.get_claims("tok", verifier="enterprise") is None
@@ -0,0 +1,224 @@
+"""
+Tests for the in-process NumPy vector store.
+
+Tests cover:
+- Exact cosine top-k matching a brute-force reference
+- Persistence to memory-mapped segments and reload
+- Upsert/delete semantics (deleted rows survive reload as deleted)
+- Segment compaction and cleanup of interrupted writes
+- IVF partitioning recall
+- int8/float16 first-pass search with float32 re-ranking
+- EmbeddingsManager selecting the store with vector_db="numpy"
+"""
+
+from unittest.mock import Mock, patch
+
+import numpy as np
+import pytest
+
+from agent.vector_store import NumpyVectorStore, approximate_scores, quantize
+
+
+def random_vectors(n, dim=16, seed=0):
+    return np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+
+
+def brute_force(vectors, query, k):
+    normed = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = normed @ (query / np.linalg.norm(query))
+    return list(np.argsort(-scores)[:k])
+
+
+@pytest.fixture
+def store(tmp_path):
+    return NumpyVectorStore(str(tmp_path / "store"))
+
+
+class TestNumpyVectorStore:
+    def test_exact_top_k(self, store):
+        vectors = random_vectors(200)
+        ids = [f"v{i}" for i in range(200)]
+        store.add(ids=ids[:120], embeddings=vectors[:120])
+        store.persist()
+        store.add(ids=ids[120:], embeddings=vectors[120:])  # still pending
+
+        query = random_vectors(1, seed=1)[0]
+        result = store.query(query_embeddings=[query.tolist()], n_results=5)
+
+        expected = [f"v{i}" for i in brute_force(vectors, query, 5)]
+        assert result["ids"][0] == expected
+        assert result["distances"][0] == sorted(result["distances"][0])
+
+    def test_persist_and_reload(self, store, tmp_path):
+        store.add(
+            ids=["a", "b"],
+            embeddings=[[1.0, 0.0], [0.0, 1.0]],
+            documents=["alpha", "beta"],
+            metadatas=[{"note_path": "a.md"}, {"note_path": "b.md"}],
+        )
+        store.persist()
+
+        reopened = NumpyVectorStore(str(tmp_path / "store"))
+        assert isinstance(reopened._segments[0].vectors, np.memmap)
+        result = reopened.query([[0.9, 0.1]], n_results=1)
+        assert result["ids"] == [["a"]]
+        assert result["documents"] == [["alpha"]]
+        assert result["metadatas"] == [[{"note_path": "a.md"}]]
+        assert reopened.get(ids=["b"], include=["embeddings"])["embeddings"] == [
+            [0.0, 1.0]
+        ]
+
+    def test_upsert_and_delete(self, store, tmp_path):
+        store.add(ids=["a", "b"], embeddings=[[1.0, 0.0], [0.0, 1.0]])
+        store.persist()
+        store.add(ids=["a"], embeddings=[[0.0, 1.0]])  # existing id: ignored
+        store.upsert(ids=["b"], embeddings=[[1.0, 0.1]], documents=["new b"])
+        store.delete(["a"])
+        store.persist()
+
+        reopened = NumpyVectorStore(str(tmp_path / "store"))
+        assert reopened.count() == 1
+        assert reopened.query([[1.0, 0.0]], n_results=5)["ids"] == [["b"]]
+        assert reopened.get(ids=["a", "b"])["documents"] == ["new b"]
+
+    def test_compaction_and_orphan_cleanup(self, tmp_path):
+        path = tmp_path / "store"
+        store = NumpyVectorStore(str(path), max_segments=2)
+        vectors = random_vectors(30)
+        for i in range(3):
+            rows = slice(i * 10, (i + 1) * 10)
+            store.add(ids=[f"v{j}" for j in range(30)][rows], embeddings=vectors[rows])
+            store.persist()
+        store.delete(["v0"])
+        store.persist()
+
+        assert len(store._segments) <= 2
+        (path / ".segment-999999.npy.tmp").write_bytes(b"partial")
+
+        reopened = NumpyVectorStore(str(path))
+        assert reopened.count() == 29
+        assert not (path / ".segment-999999.npy.tmp").exists()
+        query = vectors[5]
+        assert reopened.query([query], n_results=1)["ids"] == [["v5"]]
+
+    def test_auto_flush(self, tmp_path):
+        store = NumpyVectorStore(str(tmp_path / "store"), flush_rows=4)
+        store.add(ids=list("abcde"), embeddings=random_vectors(5))
+        assert len(store._segments) == 1
+        assert store._pending_ids == []
+
+    def test_ivf_recall(self, tmp_path):
+        rng = np.random.default_rng(3)
+        centers = rng.normal(size=(8, 16))
+        vectors = np.vstack(
+            [c + 0.1 * rng.normal(size=(250, 16)) for c in centers]
+        ).astype(np.float32)
+        store = NumpyVectorStore(
+            str(tmp_path / "store"), ivf_lists=8, nprobe=2, ivf_min_size=1000
+        )
+        store.add(ids=[str(i) for i in range(len(vectors))], embeddings=vectors)
+        store.persist()
+        assert store._centroids is not None
+
+        hits = 0
+        queries = vectors[rng.choice(len(vectors), 20, replace=False)]
+        for query in queries:
+            expected = {str(i) for i in brute_force(vectors, query, 10)}
+            got = set(store.query([query], n_results=10)["ids"][0])
+            hits += len(expected & got)
+        assert hits / 200 >= 0.9
+
+        # Partitions are reloaded with the store
+        reopened = NumpyVectorStore(str(tmp_path / "store"), nprobe=2)
+        assert reopened._centroids is not None
+
+    def test_rejects_dimension_mismatch(self, store):
+        store.add(ids=["a"], embeddings=[[1.0, 0.0]])
+        with pytest.raises(ValueError):
+            store.add(ids=["b"], embeddings=[[1.0, 0.0, 0.0]])
+
+
+class TestQuantization:
+    def test_int8_scores_close_to_exact(self):
+        vectors = random_vectors(50)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        query = vectors[0]
+        codes, scales = quantize(vectors, "int8")
+
+        assert codes.dtype == np.int8
+        approx = approximate_scores(codes, scales, query, block=7)
+        np.testing.assert_allclose(approx, vectors @ query, atol=0.02)
+        rows = np.array([3, 9, 11])
+        np.testing.assert_allclose(
+            approximate_scores(codes, scales, query, rows), approx[rows]
+        )
+
+    @pytest.mark.parametrize("kind", ["int8", "float16"])
+    def test_reranked_results_match_exact(self, tmp_path, kind):
+        vectors = random_vectors(500, dim=32)
+        ids = [str(i) for i in range(500)]
+        exact = NumpyVectorStore(str(tmp_path / "exact"))
+        quantized = NumpyVectorStore(str(tmp_path / kind), quantization=kind)
+        for store in (exact, quantized):
+            store.add(ids=ids, embeddings=vectors)
+            store.persist()
+        store.delete(["0"])
+        exact.delete(["0"])
+
+        assert quantized._segments[0].codes is not None
+        for query in random_vectors(10, dim=32, seed=5):
+            want = exact.query([query], n_results=5)
+            got = quantized.query([query], n_results=5)
+            assert got["ids"] == want["ids"]
+            # Distances come from the full-precision re-rank
+            np.testing.assert_allclose(
+                got["distances"][0], want["distances"][0], atol=1e-5
+            )
+
+    def test_codes_built_for_existing_store(self, tmp_path):
+        path = str(tmp_path / "store")
+        store = NumpyVectorStore(path)
+        store.add(ids=["a", "b"], embeddings=[[1.0, 0.0], [0.0, 1.0]])
+        store.persist()
+
+        reopened = NumpyVectorStore(path, quantization="int8")
+        assert reopened._segments[0].codes.dtype == np.int8
+        assert reopened.query([[0.0, 1.0]], n_results=1)["ids"] == [["b"]]
+
+        # Switching back drops the compact copies
+        NumpyVectorStore(path)
+        assert not list((tmp_path / "store").glob("*.int8.npy"))
+
+    def test_rejects_unknown_quantization(self, tmp_path):
+        with pytest.raises(ValueError):
+            NumpyVectorStore(str(tmp_path), quantization="int4")
+
+
+class TestEmbeddingsManagerNumpy:
+    def test_index_and_search(self, tmp_path):
+        from agent.embeddings import EmbeddingsManager
+
+        model = Mock()
+        model.encode.side_effect = lambda texts: np.array(
+            [[t.count("cat"), t.count("dog"), 1.0] for t in texts]
+            if isinstance(texts, list)
+            else [texts.count("cat"), texts.count("dog"), 1.0]
+        )
+        model.tokenizer = None
+        with patch("agent.embeddings.PersistentClient") as chroma:
+            mgr = EmbeddingsManager(
+                db_path=str(tmp_path), model=model, vector_db="numpy", chunk_size=50
+            )
+            chroma.assert_not_called()
+
+        note = tmp_path / "pets.md"
+        note.write_text("# Cats\n\ncat cat cat\n\n# Dogs\n\ndog dog dog\n")
+        assert mgr.index_file(str(note)) == 2
+
+        hits = mgr.search("dog", top_k=1)
+        assert hits[0]["source"] == str(note)
+        assert hits[0]["heading"] == "Dogs"
+        assert mgr.get_collection_info()["count"] == 2
+
+        mgr.reset_db()
+        assert mgr.get_collection_info()["count"] == 0
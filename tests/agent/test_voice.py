@@ -598,5 +598,221 @@ class TestVoiceModuleEdgeCases:
                     assert "alphacephei.com/vosk/models" in str(exc_info.value)
 
 
+class FakeRecognizer:
+    """Recognizer double: one finished segment per 8000 bytes of PCM"""
+
+    instances = 0
+
+    def __init__(self, model, sample_rate):
+        FakeRecognizer.instances += 1
+        self.sample_rate = sample_rate
+        self.buffered = 0
+        self.segments = 0
+        self.resets = 0
+
+    def AcceptWaveform(self, data):
+        self.buffered += len(data)
+        if self.buffered >= 8000:
+            self.buffered = 0
+            self.segments += 1
+            return True
+        return False
+
+    def Result(self):
+        return json.dumps({"text": f"seg{self.segments}"})
+
+    def PartialResult(self):
+        return json.dumps({"partial": f"partial{self.buffered}"})
+
+    def FinalResult(self):
+        return json.dumps({"text": "end"})
+
+    def Reset(self):
+        self.resets += 1
+        self.buffered = 0
+        self.segments = 0
+
+
+def _wav_bytes(seconds=1.0, sample_rate=16000, channels=1):
+    import io
+
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes(b"\x00\x01" * int(seconds * sample_rate) * channels)
+    buf.seek(0)
+    return buf
+
+
+class TestTranscriptionService:
+    """Pooled recognizers, worker threads and real-time factor metrics"""
+
+    pytestmark = pytest.mark.asyncio
+
+    @pytest.fixture(autouse=True)
+    def fake_vosk(self):
+        FakeRecognizer.instances = 0
+        with patch("agent.voice.vosk.KaldiRecognizer", FakeRecognizer):
+            yield
+
+    @pytest.fixture
+    def service(self):
+        from agent.voice import TranscriptionService
+
+        svc = TranscriptionService(vosk_model=object(), pool_size=2)
+        yield svc
+        svc.shutdown()
+
+    async def test_recognizers_are_reused(self, service):
+        for _ in range(5):
+            result = await service.transcribe(_wav_bytes())
+            assert result["transcription"] == "seg1 seg2 seg3 seg4 end"
+            assert result["audio_seconds"] == 1.0
+
+        assert FakeRecognizer.instances == 1
+        metrics = service.get_metrics()
+        assert metrics["requests"] == 5
+        assert metrics["audio_seconds"] == 5.0
+        assert metrics["real_time_factor"] is not None
+        assert metrics["pool"] == {"size": 2, "created": 1, "in_use": 0, "idle": 1}
+
+    async def test_invalid_format_reported(self, service):
+        result = await service.transcribe(_wav_bytes(channels=2))
+        assert "mono PCM WAV" in result["error"]
+        assert service.get_metrics()["errors"] == 1
+
+    async def test_streaming_partials_and_final(self, service):
+        async with service.open_stream(16000) as stream:
+            first = await stream.accept(b"\x00" * 4000)
+            second = await stream.accept(b"\x00" * 4000)
+            final = await stream.finish()
+
+        assert first == {"type": "partial", "text": "partial4000"}
+        assert second == {"type": "result", "text": "seg1"}
+        assert final["type"] == "final"
+        assert final["text"] == "seg1 end"
+        assert final["audio_seconds"] == 0.25
+        assert service.get_metrics()["active_streams"] == 0
+
+    async def test_pool_exhaustion_times_out(self):
+        from agent.voice import TranscriberBusyError, TranscriptionService
+
+        svc = TranscriptionService(
+            vosk_model=object(), pool_size=1, acquire_timeout=0.05
+        )
+        try:
+            async with svc.open_stream(16000):
+                with pytest.raises(TranscriberBusyError):
+                    await svc.transcribe(_wav_bytes())
+        finally:
+            svc.shutdown()
+
+    async def test_waiting_streams_leave_decode_threads_free(self):
+        import asyncio
+        import time
+
+        from agent.voice import TranscriptionService
+
+        svc = TranscriptionService(vosk_model=object(), pool_size=2, acquire_timeout=2)
+        go, release = asyncio.Event(), asyncio.Event()
+        accept_times = []
+
+        async def stream():
+            async with svc.open_stream(16000) as s:
+                await go.wait()
+                started = time.perf_counter()
+                await s.accept(b"\x00" * 4000)
+                accept_times.append(time.perf_counter() - started)
+                await release.wait()
+
+        try:
+            holders = [asyncio.create_task(stream()) for _ in range(2)]
+            await asyncio.sleep(0.05)
+            waiters = [asyncio.create_task(stream()) for _ in range(2)]
+            await asyncio.sleep(0.05)
+            # Both recognizers are checked out and two more streams are queued
+            go.set()
+            while len(accept_times) < 2:
+                await asyncio.sleep(0.01)
+            release.set()
+            await asyncio.gather(*holders, *waiters)
+        finally:
+            svc.shutdown()
+
+        assert len(accept_times) == 4
+        assert max(accept_times[:2]) < 0.5
+        assert svc.get_metrics()["streams"] == 4
+
+    def test_pool_evicts_idle_recognizer_for_other_rate(self):
+        from agent.voice import RecognizerPool
+
+        pool = RecognizerPool(object(), size=1)
+        rec = pool.acquire(16000)
+        pool.release(rec, 16000)
+        other = pool.acquire(8000, timeout=0.01)
+        assert other.sample_rate == 8000
+        assert pool.stats()["created"] == 1
+
+    def test_invalid_stream_rate(self, service):
+        with pytest.raises(ValueError):
+            service.open_stream(44100)
+
+
+class TestVoiceWebSocket:
+    """WebSocket streaming endpoint on the backend app"""
+
+    def test_streams_partials_and_final(self):
+        from agent import backend
+        from agent.voice import TranscriptionService
+
+        service = TranscriptionService(vosk_model=object(), pool_size=1)
+        client = TestClient(backend.app)
+        try:
+            with patch("agent.voice.vosk.KaldiRecognizer", FakeRecognizer), patch(
+                "agent.voice.get_transcription_service", return_value=service
+            ):
+                with client.websocket_connect(
+                    "/ws/voice_transcribe?sample_rate=16000"
+                ) as ws:
+                    ws.send_bytes(b"\x00" * 8000)
+                    assert ws.receive_json() == {"type": "result", "text": "seg1"}
+                    ws.send_text(json.dumps({"eof": True}))
+                    final = ws.receive_json()
+        finally:
+            service.shutdown()
+
+        assert final["text"] == "seg1 end"
+        assert service.get_metrics()["streams"] == 1
+
+
+class TestVoiceTranscribeEndpoint:
+    """Base64 transcription endpoint using the pooled service"""
+
+    def test_pooled_transcription_decodes_once(self):
+        import asyncio
+        import base64
+
+        from agent import backend
+        from agent.voice import TranscriptionService
+
+        service = TranscriptionService(vosk_model=object(), pool_size=1)
+        request = backend.TranscribeRequest(
+            audio_data=base64.b64encode(_wav_bytes().getvalue()).decode()
+        )
+        try:
+            with patch("agent.voice.vosk.KaldiRecognizer", FakeRecognizer), patch(
+                "agent.voice.get_transcription_service", return_value=service
+            ), patch("base64.b64decode", wraps=base64.b64decode) as decode:
+                result = asyncio.run(backend.api_voice_transcribe(request))
+        finally:
+            service.shutdown()
+
+        assert result["transcription"] == "seg1 seg2 seg3 seg4 end"
+        assert result["metadata"]["model"] == "vosk"
+        assert decode.call_count == 1
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
@@ -0,0 +1,214 @@
+"""
+Tests for the async pooled web fetcher.
+
+Tests cover:
+- Fetching, extracting and caching page text with validators
+- Serving fresh cache entries without network access
+- Conditional GET revalidation (304 reuses cached text, 200 replaces it)
+- Per-host concurrency limits and batch fetching
+- Serving the cached copy when revalidation fails
+- VaultIndexer batch ingestion
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from agent.web_fetcher import AsyncWebFetcher
+
+PAGE = (
+    "<html><head><title>{title}</title></head><body><article>"
+    "<h1>{title}</h1><p>{body}</p></article></body></html>"
+)
+
+
+class PageServer:
+    """Local HTTP server with ETag support that records requests"""
+
+    def __init__(self, delay=0.0):
+        self.pages = {}
+        self.requests = []
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with server._lock:
+                    server.active += 1
+                    server.max_active = max(server.max_active, server.active)
+                    server.requests.append(
+                        (self.path, self.headers.get("If-None-Match"))
+                    )
+                try:
+                    time.sleep(server.delay)
+                    page = server.pages.get(self.path)
+                    if page is None:
+                        self.send_response(404)
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+                    etag, html = page
+                    if self.headers.get("If-None-Match") == etag:
+                        self.send_response(304)
+                        self.send_header("ETag", etag)
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+                    data = html.encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Type", "text/html; charset=utf-8")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                finally:
+                    with server._lock:
+                        server.active -= 1
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def set_page(self, path, etag, title, body):
+        self.pages[path] = (etag, PAGE.format(title=title, body=body))
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}{path}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def server():
+    with PageServer() as s:
+        s.set_page("/a", '"v1"', "Alpha", "The first article body text.")
+        yield s
+
+
+class TestAsyncWebFetcher:
+    async def test_fetch_caches_text_and_validators(self, server, tmp_path):
+        fetcher = AsyncWebFetcher(str(tmp_path))
+        url = server.url("/a")
+        try:
+            text = await fetcher.fetch(url)
+        finally:
+            await fetcher.aclose()
+
+        assert "first article body" in text
+        key = fetcher.cache_key(url)
+        assert (tmp_path / f"{key}.txt").read_text(encoding="utf-8") == text
+        meta = json.loads((tmp_path / f"{key}.meta.json").read_text())
+        assert meta["etag"] == '"v1"'
+
+    async def test_fresh_entry_skips_network(self, server, tmp_path):
+        fetcher = AsyncWebFetcher(str(tmp_path), max_age=60)
+        url = server.url("/a")
+        try:
+            first = await fetcher.fetch(url)
+            second = await fetcher.fetch(url)
+        finally:
+            await fetcher.aclose()
+
+        assert first == second
+        assert len(server.requests) == 1
+        assert fetcher.get_stats()["fresh_hits"] == 1
+
+    async def test_stale_entry_revalidates(self, server, tmp_path):
+        fetcher = AsyncWebFetcher(str(tmp_path), max_age=0)
+        url = server.url("/a")
+        try:
+            first = await fetcher.fetch(url)
+            with patch("agent.web_fetcher.extract_readable_text") as extract:
+                assert await fetcher.fetch(url) == first
+                extract.assert_not_called()  # 304: nothing re-extracted
+
+            server.set_page("/a", '"v2"', "Alpha", "A rewritten article body.")
+            updated = await fetcher.fetch(url)
+        finally:
+            await fetcher.aclose()
+
+        assert [etag for _, etag in server.requests] == [None, '"v1"', '"v1"']
+        assert "rewritten" in updated
+        assert fetcher.get_stats()["not_modified"] == 1
+
+    async def test_force_ignores_cache(self, server, tmp_path):
+        fetcher = AsyncWebFetcher(str(tmp_path))
+        url = server.url("/a")
+        try:
+            await fetcher.fetch(url)
+            await fetcher.fetch(url, force=True)
+        finally:
+            await fetcher.aclose()
+
+        assert server.requests[1] == ("/a", None)
+
+    async def test_failed_revalidation_serves_cache(self, server, tmp_path):
+        fetcher = AsyncWebFetcher(str(tmp_path), max_age=0)
+        url = server.url("/a")
+        try:
+            cached = await fetcher.fetch(url)
+            del server.pages["/a"]
+            assert await fetcher.fetch(url) == cached
+            assert await fetcher.fetch(server.url("/missing")) is None
+        finally:
+            await fetcher.aclose()
+
+        assert fetcher.get_stats()["stale_served"] == 1
+
+    async def test_batch_respects_per_host_limit(self, tmp_path):
+        with PageServer(delay=0.05) as server:
+            urls = []
+            for i in range(8):
+                server.set_page(f"/p{i}", f'"{i}"', f"Page {i}", f"Body number {i}.")
+                urls.append(server.url(f"/p{i}"))
+
+            fetcher = AsyncWebFetcher(str(tmp_path), per_host_limit=2)
+            try:
+                results = await fetcher.fetch_many(urls + urls[:2])
+            finally:
+                await fetcher.aclose()
+
+        assert list(results) == urls
+        assert all(f"number {i}" in results[u] for i, u in enumerate(urls))
+        assert server.max_active <= 2
+        assert len(server.requests) == 8
+
+
+class TestVaultIndexerWeb:
+    async def test_index_web_pages(self, server, tmp_path):
+        from agent.indexing import VaultIndexer
+
+        emb = MagicMock()
+        index_threads = []
+        emb.index_file.side_effect = lambda path: index_threads.append(
+            threading.get_ident()
+        ) or 3
+        indexer = VaultIndexer(emb_mgr=emb, cache_dir=str(tmp_path))
+        try:
+            results = await indexer.index_web_pages(
+                [server.url("/a"), server.url("/missing")]
+            )
+        finally:
+            await indexer.close_web_fetcher()
+
+        assert results == {server.url("/a"): 3, server.url("/missing"): 0}
+        emb.index_file.assert_called_once()
+        # Embedding runs in a worker thread, not on the event loop
+        assert index_threads != [threading.get_ident()]
@@ -224,6 +224,115 @@ class TestAsyncTaskQueue:
         assert "workers_active" in stats
         await queue.stop()
 
+    async def test_priority_order(self):
+        """Higher priority runs first; FIFO within equal priority"""
+        queue = AsyncTaskQueue(max_workers=1)
+        order = []
+
+        async def record(name):
+            order.append(name)
+
+        for name, priority in [("low", 0), ("high", 5), ("mid", 1), ("high2", 5)]:
+            assert await queue.submit_task(record(name), priority=priority)
+        await queue.start()
+        await queue.stop()
+        assert order == ["high", "high2", "mid", "low"]
+
+    async def test_queue_full(self):
+        """Bounded queue rejects work instead of growing"""
+        queue = AsyncTaskQueue(max_workers=1, max_queue_size=1)
+
+        async def noop():
+            pass
+
+        first, second, third = noop(), noop(), noop()
+        assert await queue.submit_task(first)
+        assert not await queue.submit_task(second)
+        with pytest.raises(asyncio.QueueFull):
+            queue.submit_nowait(third)
+        second.close()
+        third.close()
+        assert queue.get_stats()["tasks_rejected"] == 2
+        await queue.start()
+        await queue.stop()
+
+    async def test_deadline_drop_and_deprioritize(self):
+        """Stale tasks are dropped or moved behind all other work"""
+        queue = AsyncTaskQueue(max_workers=1)
+        order = []
+
+        async def record(name):
+            order.append(name)
+
+        await queue.submit_task(record("stale"), priority=9, deadline=0.0)
+        await queue.submit_task(
+            record("demoted"), priority=9, deadline=0.0, on_deadline="deprioritize"
+        )
+        await queue.submit_task(record("normal"), priority=0)
+        await asyncio.sleep(0.01)
+        await queue.start()
+        await queue.stop()
+
+        assert order == ["normal", "demoted"]
+        stats = queue.get_stats()
+        assert stats["tasks_expired"] == 1
+        assert stats["tasks_deprioritized"] == 1
+
+    async def test_category_concurrency_limit(self):
+        """At most ``limit`` tasks of a category run at once"""
+        queue = AsyncTaskQueue(max_workers=4, category_limits={"indexing": 1})
+        running = 0
+        peak = 0
+        others = []
+
+        async def index_task():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        async def other():
+            others.append(1)
+
+        await queue.start()
+        for _ in range(4):
+            await queue.submit_task(index_task(), category="indexing")
+        for _ in range(3):
+            await queue.submit_task(other())
+        await queue.stop()
+
+        assert peak == 1
+        assert len(others) == 3
+        indexing = queue.get_stats()["categories"]["indexing"]
+        assert indexing["completed"] == 4
+        assert indexing["limit"] == 1
+        assert indexing["wait"]["p95_ms"] >= indexing["wait"]["p50_ms"]
+
+    async def test_stop_drains_or_drops(self):
+        """stop() runs queued work by default; drain=False drops it"""
+        queue = AsyncTaskQueue(max_workers=1)
+        done = []
+
+        async def work(i):
+            await asyncio.sleep(0)
+            done.append(i)
+
+        await queue.start()
+        for i in range(5):
+            await queue.submit_task(work(i))
+        await queue.stop()
+        assert done == list(range(5))
+        late = work(99)
+        assert not await queue.submit_task(late)  # No new work after stop
+        late.close()
+
+        queue = AsyncTaskQueue(max_workers=1)
+        for i in range(3):
+            await queue.submit_task(work(i))
+        await queue.stop(drain=False)
+        assert queue.get_stats()["tasks_dropped"] == 3
+
 
 class TestCachedDecorator:
     """Test the @cached decorator"""